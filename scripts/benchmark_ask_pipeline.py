@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Benchmark the staged vs. pipelined ``ask`` on a local DuckDB TPC-H database.
+
+Runs the TPC-H questions from training_data/tpch/questions.json end to end with a simulated
+LLM whose latency is configurable, and times:
+
+- staged:    generate the SQL, then run it, then generate the chart code, then render the figure
+- pipelined: ``ask(pipelined=True)`` runs the SQL as soon as the streamed response contains a complete
+             statement, and generates the chart code from the result's columns while the rows are fetched
+
+The database is generated with DuckDB's tpch extension (``CALL dbgen``). When the extension can't be
+installed (e.g. offline), synthetic tables with the TPC-H schema and row counts are generated instead;
+the timings are comparable but the rows are not spec data.
+
+Usage:
+    python scripts/benchmark_ask_pipeline.py --sf 0.1 --token-delay 0.01 --chart-latency 0.5
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+import duckdb  # noqa: E402
+
+from kiwi.core.base import KiwiBase  # noqa: E402
+
+SCHEMA = "tpch_sf1"  # the schema the training questions query
+
+REGIONS = ["AFRICA", "AMERICA", "ASIA", "EUROPE", "MIDDLE EAST"]
+NATIONS = [
+    ("ALGERIA", 0), ("ARGENTINA", 1), ("BRAZIL", 1), ("CANADA", 1), ("EGYPT", 4), ("ETHIOPIA", 0),
+    ("FRANCE", 3), ("GERMANY", 3), ("INDIA", 2), ("INDONESIA", 2), ("IRAN", 4), ("IRAQ", 4), ("JAPAN", 2),
+    ("JORDAN", 4), ("KENYA", 0), ("MOROCCO", 0), ("MOZAMBIQUE", 0), ("PERU", 1), ("CHINA", 2), ("ROMANIA", 3),
+    ("SAUDI ARABIA", 4), ("VIETNAM", 2), ("RUSSIA", 3), ("UNITED KINGDOM", 3), ("UNITED STATES", 1),
+]
+
+# TPC-H shaped tables for when the tpch extension isn't available, with dbgen's row counts.
+# rnd(key, n) is a deterministic pseudo-random integer in [0, n).
+SYNTHETIC_TPCH = """
+CREATE TEMP MACRO rnd(key, n) AS (hash(key) >> 1)::BIGINT % n;
+CREATE TABLE {s}.region AS
+    SELECT range AS r_regionkey, ([{regions}])[range + 1] AS r_name, 'comment' AS r_comment FROM range(5);
+CREATE TABLE {s}.nation AS
+    SELECT range AS n_nationkey, ([{nations}])[range + 1] AS n_name, ([{nation_regions}])[range + 1] AS n_regionkey,
+           'comment' AS n_comment
+    FROM range(25);
+CREATE TABLE {s}.supplier AS
+    SELECT range + 1 AS s_suppkey, 'Supplier#' || lpad((range + 1)::VARCHAR, 9, '0') AS s_name,
+           md5(range::VARCHAR) AS s_address, rnd([range, 1], 25) AS s_nationkey,
+           '10-' || lpad((range % 1000)::VARCHAR, 3, '0') || '-0000' AS s_phone,
+           round(rnd([range, 2], 1100000) / 100.0 - 1000, 2) AS s_acctbal, 'comment' AS s_comment
+    FROM range({suppliers});
+CREATE TABLE {s}.customer AS
+    SELECT range + 1 AS c_custkey, 'Customer#' || lpad((range + 1)::VARCHAR, 9, '0') AS c_name,
+           md5(range::VARCHAR) AS c_address, rnd([range, 3], 25) AS c_nationkey,
+           '10-' || lpad((range % 1000)::VARCHAR, 3, '0') || '-0000' AS c_phone,
+           round(rnd([range, 4], 1100000) / 100.0 - 1000, 2) AS c_acctbal,
+           (['AUTOMOBILE', 'BUILDING', 'FURNITURE', 'HOUSEHOLD', 'MACHINERY'])[rnd([range, 5], 5) + 1] AS c_mktsegment,
+           'comment' AS c_comment
+    FROM range({customers});
+CREATE TABLE {s}.part AS
+    SELECT range + 1 AS p_partkey, 'part ' || range AS p_name,
+           'Manufacturer#' || (rnd([range, 6], 5) + 1) AS p_mfgr, 'Brand#' || (rnd([range, 7], 5) + 1) || (rnd([range, 8], 5) + 1) AS p_brand,
+           (['STANDARD', 'SMALL', 'MEDIUM', 'LARGE', 'ECONOMY', 'PROMO'])[rnd([range, 9], 6) + 1] || ' BRUSHED STEEL' AS p_type,
+           rnd([range, 10], 50) + 1 AS p_size,
+           (['SM', 'MED', 'LG', 'JUMBO', 'WRAP'])[rnd([range, 11], 5) + 1] || ' BOX' AS p_container,
+           round(900 + (range % 1000) / 10.0, 2) AS p_retailprice, 'comment' AS p_comment
+    FROM range({parts});
+CREATE TABLE {s}.partsupp AS
+    SELECT range // 4 + 1 AS ps_partkey, rnd([range, 12], {suppliers}) + 1 AS ps_suppkey,
+           rnd([range, 13], 9999) + 1 AS ps_availqty, round(rnd([range, 14], 100000) / 100.0, 2) AS ps_supplycost,
+           'comment' AS ps_comment
+    FROM range({parts} * 4);
+CREATE TABLE {s}.orders AS
+    SELECT range + 1 AS o_orderkey, rnd([range, 15], {customers}) + 1 AS o_custkey,
+           (['F', 'O', 'P'])[rnd([range, 16], 3) + 1] AS o_orderstatus,
+           round(rnd([range, 17], 50000000) / 100.0, 2) AS o_totalprice,
+           DATE '1992-01-01' + rnd([range, 18], 2406)::INTEGER AS o_orderdate,
+           (['1-URGENT', '2-HIGH', '3-MEDIUM', '4-NOT SPECIFIED', '5-LOW'])[rnd([range, 19], 5) + 1] AS o_orderpriority,
+           'Clerk#' || lpad(rnd([range, 20], 1000)::VARCHAR, 9, '0') AS o_clerk, 0 AS o_shippriority,
+           'comment' AS o_comment
+    FROM range({orders});
+CREATE TABLE {s}.lineitem AS
+    SELECT o_orderkey AS l_orderkey, rnd([o_orderkey, line, 21], {parts}) + 1 AS l_partkey,
+           rnd([o_orderkey, line, 22], {suppliers}) + 1 AS l_suppkey, line AS l_linenumber,
+           rnd([o_orderkey, line, 23], 50) + 1 AS l_quantity,
+           round(rnd([o_orderkey, line, 24], 10000000) / 100.0, 2) AS l_extendedprice,
+           rnd([o_orderkey, line, 25], 11) / 100.0 AS l_discount, rnd([o_orderkey, line, 26], 9) / 100.0 AS l_tax,
+           (['A', 'N', 'R'])[rnd([o_orderkey, line, 27], 3) + 1] AS l_returnflag,
+           (['F', 'O'])[rnd([o_orderkey, line, 28], 2) + 1] AS l_linestatus,
+           o_orderdate + rnd([o_orderkey, line, 29], 121)::INTEGER AS l_shipdate,
+           o_orderdate + rnd([o_orderkey, line, 30], 91)::INTEGER + 30 AS l_commitdate,
+           o_orderdate + rnd([o_orderkey, line, 31], 151)::INTEGER + 1 AS l_receiptdate,
+           (['DELIVER IN PERSON', 'COLLECT COD', 'NONE', 'TAKE BACK RETURN'])[rnd([o_orderkey, line, 32], 4) + 1] AS l_shipinstruct,
+           (['REG AIR', 'AIR', 'RAIL', 'SHIP', 'TRUCK', 'MAIL', 'FOB'])[rnd([o_orderkey, line, 33], 7) + 1] AS l_shipmode,
+           'comment' AS l_comment
+    FROM {s}.orders, range(1, 5) AS lines(line);
+"""
+
+PLOTLY_CODE = "```python\nfig = px.bar(df.head(25), x=df.columns[0], y=df.columns[-1])\n```"
+EXPLANATION = (
+    "This query joins the relevant tables on their keys, filters the rows the question asks about, "
+    "aggregates them per group and orders the result so the most significant rows come first."
+)
+
+
+def build_database(path: str, sf: float) -> str:
+    """Generates the TPC-H tables into ``path``; returns how they were generated."""
+    conn = duckdb.connect(path)
+    try:
+        conn.execute(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}")
+        tables = conn.execute(
+            "SELECT count(*) FROM information_schema.tables WHERE table_schema = ?", [SCHEMA]
+        ).fetchone()[0]
+        if tables:
+            return "existing database"
+        try:
+            conn.execute("INSTALL tpch")
+            conn.execute("LOAD tpch")
+            conn.execute(f"CALL dbgen(sf={sf}, schema='{SCHEMA}')")
+            return f"dbgen sf={sf}"
+        except duckdb.Error as e:
+            print(f"tpch extension unavailable ({str(e).splitlines()[0]}); generating synthetic tables")
+            conn.execute(
+                SYNTHETIC_TPCH.format(
+                    s=SCHEMA,
+                    regions=", ".join(f"'{name}'" for name in REGIONS),
+                    nations=", ".join(f"'{name}'" for name, _ in NATIONS),
+                    nation_regions=", ".join(str(region) for _, region in NATIONS),
+                    suppliers=max(int(10_000 * sf), 1),
+                    customers=max(int(150_000 * sf), 1),
+                    parts=max(int(200_000 * sf), 1),
+                    orders=max(int(1_500_000 * sf), 1),
+                )
+            )
+            return f"synthetic sf={sf}"
+    finally:
+        conn.close()
+
+
+class BenchmarkKiwi(KiwiBase):
+    """KiwiBase answering the TPC-H questions with their reference SQL, at a simulated LLM speed."""
+
+    def __init__(self, answers: dict, token_delay: float, chart_latency: float, config=None):
+        KiwiBase.__init__(self, config={"token_counter": "approx", **(config or {})})
+        self.answers = answers
+        self.token_delay = token_delay
+        self.chart_latency = chart_latency
+
+    def generate_embedding(self, data, **kwargs):
+        return []
+
+    def get_similar_question_sql(self, question, **kwargs):
+        return []
+
+    def get_related_ddl(self, question, **kwargs):
+        return []
+
+    def get_related_documentation(self, question, **kwargs):
+        return []
+
+    def add_question_sql(self, question, sql, **kwargs):
+        return ""
+
+    def add_ddl(self, ddl, **kwargs):
+        return ""
+
+    def add_documentation(self, documentation, **kwargs):
+        return ""
+
+    def get_training_data(self, **kwargs):
+        return None
+
+    def remove_training_data(self, id, **kwargs):
+        return True
+
+    def system_message(self, message):
+        return {"role": "system", "content": message}
+
+    def user_message(self, message):
+        return {"role": "user", "content": message}
+
+    def assistant_message(self, message):
+        return {"role": "assistant", "content": message}
+
+    def log(self, message: str, title: str = "Info"):
+        pass
+
+    def submit_prompt_stream(self, prompt, **kwargs):
+        # The reference SQL in a code block, then an explanation, one word per token
+        sql = self.answers[prompt[-1]["content"]]
+        response = f"```sql\n{sql};\n```\n{EXPLANATION}"
+        for token in re.findall(r"\s*\S+", response):
+            time.sleep(self.token_delay)
+            yield token
+
+    def submit_prompt(self, prompt, **kwargs):
+        if prompt[-1]["content"] in self.answers:
+            return "".join(self.submit_prompt_stream(prompt, **kwargs))
+        time.sleep(self.chart_latency)
+        return PLOTLY_CODE
+
+
+def load_answers(path: Path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+    return {q["question"]: q["answer"].strip().rstrip(";") for q in questions}
+
+
+def time_ask(vn: BenchmarkKiwi, question: str, pipelined: bool) -> float:
+    start = time.perf_counter()
+    sql, df, fig = vn.ask(question, print_results=False, auto_train=False, pipelined=pipelined)
+    elapsed = time.perf_counter() - start
+    if df is None:
+        raise RuntimeError(f"the SQL of {question!r} failed")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--questions",
+        type=Path,
+        default=PROJECT_ROOT / "training_data" / "tpch" / "questions.json",
+        help="Path to a JSON list of {question, answer} objects",
+    )
+    parser.add_argument("--db", help="DuckDB file to generate (or reuse); defaults to a temporary file")
+    parser.add_argument("--sf", type=float, default=0.1, help="TPC-H scale factor")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Seconds per streamed SQL token")
+    parser.add_argument("--chart-latency", type=float, default=0.5, help="Seconds to generate the chart code")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs of each question per mode")
+    parser.add_argument("--limit", type=int, help="Only time the first N questions")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, f"tpch_sf{args.sf}.duckdb")
+        start = time.perf_counter()
+        source = build_database(path, args.sf)
+        print(f"Database: {path} ({source}, {time.perf_counter() - start:.1f} s)")
+
+        vn = BenchmarkKiwi(load_answers(args.questions), args.token_delay, args.chart_latency)
+        vn.connect_to_duckdb(path)
+        # Only time the questions whose reference SQL runs on this database (some are for other dialects);
+        # this also warms DuckDB up so the first timed mode isn't the one reading the tables from disk
+        questions = []
+        for question, sql in vn.answers.items():
+            try:
+                vn.run_sql(sql)
+                questions.append(question)
+            except Exception:
+                pass
+        skipped = len(vn.answers) - len(questions)
+        questions = questions[: args.limit]
+        # Warm up plotly so the first timed run doesn't pay for importing its modules
+        vn.get_plotly_figure("fig = px.bar(df, x='x', y='x')", vn.run_sql("SELECT 1 AS x"))
+
+        timings = {"staged": [], "pipelined": []}
+        for question in questions:
+            for mode, elapsed in timings.items():
+                elapsed.extend(time_ask(vn, question, mode == "pipelined") for _ in range(args.repeat))
+
+    print(f"Timed {len(questions)} questions x {args.repeat} ({skipped} skipped: their SQL doesn't run on DuckDB)")
+    for mode, elapsed in timings.items():
+        if not elapsed:
+            continue
+        p95 = sorted(elapsed)[int(0.95 * (len(elapsed) - 1))]
+        print(
+            f"{mode:9}: mean {statistics.mean(elapsed) * 1000:8.1f} ms  median {statistics.median(elapsed) * 1000:8.1f} ms"
+            f"  p95 {p95 * 1000:8.1f} ms"
+        )
+    if timings["staged"]:
+        print(f"speedup  : {statistics.mean(timings['staged']) / statistics.mean(timings['pipelined']):8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark ONNXMiniLM_L6_V2 embedding throughput and latency on the TPC-H question set.
+
+Each configuration is measured in two ways:
+
+- throughput: ``embed_documents`` over every question and SQL answer (ingestion workload)
+- latency:    ``embed_query`` once per question, reporting p50 / p99 (retrieval workload)
+- concurrent: ``aembed_query`` for every question at once (many simultaneous API requests)
+
+Configurations:
+
+- fixed:   every sequence padded to 256 tokens (the previous behaviour)
+- dynamic: batches padded to their longest sequence, documents bucketed by length
+- sessions: dynamic padding with a pool of 4 single-threaded sessions, so concurrent requests
+  run side by side instead of queueing on one session
+- int8:    dynamic padding with the dynamically quantized INT8 model
+  (generate it first with ``python -m kiwi.embedding.quantize``)
+
+Usage:
+    python scripts/benchmark_embedding.py --rounds 5
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from kiwi.embedding import ONNXMiniLM_L6_V2  # noqa: E402
+
+CONFIGURATIONS = {
+    "fixed": {"dynamic_padding": False},
+    "dynamic": {"dynamic_padding": True},
+    "sessions": {"dynamic_padding": True, "num_sessions": 4, "intra_op_num_threads": 1},
+    "int8": {"dynamic_padding": True, "variant": "int8"},
+}
+
+
+def load_texts(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    questions = [item["question"] for item in items]
+    documents = questions + [item["answer"] for item in items]
+    return questions, documents
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def benchmark(embedder, questions, documents, rounds):
+    # Warm up: loads the model and tokenizer outside of the timed region.
+    embedder.embed_documents(documents[:8])
+
+    throughputs = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        embedder.embed_documents(documents)
+        throughputs.append(len(documents) / (time.perf_counter() - start))
+
+    latencies = []
+    for _ in range(rounds):
+        for question in questions:
+            start = time.perf_counter()
+            embedder.embed_query(question)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async def concurrent_queries():
+        await asyncio.gather(*(embedder.aembed_query(question) for question in questions))
+
+    concurrent = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        asyncio.run(concurrent_queries())
+        concurrent.append(len(questions) / (time.perf_counter() - start))
+
+    return {
+        "docs_per_s": statistics.median(throughputs),
+        "concurrent_qps": statistics.median(concurrent),
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--questions",
+        type=Path,
+        default=PROJECT_ROOT / "training_data" / "tpch" / "questions.json",
+        help="Path to a JSON list of {question, answer} objects",
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="Timed repetitions per configuration")
+    parser.add_argument(
+        "--configs",
+        default=",".join(CONFIGURATIONS),
+        help=f"Comma-separated configurations to run, from: {', '.join(CONFIGURATIONS)}",
+    )
+    args = parser.parse_args()
+
+    questions, documents = load_texts(args.questions)
+    print(f"{len(documents)} documents, {len(questions)} queries, {args.rounds} rounds\n")
+    print(f"{'config':<12}{'docs/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'conc q/s':>10}")
+
+    results = {}
+    for name in args.configs.split(","):
+        embedder = ONNXMiniLM_L6_V2(**CONFIGURATIONS[name])
+        results[name] = benchmark(embedder, questions, documents, args.rounds)
+        r = results[name]
+        print(f"{name:<12}{r['docs_per_s']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['concurrent_qps']:>10.1f}")
+
+    if "fixed" in results and len(results) > 1:
+        baseline = results["fixed"]
+        print()
+        for name, r in results.items():
+            if name != "fixed":
+                print(
+                    f"{name}: {r['docs_per_s'] / baseline['docs_per_s']:.2f}x throughput, "
+                    f"{baseline['p50_ms'] / r['p50_ms']:.2f}x p50 latency, "
+                    f"{r['concurrent_qps'] / baseline['concurrent_qps']:.2f}x concurrent queries vs fixed"
+                )
+
+
+if __name__ == "__main__":
+    main()
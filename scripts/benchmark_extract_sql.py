@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark the single-pass SQL extractor against the regex passes it replaced.
+
+Times, over a corpus of LLM responses:
+
+- extract_sql: the five ``re.findall`` passes vs. one ``SqlExtractor`` pass over each whole response
+- streaming:   re-running the regex search over the accumulated text whenever a token could complete a
+               statement (the former ``SqlStream``) vs. feeding ``SqlExtractor`` only the new tokens
+
+Both are also timed on the inputs that made the regex passes go quadratic: statements that never
+terminate, and a long streamed preamble full of semicolons before the query.
+
+By default the corpus is built from the TPC-H question/SQL pairs in training_data/tpch/questions.json,
+wrapped in the shapes models answer with (a fenced block and an explanation, a bare statement, reasoning
+before the query, an intermediate_sql request, a refusal). Pass ``--corpus`` with a JSONL file of logged
+responses (a string or a ``{"response": ...}`` object per line) to benchmark real traffic instead.
+
+Usage:
+    python scripts/benchmark_extract_sql.py --repeat 20
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from kiwi.core.sql_extract import extract_sql  # noqa: E402
+from kiwi.core.sql_stream import SqlStream  # noqa: E402
+
+REASONING = (
+    "To answer this I need the orders joined to their customers and line items. The revenue of a line item "
+    "is its extended price after the discount, so I will select that expression, group by the requested "
+    "dimension and order by revenue so the largest values come first. "
+)
+
+SHAPES = [
+    "Here is the query:\n```sql\n{sql};\n```\nIt {explanation}",
+    "{sql};",
+    "{reasoning}\n\n```sql\n{sql}\n```",
+    "{reasoning}" * 8 + "\nSELECT the rows as follows:\n```sql\n{sql};\n```",
+    "-- intermediate_sql\n```sql\nSELECT DISTINCT n_name FROM tpch_sf1.nation;\n```",
+    "The provided context is insufficient to select the right table; please add documentation for it.",
+]
+
+# The regular expressions extract_sql used to run, in order
+LEGACY_PATTERNS = [
+    re.compile(r"\bCREATE\s+TABLE\b.*?\bAS\b.*?;", re.DOTALL | re.IGNORECASE),
+    re.compile(r"\bWITH\b .*?;", re.DOTALL | re.IGNORECASE),
+    re.compile(r"\bSELECT\b .*?;", re.DOTALL | re.IGNORECASE),
+]
+LEGACY_FENCES = [
+    re.compile(r"```sql\s*\n(.*?)```", re.DOTALL | re.IGNORECASE),
+    re.compile(r"```(.*?)```", re.DOTALL | re.IGNORECASE),
+]
+LEGACY_TERMINATED = re.compile(r"^[ \t]*((?:WITH|SELECT)\b\s.*?;)", re.DOTALL | re.IGNORECASE | re.MULTILINE)
+
+
+def legacy_extract_sql(text):
+    for pattern in LEGACY_PATTERNS:
+        sqls = pattern.findall(text)
+        if sqls:
+            return sqls[-1]
+    for pattern in LEGACY_FENCES:
+        sqls = pattern.findall(text)
+        if sqls:
+            return sqls[-1].strip()
+    return None
+
+
+class LegacySqlStream:
+    """The former SqlStream: re-runs the regex search over the whole text on every ; or ` token."""
+
+    def __init__(self):
+        self.text = ""
+        self.early_sql = None
+
+    def feed(self, token):
+        self.text += token
+        events = [{"type": "token", "text": token}]
+        if self.early_sql is None and (";" in token or "`" in token) and "intermediate_sql" not in self.text:
+            sql = None
+            match = LEGACY_FENCES[0].search(self.text)
+            if match and match.group(1).strip():
+                sql = match.group(1).strip()
+            else:
+                match = LEGACY_TERMINATED.search(self.text)
+                if match:
+                    sql = match.group(1)
+            if sql is not None:
+                self.early_sql = sql
+                events.append({"type": "early_sql", "text": sql})
+        return events
+
+
+def legacy_stream(tokens):
+    sql_stream = LegacySqlStream()
+    for token in tokens:
+        sql_stream.feed(token)
+    return sql_stream.early_sql
+
+
+def stream(tokens):
+    sql_stream = SqlStream()
+    for token in tokens:
+        sql_stream.feed(token)
+    return sql_stream.early_sql
+
+
+def tokenize(text):
+    # Roughly what an LLM streams: a word or a few characters at a time
+    return re.findall(r"\s*\S{1,4}|\s+", text)
+
+
+def load_corpus(path):
+    if path is not None:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        return [line["response"] if isinstance(line, dict) else line for line in lines]
+
+    with open(PROJECT_ROOT / "training_data" / "tpch" / "questions.json", "r", encoding="utf-8") as f:
+        questions = json.load(f)
+    return [
+        shape.format(sql=q["answer"].strip().rstrip(";"), explanation=q["question"], reasoning=REASONING)
+        for q in questions
+        for shape in SHAPES
+    ]
+
+
+def best_of(fn, inputs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, legacy, single_pass, count):
+    print(
+        f"{name:11}: legacy {legacy / count * 1e6:8.1f} us  single-pass {single_pass / count * 1e6:8.1f} us"
+        f"  per response  ({legacy / single_pass:5.2f}x)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, help="JSONL file of LLM responses")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed passes over the corpus; the best is reported")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    token_streams = [tokenize(text) for text in corpus]
+    print(f"{len(corpus)} responses, {sum(map(len, corpus)) / len(corpus):.0f} characters on average")
+
+    mismatches = sum(legacy_extract_sql(text) != extract_sql(text) for text in corpus)
+    mismatches += sum(legacy_stream(tokens) != stream(tokens) for tokens in token_streams)
+    if mismatches:
+        print(f"warning: {mismatches} responses extracted differently")
+
+    report("extract_sql", best_of(legacy_extract_sql, corpus, args.repeat), best_of(extract_sql, corpus, args.repeat),
+           len(corpus))
+    report("streaming", best_of(legacy_stream, token_streams, args.repeat), best_of(stream, token_streams, args.repeat),
+           len(corpus))
+
+    for n in (1000, 4000):
+        text = "SELECT x FROM t WHERE y = 1\n" * n
+        legacy, single_pass = best_of(legacy_extract_sql, [text], 3), best_of(extract_sql, [text], 3)
+        print(f"unterminated, {len(text):6} chars : legacy {legacy * 1000:8.1f} ms  single-pass {single_pass * 1000:8.1f} ms")
+
+        tokens = tokenize("First, the orders; then the customers; " * (n // 4) + "```sql\nSELECT 1\n```")
+        legacy, single_pass = best_of(legacy_stream, [tokens], 3), best_of(stream, [tokens], 3)
+        print(f"streamed preamble, {len(tokens):5} tokens: legacy {legacy * 1000:8.1f} ms  single-pass {single_pass * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-item vs. batched ingestion of training data into ChromaDB_VectorStore.
+
+Loads the TPC-H question/SQL pairs from training_data/tpch/questions.json, optionally
+replicates them to reach a realistic corpus size, and times:
+
+- per-item: one ``add_question_sql`` call (one embedding pass + one Chroma write) per pair
+- batched:  ``add_question_sql_batch`` with one embedding pass + one upsert per chunk
+
+Usage:
+    python scripts/benchmark_ingestion.py --repeat 40 --batch-size 256
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from kiwi.core import ChromaDB_VectorStore  # noqa: E402
+
+
+class BenchmarkKiwi(ChromaDB_VectorStore):
+    """ChromaDB_VectorStore with the LLM methods left unimplemented; only ingestion is exercised."""
+
+    def system_message(self, message: str) -> any:
+        return {"role": "system", "content": message}
+
+    def user_message(self, message: str) -> any:
+        return {"role": "user", "content": message}
+
+    def assistant_message(self, message: str) -> any:
+        return {"role": "assistant", "content": message}
+
+    def submit_prompt(self, prompt, **kwargs) -> str:
+        raise NotImplementedError("The ingestion benchmark does not call the LLM")
+
+
+def load_pairs(path: Path, repeat: int) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+
+    pairs = []
+    for i in range(repeat):
+        # Suffix replicated questions so every pair gets a distinct id.
+        suffix = "" if i == 0 else f" (variant {i})"
+        pairs.extend(
+            {"question": q["question"] + suffix, "sql": q["answer"]} for q in questions
+        )
+    return pairs
+
+
+def run_per_item(vn: BenchmarkKiwi, pairs: list) -> float:
+    vn.remove_collection("sql")
+    start = time.perf_counter()
+    for pair in pairs:
+        vn.add_question_sql(question=pair["question"], sql=pair["sql"])
+    return time.perf_counter() - start
+
+
+def run_batched(vn: BenchmarkKiwi, pairs: list, batch_size: int) -> float:
+    vn.remove_collection("sql")
+    start = time.perf_counter()
+    vn.add_question_sql_batch(pairs, batch_size=batch_size)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--questions",
+        type=Path,
+        default=PROJECT_ROOT / "training_data" / "tpch" / "questions.json",
+        help="Path to a JSON list of {question, answer} objects",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Replicate the question set N times")
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunk size for the batched run")
+    parser.add_argument("--skip-per-item", action="store_true", help="Only run the batched path")
+    args = parser.parse_args()
+
+    pairs = load_pairs(args.questions, args.repeat)
+    vn = BenchmarkKiwi(config={"client": "in-memory"})
+
+    # Warm up the embedding model so the first timed run doesn't pay for loading it.
+    vn.generate_embeddings(["warm up"])
+
+    print(f"Ingesting {len(pairs)} question/SQL pairs")
+
+    if not args.skip_per_item:
+        per_item = run_per_item(vn, pairs)
+        print(f"per-item : {per_item:8.2f} s  ({len(pairs) / per_item:8.1f} items/s)")
+
+    batched = run_batched(vn, pairs, args.batch_size)
+    print(f"batched  : {batched:8.2f} s  ({len(pairs) / batched:8.1f} items/s)  batch_size={args.batch_size}")
+
+    if not args.skip_per_item:
+        print(f"speedup  : {per_item / batched:8.2f}x")
+
+    assert vn.sql_collection.count() == len(pairs), "batched ingestion lost items"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Compare retrieval quality and latency of the fp32 and INT8 MiniLM embedding variants.
+
+Every SQL answer in the question set is indexed as a document; each question is then used as
+a query, and a hit is counted when its own answer is among the top-k results. For each variant
+the report shows:
+
+- recall@1/5/10 of question -> answer retrieval
+- ingestion throughput (docs/s) and per-query p50 / p99 latency
+- agreement with fp32: mean / min cosine between the two variants' vectors, and top-10 overlap
+
+Generate the INT8 model first:
+    python -m kiwi.embedding.quantize
+
+Usage:
+    python scripts/embedding_quality_report.py --rounds 3
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from benchmark_embedding import benchmark, load_texts  # noqa: E402
+
+from kiwi.embedding import ONNXMiniLM_L6_V2  # noqa: E402
+
+VARIANTS = ["fp32", "int8"]
+RECALL_AT = [1, 5, 10]
+
+
+def rank(query_vectors: np.ndarray, document_vectors: np.ndarray, k: int) -> np.ndarray:
+    # Vectors are L2-normalized by the encoder, so the dot product is the cosine similarity.
+    similarities = query_vectors @ document_vectors.T
+    return np.argsort(-similarities, axis=1)[:, :k]
+
+
+def recall(top: np.ndarray, k: int) -> float:
+    expected = np.arange(top.shape[0])[:, None]
+    return float((top[:, :k] == expected).any(axis=1).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--questions",
+        type=Path,
+        default=PROJECT_ROOT / "training_data" / "tpch" / "questions.json",
+        help="Path to a JSON list of {question, answer} objects",
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="Timed repetitions per variant")
+    args = parser.parse_args()
+
+    questions, documents = load_texts(args.questions)
+    answers = documents[len(questions):]
+    k_max = max(RECALL_AT)
+
+    results = {}
+    for variant in VARIANTS:
+        embedder = ONNXMiniLM_L6_V2(variant=variant)
+        query_vectors = np.asarray(embedder.embed_documents(questions))
+        answer_vectors = np.asarray(embedder.embed_documents(answers))
+
+        results[variant] = {
+            "queries": query_vectors,
+            "answers": answer_vectors,
+            "top": rank(query_vectors, answer_vectors, k_max),
+            **benchmark(embedder, questions, documents, args.rounds),
+        }
+
+    print(f"{len(questions)} questions, {len(answers)} answers, {args.rounds} rounds\n")
+    header = "".join(f"{'R@' + str(k):>8}" for k in RECALL_AT)
+    print(f"{'variant':<10}{header}{'docs/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for variant, r in results.items():
+        recalls = "".join(f"{recall(r['top'], k):>8.3f}" for k in RECALL_AT)
+        print(f"{variant:<10}{recalls}{r['docs_per_s']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+
+    baseline = results["fp32"]
+    for variant, r in results.items():
+        if variant == "fp32":
+            continue
+        cosines = np.concatenate([
+            np.sum(baseline["queries"] * r["queries"], axis=1),
+            np.sum(baseline["answers"] * r["answers"], axis=1),
+        ])
+        overlap = np.mean([
+            len(set(a) & set(b)) / k_max for a, b in zip(baseline["top"], r["top"])
+        ])
+        print(
+            f"\n{variant} vs fp32: {r['docs_per_s'] / baseline['docs_per_s']:.2f}x throughput, "
+            f"{baseline['p50_ms'] / r['p50_ms']:.2f}x p50 latency, "
+            f"cosine mean {cosines.mean():.4f} / min {cosines.min():.4f}, "
+            f"top-{k_max} overlap {overlap:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+from kiwi.cache.base import Cache
+from kiwi.cache.memory import MemoryCache, sizeof
+from kiwi.cache.redis import RedisCache
+from kiwi.cache.sqlite import SQLiteCache
+
+__all__ = ["Cache", "MemoryCache", "RedisCache", "SQLiteCache", "sizeof"]
@@ -0,0 +1,48 @@
+from abc import ABC, abstractmethod
+
+
+class Cache(ABC):
+    """
+    Define the interface for a cache that can be used to store data in a Flask or FastAPI app.
+    """
+
+    @abstractmethod
+    def generate_id(self, *args, **kwargs):
+        """
+        Generate a unique ID for the cache.
+        """
+        pass
+
+    @abstractmethod
+    def get(self, id, field):
+        """
+        Get a value from the cache.
+        """
+        pass
+
+    @abstractmethod
+    def get_all(self, field_list) -> list:
+        """
+        Get all values from the cache.
+        """
+        pass
+
+    @abstractmethod
+    def set(self, id, field, value):
+        """
+        Set a value in the cache.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, id):
+        """
+        Delete a value from the cache.
+        """
+        pass
+
+    def stats(self) -> dict:
+        """
+        Size and eviction statistics, for caches that keep them.
+        """
+        return {}
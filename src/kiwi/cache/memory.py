@@ -0,0 +1,184 @@
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from kiwi.cache.base import Cache
+
+
+def sizeof(value: Any, _depth: int = 0) -> int:
+    """
+    Approximate memory held by a cached value: ``memory_usage(deep=True)`` for DataFrames, ``nbytes``
+    for Arrow tables and numpy arrays, and ``sys.getsizeof`` for strings, bytes and (two levels of)
+    containers, such as lists of follow-up questions.
+    """
+    if value is None:
+        return 0
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):  # pandas.DataFrame
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if hasattr(value, "nbytes") and not isinstance(value, (str, bytes)):  # pyarrow.Table, numpy array
+        return int(value.nbytes)
+    size = sys.getsizeof(value)
+    if _depth < 2:
+        if isinstance(value, dict):
+            size += sum(sizeof(k, _depth + 1) + sizeof(v, _depth + 1) for k, v in value.items())
+        elif isinstance(value, (list, tuple, set)):
+            size += sum(sizeof(item, _depth + 1) for item in value)
+    return size
+
+
+@dataclass
+class MemoryCacheEntry:
+    fields: Dict[str, Any] = field(default_factory=dict)
+    sizes: Dict[str, int] = field(default_factory=dict)
+    nbytes: int = 0
+    expires_at: Optional[float] = None
+
+
+class MemoryCache(Cache):
+    """
+    In-process cache of the per-question state (SQL, DataFrame, figure, summary, ...) of the web apps.
+
+    Bounded by a number of entries (question ids) and an approximate byte budget; the least recently
+    used entries are evicted first, and an entry expires ``ttl`` seconds after it was last written.
+    Thread-safe, for the threaded Flask server.
+
+    **Example:**
+    ```python
+    cache = MemoryCache(max_entries=500, max_bytes=256 * 1024 * 1024, ttl=3600)
+    app = VannaFlaskApp(vn, cache=cache)
+    cache.stats()
+    ```
+
+    Args:
+        max_entries (int): Maximum number of ids kept.
+        max_bytes (int): Approximate memory budget for all cached values. None for no byte bound.
+        ttl (float): Seconds an entry lives after its last write. None keeps entries until evicted.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: Optional[int] = 512 * 1024 * 1024,
+        ttl: Optional[float] = 24 * 3600.0,
+    ):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError(f"max_bytes must be positive, got {max_bytes}")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache: "OrderedDict[str, MemoryCacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def generate_id(self, *args, **kwargs):
+        return str(uuid.uuid4())
+
+    def _expired(self, entry: MemoryCacheEntry, now: float) -> bool:
+        return entry.expires_at is not None and now >= entry.expires_at
+
+    def _drop(self, id) -> None:
+        # Caller holds the lock
+        entry = self.cache.pop(id)
+        self.nbytes -= entry.nbytes
+
+    def _evict(self, keep) -> None:
+        # Caller holds the lock. Expired entries go first, then least recently used ones; the entry
+        # just written is kept even if it alone exceeds the byte budget.
+        now = time.monotonic()
+        for id in [id for id, entry in self.cache.items() if self._expired(entry, now)]:
+            if id != keep:
+                self._drop(id)
+                self.expirations += 1
+
+        def over() -> bool:
+            return len(self.cache) > self.max_entries or (
+                self.max_bytes is not None and self.nbytes > self.max_bytes
+            )
+
+        while over():
+            oldest = next((id for id in self.cache if id != keep), None)
+            if oldest is None:
+                break
+            self._drop(oldest)
+            self.evictions += 1
+
+    def set(self, id, field, value):
+        size = sizeof(value)
+        with self._lock:
+            entry = self.cache.get(id)
+            if entry is None:
+                entry = self.cache[id] = MemoryCacheEntry()
+            self.cache.move_to_end(id)
+
+            old = entry.sizes.get(field, 0)
+            entry.fields[field] = value
+            entry.sizes[field] = size
+            entry.nbytes += size - old
+            self.nbytes += size - old
+            entry.expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+
+            self._evict(keep=id)
+
+    def get(self, id, field):
+        with self._lock:
+            entry = self.cache.get(id)
+            if entry is not None and self._expired(entry, time.monotonic()):
+                self._drop(id)
+                self.expirations += 1
+                entry = None
+
+            if entry is None or field not in entry.fields:
+                self.misses += 1
+                return None
+
+            self.cache.move_to_end(id)
+            self.hits += 1
+            return entry.fields[field]
+
+    def get_all(self, field_list) -> list:
+        # A listing (e.g. the question history) doesn't count as use, so it leaves the LRU order alone
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {"id": id, **{field: entry.fields.get(field) for field in field_list}}
+                for id, entry in self.cache.items()
+                if not self._expired(entry, now)
+            ]
+
+    def delete(self, id):
+        with self._lock:
+            if id in self.cache:
+                self._drop(id)
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            largest = max(self.cache.items(), key=lambda item: item[1].nbytes, default=(None, None))
+            return {
+                "backend": "memory",
+                "entries": len(self.cache),
+                "max_entries": self.max_entries,
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "largest_entry_bytes": largest[1].nbytes if largest[1] is not None else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
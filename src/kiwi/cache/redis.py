@@ -0,0 +1,132 @@
+import time
+import uuid
+from typing import Optional
+
+from kiwi.cache.base import Cache
+from kiwi.cache.serialization import dumps, loads
+from kiwi.exceptions import DependencyError
+
+
+class RedisCache(Cache):
+    """
+    App cache in Redis, or any server speaking the Redis protocol (Valkey, KeyDB, Dragonfly), shared by
+    every worker on every host.
+
+    Each id is a hash with one field per cached value, so ``get`` fetches a single field (``HGET``)
+    rather than the whole entry. DataFrames are stored as Arrow IPC. Entries expire ``ttl`` seconds
+    after their last write, and a sorted set of ids keeps the question history in order.
+
+    **Example:**
+    ```python
+    app = VannaFlaskApp(vn, cache=RedisCache("redis://cache:6379/0", ttl=3600))
+    ```
+
+    Args:
+        url (str): Server URL, e.g. ``redis://localhost:6379/0``. Ignored when ``client`` is given.
+        prefix (str): Prefix of every key, to share one database between apps.
+        ttl (float): Seconds an entry lives after its last write. None keeps entries until deleted.
+        max_entries (int): Maximum number of ids listed in the history; older ones are deleted. None for no bound.
+        client: An existing ``redis.Redis`` client to use.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "kiwi:cache:",
+        ttl: Optional[float] = 24 * 3600.0,
+        max_entries: Optional[int] = 10000,
+        client=None,
+    ):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise DependencyError(
+                    "You need to install required dependencies to execute this method, run command:"
+                    " \npip install redis"
+                )
+            client = redis.Redis.from_url(url)
+
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._ids_key = f"{prefix}ids"
+        self.evictions = 0
+
+    def _key(self, id) -> str:
+        return f"{self.prefix}entry:{id}"
+
+    def generate_id(self, *args, **kwargs):
+        return str(uuid.uuid4())
+
+    def set(self, id, field, value):
+        key = self._key(id)
+        pipe = self.client.pipeline()
+        if value is None:
+            pipe.hdel(key, field)
+        else:
+            pipe.hset(key, field, dumps(value))
+        if self.ttl is not None:
+            pipe.pexpire(key, max(int(self.ttl * 1000), 1))
+        # Score by first write, so the history keeps the order questions were asked in
+        pipe.zadd(self._ids_key, {id: time.time()}, nx=True)
+        pipe.execute()
+
+        if self.max_entries is not None and self.client.zcard(self._ids_key) > self.max_entries:
+            self._trim()
+
+    def _trim(self) -> None:
+        excess = self.client.zrange(self._ids_key, 0, -self.max_entries - 1)
+        if excess:
+            pipe = self.client.pipeline()
+            pipe.delete(*[self._key(id.decode()) for id in excess])
+            pipe.zrem(self._ids_key, *excess)
+            pipe.execute()
+            self.evictions += len(excess)
+
+    def get(self, id, field):
+        data = self.client.hget(self._key(id), field)
+        return None if data is None else loads(data)
+
+    def get_all(self, field_list) -> list:
+        ids = [id.decode() for id in self.client.zrange(self._ids_key, 0, -1)]
+        if not ids:
+            return []
+
+        pipe = self.client.pipeline()
+        for id in ids:
+            pipe.exists(self._key(id))
+            if field_list:
+                pipe.hmget(self._key(id), list(field_list))
+        replies = iter(pipe.execute())
+
+        entries, expired = [], []
+        for id in ids:
+            exists = next(replies)
+            values = next(replies) if field_list else []
+            if not exists:
+                expired.append(id)
+                continue
+            entries.append(
+                {"id": id, **{field: None if data is None else loads(data) for field, data in zip(field_list, values)}}
+            )
+
+        if expired:
+            # Hashes expired by TTL; drop their ids from the history
+            self.client.zrem(self._ids_key, *expired)
+        return entries
+
+    def delete(self, id):
+        pipe = self.client.pipeline()
+        pipe.delete(self._key(id))
+        pipe.zrem(self._ids_key, id)
+        pipe.execute()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "entries": self.client.zcard(self._ids_key),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,107 @@
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any
+
+import pandas as pd
+
+from kiwi.exceptions import DependencyError
+
+# One-byte tag in front of every serialized value
+_JSON = b"j"
+_DATAFRAME = b"d"
+_ARROW_TABLE = b"a"
+
+# Key of the JSON object standing in for a value JSON has no type for, e.g. {"$kiwi": "date", "value": "2024-01-31"}
+_TYPE_KEY = "$kiwi"
+_TAGGED_TYPES = {
+    # Checked in order: datetime is a subclass of date
+    "datetime": (datetime.datetime, datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+    "date": (datetime.date, datetime.date.isoformat, datetime.date.fromisoformat),
+    "time": (datetime.time, datetime.time.isoformat, datetime.time.fromisoformat),
+    "decimal": (decimal.Decimal, str, decimal.Decimal),
+    "uuid": (uuid.UUID, str, uuid.UUID),
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise DependencyError(
+            "You need to install required dependencies to execute this method, run command:"
+            " \npip install pyarrow"
+        )
+    return pa
+
+
+def _write_ipc(table) -> bytes:
+    pa = _pyarrow()
+    codec = "zstd" if pa.Codec.is_available("zstd") else None
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=codec)) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _read_ipc(data: bytes):
+    pa = _pyarrow()
+    return pa.ipc.open_stream(pa.py_buffer(data)).read_all()
+
+
+def _encode(value: Any) -> Any:
+    for name, (cls, encode, _) in _TAGGED_TYPES.items():
+        if isinstance(value, cls):
+            return {_TYPE_KEY: name, "value": encode(value)}
+    # NumPy scalars, e.g. an aggregate read off a DataFrame
+    if hasattr(value, "item") and hasattr(value, "dtype") and getattr(value, "ndim", None) == 0:
+        return value.item()
+    raise TypeError(f"Cannot cache a value of type {type(value).__name__}")
+
+
+def _decode(obj: dict) -> Any:
+    if _TYPE_KEY in obj and obj.keys() == {_TYPE_KEY, "value"} and obj[_TYPE_KEY] in _TAGGED_TYPES:
+        return _TAGGED_TYPES[obj[_TYPE_KEY]][2](obj["value"])
+    return obj
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Serialize a cache value for an out-of-process backend.
+
+    DataFrames and ``pyarrow.Table`` results are written as (zstd-compressed) Arrow IPC streams, which
+    are compact and fast to read back; everything else the apps cache (SQL, questions, figure JSON,
+    lists of follow-up questions, flags) is JSON. Dates, times, decimals and UUIDs are tagged so they
+    read back as themselves; any other type JSON can't hold raises a TypeError rather than being cached
+    as its string.
+    """
+    if hasattr(value, "schema") and hasattr(value, "num_rows"):
+        return _ARROW_TABLE + _write_ipc(value)
+
+    if hasattr(value, "columns") and hasattr(value, "dtypes"):
+        pa = _pyarrow()
+        try:
+            table = pa.Table.from_pandas(value)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed-type object columns: keep their values as text and their nulls as nulls
+            value = value.copy()
+            for column, dtype in value.dtypes.items():
+                if pd.api.types.is_object_dtype(dtype):
+                    value[column] = value[column].map(str, na_action="ignore")
+            table = pa.Table.from_pandas(value)
+        return _DATAFRAME + _write_ipc(table)
+
+    return _JSON + json.dumps(value, default=_encode).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Inverse of [`dumps`][kiwi.cache.serialization.dumps]."""
+    tag, payload = data[:1], data[1:]
+    if tag == _JSON:
+        return json.loads(payload, object_hook=_decode)
+    if tag == _DATAFRAME:
+        return _read_ipc(payload).to_pandas()
+    if tag == _ARROW_TABLE:
+        return _read_ipc(payload)
+    raise ValueError(f"Unknown cache value tag: {tag!r}")
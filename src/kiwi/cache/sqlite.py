@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+from kiwi.cache.base import Cache
+from kiwi.cache.serialization import dumps, loads
+
+
+class SQLiteCache(Cache):
+    """
+    App cache in a SQLite file, shared by every worker process on the host.
+
+    Run the Flask app under several gunicorn workers (or FastAPI under several uvicorn workers) with the
+    same ``path``, and an id returned by ``generate_sql`` in one worker can be used by ``run_sql`` or
+    ``generate_plotly_figure`` in another. Each field is its own row, so reading the SQL of an entry
+    doesn't load its DataFrame; DataFrames are stored as Arrow IPC. For several hosts, use
+    [`RedisCache`][kiwi.cache.redis.RedisCache].
+
+    **Example:**
+    ```python
+    app = VannaFlaskApp(vn, cache=SQLiteCache("/var/run/kiwi/cache.sqlite", ttl=3600))
+    ```
+
+    Args:
+        path (str): Database file. Use a local disk; SQLite locking is unreliable on network filesystems.
+        ttl (float): Seconds an entry lives after its last write. None keeps entries until evicted.
+        max_entries (int): Maximum number of ids kept; the least recently written are evicted. None for no bound.
+        timeout (float): Seconds to wait for another process's write lock.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = 24 * 3600.0,
+        max_entries: Optional[int] = 10000,
+        timeout: float = 10.0,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._local = threading.local()
+        self.evictions = 0
+
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " id TEXT PRIMARY KEY,"
+                " updated_at REAL NOT NULL,"
+                " expires_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_fields ("
+                " id TEXT NOT NULL REFERENCES cache_entries(id) ON DELETE CASCADE,"
+                " field TEXT NOT NULL,"
+                " value BLOB NOT NULL,"
+                " PRIMARY KEY (id, field))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_updated ON cache_entries(updated_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite serializes writers across threads and processes. A worker
+        # forked after the cache was created must not reuse its parent's connection.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def generate_id(self, *args, **kwargs):
+        return str(uuid.uuid4())
+
+    def set(self, id, field, value):
+        data = None if value is None else dumps(value)  # serialize before taking the write lock
+        now = time.time()
+        expires_at = None if self.ttl is None else now + self.ttl
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            new = conn.execute("SELECT 1 FROM cache_entries WHERE id = ?", (id,)).fetchone() is None
+            conn.execute(
+                "INSERT INTO cache_entries (id, updated_at, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET updated_at = excluded.updated_at, expires_at = excluded.expires_at",
+                (id, now, expires_at),
+            )
+
+            if data is None:
+                conn.execute("DELETE FROM cache_fields WHERE id = ? AND field = ?", (id, field))
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_fields (id, field, value) VALUES (?, ?, ?)",
+                    (id, field, data),
+                )
+
+            if new:
+                self._prune(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        if self.max_entries is not None:
+            evicted = conn.execute(
+                "DELETE FROM cache_entries WHERE id IN ("
+                " SELECT id FROM cache_entries ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self.evictions += max(evicted, 0)
+
+    def get(self, id, field):
+        row = self._conn().execute(
+            "SELECT f.value FROM cache_fields f JOIN cache_entries e ON e.id = f.id"
+            " WHERE f.id = ? AND f.field = ? AND (e.expires_at IS NULL OR e.expires_at > ?)",
+            (id, field, time.time()),
+        ).fetchone()
+        return None if row is None else loads(row[0])
+
+    def get_all(self, field_list) -> list:
+        conn = self._conn()
+        ids = [
+            row[0]
+            for row in conn.execute(
+                "SELECT id FROM cache_entries WHERE expires_at IS NULL OR expires_at > ? ORDER BY rowid",
+                (time.time(),),
+            )
+        ]
+        if not ids or not field_list:
+            return [{"id": id} for id in ids]
+
+        values = {}
+        marks = ",".join("?" * len(field_list))
+        for id, field, value in conn.execute(
+            f"SELECT id, field, value FROM cache_fields WHERE field IN ({marks})", list(field_list)
+        ):
+            values[(id, field)] = value
+
+        return [
+            {
+                "id": id,
+                **{
+                    field: loads(values[(id, field)]) if (id, field) in values else None
+                    for field in field_list
+                },
+            }
+            for id in ids
+        ]
+
+    def delete(self, id):
+        self._conn().execute("DELETE FROM cache_entries WHERE id = ?", (id,))
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        entries = conn.execute(
+            "SELECT count(*) FROM cache_entries WHERE expires_at IS NULL OR expires_at > ?", (time.time(),)
+        ).fetchone()[0]
+        nbytes = conn.execute("SELECT coalesce(sum(length(value)), 0) FROM cache_fields").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "bytes": nbytes,
+            "evictions": self.evictions,
+        }
@@ -48,14 +48,19 @@ flowchart
 
 """
 
+import asyncio
 import json
 import os
 import re
 import sqlite3
-import traceback
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Union
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List, Tuple, Union
 from urllib.parse import urlparse
+from uuid import uuid4
 
 import pandas as pd
 import plotly
@@ -64,10 +69,54 @@ import plotly.graph_objects as go
 import requests
 import sqlparse
 
+from kiwi.core.llm_limits import endpoint_semaphore
+from kiwi.core.pool import ConnectionPool
+from kiwi.core.result_cache import ResultCache, normalize_sql, result_nbytes
+from kiwi.core.schema_linking import SchemaIndex
+from kiwi.core.semantic_cache import SemanticCache
+from kiwi.core.sql_extract import extract_sql
+from kiwi.core.sql_stream import SqlStream
+from kiwi.core.streaming import (
+    ChunkedResult,
+    cursor_chunks,
+    dataframe_chunks,
+    describe_cursor,
+)
+from kiwi.core.token_budget import TokenBudget, make_token_counter
 from kiwi.exceptions import DependencyError, ImproperlyConfigured, ValidationError
 from kiwi.types import TrainingPlan, TrainingPlanItem
 from kiwi.utils import validate_config_path
 
+if TYPE_CHECKING:
+    import pyarrow
+
+# What generate_sql and its variants return instead of SQL when the intermediate_sql step can't be taken
+_INTERMEDIATE_SQL_NOT_ALLOWED = (
+    "The LLM is not allowed to see the data in your database. Your question requires database introspection"
+    " to generate the necessary SQL. Please set allow_llm_to_see_data=True to enable this."
+)
+_INTERMEDIATE_SQL_FAILED = "Error running intermediate SQL: {}"
+
+# init_sql statements creating connection-scoped objects, which DuckDB cursors don't inherit
+_DUCKDB_TEMP_OBJECT = re.compile(r"\s*CREATE\s+(?:OR\s+REPLACE\s+)?TEMP(?:ORARY)?\b", re.IGNORECASE)
+
+# Result column dtypes by cursor.description type code, for describe_sql. PostgreSQL type OIDs:
+# bool, int8, int2, int4, oid, float4, float8, money, numeric, timestamp and timestamptz.
+_POSTGRES_DTYPES = {
+    16: "bool",
+    20: "int64", 21: "int64", 23: "int64", 26: "int64",
+    700: "float64", 701: "float64", 790: "float64", 1700: "float64",
+    1114: "datetime64[ns]", 1184: "datetime64[ns, UTC]",
+}
+# MySQL field types: decimal, tiny, short, long, float, double, timestamp, longlong, int24, datetime,
+# year and newdecimal
+_MYSQL_DTYPES = {
+    0: "float64", 1: "int64", 2: "int64", 3: "int64", 4: "float64", 5: "float64", 7: "datetime64[ns]",
+    8: "int64", 9: "int64", 12: "datetime64[ns]", 13: "int64", 246: "float64",
+}
+# PyMySQL OperationalError codes for a lost connection: server has gone away, lost connection during query
+_MYSQL_DISCONNECT_CODES = {2006, 2013}
+
 
 class KiwiBase(ABC):
     def __init__(self, config=None):
@@ -76,10 +125,79 @@ class KiwiBase(ABC):
 
         self.config = config
         self.run_sql_is_set = False
+        self.run_sql_arrow_is_set = False
         self.static_documentation = ""
         self.dialect = self.config.get("dialect", "SQL")
         self.language = self.config.get("language", None)
         self.max_tokens = self.config.get("max_tokens", 14000)
+        # "approx", "auto", "tiktoken[:<encoding>]", "hf:<tokenizer>" or a TokenCounter instance.
+        self.token_counter = make_token_counter(self.config.get("token_counter", "approx"))
+        self.parallel_retrieval = self.config.get("parallel_retrieval", True)
+        # Threads for the retrieval lookups, shared by every request this instance serves: each question
+        # occupies up to three at once, so the default lets about ten run without queueing. Threads are only
+        # started as requests need them.
+        self.retrieval_workers = self.config.get("retrieval_workers", 32)
+        # Streaming fetch (run_sql_iter): rows per chunk and the caps after which the fetch stops and the
+        # result is marked truncated. None disables a cap.
+        self.result_chunk_rows = self.config.get("result_chunk_rows", 10000)
+        self.result_max_rows = self.config.get("result_max_rows", None)
+        self.result_max_bytes = self.config.get("result_max_bytes", 256 * 1024 * 1024)
+        self._sql_chunks = None
+        self._retrieval_executor = None
+        self._retrieval_executor_lock = threading.Lock()
+
+        # Semantic answer cache: True for defaults, a dict of SemanticCache arguments
+        # (e.g. {"threshold": 0.97, "ttl": 3600}), or a SemanticCache instance to share.
+        semantic_cache = self.config.get("semantic_cache", None)
+        if semantic_cache is None or semantic_cache is False:
+            self.semantic_cache = None
+        elif semantic_cache is True:
+            self.semantic_cache = SemanticCache()
+        elif isinstance(semantic_cache, SemanticCache):
+            self.semantic_cache = semantic_cache
+        else:
+            self.semantic_cache = SemanticCache(**semantic_cache)
+        # Identifies this instance's training data in semantic cache namespaces, unless the vector store
+        # has a location of its own; the version moves on whenever the training data changes.
+        self._training_data_token = uuid4().hex
+        self._training_data_version = 0
+
+        # Schema linking: True for defaults, a dict of SchemaIndex arguments (e.g. {"max_tables": 6}),
+        # or a SchemaIndex instance. The index is (re)built from the trained DDL on first use and
+        # after the training data changes.
+        schema_linking = self.config.get("schema_linking", None)
+        if schema_linking is None or schema_linking is False:
+            self.schema_index = None
+        elif schema_linking is True:
+            self.schema_index = SchemaIndex()
+        elif isinstance(schema_linking, SchemaIndex):
+            self.schema_index = schema_linking
+        else:
+            self.schema_index = SchemaIndex(**schema_linking)
+        # The training data version the index was last synced with
+        self._schema_index_version = None
+        self._schema_index_lock = threading.Lock()
+
+        # Query result cache: True for defaults, a dict of ResultCache arguments
+        # (e.g. {"ttl": 300, "dialect_ttls": {"Snowflake SQL": 3600}}), or a ResultCache instance to share.
+        result_cache = self.config.get("result_cache", None)
+        if result_cache is None or result_cache is False:
+            self.result_cache = None
+        elif result_cache is True:
+            self.result_cache = ResultCache()
+        elif isinstance(result_cache, ResultCache):
+            self.result_cache = result_cache
+        else:
+            self.result_cache = ResultCache(**result_cache)
+        # Identifies the database in result cache keys. Defaults to one per connect_to_* call; set it to
+        # share cached results between instances connected to the same database.
+        self.connection_id = self.config.get("connection_id", None)
+        # Stands in for connection_id in cache keys when it isn't set; every connect_to_* call draws a new one
+        self._connection_token = uuid4().hex
+        # Async LLM calls: at most `llm_concurrency` in flight per model endpoint (None for no bound),
+        # shared by every instance naming the same `llm_endpoint` (default: the chat class and model).
+        self.llm_concurrency = self.config.get("llm_concurrency", None)
+        self.llm_endpoint = self.config.get("llm_endpoint", None)
 
     def log(self, message: str, title: str = "Info"):
         print(f"{title}: {message}")
@@ -99,11 +217,10 @@ class KiwiBase(ABC):
 
         Uses the LLM to generate a SQL query that answers a question. It runs the following methods:
 
-        - [`get_similar_question_sql`][kiwi.core.base.KiwiBase.get_similar_question_sql]
-
-        - [`get_related_ddl`][kiwi.core.base.KiwiBase.get_related_ddl]
-
-        - [`get_related_documentation`][kiwi.core.base.KiwiBase.get_related_documentation]
+        - [`get_related_context`][kiwi.core.base.KiwiBase.get_related_context], which fans out to
+          [`get_similar_question_sql`][kiwi.core.base.KiwiBase.get_similar_question_sql],
+          [`get_related_ddl`][kiwi.core.base.KiwiBase.get_related_ddl] and
+          [`get_related_documentation`][kiwi.core.base.KiwiBase.get_related_documentation]
 
         - [`get_sql_prompt`][kiwi.core.base.KiwiBase.get_sql_prompt]
 
@@ -117,52 +234,499 @@ class KiwiBase(ABC):
         Returns:
             str: The SQL query that answers the question.
         """
-        if self.config is not None:
-            initial_prompt = self.config.get("initial_prompt", None)
-        else:
-            initial_prompt = None
-        question_sql_list = self.get_similar_question_sql(question, **kwargs)
-        ddl_list = self.get_related_ddl(question, **kwargs)
-        doc_list = self.get_related_documentation(question, **kwargs)
+        start = time.perf_counter()
+        namespace = self._semantic_cache_namespace()
+        embedding = self.generate_embedding(question) if self.semantic_cache is not None else None
+        cached_sql = self._semantic_cache_lookup(namespace, question, embedding)
+        if cached_sql is not None:
+            return cached_sql
+
+        context = self.get_related_context(question, embedding=embedding, **kwargs)
+        prompt = self._sql_prompt(question, context, **kwargs)
+        llm_start = time.perf_counter()
+        llm_response = self.submit_prompt(prompt, **kwargs)
+        self.log(title="LLM Response", message=llm_response)
+        self.log(title="Timings", message=f"llm: {(time.perf_counter() - llm_start) * 1000:.1f} ms")
+
+        if self._wants_intermediate_sql(llm_response):
+            if not allow_llm_to_see_data:
+                return _INTERMEDIATE_SQL_NOT_ALLOWED
+
+            intermediate_sql = self._intermediate_sql(llm_response)
+            try:
+                df = self.run_sql_cached(intermediate_sql)
+                prompt = self._sql_prompt(question, context, intermediate=(intermediate_sql, df), **kwargs)
+                llm_response = self.submit_prompt(prompt, **kwargs)
+                self.log(title="LLM Response", message=llm_response)
+            except Exception as e:
+                return _INTERMEDIATE_SQL_FAILED.format(e)
+
+        return self._finish_sql(namespace, question, embedding, llm_response, start)
+
+    async def agenerate_sql(self, question: str, allow_llm_to_see_data=False, **kwargs) -> str:
+        """
+        Example:
+        ```python
+        sql = await vn.agenerate_sql("What are the top 10 customers by sales?")
+        ```
+
+        Async counterpart of [`generate_sql`][kiwi.core.base.KiwiBase.generate_sql]. Retrieval runs through
+        [`aget_related_context`][kiwi.core.base.KiwiBase.aget_related_context] and the prompt is sent with
+        [`asubmit_prompt`][kiwi.core.base.KiwiBase.asubmit_prompt].
+
+        Args:
+            question (str): The question to generate a SQL query for.
+            allow_llm_to_see_data (bool): Whether to allow the LLM to see the data (for the purposes of introspecting the data to generate the final SQL).
+
+        Returns:
+            str: The SQL query that answers the question.
+        """
+        start = time.perf_counter()
+        namespace = self._semantic_cache_namespace()
+        embedding = await self._aembed_for_semantic_cache(question)
+        cached_sql = self._semantic_cache_lookup(namespace, question, embedding)
+        if cached_sql is not None:
+            return cached_sql
+
+        context = await self.aget_related_context(question, embedding=embedding, **kwargs)
+        prompt = self._sql_prompt(question, context, **kwargs)
+        llm_start = time.perf_counter()
+        llm_response = await self._limited_asubmit_prompt(prompt, **kwargs)
+        self.log(title="LLM Response", message=llm_response)
+        self.log(title="Timings", message=f"llm: {(time.perf_counter() - llm_start) * 1000:.1f} ms")
+
+        if self._wants_intermediate_sql(llm_response):
+            if not allow_llm_to_see_data:
+                return _INTERMEDIATE_SQL_NOT_ALLOWED
+
+            intermediate_sql = self._intermediate_sql(llm_response)
+            try:
+                df = await asyncio.to_thread(self.run_sql_cached, intermediate_sql)
+                prompt = self._sql_prompt(question, context, intermediate=(intermediate_sql, df), **kwargs)
+                llm_response = await self._limited_asubmit_prompt(prompt, **kwargs)
+                self.log(title="LLM Response", message=llm_response)
+            except Exception as e:
+                return _INTERMEDIATE_SQL_FAILED.format(e)
+
+        return self._finish_sql(namespace, question, embedding, llm_response, start)
+
+    def generate_sql_stream(self, question: str, allow_llm_to_see_data=False, **kwargs) -> Iterator[dict]:
+        """
+        Example:
+        ```python
+        for event in vn.generate_sql_stream("What are the top 10 customers by sales?"):
+            if event["type"] == "early_sql":
+                future = executor.submit(vn.run_sql, event["text"])
+        ```
+
+        Streaming variant of [`generate_sql`][kiwi.core.base.KiwiBase.generate_sql]: the prompt is sent with
+        [`submit_prompt_stream`][kiwi.core.base.KiwiBase.submit_prompt_stream] and events are yielded as the
+        response arrives:
+
+        - ``{"type": "token", "text": ...}`` for each piece of the response.
+        - ``{"type": "early_sql", "text": ...}`` once, as soon as a complete statement can be extracted, so it
+          can be run before the model finishes any trailing explanation.
+        - ``{"type": "intermediate_sql", "text": ...}`` when the model asked to inspect the data first; the
+          tokens of the second response follow.
+        - ``{"type": "sql", "text": ...}`` last, with what `generate_sql` would have returned.
+
+        Args:
+            question (str): The question to generate a SQL query for.
+            allow_llm_to_see_data (bool): Whether to allow the LLM to see the data (for the purposes of introspecting the data to generate the final SQL).
+
+        Returns:
+            Iterator[dict]: The events.
+        """
+        start = time.perf_counter()
+        namespace = self._semantic_cache_namespace()
+        embedding = self.generate_embedding(question) if self.semantic_cache is not None else None
+        cached_sql = self._semantic_cache_lookup(namespace, question, embedding)
+        if cached_sql is not None:
+            yield {"type": "sql", "text": cached_sql}
+            return
+
+        context = self.get_related_context(question, embedding=embedding, **kwargs)
+        prompt = self._sql_prompt(question, context, **kwargs)
+        llm_response = yield from self._stream_sql_response(prompt, **kwargs)
+
+        if self._wants_intermediate_sql(llm_response):
+            if not allow_llm_to_see_data:
+                yield {"type": "sql", "text": _INTERMEDIATE_SQL_NOT_ALLOWED}
+                return
+
+            intermediate_sql = self._intermediate_sql(llm_response)
+            yield {"type": "intermediate_sql", "text": intermediate_sql}
+            try:
+                df = self.run_sql_cached(intermediate_sql)
+                prompt = self._sql_prompt(question, context, intermediate=(intermediate_sql, df), **kwargs)
+            except Exception as e:
+                yield {"type": "sql", "text": _INTERMEDIATE_SQL_FAILED.format(e)}
+                return
+
+            llm_response = yield from self._stream_sql_response(prompt, **kwargs)
+
+        yield {"type": "sql", "text": self._finish_sql(namespace, question, embedding, llm_response, start)}
+
+    async def agenerate_sql_stream(self, question: str, allow_llm_to_see_data=False, **kwargs) -> AsyncIterator[dict]:
+        """
+        Example:
+        ```python
+        async for event in vn.agenerate_sql_stream("What are the top 10 customers by sales?"):
+            print(event)
+        ```
+
+        Async counterpart of [`generate_sql_stream`][kiwi.core.base.KiwiBase.generate_sql_stream], yielding the
+        same events. Retrieval runs through [`aget_related_context`][kiwi.core.base.KiwiBase.aget_related_context]
+        and the prompt is streamed with [`asubmit_prompt_stream`][kiwi.core.base.KiwiBase.asubmit_prompt_stream].
+
+        Args:
+            question (str): The question to generate a SQL query for.
+            allow_llm_to_see_data (bool): Whether to allow the LLM to see the data (for the purposes of introspecting the data to generate the final SQL).
+
+        Returns:
+            AsyncIterator[dict]: The events.
+        """
+        start = time.perf_counter()
+        namespace = self._semantic_cache_namespace()
+        embedding = await self._aembed_for_semantic_cache(question)
+        cached_sql = self._semantic_cache_lookup(namespace, question, embedding)
+        if cached_sql is not None:
+            yield {"type": "sql", "text": cached_sql}
+            return
+
+        context = await self.aget_related_context(question, embedding=embedding, **kwargs)
+        prompt = self._sql_prompt(question, context, **kwargs)
+        stream = SqlStream()
+        async for token in self._limited_asubmit_prompt_stream(prompt, **kwargs):
+            for event in stream.feed(token):
+                yield event
+        llm_response = stream.text
+        self.log(title="LLM Response", message=llm_response)
+
+        if self._wants_intermediate_sql(llm_response):
+            if not allow_llm_to_see_data:
+                yield {"type": "sql", "text": _INTERMEDIATE_SQL_NOT_ALLOWED}
+                return
+
+            intermediate_sql = self._intermediate_sql(llm_response)
+            yield {"type": "intermediate_sql", "text": intermediate_sql}
+            try:
+                df = await asyncio.to_thread(self.run_sql_cached, intermediate_sql)
+                prompt = self._sql_prompt(question, context, intermediate=(intermediate_sql, df), **kwargs)
+            except Exception as e:
+                yield {"type": "sql", "text": _INTERMEDIATE_SQL_FAILED.format(e)}
+                return
+
+            stream = SqlStream()
+            async for token in self._limited_asubmit_prompt_stream(prompt, **kwargs):
+                for event in stream.feed(token):
+                    yield event
+            llm_response = stream.text
+            self.log(title="LLM Response", message=llm_response)
+
+        yield {"type": "sql", "text": self._finish_sql(namespace, question, embedding, llm_response, start)}
+
+    # Steps shared by generate_sql, agenerate_sql, generate_sql_stream and agenerate_sql_stream
+
+    async def _aembed_for_semantic_cache(self, question: str):
+        if self.semantic_cache is None:
+            return None
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_retrieval_executor(), self.generate_embedding, question
+        )
+
+    def _sql_prompt(self, question: str, context: Tuple[list, list, list], intermediate=None, **kwargs):
+        # `intermediate` is the (SQL, DataFrame) of an intermediate query, whose result goes into the prompt
+        question_sql_list, ddl_list, doc_list = context
+        if intermediate is not None:
+            intermediate_sql, df = intermediate
+            doc_list = doc_list + [
+                f"The following is a pandas DataFrame with the results of the intermediate SQL query {intermediate_sql}: \n"
+                + df.to_markdown()
+            ]
         prompt = self.get_sql_prompt(
-            initial_prompt=initial_prompt,
+            initial_prompt=self.config.get("initial_prompt", None) if self.config is not None else None,
             question=question,
             question_sql_list=question_sql_list,
             ddl_list=ddl_list,
             doc_list=doc_list,
             **kwargs,
         )
-        self.log(title="SQL Prompt", message=prompt)
-        llm_response = self.submit_prompt(prompt, **kwargs)
-        self.log(title="LLM Response", message=llm_response)
+        self.log(title="SQL Prompt" if intermediate is None else "Final SQL Prompt", message=prompt)
+        return prompt
+
+    def _stream_sql_response(self, prompt, **kwargs) -> Iterator[dict]:
+        # Yields the events of one streamed response and returns its text
+        stream = SqlStream()
+        for token in self.submit_prompt_stream(prompt, **kwargs):
+            yield from stream.feed(token)
+        self.log(title="LLM Response", message=stream.text)
+        return stream.text
+
+    @staticmethod
+    def _wants_intermediate_sql(llm_response: str) -> bool:
+        return "intermediate_sql" in llm_response
+
+    def _intermediate_sql(self, llm_response: str) -> str:
+        intermediate_sql = self.extract_sql(llm_response)
+        self.log(title="Running Intermediate SQL", message=intermediate_sql)
+        return intermediate_sql
+
+    def _finish_sql(self, namespace: str, question: str, embedding, llm_response: str, start: float) -> str:
+        sql = self.extract_sql(llm_response)
+        self._semantic_cache_add(namespace, question, embedding, sql, start)
+        return sql
+
+    def _training_data_id(self) -> str:
+        """
+        Identifies the store holding the training data. Vector stores that persist to a location other
+        instances can open override this, so instances trained from the same store can share answers.
+        """
+        return self._training_data_token
 
-        if 'intermediate_sql' in llm_response:
-            if not allow_llm_to_see_data:
-                return "The LLM is not allowed to see the data in your database. Your question requires database introspection to generate the necessary SQL. Please set allow_llm_to_see_data=True to enable this."
+    def _semantic_cache_namespace(self) -> str:
+        # Cached SQL only answers the same question against the same database, with the same training data
+        # in the prompt. Generations read the namespace when they start, so one still running when the
+        # training data changes can't cache its answer under the new version.
+        database = self.connection_id or self._connection_token
+        return f"{self.dialect}:{database}:{self._training_data_id()}:{self._training_data_version}"
 
-            if allow_llm_to_see_data:
-                intermediate_sql = self.extract_sql(llm_response)
+    def _semantic_cache_lookup(self, namespace: str, question: str, embedding) -> Union[str, None]:
+        if self.semantic_cache is None or embedding is None:
+            return None
 
-                try:
-                    self.log(title="Running Intermediate SQL", message=intermediate_sql)
-                    df = self.run_sql(intermediate_sql)
-
-                    prompt = self.get_sql_prompt(
-                        initial_prompt=initial_prompt,
-                        question=question,
-                        question_sql_list=question_sql_list,
-                        ddl_list=ddl_list,
-                        doc_list=doc_list+[f"The following is a pandas DataFrame with the results of the intermediate SQL query {intermediate_sql}: \n" + df.to_markdown()],
-                        **kwargs,
+        hit = self.semantic_cache.lookup(namespace, embedding)
+        if hit is None:
+            return None
+
+        self.log(
+            title="Semantic Cache Hit",
+            message=f"'{question}' matched '{hit.question}' (similarity {hit.similarity:.3f})",
+        )
+        return hit.sql
+
+    def _semantic_cache_add(self, namespace: str, question: str, embedding, sql: str, start: float):
+        if self.semantic_cache is None or embedding is None or not self.is_sql_valid(sql):
+            return
+
+        self.semantic_cache.add(
+            namespace,
+            question=question,
+            embedding=embedding,
+            sql=sql,
+            generation_ms=(time.perf_counter() - start) * 1000,
+        )
+
+    def _training_data_changed(self):
+        """
+        Called by vector stores after DDL or documentation is added, or any training data is removed.
+        Cached answers were generated against the old schema context, so this instance's namespace is dropped;
+        other instances sharing the cache keep theirs.
+        """
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate(self._semantic_cache_namespace())
+        self._training_data_version += 1
+
+    def link_schema(self, question: str, ddl_list: list) -> list:
+        """
+        Example:
+        ```python
+        vn.link_schema("Total revenue by customer nation", vn.get_related_ddl("Total revenue by customer nation"))
+        ```
+
+        Prunes retrieved DDL to the tables relevant to a question, plus the tables needed to join them, using
+        the [`SchemaIndex`][kiwi.core.schema_linking.SchemaIndex] enabled by the `schema_linking` config option.
+        Returns `ddl_list` unchanged when schema linking is off.
+
+        Args:
+            question (str): The question being answered.
+            ddl_list (list): DDL returned by [`get_related_ddl`][kiwi.core.base.KiwiBase.get_related_ddl], best first.
+
+        Returns:
+            list: The DDL to put in the prompt.
+        """
+        if self.schema_index is None:
+            return ddl_list
+
+        if self._schema_index_version != self._training_data_version:
+            with self._schema_index_lock:
+                version = self._training_data_version
+                if self._schema_index_version != version:
+                    df = self.get_training_data()
+                    if len(df) > 0 and "training_data_type" in df.columns:
+                        ddl = df[df["training_data_type"] == "ddl"]["content"].tolist()
+                    else:
+                        ddl = []
+                    self.schema_index.sync(ddl)
+                    # Only once the sync succeeded; a failed one is retried on the next question
+                    self._schema_index_version = version
+
+        return self.schema_index.link(question, ddl_list)
+
+    def get_cache_stats(self) -> dict:
+        """
+        Example:
+        ```python
+        vn.get_cache_stats()
+        ```
+
+        Statistics for the caches this instance uses, keyed by cache name.
+
+        Returns:
+            dict: Cache name to that cache's statistics.
+        """
+        stats = {}
+        if self.semantic_cache is not None:
+            stats["semantic_cache"] = self.semantic_cache.stats()
+        if self.result_cache is not None:
+            stats["result_cache"] = self.result_cache.stats()
+        stats["token_counter"] = self.token_counter.stats()
+        return stats
+
+    def _create_connection_pool(self, connect, **kwargs) -> ConnectionPool:
+        # Replaces the pool of any previous connect_to_* call, so reconnecting doesn't leak connections.
+        previous = getattr(self, "connection_pool", None)
+        pool = ConnectionPool(connect, **kwargs)
+        if pool.min_size == 0:
+            # Fail fast on bad credentials even when nothing is opened up front
+            with pool.connection():
+                pass
+        if previous is not None:
+            previous.close()
+        self.connection_pool = pool
+        return pool
+
+    def get_pool_stats(self) -> dict:
+        """
+        Example:
+        ```python
+        vn.get_pool_stats()
+        ```
+
+        Statistics for the database connection pool set up by a pooled `connect_to_*` method, such as
+        [`connect_to_postgres`][kiwi.core.base.KiwiBase.connect_to_postgres]: size, connections in use,
+        current and time-averaged utilization, checkout wait times, timeouts and reconnects.
+
+        Returns:
+            dict: The pool statistics, or an empty dict when the connection isn't pooled.
+        """
+        pool = getattr(self, "connection_pool", None)
+        return pool.stats() if pool is not None else {}
+
+    def _get_retrieval_executor(self) -> ThreadPoolExecutor:
+        if self._retrieval_executor is None:
+            with self._retrieval_executor_lock:
+                if self._retrieval_executor is None:
+                    self._retrieval_executor = ThreadPoolExecutor(
+                        max_workers=self.retrieval_workers,
+                        thread_name_prefix="kiwi-retrieval",
                     )
-                    self.log(title="Final SQL Prompt", message=prompt)
-                    llm_response = self.submit_prompt(prompt, **kwargs)
-                    self.log(title="LLM Response", message=llm_response)
-                except Exception as e:
-                    return f"Error running intermediate SQL: {e}"
+        return self._retrieval_executor
 
+    def _retrieval_stages(self) -> list:
+        return [
+            ("sql", self.get_similar_question_sql),
+            ("ddl", self.get_related_ddl),
+            ("documentation", self.get_related_documentation),
+        ]
+
+    @staticmethod
+    def _timed(fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        return result, (time.perf_counter() - start) * 1000
+
+    def _log_retrieval_timings(self, timings: dict):
+        self.log(
+            title="Retrieval Timings",
+            message=", ".join(f"{stage}: {ms:.1f} ms" for stage, ms in timings.items()),
+        )
 
-        return self.extract_sql(llm_response)
+    def get_related_context(self, question: str, embedding=None, **kwargs) -> Tuple[list, list, list]:
+        """
+        Example:
+        ```python
+        question_sql_list, ddl_list, doc_list = vn.get_related_context("What are the top 10 customers by sales?")
+        ```
+
+        Retrieval stage of [`generate_sql`][kiwi.core.base.KiwiBase.generate_sql]. Embeds the question once with
+        [`generate_embedding`][kiwi.core.base.KiwiBase.generate_embedding] and passes it to the three lookups as
+        the `embedding` keyword argument, so vector stores that accept it don't embed the question again.
+        An embedding the caller already has can be passed in instead.
+        The lookups run concurrently on a thread pool of `retrieval_workers` threads (32 by default) unless the
+        `parallel_retrieval` config option is False.
+        With the `schema_linking` config option, the DDL is then pruned by [`link_schema`][kiwi.core.base.KiwiBase.link_schema].
+
+        Args:
+            question (str): The question to retrieve context for.
+            embedding (list, optional): The embedding of the question, if already computed.
+
+        Returns:
+            Tuple[list, list, list]: Similar question/SQL pairs, related DDL and related documentation.
+        """
+        start = time.perf_counter()
+        timings = {}
+        if embedding is None:
+            embedding, timings["embed"] = self._timed(self.generate_embedding, question)
+        stages = self._retrieval_stages()
+
+        if self.parallel_retrieval:
+            executor = self._get_retrieval_executor()
+            futures = [
+                executor.submit(self._timed, fn, question, embedding=embedding, **kwargs)
+                for _, fn in stages
+            ]
+            outcomes = [future.result() for future in futures]
+        else:
+            outcomes = [self._timed(fn, question, embedding=embedding, **kwargs) for _, fn in stages]
+
+        for (stage, _), (_, ms) in zip(stages, outcomes):
+            timings[stage] = ms
+        question_sql_list, ddl_list, doc_list = (result for result, _ in outcomes)
+
+        if self.schema_index is not None:
+            ddl_list, timings["schema_linking"] = self._timed(self.link_schema, question, ddl_list)
+        timings["total"] = (time.perf_counter() - start) * 1000
+        self._log_retrieval_timings(timings)
+
+        return question_sql_list, ddl_list, doc_list
+
+    async def aget_related_context(self, question: str, embedding=None, **kwargs) -> Tuple[list, list, list]:
+        """
+        Async counterpart of [`get_related_context`][kiwi.core.base.KiwiBase.get_related_context]. The three
+        lookups are awaited concurrently on the retrieval thread pool.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_retrieval_executor()
+        start = time.perf_counter()
+
+        timings = {}
+        if embedding is None:
+            embedding, timings["embed"] = await loop.run_in_executor(
+                executor, self._timed, self.generate_embedding, question
+            )
+        stages = self._retrieval_stages()
+        outcomes = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    executor, lambda fn=fn: self._timed(fn, question, embedding=embedding, **kwargs)
+                )
+                for _, fn in stages
+            )
+        )
+
+        for (stage, _), (_, ms) in zip(stages, outcomes):
+            timings[stage] = ms
+        question_sql_list, ddl_list, doc_list = (result for result, _ in outcomes)
+
+        if self.schema_index is not None:
+            ddl_list, timings["schema_linking"] = await loop.run_in_executor(
+                executor, self._timed, self.link_schema, question, ddl_list
+            )
+        timings["total"] = (time.perf_counter() - start) * 1000
+        self._log_retrieval_timings(timings)
+
+        return question_sql_list, ddl_list, doc_list
 
     def extract_sql(self, llm_response: str) -> str:
         """
@@ -174,6 +738,11 @@ class KiwiBase(ABC):
         Extracts the SQL query from the LLM response. This is useful in case the LLM response contains other information besides the SQL query.
         Override this function if your LLM responses need custom extraction logic.
 
+        The first of these that matches wins: the last CREATE TABLE ... AS ...; statement, the last
+        WITH ...; statement, the last SELECT ...; statement, the last ```sql block, the last code block.
+        Otherwise the response is returned as is. The response is tokenized in a single pass (see
+        [`SqlExtractor`][kiwi.core.sql_extract.SqlExtractor]).
+
         Args:
             llm_response (str): The LLM response.
 
@@ -181,51 +750,11 @@ class KiwiBase(ABC):
             str: The extracted SQL query.
         """
 
-        import re
-        """
-        Extracts the SQL query from the LLM response, handling various formats including:
-        - WITH clause
-        - SELECT statement
-        - CREATE TABLE AS SELECT
-        - Markdown code blocks
-        """
-
-        # Match CREATE TABLE ... AS SELECT
-        sqls = re.findall(r"\bCREATE\s+TABLE\b.*?\bAS\b.*?;", llm_response, re.DOTALL | re.IGNORECASE)
-        if sqls:
-            sql = sqls[-1]
-            self.log(title="Extracted SQL", message=f"{sql}")
-            return sql
-
-        # Match WITH clause (CTEs)
-        sqls = re.findall(r"\bWITH\b .*?;", llm_response, re.DOTALL | re.IGNORECASE)
-        if sqls:
-            sql = sqls[-1]
-            self.log(title="Extracted SQL", message=f"{sql}")
-            return sql
-
-        # Match SELECT ... ;
-        sqls = re.findall(r"\bSELECT\b .*?;", llm_response, re.DOTALL | re.IGNORECASE)
-        if sqls:
-            sql = sqls[-1]
-            self.log(title="Extracted SQL", message=f"{sql}")
-            return sql
-
-        # Match ```sql ... ``` blocks
-        sqls = re.findall(r"```sql\s*\n(.*?)```", llm_response, re.DOTALL | re.IGNORECASE)
-        if sqls:
-            sql = sqls[-1].strip()
-            self.log(title="Extracted SQL", message=f"{sql}")
-            return sql
-
-        # Match any ``` ... ``` code blocks
-        sqls = re.findall(r"```(.*?)```", llm_response, re.DOTALL | re.IGNORECASE)
-        if sqls:
-            sql = sqls[-1].strip()
-            self.log(title="Extracted SQL", message=f"{sql}")
-            return sql
-
-        return llm_response
+        sql = extract_sql(llm_response)
+        if sql is None:
+            return llm_response
+        self.log(title="Extracted SQL", message=f"{sql}")
+        return sql
 
     def is_sql_valid(self, sql: str) -> bool:
         """
@@ -262,12 +791,18 @@ class KiwiBase(ABC):
         You can override this method to customize the logic for generating charts.
 
         Args:
-            df (pd.DataFrame): The DataFrame to check.
+            df (pd.DataFrame): The DataFrame (or `pyarrow.Table`) to check.
 
         Returns:
             bool: True if a chart should be generated, False otherwise.
         """
 
+        if hasattr(df, "schema"):  # pyarrow.Table
+            import pyarrow.types as pat
+
+            numeric = [pat.is_integer, pat.is_floating, pat.is_decimal]
+            return df.num_rows > 1 and any(any(is_type(f.type) for is_type in numeric) for f in df.schema)
+
         if len(df) > 1 and df.select_dtypes(include=['number']).shape[1] > 0:
             return True
 
@@ -293,13 +828,23 @@ class KiwiBase(ABC):
         if last_question is None:
             return new_question
 
-        prompt = [
+        return self.submit_prompt(prompt=self._rewritten_question_prompt(last_question, new_question), **kwargs)
+
+    async def agenerate_rewritten_question(self, last_question: str, new_question: str, **kwargs) -> str:
+        """
+        Async counterpart of [`generate_rewritten_question`][kiwi.core.base.KiwiBase.generate_rewritten_question].
+        """
+        if last_question is None:
+            return new_question
+
+        return await self._limited_asubmit_prompt(self._rewritten_question_prompt(last_question, new_question), **kwargs)
+
+    def _rewritten_question_prompt(self, last_question: str, new_question: str) -> list:
+        return [
             self.system_message("Your goal is to combine a sequence of questions into a singular question if they are related. If the second question does not relate to the first question and is fully self-contained, return the second question. Return just the new combined question with no additional explanations. The question should theoretically be answerable with a single SQL statement."),
             self.user_message("First question: " + last_question + "\nSecond question: " + new_question),
         ]
 
-        return self.submit_prompt(prompt=prompt, **kwargs)
-
     def generate_followup_questions(
         self, question: str, sql: str, df: pd.DataFrame, n_questions: int = 5, **kwargs
     ) -> list:
@@ -321,7 +866,24 @@ class KiwiBase(ABC):
             list: A list of followup questions that you can ask Kiwi.AI.
         """
 
-        message_log = [
+        llm_response = self.submit_prompt(self._followup_questions_prompt(question, sql, df, n_questions), **kwargs)
+
+        return self._parse_followup_questions(llm_response)
+
+    async def agenerate_followup_questions(
+        self, question: str, sql: str, df: pd.DataFrame, n_questions: int = 5, **kwargs
+    ) -> list:
+        """
+        Async counterpart of [`generate_followup_questions`][kiwi.core.base.KiwiBase.generate_followup_questions].
+        """
+        llm_response = await self._limited_asubmit_prompt(
+            self._followup_questions_prompt(question, sql, df, n_questions), **kwargs
+        )
+
+        return self._parse_followup_questions(llm_response)
+
+    def _followup_questions_prompt(self, question: str, sql: str, df: pd.DataFrame, n_questions: int) -> list:
+        return [
             self.system_message(
                 f"You are a helpful data assistant. The user asked the question: '{question}'\n\nThe SQL query for this question was: {sql}\n\nThe following is a pandas DataFrame with the results of the query: \n{df.head(25).to_markdown()}\n\n"
             ),
@@ -331,8 +893,8 @@ class KiwiBase(ABC):
             ),
         ]
 
-        llm_response = self.submit_prompt(message_log, **kwargs)
-
+    @staticmethod
+    def _parse_followup_questions(llm_response: str) -> list:
         numbers_removed = re.sub(r"^\d+\.\s*", "", llm_response, flags=re.MULTILINE)
         return numbers_removed.split("\n")
 
@@ -366,7 +928,31 @@ class KiwiBase(ABC):
             str: The summary of the results of the SQL query.
         """
 
-        message_log = [
+        summary = self.submit_prompt(self._summary_prompt(question, df), **kwargs)
+
+        return summary
+
+    async def agenerate_summary(self, question: str, df: pd.DataFrame, **kwargs) -> str:
+        """
+        **Example:**
+        ```python
+        summary = await vn.agenerate_summary("What are the top 10 customers by sales?", df)
+        ```
+
+        Async counterpart of [`generate_summary`][kiwi.core.base.KiwiBase.generate_summary]. The prompt is sent
+        with [`asubmit_prompt`][kiwi.core.base.KiwiBase.asubmit_prompt], within the `llm_concurrency` bound.
+
+        Args:
+            question (str): The question that was asked.
+            df (pd.DataFrame): The results of the SQL query.
+
+        Returns:
+            str: The summary of the results of the SQL query.
+        """
+        return await self._limited_asubmit_prompt(self._summary_prompt(question, df), **kwargs)
+
+    def _summary_prompt(self, question: str, df: pd.DataFrame) -> list:
+        return [
             self.system_message(
                 f"You are a helpful data assistant. The user asked the question: '{question}'\n\nThe following is a pandas DataFrame with the results of the query: \n{df.to_markdown()}\n\n"
             ),
@@ -376,9 +962,32 @@ class KiwiBase(ABC):
             ),
         ]
 
-        summary = self.submit_prompt(message_log, **kwargs)
+    def generate_summary_stream(self, question: str, df: pd.DataFrame, **kwargs) -> Iterator[str]:
+        """
+        **Example:**
+        ```python
+        for token in vn.generate_summary_stream("What are the top 10 customers by sales?", df):
+            print(token, end="")
+        ```
 
-        return summary
+        Streaming variant of [`generate_summary`][kiwi.core.base.KiwiBase.generate_summary], yielding the summary
+        as the LLM writes it.
+
+        Args:
+            question (str): The question that was asked.
+            df (pd.DataFrame): The results of the SQL query.
+
+        Returns:
+            Iterator[str]: The pieces of the summary.
+        """
+        yield from self.submit_prompt_stream(self._summary_prompt(question, df), **kwargs)
+
+    async def agenerate_summary_stream(self, question: str, df: pd.DataFrame, **kwargs) -> AsyncIterator[str]:
+        """
+        Async counterpart of [`generate_summary_stream`][kiwi.core.base.KiwiBase.generate_summary_stream].
+        """
+        async for token in self._limited_asubmit_prompt_stream(self._summary_prompt(question, df), **kwargs):
+            yield token
 
     # ----------------- Use Any Embeddings API ----------------- #
     @abstractmethod
@@ -465,6 +1074,59 @@ class KiwiBase(ABC):
         """
         pass
 
+    def add_question_sql_batch(
+        self, question_sql_list: List[dict], batch_size: int = None, **kwargs
+    ) -> List[str]:
+        """
+        Example:
+        ```python
+        vn.add_question_sql_batch([{"question": "How many customers are there?", "sql": "SELECT COUNT(*) FROM customers"}])
+        ```
+
+        Adds many question/SQL pairs to the training data. The default implementation calls
+        [`add_question_sql`][kiwi.core.base.KiwiBase.add_question_sql] once per pair; vector stores
+        that can embed and write in bulk should override it.
+
+        Args:
+            question_sql_list (List[dict]): Dicts with "question" and "sql" keys.
+            batch_size (int): How many items to embed and write per round trip. Ignored by the default implementation.
+
+        Returns:
+            List[str]: The IDs of the training data that was added, in input order.
+        """
+        return [
+            self.add_question_sql(question=item["question"], sql=item["sql"], **kwargs)
+            for item in question_sql_list
+        ]
+
+    def add_ddl_batch(self, ddl_list: List[str], batch_size: int = None, **kwargs) -> List[str]:
+        """
+        Adds many DDL statements to the training data. See [`add_question_sql_batch`][kiwi.core.base.KiwiBase.add_question_sql_batch].
+
+        Args:
+            ddl_list (List[str]): The DDL statements to add.
+            batch_size (int): How many items to embed and write per round trip.
+
+        Returns:
+            List[str]: The IDs of the training data that was added, in input order.
+        """
+        return [self.add_ddl(ddl, **kwargs) for ddl in ddl_list]
+
+    def add_documentation_batch(
+        self, documentation_list: List[str], batch_size: int = None, **kwargs
+    ) -> List[str]:
+        """
+        Adds many documentation strings to the training data. See [`add_question_sql_batch`][kiwi.core.base.KiwiBase.add_question_sql_batch].
+
+        Args:
+            documentation_list (List[str]): The documentation to add.
+            batch_size (int): How many items to embed and write per round trip.
+
+        Returns:
+            List[str]: The IDs of the training data that was added, in input order.
+        """
+        return [self.add_documentation(doc, **kwargs) for doc in documentation_list]
+
     @abstractmethod
     def get_training_data(self, **kwargs) -> pd.DataFrame:
         """
@@ -513,58 +1175,71 @@ class KiwiBase(ABC):
         pass
 
     def str_to_approx_token_count(self, string: str) -> int:
-        return len(string) / 4
+        return self.token_counter.count(string)
 
-    def add_ddl_to_prompt(
-        self, initial_prompt: str, ddl_list: list[str], max_tokens: int = 14000
+    def new_token_budget(self, max_tokens: int = None) -> TokenBudget:
+        """
+        Start a running token total for one prompt, counted with the `token_counter` config option.
+
+        Args:
+            max_tokens (int): Budget for the prompt. Defaults to the `max_tokens` config option.
+
+        Returns:
+            TokenBudget: An empty budget.
+        """
+        return TokenBudget(self.token_counter, self.max_tokens if max_tokens is None else max_tokens)
+
+    def _add_section_to_prompt(
+        self, initial_prompt: str, header: str, chunks: List[str], max_tokens: int, budget: TokenBudget
     ) -> str:
-        if len(ddl_list) > 0:
-            initial_prompt += "\n===Tables \n"
-
-            for ddl in ddl_list:
-                if (
-                    self.str_to_approx_token_count(initial_prompt)
-                    + self.str_to_approx_token_count(ddl)
-                    < max_tokens
-                ):
-                    initial_prompt += f"{ddl}\n\n"
+        if len(chunks) == 0:
+            return initial_prompt
+
+        if budget is None:
+            budget = self.new_token_budget(max_tokens)
+            budget.add(initial_prompt)
+        budget.add(header)
 
-        return initial_prompt
+        chosen = budget.pack(chunks)
+        return initial_prompt + header + "".join(chunks[i] for i in chosen)
+
+    def add_ddl_to_prompt(
+        self, initial_prompt: str, ddl_list: list[str], max_tokens: int = 14000, budget: TokenBudget = None
+    ) -> str:
+        """
+        Appends the DDL that fits in the token budget, chosen by relevance per token. `ddl_list` is ordered
+        best first. Pass the same `budget` to several `add_*_to_prompt` calls to share one running total
+        across sections; without it, a budget of `max_tokens` is started from `initial_prompt`.
+        """
+        return self._add_section_to_prompt(
+            initial_prompt, "\n===Tables \n", [f"{ddl}\n\n" for ddl in ddl_list], max_tokens, budget
+        )
 
     def add_documentation_to_prompt(
         self,
         initial_prompt: str,
         documentation_list: list[str],
         max_tokens: int = 14000,
+        budget: TokenBudget = None,
     ) -> str:
-        if len(documentation_list) > 0:
-            initial_prompt += "\n===Additional Context \n\n"
-
-            for documentation in documentation_list:
-                if (
-                    self.str_to_approx_token_count(initial_prompt)
-                    + self.str_to_approx_token_count(documentation)
-                    < max_tokens
-                ):
-                    initial_prompt += f"{documentation}\n\n"
-
-        return initial_prompt
+        return self._add_section_to_prompt(
+            initial_prompt,
+            "\n===Additional Context \n\n",
+            [f"{documentation}\n\n" for documentation in documentation_list],
+            max_tokens,
+            budget,
+        )
 
     def add_sql_to_prompt(
-        self, initial_prompt: str, sql_list: list[str], max_tokens: int = 14000
+        self, initial_prompt: str, sql_list: list[str], max_tokens: int = 14000, budget: TokenBudget = None
     ) -> str:
-        if len(sql_list) > 0:
-            initial_prompt += "\n===Question-SQL Pairs\n\n"
-
-            for question in sql_list:
-                if (
-                    self.str_to_approx_token_count(initial_prompt)
-                    + self.str_to_approx_token_count(question["sql"])
-                    < max_tokens
-                ):
-                    initial_prompt += f"{question['question']}\n{question['sql']}\n\n"
-
-        return initial_prompt
+        return self._add_section_to_prompt(
+            initial_prompt,
+            "\n===Question-SQL Pairs\n\n",
+            [f"{question['question']}\n{question['sql']}\n\n" for question in sql_list],
+            max_tokens,
+            budget,
+        )
 
     def get_sql_prompt(
         self,
@@ -603,15 +1278,18 @@ class KiwiBase(ABC):
             initial_prompt = f"You are a {self.dialect} expert. " + \
             "Please help to generate a SQL query to answer the question. Your response should ONLY be based on the given context and follow the response guidelines and format instructions. "
 
+        budget = self.new_token_budget()
+        budget.add(initial_prompt)
+
         initial_prompt = self.add_ddl_to_prompt(
-            initial_prompt, ddl_list, max_tokens=self.max_tokens
+            initial_prompt, ddl_list, max_tokens=self.max_tokens, budget=budget
         )
 
         if self.static_documentation != "":
             doc_list.append(self.static_documentation)
 
         initial_prompt = self.add_documentation_to_prompt(
-            initial_prompt, doc_list, max_tokens=self.max_tokens
+            initial_prompt, doc_list, max_tokens=self.max_tokens, budget=budget
         )
 
         initial_prompt += (
@@ -648,16 +1326,19 @@ class KiwiBase(ABC):
     ) -> list:
         initial_prompt = f"The user initially asked the question: '{question}': \n\n"
 
+        budget = self.new_token_budget()
+        budget.add(initial_prompt)
+
         initial_prompt = self.add_ddl_to_prompt(
-            initial_prompt, ddl_list, max_tokens=self.max_tokens
+            initial_prompt, ddl_list, max_tokens=self.max_tokens, budget=budget
         )
 
         initial_prompt = self.add_documentation_to_prompt(
-            initial_prompt, doc_list, max_tokens=self.max_tokens
+            initial_prompt, doc_list, max_tokens=self.max_tokens, budget=budget
         )
 
         initial_prompt = self.add_sql_to_prompt(
-            initial_prompt, question_sql_list, max_tokens=self.max_tokens
+            initial_prompt, question_sql_list, max_tokens=self.max_tokens, budget=budget
         )
 
         message_log = [self.system_message(initial_prompt)]
@@ -682,15 +1363,87 @@ class KiwiBase(ABC):
         )
         ```
 
-        This method is used to submit a prompt to the LLM.
+        This method is used to submit a prompt to the LLM.
+
+        Args:
+            prompt (any): The prompt to submit to the LLM.
+
+        Returns:
+            str: The response from the LLM.
+        """
+        pass
+
+    async def asubmit_prompt(self, prompt, **kwargs) -> str:
+        """
+        Async counterpart of [`submit_prompt`][kiwi.core.base.KiwiBase.submit_prompt]. The default
+        implementation runs `submit_prompt` in a worker thread; LLM integrations with a native async
+        client should override it.
+        """
+        return await asyncio.to_thread(self.submit_prompt, prompt, **kwargs)
+
+    def submit_prompt_stream(self, prompt, **kwargs) -> Iterator[str]:
+        """
+        Example:
+        ```python
+        for token in vn.submit_prompt_stream([vn.user_message("Hello")]):
+            print(token, end="")
+        ```
+
+        Streaming variant of [`submit_prompt`][kiwi.core.base.KiwiBase.submit_prompt], yielding the response as
+        it is generated. The default implementation yields the whole `submit_prompt` response at once; LLM
+        integrations that can stream should override it.
 
         Args:
             prompt (any): The prompt to submit to the LLM.
 
         Returns:
-            str: The response from the LLM.
+            Iterator[str]: The pieces of the response.
         """
-        pass
+        yield self.submit_prompt(prompt, **kwargs)
+
+    async def asubmit_prompt_stream(self, prompt, **kwargs) -> AsyncIterator[str]:
+        """
+        Async counterpart of [`submit_prompt_stream`][kiwi.core.base.KiwiBase.submit_prompt_stream]. The default
+        implementation iterates `submit_prompt_stream` in a worker thread; LLM integrations with a native async
+        client should override it.
+        """
+        iterator = iter(self.submit_prompt_stream(prompt, **kwargs))
+        done = object()
+        try:
+            while True:
+                token = await asyncio.to_thread(next, iterator, done)
+                if token is done:
+                    break
+                yield token
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except ValueError:
+                    pass  # cancelled while the worker thread is still inside next()
+
+    def _llm_endpoint_key(self) -> str:
+        """Default name of the model endpoint for `llm_concurrency`; chat classes add their model and server."""
+        return type(self).__name__
+
+    @asynccontextmanager
+    async def _llm_slot(self):
+        if self.llm_concurrency is None:
+            yield
+            return
+        async with endpoint_semaphore(self.llm_endpoint or self._llm_endpoint_key(), self.llm_concurrency):
+            yield
+
+    async def _limited_asubmit_prompt(self, prompt, **kwargs) -> str:
+        async with self._llm_slot():
+            return await self.asubmit_prompt(prompt, **kwargs)
+
+    async def _limited_asubmit_prompt_stream(self, prompt, **kwargs) -> AsyncIterator[str]:
+        # The slot is held until the whole response has been streamed
+        async with self._llm_slot():
+            async for token in self.asubmit_prompt_stream(prompt, **kwargs):
+                yield token
 
     def generate_question(self, sql: str, **kwargs) -> str:
         response = self.submit_prompt(
@@ -735,6 +1488,21 @@ class KiwiBase(ABC):
     def generate_plotly_code(
         self, question: str = None, sql: str = None, df_metadata: str = None, **kwargs
     ) -> str:
+        plotly_code = self.submit_prompt(self._plotly_code_prompt(question, sql, df_metadata), kwargs=kwargs)
+
+        return self._sanitize_plotly_code(self._extract_python_code(plotly_code))
+
+    async def agenerate_plotly_code(
+        self, question: str = None, sql: str = None, df_metadata: str = None, **kwargs
+    ) -> str:
+        """
+        Async counterpart of [`generate_plotly_code`][kiwi.core.base.KiwiBase.generate_plotly_code].
+        """
+        plotly_code = await self._limited_asubmit_prompt(self._plotly_code_prompt(question, sql, df_metadata), **kwargs)
+
+        return self._sanitize_plotly_code(self._extract_python_code(plotly_code))
+
+    def _plotly_code_prompt(self, question: str = None, sql: str = None, df_metadata: str = None) -> list:
         if question is not None:
             system_msg = f"The following is a pandas DataFrame that contains the results of the query that answers the question the user asked: '{question}'"
         else:
@@ -745,17 +1513,13 @@ class KiwiBase(ABC):
 
         system_msg += f"The following is information about the resulting pandas DataFrame 'df': \n{df_metadata}"
 
-        message_log = [
+        return [
             self.system_message(system_msg),
             self.user_message(
                 "Can you generate the Python plotly code to chart the results of the dataframe? Assume the data is in a pandas dataframe called 'df'. If there is only one value in the dataframe, use an Indicator. Respond with only Python code. Do not answer with any explanations -- just the code."
             ),
         ]
 
-        plotly_code = self.submit_prompt(message_log, kwargs=kwargs)
-
-        return self._sanitize_plotly_code(self._extract_python_code(plotly_code))
-
     # ----------------- Connect to Any Database to run the Generated SQL ----------------- #
 
     def connect_to_snowflake(
@@ -817,7 +1581,7 @@ class KiwiBase(ABC):
             **kwargs
         )
 
-        def run_sql_snowflake(sql: str) -> pd.DataFrame:
+        def snowflake_cursor():
             cs = conn.cursor()
 
             if role is not None:
@@ -826,6 +1590,10 @@ class KiwiBase(ABC):
             if warehouse is not None:
                 cs.execute(f"USE WAREHOUSE {warehouse}")
             cs.execute(f"USE DATABASE {database}")
+            return cs
+
+        def run_sql_snowflake(sql: str) -> pd.DataFrame:
+            cs = snowflake_cursor()
 
             cur = cs.execute(sql)
 
@@ -836,9 +1604,19 @@ class KiwiBase(ABC):
 
             return df
 
+        def sql_chunks_snowflake(sql: str, chunk_rows: int):
+            cs = snowflake_cursor()
+            try:
+                cs.execute(sql)
+                yield from cursor_chunks(cs, chunk_rows)
+            finally:
+                cs.close()
+
         self.dialect = "Snowflake SQL"
         self.run_sql = run_sql_snowflake
+        self._connection_token = uuid4().hex
         self.run_sql_is_set = True
+        self._sql_chunks = sql_chunks_snowflake
 
     def connect_to_sqlite(self, url: str, check_same_thread: bool = False,  **kwargs):
         """
@@ -874,9 +1652,14 @@ class KiwiBase(ABC):
         def run_sql_sqlite(sql: str):
             return pd.read_sql_query(sql, conn)
 
+        def sql_chunks_sqlite(sql: str, chunk_rows: int):
+            yield from pd.read_sql_query(sql, conn, chunksize=chunk_rows)
+
         self.dialect = "SQLite"
         self.run_sql = run_sql_sqlite
+        self._connection_token = uuid4().hex
         self.run_sql_is_set = True
+        self._sql_chunks = sql_chunks_sqlite
 
     def connect_to_postgres(
         self,
@@ -885,6 +1668,11 @@ class KiwiBase(ABC):
         user: str = None,
         password: str = None,
         port: int = None,
+        pool_min_size: int = 1,
+        pool_max_size: int = 10,
+        pool_timeout: float = 30.0,
+        pool_recycle: float = 3600.0,
+        pool_pre_ping: bool = True,
         **kwargs
     ):
 
@@ -906,6 +1694,11 @@ class KiwiBase(ABC):
             user (str): The postgres user.
             password (str): The postgres password.
             port (int): The postgres Port.
+            pool_min_size (int): Connections opened up front.
+            pool_max_size (int): Maximum concurrent connections; further queries wait for one to be returned.
+            pool_timeout (float): Seconds a query waits for a free connection.
+            pool_recycle (float): Connections older than this many seconds are replaced. None disables recycling.
+            pool_pre_ping (bool): Check each connection with `SELECT 1` before handing it out.
         """
 
         try:
@@ -947,62 +1740,73 @@ class KiwiBase(ABC):
         if not port:
             raise ImproperlyConfigured("Please set your postgres port")
 
-        conn = None
+        def connect_to_db():
+            return psycopg2.connect(host=host, dbname=dbname,
+                        user=user, password=password, port=port, **kwargs)
 
         try:
-            conn = psycopg2.connect(
-                host=host,
-                dbname=dbname,
-                user=user,
-                password=password,
-                port=port,
-                **kwargs
+            pool = self._create_connection_pool(
+                connect_to_db,
+                min_size=pool_min_size,
+                max_size=pool_max_size,
+                timeout=pool_timeout,
+                recycle=pool_recycle,
+                pre_ping=pool_pre_ping,
+                disconnect_errors=(psycopg2.InterfaceError, psycopg2.OperationalError),
+                # A cancelled statement (e.g. statement_timeout) leaves the connection usable
+                disconnect_filter=lambda e: not isinstance(e, psycopg2.extensions.QueryCanceledError),
             )
         except psycopg2.Error as e:
             raise ValidationError(e)
 
-        def connect_to_db():
-            return psycopg2.connect(host=host, dbname=dbname,
-                        user=user, password=password, port=port, **kwargs)
-
-
         def run_sql_postgres(sql: str) -> Union[pd.DataFrame, None]:
-            conn = None
-            try:
-                conn = connect_to_db()  # Initial connection attempt
-                cs = conn.cursor()
-                cs.execute(sql)
-                results = cs.fetchall()
-
-                # Create a pandas dataframe from the results
-                df = pd.DataFrame(results, columns=[desc[0] for desc in cs.description])
-                return df
+            for attempt in range(2):
+                try:
+                    with pool.connection() as conn:
+                        cs = conn.cursor()
+                        cs.execute(sql)
+                        results = cs.fetchall()
 
-            except psycopg2.InterfaceError as e:
-                # Attempt to reconnect and retry the operation
-                if conn:
-                    conn.close()  # Ensure any existing connection is closed
-                conn = connect_to_db()
-                cs = conn.cursor()
-                cs.execute(sql)
-                results = cs.fetchall()
+                        # Create a pandas dataframe from the results
+                        df = pd.DataFrame(results, columns=[desc[0] for desc in cs.description])
+                        return df
 
-                # Create a pandas dataframe from the results
-                df = pd.DataFrame(results, columns=[desc[0] for desc in cs.description])
-                return df
+                except psycopg2.Error as e:
+                    # The pool has discarded a broken connection; retry once on a fresh one
+                    if attempt == 1 or not pool.is_disconnect(e):
+                        raise ValidationError(e)
 
+        def sql_chunks_postgres(sql: str, chunk_rows: int):
+            try:
+                with pool.connection() as conn:
+                    # A named cursor keeps a SELECT's result on the server and fetches it chunk by chunk;
+                    # other statements cannot be declared as cursors. Checkin rolls back, closing it.
+                    server_side = sqlparse.parse(sql)[0].get_type() == "SELECT"
+                    cs = conn.cursor(name="kiwi_run_sql_iter") if server_side else conn.cursor()
+                    cs.itersize = chunk_rows
+                    try:
+                        cs.execute(sql)
+                        yield from cursor_chunks(cs, chunk_rows, server_side=server_side)
+                    finally:
+                        cs.close()
             except psycopg2.Error as e:
-                if conn:
-                    conn.rollback()
-                    raise ValidationError(e)
+                raise ValidationError(e)
 
-            except Exception as e:
-                        conn.rollback()
-                        raise e
+        def describe_sql_postgres(sql: str) -> pd.DataFrame:
+            try:
+                with pool.connection() as conn:
+                    cs = conn.cursor()
+                    cs.execute(self._limit_0_probe(sql))
+                    return describe_cursor(cs, _POSTGRES_DTYPES)
+            except psycopg2.Error as e:
+                raise ValidationError(e)
 
         self.dialect = "PostgreSQL"
+        self._connection_token = uuid4().hex
         self.run_sql_is_set = True
         self.run_sql = run_sql_postgres
+        self._sql_chunks = sql_chunks_postgres
+        self.describe_sql = describe_sql_postgres
 
 
     def connect_to_mysql(
@@ -1012,8 +1816,38 @@ class KiwiBase(ABC):
         user: str = None,
         password: str = None,
         port: int = None,
+        pool_min_size: int = 1,
+        pool_max_size: int = 10,
+        pool_timeout: float = 30.0,
+        pool_recycle: float = 3600.0,
+        pool_pre_ping: bool = True,
         **kwargs
     ):
+        """
+        Connect to MySQL using the PyMySQL connector. This is just a helper function to set [`vn.run_sql`][kiwi.core.base.KiwiBase.run_sql]
+        **Example:**
+        ```python
+        vn.connect_to_mysql(
+            host="myhost",
+            dbname="mydatabase",
+            user="myuser",
+            password="mypassword",
+            port=3306,
+            pool_max_size=20,
+        )
+        ```
+        Args:
+            host (str): The MySQL host.
+            dbname (str): The MySQL database name.
+            user (str): The MySQL user.
+            password (str): The MySQL password.
+            port (int): The MySQL port.
+            pool_min_size (int): Connections opened up front.
+            pool_max_size (int): Maximum concurrent connections; further queries wait for one to be returned.
+            pool_timeout (float): Seconds a query waits for a free connection.
+            pool_recycle (float): Connections older than this many seconds are replaced. None disables recycling.
+            pool_pre_ping (bool): Ping each connection before handing it out.
+        """
 
         try:
             import pymysql.cursors
@@ -1053,45 +1887,84 @@ class KiwiBase(ABC):
         if not port:
             raise ImproperlyConfigured("Please set your MySQL port")
 
-        conn = None
-
-        try:
-            conn = pymysql.connect(
+        def connect_to_db():
+            return pymysql.connect(
                 host=host,
                 user=user,
                 password=password,
                 database=dbname,
-                port=port,
+                port=int(port),
                 cursorclass=pymysql.cursors.DictCursor,
                 **kwargs
             )
+
+        try:
+            pool = self._create_connection_pool(
+                connect_to_db,
+                min_size=pool_min_size,
+                max_size=pool_max_size,
+                timeout=pool_timeout,
+                recycle=pool_recycle,
+                pre_ping=pool_pre_ping,
+                ping=lambda conn: conn.ping(reconnect=False),
+                disconnect_errors=(pymysql.err.InterfaceError, pymysql.err.OperationalError),
+                # OperationalError also covers lock wait timeouts, deadlocks and the like
+                disconnect_filter=lambda e: (
+                    not isinstance(e, pymysql.err.OperationalError) or bool(e.args) and e.args[0] in _MYSQL_DISCONNECT_CODES
+                ),
+            )
         except pymysql.Error as e:
             raise ValidationError(e)
 
         def run_sql_mysql(sql: str) -> Union[pd.DataFrame, None]:
-            if conn:
+            for attempt in range(2):
                 try:
-                    conn.ping(reconnect=True)
-                    cs = conn.cursor()
-                    cs.execute(sql)
-                    results = cs.fetchall()
-
-                    # Create a pandas dataframe from the results
-                    df = pd.DataFrame(
-                        results, columns=[desc[0] for desc in cs.description]
-                    )
-                    return df
+                    with pool.connection() as conn:
+                        cs = conn.cursor()
+                        cs.execute(sql)
+                        results = cs.fetchall()
+
+                        # Create a pandas dataframe from the results
+                        df = pd.DataFrame(
+                            results, columns=[desc[0] for desc in cs.description]
+                        )
+                        return df
 
                 except pymysql.Error as e:
-                    conn.rollback()
-                    raise ValidationError(e)
+                    # The pool has discarded a broken connection; retry once on a fresh one
+                    if attempt == 1 or not pool.is_disconnect(e):
+                        raise ValidationError(e)
 
-                except Exception as e:
-                    conn.rollback()
-                    raise e
+        def sql_chunks_mysql(sql: str, chunk_rows: int):
+            entry = pool.acquire()
+            finished = False
+            try:
+                # Unbuffered cursor: rows are read from the socket as they are fetched
+                cs = entry.connection.cursor(pymysql.cursors.SSDictCursor)
+                cs.execute(sql)
+                yield from cursor_chunks(cs, chunk_rows)
+                cs.close()
+                finished = True
+            except pymysql.Error as e:
+                raise ValidationError(e)
+            finally:
+                # Closing an unbuffered cursor mid-result would read the rest of it; drop the connection instead
+                pool.release(entry, discard=not finished)
+
+        def describe_sql_mysql(sql: str) -> pd.DataFrame:
+            try:
+                with pool.connection() as conn:
+                    cs = conn.cursor()
+                    cs.execute(self._limit_0_probe(sql))
+                    return describe_cursor(cs, _MYSQL_DTYPES)
+            except pymysql.Error as e:
+                raise ValidationError(e)
 
+        self._connection_token = uuid4().hex
         self.run_sql_is_set = True
         self.run_sql = run_sql_mysql
+        self._sql_chunks = sql_chunks_mysql
+        self.describe_sql = describe_sql_mysql
 
     def connect_to_clickhouse(
         self,
@@ -1169,8 +2042,16 @@ class KiwiBase(ABC):
                 except Exception as e:
                     raise e
 
+        def sql_chunks_clickhouse(sql: str, chunk_rows: int):
+            with conn.query_row_block_stream(sql, settings={"max_block_size": chunk_rows}) as stream:
+                columns = stream.source.column_names
+                for block in stream:
+                    yield pd.DataFrame(block, columns=columns)
+
+        self._connection_token = uuid4().hex
         self.run_sql_is_set = True
         self.run_sql = run_sql_clickhouse
+        self._sql_chunks = sql_chunks_clickhouse
 
     def connect_to_oracle(
         self,
@@ -1260,8 +2141,26 @@ class KiwiBase(ABC):
                     conn.rollback()
                     raise e
 
+        def sql_chunks_oracle(sql: str, chunk_rows: int):
+            sql = sql.rstrip()
+            if sql.endswith(';'):
+                sql = sql[:-1]
+
+            cs = conn.cursor()
+            cs.arraysize = chunk_rows
+            try:
+                cs.execute(sql)
+                yield from cursor_chunks(cs, chunk_rows)
+            except oracledb.Error as e:
+                conn.rollback()
+                raise ValidationError(e)
+            finally:
+                cs.close()
+
+        self._connection_token = uuid4().hex
         self.run_sql_is_set = True
         self.run_sql = run_sql_oracle
+        self._sql_chunks = sql_chunks_oracle
 
     def connect_to_bigquery(
         self,
@@ -1347,17 +2246,36 @@ class KiwiBase(ABC):
                 return df
             return None
 
+        def sql_chunks_bigquery(sql: str, chunk_rows: int):
+            if conn:
+                job = conn.query(sql)
+                yield from job.result(page_size=chunk_rows).to_dataframe_iterable()
+
         self.dialect = "BigQuery SQL"
+        self._connection_token = uuid4().hex
         self.run_sql_is_set = True
         self.run_sql = run_sql_bigquery
+        self._sql_chunks = sql_chunks_bigquery
 
-    def connect_to_duckdb(self, url: str, init_sql: str = None, **kwargs):
+    def connect_to_duckdb(
+        self,
+        url: str,
+        init_sql: str = None,
+        threads: int = None,
+        memory_limit: str = None,
+        **kwargs
+    ):
         """
         Connect to a DuckDB database. This is just a helper function to set [`vn.run_sql`][kiwi.core.base.KiwiBase.run_sql]
 
+        Each thread that calls `run_sql` gets its own cursor on the shared connection, so concurrent
+        requests run in parallel instead of contending for one connection object.
+
         Args:
             url (str): The URL of the database to connect to. Use :memory: to create an in-memory database. Use md: or motherduck: to use the MotherDuck database.
             init_sql (str, optional): SQL to run when connecting to the database. Defaults to None.
+            threads (int, optional): DuckDB worker threads shared by all queries. Defaults to DuckDB's choice (one per core).
+            memory_limit (str, optional): DuckDB memory limit, e.g. "4GB". Defaults to DuckDB's choice.
 
         Returns:
             None
@@ -1388,17 +2306,80 @@ class KiwiBase(ABC):
                     with open(path, "wb") as f:
                         f.write(response.content)
 
+        config = dict(kwargs.pop("config", None) or {})
+        if threads is not None:
+            config["threads"] = threads
+        if memory_limit is not None:
+            config["memory_limit"] = memory_limit
+
         # Connect to the database
-        conn = duckdb.connect(path, **kwargs)
+        conn = duckdb.connect(path, config=config, **kwargs)
+        session_sql = []
         if init_sql:
             conn.query(init_sql)
+            # Cursors share the database, its tables and ATTACHed databases, but not the session state
+            # of the connection: USE, SET (VARIABLE), search_path, PRAGMAs and TEMP objects. The
+            # statements that create that state are replayed on every cursor.
+            session_sql = [
+                statement.query
+                for statement in conn.extract_statements(init_sql)
+                if statement.type.name in ("SET", "PRAGMA") or _DUCKDB_TEMP_OBJECT.match(statement.query)
+            ]
+
+        local = threading.local()
+
+        def new_cursor():
+            cs = conn.cursor()
+            for statement in session_sql:
+                cs.execute(statement)
+            return cs
+
+        def cursor():
+            # A DuckDB connection must not be used from several threads at once; cursors on it
+            # can run concurrently, so each thread gets its own.
+            cs = getattr(local, "cursor", None)
+            if cs is None:
+                cs = new_cursor()
+                local.cursor = cs
+            return cs
 
         def run_sql_duckdb(sql: str):
-            return conn.query(sql).to_df()
+            return cursor().query(sql).to_df()
+
+        def run_sql_duckdb_arrow(sql: str):
+            relation = cursor().query(sql)
+            if relation is None:
+                # Statements without a result set (DDL, SET, ...)
+                import pyarrow as pa
+
+                return pa.table({})
+            return relation.to_arrow_table() if hasattr(relation, "to_arrow_table") else relation.arrow()
+
+        def sql_chunks_duckdb(sql: str, chunk_rows: int):
+            # A cursor of its own, so the thread can run other queries while this result is open
+            cs = new_cursor()
+            try:
+                relation = cs.query(sql)
+                if relation is not None:
+                    if hasattr(relation, "to_arrow_reader"):
+                        yield from relation.to_arrow_reader(chunk_rows)
+                    else:
+                        yield from relation.fetch_record_batch(chunk_rows)
+            finally:
+                cs.close()
+
+        def describe_sql_duckdb(sql: str):
+            # Relations are lazy: limit(0) binds the query and reports its columns without scanning anything
+            return cursor().sql(sql).limit(0).to_df()
 
         self.dialect = "DuckDB SQL"
         self.run_sql = run_sql_duckdb
+        self._connection_token = uuid4().hex
         self.run_sql_is_set = True
+        self._sql_chunks = sql_chunks_duckdb
+        self.run_sql_arrow = run_sql_duckdb_arrow
+        self.run_sql_arrow_is_set = True
+        self.describe_sql = describe_sql_duckdb
 
     def connect_to_mssql(self, odbc_conn_str: str, **kwargs):
         """
@@ -1444,9 +2425,16 @@ class KiwiBase(ABC):
 
             raise Exception("Couldn't run sql")
 
+        def sql_chunks_mssql(sql: str, chunk_rows: int):
+            with engine.begin() as conn:
+                conn = conn.execution_options(stream_results=True)
+                yield from pd.read_sql_query(sa.text(sql), conn, chunksize=chunk_rows)
+
         self.dialect = "T-SQL / Microsoft SQL Server"
         self.run_sql = run_sql_mssql
+        self._connection_token = uuid4().hex
         self.run_sql_is_set = True
+        self._sql_chunks = sql_chunks_mssql
     def connect_to_presto(
         self,
         host: str,
@@ -1561,8 +2549,23 @@ class KiwiBase(ABC):
             print(e)
             raise e
 
+      def sql_chunks_presto(sql: str, chunk_rows: int):
+        sql = sql.rstrip()
+        if sql.endswith(';'):
+          sql = sql[:-1]
+        cs = conn.cursor()
+        try:
+          cs.execute(sql)
+          yield from cursor_chunks(cs, chunk_rows)
+        except presto.Error as e:
+          raise ValidationError(e)
+        finally:
+          cs.close()
+
+      self._connection_token = uuid4().hex
       self.run_sql_is_set = True
       self.run_sql = run_sql_presto
+      self._sql_chunks = sql_chunks_presto
 
     def connect_to_hive(
         self,
@@ -1658,8 +2661,20 @@ class KiwiBase(ABC):
             print(e)
             raise e
 
+      def sql_chunks_hive(sql: str, chunk_rows: int):
+        cs = conn.cursor()
+        try:
+          cs.execute(sql)
+          yield from cursor_chunks(cs, chunk_rows)
+        except hive.Error as e:
+          raise ValidationError(e)
+        finally:
+          cs.close()
+
+      self._connection_token = uuid4().hex
       self.run_sql_is_set = True
       self.run_sql = run_sql_hive
+      self._sql_chunks = sql_chunks_hive
 
     def run_sql(self, sql: str, **kwargs) -> pd.DataFrame:
         """
@@ -1680,6 +2695,399 @@ class KiwiBase(ABC):
             "You need to connect to a database first by running vn.connect_to_snowflake(), vn.connect_to_postgres(), similar function, or manually set vn.run_sql"
         )
 
+    def run_sql_iter(
+        self,
+        sql: str,
+        chunk_rows: int = None,
+        max_rows: int = None,
+        max_bytes: int = None,
+        **kwargs
+    ) -> ChunkedResult:
+        """
+        Example:
+        ```python
+        result = vn.run_sql_iter("SELECT * FROM orders", chunk_rows=5000, max_rows=100_000)
+        for chunk in result:
+            print(len(chunk))
+        result.truncated
+        ```
+
+        Run a SQL query and fetch its result a chunk at a time, stopping at a row or byte cap.
+
+        The `connect_to_*` helpers fetch with `fetchmany` on a server-side or unbuffered cursor where the
+        driver has one, so a runaway `SELECT *` never has to fit in memory. If `vn.run_sql` was set some
+        other way, its DataFrame is chunked and capped instead. The query runs when the result is first
+        iterated; iterate it, or call `to_df()` / `to_arrow()`, once.
+
+        Args:
+            sql (str): The SQL query to run.
+            chunk_rows (int): Rows per chunk. Defaults to the `result_chunk_rows` config (10000).
+            max_rows (int): Stop after this many rows. Defaults to the `result_max_rows` config (no cap).
+            max_bytes (int): Stop after this many bytes of DataFrame memory. Defaults to the `result_max_bytes` config (256 MiB).
+
+        Returns:
+            ChunkedResult: Iterable of DataFrame chunks with `truncated`, `rows` and `bytes` attributes.
+        """
+        chunk_rows = chunk_rows or self.result_chunk_rows
+        max_rows = self.result_max_rows if max_rows is None else max_rows
+        max_bytes = self.result_max_bytes if max_bytes is None else max_bytes
+
+        cacheable = self._result_cacheable(sql)
+        cached = self.result_cache.get(sql, self._result_cache_connection()) if cacheable else None
+        if cached is not None:
+            if hasattr(cached, "to_batches"):  # pyarrow.Table
+                chunks = cached.to_batches(max_chunksize=chunk_rows) or [cached]
+            else:
+                chunks = dataframe_chunks(cached, chunk_rows)
+        elif self._sql_chunks is not None:
+            chunks = self._sql_chunks(sql, chunk_rows)
+        else:
+            def materialized_chunks():
+                yield from dataframe_chunks(self.run_sql(sql, **kwargs), chunk_rows)
+
+            chunks = materialized_chunks()
+
+        if cacheable and cached is None:
+            chunks = self._caching_chunks(sql, chunks)
+
+        return ChunkedResult(chunks, max_rows=max_rows, max_bytes=max_bytes)
+
+    def _caching_chunks(self, sql: str, chunks):
+        # Pass chunks through and cache the whole result once the fetch completes. A fetch stopped early
+        # by a cap closes this generator before the end, so truncated results are never cached.
+        connection = self._result_cache_connection()
+        kept, size = [], 0
+        for chunk in chunks:
+            yield chunk
+            if kept is not None:
+                kept.append(chunk)
+                size += result_nbytes(chunk)
+                if size > self.result_cache.max_bytes:
+                    kept = None
+
+        if kept:
+            if hasattr(kept[0], "schema") and hasattr(kept[0], "num_rows"):
+                import pyarrow as pa
+
+                result = pa.Table.from_batches(kept)
+            else:
+                result = pd.concat(kept, ignore_index=True) if len(kept) > 1 else kept[0]
+            self.result_cache.set(sql, result, connection, dialect=self.dialect)
+
+    def _result_cache_connection(self) -> str:
+        # The same SQL on another database is another result. Without an explicit connection_id, each
+        # connect_to_* call starts with an empty namespace.
+        return f"{self.dialect}:{self.connection_id or self._connection_token}"
+
+    def _result_cacheable(self, sql: str) -> bool:
+        return self.result_cache is not None and self.is_sql_valid(sql)
+
+    def run_sql_cached(self, sql: str, **kwargs) -> pd.DataFrame:
+        """
+        Example:
+        ```python
+        vn.run_sql_cached("SELECT * FROM my_table")
+        ```
+
+        [`vn.run_sql`][kiwi.core.base.KiwiBase.run_sql] behind the query result cache (the `result_cache`
+        config). Statements accepted by [`is_sql_valid`][kiwi.core.base.KiwiBase.is_sql_valid] are
+        looked up by their normalized SQL and the connection; anything else always runs.
+
+        Args:
+            sql (str): The SQL query to run.
+
+        Returns:
+            pd.DataFrame: The results of the SQL query.
+        """
+        if not self._result_cacheable(sql):
+            return self.run_sql(sql, **kwargs)
+
+        connection = self._result_cache_connection()
+        cached = self.result_cache.get(sql, connection)
+        if cached is not None:
+            return cached.to_pandas() if hasattr(cached, "to_batches") else cached.copy(deep=False)
+
+        df = self.run_sql(sql, **kwargs)
+        if df is not None:
+            # A shallow copy, so changes the caller makes to its DataFrame don't reach the cache
+            self.result_cache.set(sql, df.copy(deep=False), connection, dialect=self.dialect)
+        return df
+
+    def invalidate_result_cache(self, sql: str = None) -> int:
+        """
+        Example:
+        ```python
+        vn.invalidate_result_cache()  # after loading new data
+        ```
+
+        Drop cached query results for the current connection: all of them, or only those of `sql`.
+
+        Args:
+            sql (str, optional): Only drop this query's result.
+
+        Returns:
+            int: Number of cached results dropped.
+        """
+        if self.result_cache is None:
+            return 0
+        return self.result_cache.invalidate(sql=sql, connection=self._result_cache_connection())
+
+    def run_sql_arrow(self, sql: str, **kwargs) -> "pyarrow.Table":
+        """
+        Example:
+        ```python
+        table = vn.run_sql_arrow("SELECT * FROM my_table")
+        preview = table.slice(0, 10).to_pandas()
+        ```
+
+        Run a SQL query and return the result as a `pyarrow.Table`.
+
+        Connectors that can export Arrow natively (DuckDB) set this directly and set
+        `vn.run_sql_arrow_is_set`, so the result is never materialized in pandas unless a caller asks
+        for it. Otherwise the DataFrame from [`vn.run_sql`][kiwi.core.base.KiwiBase.run_sql] is converted.
+
+        Args:
+            sql (str): The SQL query to run.
+
+        Returns:
+            pyarrow.Table: The results of the SQL query.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise DependencyError(
+                "You need to install required dependencies to execute this method, run command:"
+                " \npip install pyarrow"
+            )
+
+        return pa.Table.from_pandas(self.run_sql(sql, **kwargs), preserve_index=False)
+
+    def describe_sql(self, sql: str) -> pd.DataFrame:
+        """
+        Example:
+        ```python
+        vn.describe_sql("SELECT * FROM my_table").dtypes
+        ```
+
+        The columns of a SQL query's result without fetching its rows: an empty DataFrame with the
+        result's column names and dtypes.
+
+        Connectors that can describe a query set this directly: DuckDB natively, PostgreSQL and MySQL from
+        the type codes of a ``LIMIT 0`` probe. Otherwise the probe is run with
+        [`vn.run_sql`][kiwi.core.base.KiwiBase.run_sql], and since it returns no rows to infer dtypes from,
+        the columns are typed as whatever `run_sql` gives an empty result (usually ``object``). Dialects
+        without ``LIMIT`` should override it.
+
+        Args:
+            sql (str): The SQL query to describe.
+
+        Returns:
+            pd.DataFrame: An empty DataFrame with the columns of the query's result.
+        """
+        return self.run_sql(self._limit_0_probe(sql)).head(0)
+
+    @staticmethod
+    def _limit_0_probe(sql: str) -> str:
+        body = sql.strip().rstrip(";")
+        return f"SELECT * FROM ({body}) AS kiwi_probe LIMIT 0"
+
+    def _pipelined_sql(
+        self, question: str, allow_llm_to_see_data: bool = False, chart: bool = True
+    ) -> Tuple[str, Union[Future, None], Union[Future, None]]:
+        # Generates the SQL with generate_sql_stream and starts running it on the early_sql event, while the
+        # model may still be writing an explanation. Once the result's columns are known from describe_sql
+        # the chart code is generated, concurrently with fetching the rows. Returns the SQL and the futures of
+        # the DataFrame and of the plotly code (None when the SQL isn't run).
+        executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="kiwi-ask")
+
+        def chart_code(sql, discarded):
+            columns = self.describe_sql(sql)
+            if discarded.is_set():
+                return None
+            return self.generate_plotly_code(
+                question=question,
+                sql=sql,
+                df_metadata=f"Running df.dtypes gives:\n {columns.dtypes}",
+            )
+
+        def start(sql):
+            discarded = threading.Event()
+            fetch = executor.submit(self.run_sql_cached, sql)
+            return sql, fetch, executor.submit(chart_code, sql, discarded) if chart else None, discarded
+
+        def discard(sql, fetch, code, discarded):
+            # Work that hasn't started is cancelled and the chart code isn't requested once the columns
+            # are known. A query already running on the database can't be interrupted portably: it runs
+            # to completion in the background and its result is dropped (or kept by the result cache).
+            discarded.set()
+            for future in (fetch, code):
+                if future is not None:
+                    future.cancel()
+
+        try:
+            started = None
+            sql = None
+            for event in self.generate_sql_stream(question=question, allow_llm_to_see_data=allow_llm_to_see_data):
+                if event["type"] == "early_sql" and self.run_sql_is_set and self.is_sql_valid(event["text"]):
+                    started = start(event["text"])
+                elif event["type"] == "sql":
+                    sql = event["text"]
+
+            if not self.run_sql_is_set:
+                return sql, None, None
+            if started is not None and normalize_sql(started[0]) == normalize_sql(sql):
+                return sql, started[1], started[2]
+
+            # No early SQL, or the final statement differs: the speculative run (if any) is discarded
+            if started is not None:
+                discard(*started)
+            if not self.is_sql_valid(sql):
+                # Not a query (e.g. an explanation of why none could be generated): never sent to the database
+                fetch = Future()
+                fetch.set_exception(ValidationError(f"Not a valid SQL query: {sql}"))
+                return sql, fetch, None
+            started = start(sql)
+            return sql, started[1], started[2]
+        finally:
+            # Lets the submitted work finish in the background without holding on to the threads
+            executor.shutdown(wait=False)
+
+    def enrich(
+        self,
+        question: str,
+        sql: str,
+        df: pd.DataFrame,
+        chart: bool = True,
+        summary: bool = True,
+        followup_questions: bool = True,
+        plotly_code: str = None,
+        dark_mode: bool = True,
+    ) -> Iterator[dict]:
+        """
+        **Example:**
+        ```python
+        for event in vn.enrich(question, sql, df):
+            print(event["type"])
+        ```
+
+        Post-query enrichment: generates the chart, the summary and the followup questions of a result
+        concurrently, and yields each one as soon as it is ready, so the whole stage takes as long as the
+        slowest LLM call rather than the sum of the three. Events are:
+
+        - ``{"type": "plotly_figure", "plotly_code": ..., "fig": ...}``
+        - ``{"type": "summary", "text": ...}``
+        - ``{"type": "followup_questions", "questions": [...]}``
+        - ``{"type": "error", "stage": ..., "error": ...}`` when a stage fails; the others still complete.
+
+        Args:
+            question (str): The question that was asked.
+            sql (str): The SQL query that produced `df`.
+            df (pd.DataFrame): The results of the SQL query.
+            chart (bool): Whether to generate the chart.
+            summary (bool): Whether to generate the summary.
+            followup_questions (bool): Whether to generate followup questions.
+            plotly_code (str): Chart code to render instead of generating it.
+            dark_mode (bool): Whether to render the chart with the dark theme.
+
+        Returns:
+            Iterator[dict]: The events, in the order the stages complete.
+        """
+        def chart_stage():
+            code = plotly_code or self.generate_plotly_code(
+                question=question,
+                sql=sql,
+                df_metadata=f"Running df.dtypes gives:\n {df.dtypes}",
+            )
+            fig = self.get_plotly_figure(plotly_code=code, df=df, dark_mode=dark_mode)
+            return {"type": "plotly_figure", "plotly_code": code, "fig": fig}
+
+        def summary_stage():
+            return {"type": "summary", "text": self.generate_summary(question=question, df=df)}
+
+        def followup_questions_stage():
+            questions = self.generate_followup_questions(question=question, sql=sql, df=df)
+            return {"type": "followup_questions", "questions": questions}
+
+        stages = {
+            stage: fn
+            for stage, fn, enabled in (
+                ("chart", chart_stage, chart),
+                ("summary", summary_stage, summary),
+                ("followup_questions", followup_questions_stage, followup_questions),
+            )
+            if enabled
+        }
+        if not stages:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix="kiwi-enrich")
+        try:
+            futures = {executor.submit(fn): stage for stage, fn in stages.items()}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    yield {"type": "error", "stage": futures[future], "error": str(e)}
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def aenrich(
+        self,
+        question: str,
+        sql: str,
+        df: pd.DataFrame,
+        chart: bool = True,
+        summary: bool = True,
+        followup_questions: bool = True,
+        plotly_code: str = None,
+        dark_mode: bool = True,
+    ) -> AsyncIterator[dict]:
+        """
+        Async counterpart of [`enrich`][kiwi.core.base.KiwiBase.enrich], yielding the same events. The LLM
+        calls are made with [`agenerate_plotly_code`][kiwi.core.base.KiwiBase.agenerate_plotly_code],
+        [`agenerate_summary`][kiwi.core.base.KiwiBase.agenerate_summary] and
+        [`agenerate_followup_questions`][kiwi.core.base.KiwiBase.agenerate_followup_questions]; the figure is
+        rendered in a worker thread.
+        """
+        async def chart_stage():
+            code = plotly_code or await self.agenerate_plotly_code(
+                question=question,
+                sql=sql,
+                df_metadata=f"Running df.dtypes gives:\n {df.dtypes}",
+            )
+            fig = await asyncio.to_thread(self.get_plotly_figure, plotly_code=code, df=df, dark_mode=dark_mode)
+            return {"type": "plotly_figure", "plotly_code": code, "fig": fig}
+
+        async def summary_stage():
+            return {"type": "summary", "text": await self.agenerate_summary(question=question, df=df)}
+
+        async def followup_questions_stage():
+            questions = await self.agenerate_followup_questions(question=question, sql=sql, df=df)
+            return {"type": "followup_questions", "questions": questions}
+
+        stages = {
+            stage: fn
+            for stage, fn, enabled in (
+                ("chart", chart_stage, chart),
+                ("summary", summary_stage, summary),
+                ("followup_questions", followup_questions_stage, followup_questions),
+            )
+            if enabled
+        }
+        tasks = {asyncio.ensure_future(fn()): stage for stage, fn in stages.items()}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        yield task.result()
+                    except Exception as e:
+                        yield {"type": "error", "stage": tasks[task], "error": str(e)}
+        finally:
+            for task in pending:
+                task.cancel()
+
     def ask(
         self,
         question: Union[str, None] = None,
@@ -1687,6 +3095,9 @@ class KiwiBase(ABC):
         auto_train: bool = True,
         visualize: bool = True,  # if False, will not generate plotly code
         allow_llm_to_see_data: bool = False,
+        summarize: bool = False,
+        followup_questions: bool = False,
+        pipelined: bool = False,
     ) -> Union[
         Tuple[
             Union[str, None],
@@ -1708,6 +3119,13 @@ class KiwiBase(ABC):
             print_results (bool): Whether to print the results of the SQL query.
             auto_train (bool): Whether to automatically train Kiwi.AI on the question and SQL query.
             visualize (bool): Whether to generate plotly code and display the plotly figure.
+            summarize (bool): Whether to print a summary of the results. Generated concurrently with the chart.
+            followup_questions (bool): Whether to print followup questions. Generated concurrently with the chart.
+            pipelined (bool): Whether to overlap the stages: the SQL is run as soon as the streamed response
+                contains a complete statement, and the chart code is generated from the result's columns
+                ([`describe_sql`][kiwi.core.base.KiwiBase.describe_sql]) while the rows are fetched. If the
+                final SQL differs from the statement started early, that query keeps running on the database
+                in the background until it completes; its result is not used.
 
         Returns:
             Tuple[str, pd.DataFrame, plotly.graph_objs.Figure]: The SQL query, the results of the SQL query, and the plotly figure.
@@ -1716,8 +3134,14 @@ class KiwiBase(ABC):
         if question is None:
             question = input("Enter a question: ")
 
+        fetch = plotly_code = None
         try:
-            sql = self.generate_sql(question=question, allow_llm_to_see_data=allow_llm_to_see_data)
+            if pipelined:
+                sql, fetch, plotly_code = self._pipelined_sql(
+                    question=question, allow_llm_to_see_data=allow_llm_to_see_data, chart=visualize
+                )
+            else:
+                sql = self.generate_sql(question=question, allow_llm_to_see_data=allow_llm_to_see_data)
         except Exception as e:
             print(e)
             return None, None, None
@@ -1740,7 +3164,7 @@ class KiwiBase(ABC):
                 return sql, None, None
 
         try:
-            df = self.run_sql(sql)
+            df = fetch.result() if fetch is not None else self.run_sql_cached(sql)
 
             if print_results:
                 try:
@@ -1753,15 +3177,26 @@ class KiwiBase(ABC):
 
             if len(df) > 0 and auto_train:
                 self.add_question_sql(question=question, sql=sql)
-            # Only generate plotly code if visualize is True
-            if visualize:
+            if plotly_code is not None:
                 try:
-                    plotly_code = self.generate_plotly_code(
-                        question=question,
-                        sql=sql,
-                        df_metadata=f"Running df.dtypes gives:\n {df.dtypes}",
-                    )
-                    fig = self.get_plotly_figure(plotly_code=plotly_code, df=df)
+                    plotly_code = plotly_code.result()
+                except Exception as e:
+                    # Generated again from the fetched result below
+                    self.log(title="Pipelined chart code failed", message=str(e))
+                    plotly_code = None
+            # Chart, summary and followup questions are generated concurrently
+            fig = None
+            for event in self.enrich(
+                question=question,
+                sql=sql,
+                df=df,
+                chart=visualize,
+                summary=summarize,
+                followup_questions=followup_questions,
+                plotly_code=plotly_code,
+            ):
+                if event["type"] == "plotly_figure":
+                    fig = event["fig"]
                     if print_results:
                         try:
                             display = __import__(
@@ -1774,16 +3209,20 @@ class KiwiBase(ABC):
                             display(Image(img_bytes))
                         except Exception as e:
                             fig.show()
-                except Exception as e:
-                    # Print stack trace
-                    traceback.print_exc()
-                    print("Couldn't run plotly code: ", e)
-                    if print_results:
-                        return None
-                    else:
-                        return sql, df, None
-            else:
-                return sql, df, None
+                elif event["type"] == "summary":
+                    print(event["text"])
+                elif event["type"] == "followup_questions":
+                    print("\n".join(event["questions"]))
+                elif event["stage"] == "chart":
+                    print("Couldn't run plotly code: ", event["error"])
+                else:
+                    print(f"Couldn't generate {event['stage']}: ", event["error"])
+
+            if fig is None:
+                if visualize and print_results:
+                    return None
+                else:
+                    return sql, df, None
 
         except Exception as e:
             print("Couldn't run sql: ", e)
@@ -1800,6 +3239,7 @@ class KiwiBase(ABC):
         ddl: str = None,
         documentation: str = None,
         plan: TrainingPlan = None,
+        batch_size: int = None,
     ) -> str:
         """
         **Example:**
@@ -1820,6 +3260,7 @@ class KiwiBase(ABC):
             ddl (str):  The DDL statement.
             documentation (str): The documentation to train on.
             plan (TrainingPlan): The training plan to train on.
+            batch_size (int): When training on a plan, how many items to embed and write at once. Defaults to the vector store's own setting.
         """
 
         if question and not sql:
@@ -1840,13 +3281,23 @@ class KiwiBase(ABC):
             return self.add_ddl(ddl)
 
         if plan:
+            ddl_list = []
+            documentation_list = []
+            question_sql_list = []
             for item in plan._plan:
                 if item.item_type == TrainingPlanItem.ITEM_TYPE_DDL:
-                    self.add_ddl(item.item_value)
+                    ddl_list.append(item.item_value)
                 elif item.item_type == TrainingPlanItem.ITEM_TYPE_IS:
-                    self.add_documentation(item.item_value)
+                    documentation_list.append(item.item_value)
                 elif item.item_type == TrainingPlanItem.ITEM_TYPE_SQL:
-                    self.add_question_sql(question=item.item_name, sql=item.item_value)
+                    question_sql_list.append({"question": item.item_name, "sql": item.item_value})
+
+            if ddl_list:
+                self.add_ddl_batch(ddl_list, batch_size=batch_size)
+            if documentation_list:
+                self.add_documentation_batch(documentation_list, batch_size=batch_size)
+            if question_sql_list:
+                self.add_question_sql_batch(question_sql_list, batch_size=batch_size)
 
     def _get_databases(self) -> List[str]:
         try:
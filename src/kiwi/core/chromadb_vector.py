@@ -1,5 +1,6 @@
 import json
-from typing import List
+import os
+from typing import Iterable, List, Tuple
 
 import chromadb
 import pandas as pd
@@ -7,6 +8,7 @@ from chromadb.config import Settings
 from chromadb.utils import embedding_functions
 
 from .base import KiwiBase
+from ..embedding.cache import EmbeddingCache
 from ..utils import deterministic_uuid
 
 default_ef = embedding_functions.DefaultEmbeddingFunction()
@@ -25,7 +27,21 @@ class ChromaDB_VectorStore(KiwiBase):
         self.n_results_sql = config.get("n_results_sql", config.get("n_results", 10))
         self.n_results_documentation = config.get("n_results_documentation", config.get("n_results", 10))
         self.n_results_ddl = config.get("n_results_ddl", config.get("n_results", 10))
+        self.embedding_batch_size = config.get("embedding_batch_size", 256)
+
+        # Query embeddings are cached in front of the embedding function. Pass an
+        # EmbeddingCache instance to share it between stores, a dict of EmbeddingCache
+        # arguments (e.g. {"max_entries": 10000, "path": "embeddings.sqlite"}), or False.
+        embedding_cache = config.get("embedding_cache", {})
+        if embedding_cache is None or embedding_cache is False:
+            self.embedding_cache = None
+        elif isinstance(embedding_cache, EmbeddingCache):
+            self.embedding_cache = embedding_cache
+        else:
+            self.embedding_cache = EmbeddingCache(**embedding_cache)
+        self.embedding_model_name = self._resolve_embedding_model_name(self.embedding_function)
 
+        self._persist_path = os.path.abspath(path) if curr_client == "persistent" else None
         if curr_client == "persistent":
             self.chroma_client = chromadb.PersistentClient(
                 path=path, settings=Settings(anonymized_telemetry=False)
@@ -56,13 +72,86 @@ class ChromaDB_VectorStore(KiwiBase):
             metadata=collection_metadata,
         )
 
+    def _training_data_id(self) -> str:
+        if self._persist_path is not None:
+            return f"chroma:{self._persist_path}"
+        return super()._training_data_id()
+
+    @staticmethod
+    def _resolve_embedding_model_name(embedding_function) -> str:
+        for attr in ("model_name", "MODEL_NAME"):
+            value = getattr(embedding_function, attr, None)
+            if isinstance(value, str):
+                return value
+        name = getattr(embedding_function, "name", None)
+        if callable(name):
+            try:
+                return str(name())
+            except Exception:
+                pass
+        return type(embedding_function).__name__
+
     def generate_embedding(self, data: str, **kwargs) -> List[float]:
+        if self.embedding_cache is not None:
+            return self.embedding_cache.get_or_compute(
+                self.embedding_model_name, [data], self.embedding_function
+            )[0]
+
         embedding = self.embedding_function([data])
         if len(embedding) == 1:
             return embedding[0]
         return embedding
 
-    def add_question_sql(self, question: str, sql: str, **kwargs) -> str:
+    def generate_embeddings(self, data: List[str], **kwargs) -> List[List[float]]:
+        """
+        Embed several documents with a single call to the embedding function. Unlike
+        [`generate_embedding`][kiwi.core.chromadb_vector.ChromaDB_VectorStore.generate_embedding]
+        this bypasses the query embedding cache, so bulk ingestion doesn't evict hot questions.
+
+        Args:
+            data (List[str]): The documents to embed.
+
+        Returns:
+            List[List[float]]: One embedding per document, in input order.
+        """
+        if len(data) == 0:
+            return []
+        return list(self.embedding_function(data))
+
+    def _upsert_in_batches(
+        self, collection, items: Iterable[Tuple[str, str]], batch_size: int = None
+    ) -> List[str]:
+        """
+        Embed and upsert (id, document) pairs into a collection, one embedding call and
+        one ``collection.upsert`` per chunk of ``batch_size`` items.
+
+        Duplicate ids are written once; the returned list still has one id per input item.
+        """
+        if batch_size is None:
+            batch_size = self.embedding_batch_size
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+
+        ids = []
+        unique = {}
+        for id, document in items:
+            ids.append(id)
+            unique.setdefault(id, document)
+
+        pending = list(unique.items())
+        for i in range(0, len(pending), batch_size):
+            chunk = pending[i: i + batch_size]
+            documents = [document for _, document in chunk]
+            collection.upsert(
+                documents=documents,
+                embeddings=self.generate_embeddings(documents),
+                ids=[id for id, _ in chunk],
+            )
+
+        return ids
+
+    @staticmethod
+    def _question_sql_document(question: str, sql: str) -> Tuple[str, str]:
         question_sql_json = json.dumps(
             {
                 "question": question,
@@ -70,10 +159,13 @@ class ChromaDB_VectorStore(KiwiBase):
             },
             ensure_ascii=False,
         )
-        id = deterministic_uuid(question_sql_json) + "-sql"
+        return deterministic_uuid(question_sql_json) + "-sql", question_sql_json
+
+    def add_question_sql(self, question: str, sql: str, **kwargs) -> str:
+        id, question_sql_json = self._question_sql_document(question, sql)
         self.sql_collection.add(
             documents=question_sql_json,
-            embeddings=self.generate_embedding(question_sql_json),
+            embeddings=self.generate_embeddings([question_sql_json]),
             ids=id,
         )
 
@@ -83,20 +175,60 @@ class ChromaDB_VectorStore(KiwiBase):
         id = deterministic_uuid(ddl) + "-ddl"
         self.ddl_collection.add(
             documents=ddl,
-            embeddings=self.generate_embedding(ddl),
+            embeddings=self.generate_embeddings([ddl]),
             ids=id,
         )
+        self._training_data_changed()
         return id
 
     def add_documentation(self, documentation: str, **kwargs) -> str:
         id = deterministic_uuid(documentation) + "-doc"
         self.documentation_collection.add(
             documents=documentation,
-            embeddings=self.generate_embedding(documentation),
+            embeddings=self.generate_embeddings([documentation]),
             ids=id,
         )
+        self._training_data_changed()
         return id
 
+    def add_question_sql_batch(
+        self, question_sql_list: List[dict], batch_size: int = None, **kwargs
+    ) -> List[str]:
+        return self._upsert_in_batches(
+            self.sql_collection,
+            (
+                self._question_sql_document(item["question"], item["sql"])
+                for item in question_sql_list
+            ),
+            batch_size=batch_size,
+        )
+
+    def add_ddl_batch(self, ddl_list: List[str], batch_size: int = None, **kwargs) -> List[str]:
+        ids = self._upsert_in_batches(
+            self.ddl_collection,
+            ((deterministic_uuid(ddl) + "-ddl", ddl) for ddl in ddl_list),
+            batch_size=batch_size,
+        )
+        self._training_data_changed()
+        return ids
+
+    def add_documentation_batch(
+        self, documentation_list: List[str], batch_size: int = None, **kwargs
+    ) -> List[str]:
+        ids = self._upsert_in_batches(
+            self.documentation_collection,
+            ((deterministic_uuid(doc) + "-doc", doc) for doc in documentation_list),
+            batch_size=batch_size,
+        )
+        self._training_data_changed()
+        return ids
+
+    def get_cache_stats(self) -> dict:
+        stats = KiwiBase.get_cache_stats(self)
+        if self.embedding_cache is not None:
+            stats["embedding_cache"] = self.embedding_cache.stats()
+        return stats
+
     def get_training_data(self, **kwargs) -> pd.DataFrame:
         sql_data = self.sql_collection.get()
 
@@ -165,16 +297,16 @@ class ChromaDB_VectorStore(KiwiBase):
     def remove_training_data(self, id: str, **kwargs) -> bool:
         if id.endswith("-sql"):
             self.sql_collection.delete(ids=id)
-            return True
         elif id.endswith("-ddl"):
             self.ddl_collection.delete(ids=id)
-            return True
         elif id.endswith("-doc"):
             self.documentation_collection.delete(ids=id)
-            return True
         else:
             return False
 
+        self._training_data_changed()
+        return True
+
     def remove_collection(self, collection_name: str) -> bool:
         """
         This function can reset the collection to empty state.
@@ -190,18 +322,21 @@ class ChromaDB_VectorStore(KiwiBase):
             self.sql_collection = self.chroma_client.get_or_create_collection(
                 name="sql", embedding_function=self.embedding_function
             )
+            self._training_data_changed()
             return True
         elif collection_name == "ddl":
             self.chroma_client.delete_collection(name="ddl")
             self.ddl_collection = self.chroma_client.get_or_create_collection(
                 name="ddl", embedding_function=self.embedding_function
             )
+            self._training_data_changed()
             return True
         elif collection_name == "documentation":
             self.chroma_client.delete_collection(name="documentation")
             self.documentation_collection = self.chroma_client.get_or_create_collection(
                 name="documentation", embedding_function=self.embedding_function
             )
+            self._training_data_changed()
             return True
         else:
             return False
@@ -232,26 +367,34 @@ class ChromaDB_VectorStore(KiwiBase):
 
             return documents
 
-    def get_similar_question_sql(self, question: str, **kwargs) -> list:
+    def _query_args(self, question: str, embedding=None) -> dict:
+        # Always query by vector: either one computed upstream (see
+        # KiwiBase.get_related_context) or one from the embedding cache, so
+        # Chroma never re-embeds the question text itself.
+        if embedding is None:
+            embedding = self.generate_embedding(question)
+        return {"query_embeddings": [embedding]}
+
+    def get_similar_question_sql(self, question: str, embedding=None, **kwargs) -> list:
         return ChromaDB_VectorStore._extract_documents(
             self.sql_collection.query(
-                query_texts=[question],
+                **self._query_args(question, embedding),
                 n_results=self.n_results_sql,
             )
         )
 
-    def get_related_ddl(self, question: str, **kwargs) -> list:
+    def get_related_ddl(self, question: str, embedding=None, **kwargs) -> list:
         return ChromaDB_VectorStore._extract_documents(
             self.ddl_collection.query(
-                query_texts=[question],
+                **self._query_args(question, embedding),
                 n_results=self.n_results_ddl,
             )
         )
 
-    def get_related_documentation(self, question: str, **kwargs) -> list:
+    def get_related_documentation(self, question: str, embedding=None, **kwargs) -> list:
         return ChromaDB_VectorStore._extract_documents(
             self.documentation_collection.query(
-                query_texts=[question],
+                **self._query_args(question, embedding),
                 n_results=self.n_results_documentation,
             )
         )
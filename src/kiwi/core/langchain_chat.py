@@ -1,4 +1,4 @@
-from typing import List
+from typing import AsyncIterator, Iterator, List
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import (
@@ -66,4 +66,64 @@ class LangChain_Chat(KiwiBase):
             title="Model Used",
         )
 
-        return response.content
\ No newline at end of file
+        return response.content
+
+    async def asubmit_prompt(self, prompt: List[BaseMessage], **kwargs) -> str:
+        if prompt is None:
+            raise Exception("Prompt is None")
+
+        if len(prompt) == 0:
+            raise Exception("Prompt is empty")
+
+        response = await self.llm.ainvoke(prompt)
+        num_tokens = self.count_prompt_tokens(prompt, response)
+        self.log(
+            f"Used model {self.model_name} for {num_tokens} tokens (approx)",
+            title="Model Used",
+        )
+
+        return response.content
+
+    def _llm_endpoint_key(self) -> str:
+        # Chat models expose their server under different names (openai_api_base, base_url, ...)
+        for attr in ("openai_api_base", "base_url", "anthropic_api_url", "endpoint_url"):
+            base_url = getattr(self.llm, attr, None)
+            if base_url:
+                return f"{base_url}|{self.model_name}"
+        return f"{type(self.llm).__name__}|{self.model_name}"
+
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        # Some providers (e.g. Anthropic) stream a list of content blocks instead of a string
+        if isinstance(chunk.content, str):
+            return chunk.content
+        return "".join(
+            part if isinstance(part, str) else part.get("text", "")
+            for part in chunk.content
+        )
+
+    def submit_prompt_stream(self, prompt: List[BaseMessage], **kwargs) -> Iterator[str]:
+        if prompt is None:
+            raise Exception("Prompt is None")
+
+        if len(prompt) == 0:
+            raise Exception("Prompt is empty")
+
+        for chunk in self.llm.stream(prompt):
+            text = self._chunk_text(chunk)
+            if text:
+                yield text
+        self.log(f"Used model {self.model_name} (streamed)", title="Model Used")
+
+    async def asubmit_prompt_stream(self, prompt: List[BaseMessage], **kwargs) -> AsyncIterator[str]:
+        if prompt is None:
+            raise Exception("Prompt is None")
+
+        if len(prompt) == 0:
+            raise Exception("Prompt is empty")
+
+        async for chunk in self.llm.astream(prompt):
+            text = self._chunk_text(chunk)
+            if text:
+                yield text
+        self.log(f"Used model {self.model_name} (streamed)", title="Model Used")
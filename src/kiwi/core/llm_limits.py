@@ -0,0 +1,32 @@
+import asyncio
+import threading
+import weakref
+from typing import Dict
+
+# event loop -> endpoint -> semaphore. asyncio semaphores belong to one loop, so each loop gets its own.
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def endpoint_semaphore(endpoint: str, limit: int) -> asyncio.Semaphore:
+    """
+    The semaphore bounding in-flight async LLM calls to ``endpoint`` in the running event loop.
+
+    Every instance naming the same endpoint shares it, so several [`KiwiBase`][kiwi.core.base.KiwiBase]
+    instances served by one process can't together exceed what the model server accepts. The limit of
+    the first caller for an endpoint wins.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be positive, got {limit}")
+
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _semaphores.get(loop)
+        if per_loop is None:
+            per_loop = _semaphores[loop] = {}
+        semaphore = per_loop.get(endpoint)
+        if semaphore is None:
+            semaphore = per_loop[endpoint] = asyncio.Semaphore(limit)
+    return semaphore
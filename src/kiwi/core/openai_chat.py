@@ -1,13 +1,17 @@
 import os
+from typing import AsyncIterator, Iterator
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
-from .base import VannaBase
+from .base import KiwiBase
 
 
-class OpenAI_Chat(VannaBase):
-    def __init__(self, client=None, config=None):
-        VannaBase.__init__(self, config=config)
+class OpenAI_Chat(KiwiBase):
+    def __init__(self, client=None, config=None, async_client=None):
+        KiwiBase.__init__(self, config=config)
+
+        # Used by asubmit_prompt; built from the sync client's settings when not given
+        self.async_client = async_client
 
         # default parameters - can be overrided using config
         self.temperature = 0.7
@@ -50,7 +54,7 @@ class OpenAI_Chat(VannaBase):
     def assistant_message(self, message: str) -> any:
         return {"role": "assistant", "content": message}
 
-    def submit_prompt(self, prompt, **kwargs) -> str:
+    def _completion_params(self, prompt, **kwargs) -> dict:
         if prompt is None:
             raise Exception("Prompt is None")
 
@@ -68,43 +72,23 @@ class OpenAI_Chat(VannaBase):
             print(
                 f"Using model {model} for {num_tokens} tokens (approx)"
             )
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
-            )
+            target = {"model": model}
         elif kwargs.get("engine", None) is not None:
             engine = kwargs.get("engine", None)
             print(
                 f"Using model {engine} for {num_tokens} tokens (approx)"
             )
-            response = self.client.chat.completions.create(
-                engine=engine,
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
-            )
+            target = {"engine": engine}
         elif self.config is not None and "engine" in self.config:
             print(
                 f"Using engine {self.config['engine']} for {num_tokens} tokens (approx)"
             )
-            response = self.client.chat.completions.create(
-                engine=self.config["engine"],
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
-            )
+            target = {"engine": self.config["engine"]}
         elif self.config is not None and "model" in self.config:
             print(
                 f"Using model {self.config['model']} for {num_tokens} tokens (approx)"
             )
-            response = self.client.chat.completions.create(
-                model=self.config["model"],
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
-            )
+            target = {"model": self.config["model"]}
         else:
             if num_tokens > 3500:
                 model = "gpt-3.5-turbo-16k"
@@ -112,17 +96,81 @@ class OpenAI_Chat(VannaBase):
                 model = "gpt-3.5-turbo"
 
             print(f"Using model {model} for {num_tokens} tokens (approx)")
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
-            )
+            target = {"model": model}
+
+        return {
+            **target,
+            "messages": prompt,
+            "stop": None,
+            "temperature": self.temperature,
+        }
 
+    @staticmethod
+    def _response_text(response) -> str:
         # Find the first response from the chatbot that has text in it (some responses may not have text)
         for choice in response.choices:
-            if "text" in choice:
-                return choice.text
+            message = getattr(choice, "message", None)
+            text = getattr(choice, "text", None) or getattr(message, "content", None)
+            if text:
+                return text
 
         # If no response with text is found, return the first response's content (which may be empty)
         return response.choices[0].message.content
+
+    def submit_prompt(self, prompt, **kwargs) -> str:
+        response = self.client.chat.completions.create(**self._completion_params(prompt, **kwargs))
+        return self._response_text(response)
+
+    def submit_prompt_stream(self, prompt, **kwargs) -> Iterator[str]:
+        stream = self.client.chat.completions.create(**self._completion_params(prompt, **kwargs), stream=True)
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the stream early (client gone, SQL already extracted) stops the generation
+            stream.close()
+
+    def _get_async_client(self):
+        # Built with the sync client's settings. A custom http_client (proxies, transports) can't be carried
+        # over to the async client: pass async_client as well in that case.
+        if self.async_client is None and isinstance(getattr(self, "client", None), OpenAI):
+            self.async_client = AsyncOpenAI(
+                api_key=self.client.api_key,
+                organization=self.client.organization,
+                project=self.client.project,
+                base_url=self.client.base_url,
+                timeout=self.client.timeout,
+                max_retries=self.client.max_retries,
+                default_headers=self.client._custom_headers,
+                default_query=self.client._custom_query,
+            )
+        return self.async_client
+
+    async def asubmit_prompt(self, prompt, **kwargs) -> str:
+        client = self._get_async_client()
+        if client is None:
+            return await super().asubmit_prompt(prompt, **kwargs)
+
+        response = await client.chat.completions.create(**self._completion_params(prompt, **kwargs))
+        return self._response_text(response)
+
+    async def asubmit_prompt_stream(self, prompt, **kwargs) -> AsyncIterator[str]:
+        client = self._get_async_client()
+        if client is None:
+            async for token in super().asubmit_prompt_stream(prompt, **kwargs):
+                yield token
+            return
+
+        stream = await client.chat.completions.create(**self._completion_params(prompt, **kwargs), stream=True)
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+    def _llm_endpoint_key(self) -> str:
+        base_url = getattr(self.async_client or getattr(self, "client", None), "base_url", None)
+        model = (self.config or {}).get("model") or (self.config or {}).get("engine")
+        return f"{base_url}|{model}"
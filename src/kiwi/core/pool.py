@@ -0,0 +1,272 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional, Tuple, Type
+
+from kiwi import exceptions
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledConnection:
+    connection: Any
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of DB-API connections.
+
+    Connections are created lazily up to ``max_size`` (``min_size`` are opened up front) and handed out
+    most-recently-used first. On checkout a connection older than ``recycle`` seconds is replaced, and with
+    ``pre_ping`` the connection is health-checked first and transparently replaced if the check fails.
+    On checkin it is reset (rolled back by default) so no transaction leaks into the next borrower.
+    Inside [`connection`][kiwi.core.pool.ConnectionPool.connection], an exception that
+    [`is_disconnect`][kiwi.core.pool.ConnectionPool.is_disconnect] recognizes discards the connection
+    instead of returning it.
+
+    **Example:**
+    ```python
+    pool = ConnectionPool(lambda: psycopg2.connect(dsn), min_size=1, max_size=10,
+                          disconnect_errors=(psycopg2.InterfaceError, psycopg2.OperationalError))
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+    pool.stats()
+    ```
+
+    Args:
+        connect (Callable): Opens a new connection.
+        min_size (int): Connections opened when the pool is created.
+        max_size (int): Maximum number of open connections, idle or in use.
+        timeout (float): Seconds to wait for a free connection before raising `kiwi.exceptions.ConnectionError`.
+        recycle (float): Connections older than this many seconds are closed on checkout. None disables recycling.
+        pre_ping (bool): Health-check connections on checkout.
+        ping (Callable): Health check; raises if the connection is unusable. Defaults to running ``SELECT 1``.
+        reset (Callable): Called on checkin. Defaults to ``connection.rollback()``.
+        disconnect_errors (tuple): Exception types that mean the connection is broken.
+        disconnect_filter (Callable): Narrows ``disconnect_errors`` for drivers that share an exception type
+            between lost connections and other failures, e.g. by error code. Defaults to accepting all of them.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 30.0,
+        recycle: Optional[float] = 3600.0,
+        pre_ping: bool = True,
+        ping: Optional[Callable[[Any], None]] = None,
+        reset: Optional[Callable[[Any], None]] = None,
+        disconnect_errors: Tuple[Type[BaseException], ...] = (),
+        disconnect_filter: Optional[Callable[[BaseException], bool]] = None,
+    ):
+        if max_size < 1:
+            raise ValueError(f"max_size must be positive, got {max_size}")
+        if not 0 <= min_size <= max_size:
+            raise ValueError(f"min_size must be between 0 and max_size, got {min_size}")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self._ping = ping or self._select_one
+        self._reset = reset or (lambda conn: conn.rollback())
+        self.disconnect_errors = disconnect_errors
+        self._disconnect_filter = disconnect_filter
+
+        self._idle: "deque[PooledConnection]" = deque()
+        self._cond = threading.Condition()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        self._started = time.monotonic()
+        self._last_change = self._started
+        self._busy_seconds = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.recycled = 0
+        self.failed_pings = 0
+        self.peak_in_use = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        for _ in range(min_size):
+            self._idle.append(PooledConnection(self._open()))
+            self._size += 1
+
+    @staticmethod
+    def _select_one(conn) -> None:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _open(self) -> Any:
+        conn = self._connect()
+        with self._cond:
+            self.created += 1
+        return conn
+
+    @staticmethod
+    def _close(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _track_busy(self, now: float) -> None:
+        # Caller holds the lock. Integrates connections-in-use over time for mean utilization.
+        self._busy_seconds += self._in_use * (now - self._last_change)
+        self._last_change = now
+
+    def _validate(self, entry: PooledConnection) -> PooledConnection:
+        if self.recycle is not None and time.monotonic() - entry.created_at > self.recycle:
+            self._close(entry.connection)
+            with self._cond:
+                self.recycled += 1
+            return PooledConnection(self._open())
+
+        if self.pre_ping:
+            try:
+                self._ping(entry.connection)
+                self._reset(entry.connection)
+            except Exception as e:
+                logger.info(f"Discarding pooled connection that failed its health check: {e}")
+                self._close(entry.connection)
+                with self._cond:
+                    self.failed_pings += 1
+                return PooledConnection(self._open())
+        return entry
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Check out a connection. Prefer [`connection`][kiwi.core.pool.ConnectionPool.connection]."""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise exceptions.ConnectionError("Connection pool is closed")
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    entry = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise exceptions.ConnectionError(
+                        f"Timed out after {timeout:.1f}s waiting for a connection ({self.max_size} in use)"
+                    )
+                self._cond.wait(remaining)
+
+            now = time.monotonic()
+            self._track_busy(now)
+            self._in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self._in_use)
+            self.checkouts += 1
+            wait = now - start
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+        try:
+            return PooledConnection(self._open()) if entry is None else self._validate(entry)
+        except BaseException:
+            self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._track_busy(time.monotonic())
+            self._in_use -= 1
+            self._size -= 1
+            self._cond.notify()
+
+    def release(self, entry: PooledConnection, discard: bool = False) -> None:
+        """Return a checked-out connection, or close it when ``discard`` is True."""
+        if not discard:
+            try:
+                self._reset(entry.connection)
+            except Exception:
+                discard = True
+
+        if discard or self._closed:
+            self._close(entry.connection)
+            with self._cond:
+                self.discarded += 1
+            self._release_slot()
+            return
+
+        with self._cond:
+            self._track_busy(time.monotonic())
+            self._in_use -= 1
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def is_disconnect(self, error: BaseException) -> bool:
+        """Whether ``error`` means the connection it was raised on is broken, so a retry needs a fresh one."""
+        if not isinstance(error, self.disconnect_errors):
+            return False
+        return self._disconnect_filter is None or self._disconnect_filter(error)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """Borrow a connection for the duration of a ``with`` block."""
+        entry = self.acquire(timeout)
+        try:
+            yield entry.connection
+        except BaseException as e:
+            self.release(entry, discard=self.is_disconnect(e))
+            raise
+        else:
+            self.release(entry)
+
+    def close(self) -> None:
+        """Close idle connections now; connections in use are closed when they are returned."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close(entry.connection)
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            self._track_busy(now)
+            elapsed = max(now - self._started, 1e-9)
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "utilization": self._in_use / self.max_size,
+                "mean_utilization": self._busy_seconds / (elapsed * self.max_size),
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "mean_wait_ms": self.total_wait / self.checkouts * 1000 if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+                "created": self.created,
+                "discarded": self.discarded,
+                "recycled": self.recycled,
+                "failed_pings": self.failed_pings,
+            }
@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import sqlparse
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Canonical form of a query for cache keys: comments stripped, keywords upper-cased, whitespace
+    between tokens collapsed and trailing semicolons dropped. Identifiers and literals are left as
+    written, including the whitespace inside string literals, since it changes what the query matches.
+    """
+    formatted = sqlparse.format(sql, strip_comments=True, keyword_case="upper", strip_whitespace=True)
+    return formatted.strip().rstrip(";").rstrip()
+
+
+def result_nbytes(value) -> int:
+    """Approximate in-memory size of a DataFrame or ``pyarrow.Table``."""
+    if hasattr(value, "nbytes") and hasattr(value, "schema"):
+        return value.nbytes
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return 0
+
+
+@dataclass
+class ResultCacheEntry:
+    result: Any
+    nbytes: int
+    expires_at: Optional[float]
+    created_at: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+
+class ResultCache:
+    """
+    LRU cache of query results, keyed by normalized SQL and the connection it ran on.
+
+    [`KiwiBase.run_sql_cached`][kiwi.core.base.KiwiBase.run_sql_cached] and
+    [`KiwiBase.run_sql_iter`][kiwi.core.base.KiwiBase.run_sql_iter] consult it for statements that
+    [`is_sql_valid`][kiwi.core.base.KiwiBase.is_sql_valid] accepts (read-only SELECTs by default), so
+    re-running a query from the history panel, ``load_question`` or an unchanged ``fix_sql`` doesn't hit
+    the warehouse again. Entries expire after a per-dialect TTL, and the least recently used ones are
+    evicted once the cached results exceed ``max_bytes``.
+
+    **Example:**
+    ```python
+    vn = MyKiwi(config={"result_cache": {"ttl": 300, "dialect_ttls": {"Snowflake SQL": 3600}}})
+    vn.run_sql_cached("SELECT region, sum(amount) FROM sales GROUP BY 1")
+    vn.result_cache.invalidate()
+    ```
+
+    Args:
+        ttl (float): Seconds a result stays valid. None keeps results until evicted or invalidated.
+        dialect_ttls (dict): TTL overrides by `vn.dialect`, e.g. ``{"DuckDB SQL": 60}``.
+        max_bytes (int): Total size of cached results; least recently used entries are evicted beyond it.
+        max_entries (int): Maximum number of cached results.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = 300.0,
+        dialect_ttls: Optional[Dict[str, Optional[float]]] = None,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_entries: int = 1000,
+    ):
+        if max_bytes < 1:
+            raise ValueError(f"max_bytes must be positive, got {max_bytes}")
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+
+        self.ttl = ttl
+        self.dialect_ttls = dict(dialect_ttls or {})
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], ResultCacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.too_large = 0
+
+    def ttl_for(self, dialect: Optional[str]) -> Optional[float]:
+        return self.dialect_ttls.get(dialect, self.ttl)
+
+    def _drop(self, key) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(key)
+        self.nbytes -= entry.nbytes
+
+    def get(self, sql: str, connection: str) -> Any:
+        """Return the cached result for ``sql`` on ``connection``, or None."""
+        key = (connection, normalize_sql(sql))
+        with self._lock:
+            self.lookups += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at is not None and time.monotonic() >= entry.expires_at:
+                self._drop(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.hits += 1
+            return entry.result
+
+    def set(self, sql: str, result: Any, connection: str, dialect: Optional[str] = None) -> bool:
+        """Cache a result. Returns False if it is larger than the whole cache."""
+        nbytes = result_nbytes(result)
+        if nbytes > self.max_bytes:
+            with self._lock:
+                self.too_large += 1
+            return False
+
+        ttl = self.ttl_for(dialect)
+        key = (connection, normalize_sql(sql))
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = ResultCacheEntry(
+                result=result,
+                nbytes=nbytes,
+                expires_at=None if ttl is None else time.monotonic() + ttl,
+            )
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def invalidate(self, sql: Optional[str] = None, connection: Optional[str] = None) -> int:
+        """
+        Drop cached results: one query's (``sql``), one connection's, both, or everything.
+
+        Returns:
+            int: Number of entries dropped.
+        """
+        normalized = None if sql is None else normalize_sql(sql)
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if (connection is None or key[0] == connection) and (normalized is None or key[1] == normalized)
+            ]
+            for key in keys:
+                self._drop(key)
+            self.invalidations += 1
+            return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "too_large": self.too_large,
+            }
@@ -0,0 +1,383 @@
+import math
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import sqlparse
+
+_CREATE_TABLE = re.compile(
+    r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:GLOBAL\s+|LOCAL\s+)?(?:TEMP|TEMPORARY)\s+)?TABLE\s+"
+    r"(?:IF\s+NOT\s+EXISTS\s+)?(?P<name>[^\s(]+)\s*\((?P<body>.*)\)[^)]*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_FOREIGN_KEY = re.compile(
+    r"FOREIGN\s+KEY\s*\((?P<columns>[^)]*)\)\s*REFERENCES\s+(?P<table>[^\s(]+)\s*(?:\((?P<ref_columns>[^)]*)\))?",
+    re.IGNORECASE,
+)
+_INLINE_REFERENCES = re.compile(
+    r"\bREFERENCES\s+(?P<table>[^\s(]+)\s*(?:\((?P<ref_columns>[^)]*)\))?", re.IGNORECASE
+)
+_PRIMARY_KEY = re.compile(r"PRIMARY\s+KEY\s*\((?P<columns>[^)]*)\)", re.IGNORECASE)
+_CONSTRAINT_PREFIXES = ("constraint", "primary", "foreign", "unique", "check", "key", "index", "exclude")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9]*")
+# Runs of CJK ideographs, kana and hangul, which aren't separated into words by spaces
+_CJK = re.compile("[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+")
+
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "that", "this", "what", "which", "who", "whose", "how",
+    "many", "much", "are", "was", "were", "has", "have", "had", "each", "per", "all", "any", "top",
+    "list", "show", "give", "find", "get", "number", "count", "total", "average", "most", "least",
+    "than", "more", "less", "between", "over", "under", "into", "their", "there", "them", "they",
+    "does", "did", "not", "can", "by", "of", "in", "on", "to", "is", "a", "an",
+}
+
+
+def _strip_identifier(identifier: str) -> str:
+    return identifier.strip().strip('`"[]')
+
+
+def _table_key(identifier: str) -> str:
+    # Schema-qualified names are keyed by their last part, so `main.orders` and `orders` match.
+    parts = [_strip_identifier(p) for p in identifier.split(".")]
+    return parts[-1].lower()
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def cjk_tokens(text: str) -> Set[str]:
+    """
+    The overlapping character bigrams of the CJK runs in ``text`` (a lone character stands for itself), so
+    that ``客户`` in a question matches a ``客户名称`` column without segmenting either into words.
+    """
+    tokens = set()
+    for run in _CJK.findall(text):
+        if len(run) == 1:
+            tokens.add(run)
+        tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def identifier_tokens(identifier: str) -> Set[str]:
+    """Split an identifier like ``o_orderDate`` or ``SupportRepId`` into stemmed lowercase words."""
+    tokens = cjk_tokens(identifier)
+    for part in re.split(r"[_\W]+", _strip_identifier(identifier)):
+        for word in _CAMEL.findall(part):
+            word = word.lower()
+            if len(word) >= 3:
+                tokens.add(_stem(word))
+        if len(part) >= 3:
+            tokens.add(_stem(part.lower()))
+    return tokens
+
+
+def question_tokens(question: str) -> Set[str]:
+    return {
+        _stem(word.lower())
+        for word in _WORD.findall(question)
+        if len(word) >= 3 and word.lower() not in _STOPWORDS
+    } | cjk_tokens(question)
+
+
+def _split_top_level(body: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in body:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _column_list(columns: str) -> List[str]:
+    return [_strip_identifier(c).lower() for c in columns.split(",") if c.strip()]
+
+
+@dataclass
+class ForeignKey:
+    columns: List[str]
+    ref_table: str
+    ref_columns: List[str]
+
+
+@dataclass
+class TableInfo:
+    name: str
+    ddl: str
+    columns: List[str] = field(default_factory=list)
+    primary_key: List[str] = field(default_factory=list)
+    foreign_keys: List[ForeignKey] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return _table_key(self.name)
+
+
+def parse_ddl(ddl: str) -> List[TableInfo]:
+    """
+    Parse the ``CREATE TABLE`` statements in a DDL string into table, column and foreign-key records.
+    Other statements are ignored.
+
+    Args:
+        ddl (str): One or more SQL statements.
+
+    Returns:
+        List[TableInfo]: One record per table, each holding the text of its own statement.
+    """
+    tables = []
+    for statement in sqlparse.split(ddl):
+        text = sqlparse.format(statement, strip_comments=True).strip().rstrip(";")
+        match = _CREATE_TABLE.match(text)
+        if match is None:
+            continue
+
+        table = TableInfo(name=_strip_identifier(match.group("name")), ddl=statement.strip())
+        for item in _split_top_level(match.group("body")):
+            lowered = item.lower()
+            if lowered.startswith(_CONSTRAINT_PREFIXES):
+                pk = _PRIMARY_KEY.search(item)
+                if pk:
+                    table.primary_key = _column_list(pk.group("columns"))
+                for fk in _FOREIGN_KEY.finditer(item):
+                    table.foreign_keys.append(
+                        ForeignKey(
+                            columns=_column_list(fk.group("columns")),
+                            ref_table=_table_key(fk.group("table")),
+                            ref_columns=_column_list(fk.group("ref_columns") or ""),
+                        )
+                    )
+                continue
+
+            column = _strip_identifier(item.split()[0]).lower()
+            table.columns.append(column)
+            if "primary key" in lowered:
+                table.primary_key = [column]
+            ref = _INLINE_REFERENCES.search(item)
+            if ref:
+                table.foreign_keys.append(
+                    ForeignKey(
+                        columns=[column],
+                        ref_table=_table_key(ref.group("table")),
+                        ref_columns=_column_list(ref.group("ref_columns") or ""),
+                    )
+                )
+        tables.append(table)
+    return tables
+
+
+class SchemaIndex:
+    """
+    Table-level index over the trained DDL, used to prune the DDL that goes into a SQL prompt.
+
+    Each DDL string is parsed once into [`TableInfo`][kiwi.core.schema_linking.TableInfo] records. For a
+    question, every table is scored by combining where its DDL ranked in the vector search with
+    IDF-weighted matches between the question's words and the table and column names. The best tables
+    are then joined into a small connected set by adding the tables on the shortest foreign-key path
+    between them, and only those tables' ``CREATE TABLE`` statements are returned.
+
+    **Example:**
+    ```python
+    index = SchemaIndex(max_tables=5)
+    index.sync(all_ddl)
+    ddl_for_prompt = index.link("Total revenue by customer nation", vector_ddl_hits)
+    ```
+
+    Args:
+        max_tables (int): Maximum number of tables returned, including join-path tables.
+        max_hops (int): Longest foreign-key path used to connect two relevant tables.
+        vector_weight (float): Weight of the vector-search rank in a table's score.
+        lexical_weight (float): Weight of the name-matching score in a table's score.
+        min_score (float): Tables scoring below this are never selected as seeds.
+    """
+
+    def __init__(
+        self,
+        max_tables: int = 8,
+        max_hops: int = 3,
+        vector_weight: float = 1.0,
+        lexical_weight: float = 1.0,
+        min_score: float = 0.2,
+    ):
+        if max_tables < 1:
+            raise ValueError(f"max_tables must be positive, got {max_tables}")
+
+        self.max_tables = max_tables
+        self.max_hops = max_hops
+        self.vector_weight = vector_weight
+        self.lexical_weight = lexical_weight
+        self.min_score = min_score
+
+        self._parsed: Dict[str, List[TableInfo]] = {}
+        self.tables: Dict[str, TableInfo] = {}
+        self._table_tokens: Dict[str, Set[str]] = {}
+        self._column_tokens: Dict[str, Set[str]] = {}
+        self._idf: Dict[str, float] = {}
+        self._graph: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def sync(self, ddl_list: Iterable[str]) -> None:
+        """Make the index reflect exactly ``ddl_list``. Only DDL strings not seen before are parsed."""
+        ddl_list = list(dict.fromkeys(ddl_list))
+        with self._lock:
+            self._parsed = {ddl: self._tables_in(ddl) for ddl in ddl_list}
+            self._rebuild()
+
+    def add(self, ddl: str) -> List[TableInfo]:
+        with self._lock:
+            if ddl not in self._parsed:
+                self._parsed[ddl] = parse_ddl(ddl)
+                self._rebuild()
+            return self._parsed[ddl]
+
+    def _rebuild(self) -> None:
+        # Caller holds the lock.
+        self.tables = {}
+        for tables in self._parsed.values():
+            for table in tables:
+                self.tables[table.key] = table
+
+        self._table_tokens = {key: identifier_tokens(t.name) for key, t in self.tables.items()}
+        self._column_tokens = {
+            key: set().union(*(identifier_tokens(c) for c in t.columns)) if t.columns else set()
+            for key, t in self.tables.items()
+        }
+
+        document_frequency: Dict[str, int] = {}
+        for key in self.tables:
+            for token in self._table_tokens[key] | self._column_tokens[key]:
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+        n = max(len(self.tables), 1)
+        self._idf = {token: math.log(1 + n / df) for token, df in document_frequency.items()}
+
+        self._graph = {key: set() for key in self.tables}
+        for key, table in self.tables.items():
+            for fk in table.foreign_keys:
+                if fk.ref_table in self._graph and fk.ref_table != key:
+                    self._graph[key].add(fk.ref_table)
+                    self._graph[fk.ref_table].add(key)
+
+    def _tables_in(self, ddl: str) -> List[TableInfo]:
+        if ddl in self._parsed:
+            return self._parsed[ddl]
+        return parse_ddl(ddl)
+
+    def _lexical_score(self, key: str, words: Set[str]) -> float:
+        score = 0.0
+        for word in words:
+            if word in self._table_tokens[key]:
+                score += 2 * self._idf.get(word, 0.0)
+            elif word in self._column_tokens[key]:
+                score += self._idf.get(word, 0.0)
+            elif len(word) >= 4 and any(
+                token.startswith(word) or word.startswith(token)
+                for token in self._column_tokens[key]
+                if len(token) >= 4
+            ):
+                # Partial match, e.g. "orderdate" against "order", or "ship" against "shipmode".
+                score += 0.5 * self._idf.get(word, math.log(2))
+        return score
+
+    def rank_tables(self, question: str, ddl_hits: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Score every table for a question.
+
+        Args:
+            question (str): The user question.
+            ddl_hits (List[str]): DDL strings from the vector search, best first.
+
+        Returns:
+            List[Tuple[str, float]]: ``(table name, score)`` for tables with a positive score, best first.
+        """
+        words = question_tokens(question)
+        vector_scores: Dict[str, float] = {}
+        for rank, ddl in enumerate(ddl_hits or []):
+            for table in self._tables_in(ddl):
+                vector_scores.setdefault(table.key, 1.0 / (1 + rank))
+
+        lexical = {key: self._lexical_score(key, words) for key in self.tables}
+        top_lexical = max(lexical.values(), default=0.0) or 1.0
+
+        scores = []
+        for key, table in self.tables.items():
+            score = (
+                self.vector_weight * vector_scores.get(key, 0.0)
+                + self.lexical_weight * lexical[key] / top_lexical
+            )
+            if score > 0:
+                scores.append((table.name, score))
+        scores.sort(key=lambda item: -item[1])
+        return scores
+
+    def _path(self, start: str, targets: Set[str]) -> Optional[List[str]]:
+        # Breadth-first search over the undirected foreign-key graph, at most max_hops edges.
+        queue = deque([(start, [start])])
+        seen = {start}
+        while queue:
+            node, path = queue.popleft()
+            if node in targets and node != start:
+                return path
+            if len(path) > self.max_hops:
+                continue
+            for neighbour in sorted(self._graph.get(node, ())):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append((neighbour, path + [neighbour]))
+        return None
+
+    def link_tables(self, question: str, ddl_hits: Optional[List[str]] = None) -> List[str]:
+        """Return the keys of the linked tables: relevant seeds plus the tables joining them."""
+        selected: List[str] = []
+        for name, score in self.rank_tables(question, ddl_hits):
+            if len(selected) >= self.max_tables or score < self.min_score:
+                break
+            key = _table_key(name)
+            if key in selected:
+                continue
+
+            bridge = []
+            if selected:
+                path = self._path(key, set(selected))
+                if path is not None:
+                    bridge = [node for node in path[1:-1] if node not in selected]
+            if len(selected) + 1 + len(bridge) > self.max_tables:
+                continue
+            selected.append(key)
+            selected.extend(bridge)
+        return selected
+
+    def link(self, question: str, ddl_hits: List[str]) -> List[str]:
+        """
+        Prune DDL for a prompt.
+
+        Args:
+            question (str): The user question.
+            ddl_hits (List[str]): DDL strings from the vector search, best first.
+
+        Returns:
+            List[str]: One ``CREATE TABLE`` statement per linked table, followed by any vector hits that
+            contain no table definition (views, comments, ...). Returns ``ddl_hits`` unchanged when the
+            index holds no tables.
+        """
+        with self._lock:
+            if not self.tables:
+                return ddl_hits
+            linked = [self.tables[key].ddl for key in self.link_tables(question, ddl_hits)]
+            passthrough = [ddl for ddl in ddl_hits if not self._tables_in(ddl)]
+            return linked + passthrough
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class SemanticCacheEntry:
+    question: str
+    sql: str
+    embedding: np.ndarray
+    generation_ms: float
+    created_at: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+
+@dataclass
+class SemanticCacheHit:
+    question: str
+    sql: str
+    similarity: float
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache of previously answered questions and the SQL generated for them.
+
+    [`KiwiBase.generate_sql`][kiwi.core.base.KiwiBase.generate_sql] consults it before calling the LLM:
+    if a cached question in the same namespace (dialect, database and training data) is at least
+    ``threshold`` cosine-similar to the incoming one, its SQL is returned directly. When an instance's schema
+    context changes, its namespace is dropped by [`invalidate`][kiwi.core.semantic_cache.SemanticCache.invalidate].
+
+    Args:
+        threshold (float): Minimum cosine similarity for a hit.
+        max_entries (int): Maximum entries kept per namespace; least recently used entries are evicted.
+        ttl (float): Seconds after which an entry expires. None keeps entries until evicted or invalidated.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1000, ttl: Optional[float] = None):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._namespaces: Dict[str, "OrderedDict[str, SemanticCacheEntry]"] = {}
+        self._matrices: Dict[str, Tuple[list, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.invalidations = 0
+        self.latency_saved_ms = 0.0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _expired(self, entry: SemanticCacheEntry, now: float) -> bool:
+        return self.ttl is not None and now - entry.created_at > self.ttl
+
+    def _matrix(self, namespace: str) -> Tuple[list, Optional[np.ndarray]]:
+        # Caller holds the lock. The stacked matrix is rebuilt only after the namespace changes.
+        if namespace not in self._matrices:
+            entries = list(self._namespaces.get(namespace, {}).values())
+            matrix = np.vstack([e.embedding for e in entries]) if entries else None
+            self._matrices[namespace] = (entries, matrix)
+        return self._matrices[namespace]
+
+    def lookup(self, namespace: str, embedding: Sequence[float]) -> Optional[SemanticCacheHit]:
+        """Return the most similar cached answer above the threshold, or None."""
+        query = self._normalize(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            self.lookups += 1
+            entries, matrix = self._matrix(namespace)
+            if matrix is None or matrix.shape[1] != query.shape[0]:
+                return None
+
+            similarities = matrix @ query
+            for index in np.argsort(-similarities):
+                similarity = float(similarities[index])
+                if similarity < self.threshold:
+                    return None
+                entry = entries[index]
+                if self._expired(entry, now):
+                    continue
+
+                entry.hits += 1
+                self.hits += 1
+                self.latency_saved_ms += entry.generation_ms
+                self._namespaces[namespace].move_to_end(entry.question)
+                return SemanticCacheHit(question=entry.question, sql=entry.sql, similarity=similarity)
+
+        return None
+
+    def add(
+        self,
+        namespace: str,
+        question: str,
+        embedding: Sequence[float],
+        sql: str,
+        generation_ms: float = 0.0,
+    ) -> None:
+        """Remember the SQL generated for a question, along with how long generating it took."""
+        entry = SemanticCacheEntry(
+            question=question,
+            sql=sql,
+            embedding=self._normalize(embedding),
+            generation_ms=generation_ms,
+        )
+        now = time.monotonic()
+
+        with self._lock:
+            entries = self._namespaces.setdefault(namespace, OrderedDict())
+            entries[question] = entry
+            entries.move_to_end(question)
+
+            for key in [k for k, e in entries.items() if self._expired(e, now)]:
+                del entries[key]
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+            self._matrices.pop(namespace, None)
+
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        """Drop cached answers for one namespace, or for all of them."""
+        with self._lock:
+            if namespace is None:
+                self._namespaces.clear()
+                self._matrices.clear()
+            else:
+                self._namespaces.pop(namespace, None)
+                self._matrices.pop(namespace, None)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.lookups - self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "latency_saved_ms": self.latency_saved_ms,
+                "invalidations": self.invalidations,
+                "size": sum(len(entries) for entries in self._namespaces.values()),
+                "threshold": self.threshold,
+            }
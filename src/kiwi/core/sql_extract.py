@@ -0,0 +1,269 @@
+import re
+from typing import List, Optional, Tuple
+
+# Everything the extraction rules look at: statement terminators, runs of backticks (code fences) and the
+# keywords that start a statement. A keyword only counts before whitespace, as in "SELECT x". The leading
+# lookahead lets the engine skip every position that can't start a token without trying the alternatives.
+_TOKENS = re.compile(
+    r"(?=[;`cws])(?:(;)|(`{3,})|\b(?:(CREATE\s+TABLE\b)|(WITH|SELECT)\b(?=\s)))",
+    re.IGNORECASE,
+)
+# Looked for only after CREATE TABLE, so the aliases of every other statement aren't tokenized
+_AS = re.compile(r"\bAS\b", re.IGNORECASE)
+# What may follow the backticks opening a ```sql block
+_SQL_FENCE_OPEN = re.compile(r"sql\s*\n", re.IGNORECASE)
+
+Span = Tuple[int, int]
+
+
+def _is_word(char: str) -> bool:
+    # What \w matches
+    return char.isalnum() or char == "_"
+
+
+def _partial_start(text: str, start: int) -> int:
+    """
+    Where the end of ``text`` that more text could still turn into (or out of) a token begins: a word that
+    may grow, a CREATE waiting for TABLE, or a run of backticks with what may become its language tag.
+    Walks back from the end, so the cost doesn't depend on the length of the text.
+    """
+    end = len(text)
+    space = end
+    while space > start and text[space - 1].isspace():
+        space -= 1
+    word = space
+    while word > start and _is_word(text[word - 1]):
+        word -= 1
+
+    if space == end and word < end:
+        hold = word
+        # CREATE, whitespace, and the start of what may be TABLE
+        before = word
+        while before > start and text[before - 1].isspace():
+            before -= 1
+        if before < word:
+            create = before
+            while create > start and _is_word(text[create - 1]):
+                create -= 1
+            if text[create:before].lower() == "create":
+                return create
+    elif text[word:space].lower() == "create":
+        return word
+    else:
+        hold = end
+
+    if word > start and text[word - 1] == "`":
+        while word > start and text[word - 1] == "`":
+            word -= 1
+        return word
+    return hold
+
+
+class SqlExtractor:
+    """
+    Single-pass SQL extraction from an LLM response, fed whole or a token at a time.
+
+    The text is tokenized once into terminators, code fences and statement keywords, and every extraction
+    rule of [`extract_sql`][kiwi.core.base.KiwiBase.extract_sql] advances on those tokens at the same time,
+    so the response is never scanned again however long it gets. Only the end of the text that a later
+    token could still change is held back and tokenized again.
+
+    **Example:**
+    ```python
+    extractor = SqlExtractor()
+    for token in tokens:
+        extractor.feed(token)
+        if extractor.complete_sql() is not None:
+            ...  # a statement is ready before the response is
+    extractor.feed("", final=True)
+    extractor.last_sql()
+    ```
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._text: Optional[str] = ""
+        # Unprocessed text from absolute offset _offset, starting one character before _scan so the word
+        # boundary in front of a keyword can be checked
+        self._pending = ""
+        self._offset = 0
+        self._scan = 0
+        self._final = False
+        # Whether only spaces and tabs precede the scan position on its line
+        self._line_blank = True
+
+        # CREATE TABLE ... AS ... ; (phase 1 waits for AS from _create_as, phase 2 for the semicolon)
+        self._create_phase, self._create_start, self._create_as, self._create = 0, 0, 0, None
+        # WITH ... ; and SELECT ... ; where the keyword is followed by a space
+        self._with_start, self._with = None, None
+        self._select_start, self._select = None, None
+        # The first WITH / SELECT ... ; starting a line
+        self._statement_start, self._first_statement = None, None
+        # ```sql ... ``` blocks: where the content of the open one starts
+        self._sql_fence_content, self._sql_fence_cursor = None, 0
+        self._sql_fence, self._first_sql_fence = None, None
+        # Any ``` ... ``` block: where the open one's backticks are
+        self._fence_open, self._fence_cursor, self._fence = None, 0, None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        if self._text is None:
+            self._text = "".join(self._chunks)
+            self._chunks = [self._text]
+        return self._text
+
+    def feed(self, chunk: str, final: bool = False) -> None:
+        """
+        Add the next piece of the response. Pass ``final=True`` with the last one (or an empty string) so
+        the end of the text is tokenized too; nothing can be fed after that.
+        """
+        if self._final:
+            raise ValueError("feed() called after the final chunk")
+        self._final = final
+        if chunk:
+            self._chunks.append(chunk)
+            self._text = None
+            self._pending += chunk
+
+        pending = self._pending
+        hold = len(pending)
+        start = self._scan - self._offset
+        if not final:
+            hold = _partial_start(pending, start)
+
+        for match in _TOKENS.finditer(pending, start, hold):
+            self._track_line(pending, start, match.start())
+            self._token(match, pending)
+            start = match.end()
+            self._line_blank = False
+        self._track_line(pending, start, hold)
+        if self._create_phase == 1:
+            self._find_as(pending, hold)
+
+        if not final:
+            self._peek_sql_fence_close(pending, hold)
+        self._scan = self._offset + hold
+        # Keep one character of context before the held-back end
+        keep = max(hold - 1, 0)
+        self._pending = pending[keep:]
+        self._offset += keep
+
+    def _track_line(self, pending: str, start: int, end: int) -> None:
+        newline = pending.rfind("\n", start, end)
+        if newline != -1:
+            self._line_blank = not pending[newline + 1:end].strip(" \t")
+        elif self._line_blank:
+            self._line_blank = not pending[start:end].strip(" \t")
+
+    def _token(self, match: "re.Match", pending: str) -> None:
+        position = self._offset + match.start()
+        end = self._offset + match.end()
+        semicolon, backticks, create, keyword = match.groups()
+
+        if semicolon:
+            if self._create_phase == 1:
+                self._find_as(pending, match.start())
+            if self._create_phase == 2:
+                self._create = (self._create_start, end)
+                self._create_phase = 0
+            if self._with_start is not None:
+                self._with = (self._with_start, end)
+                self._with_start = None
+            if self._select_start is not None:
+                self._select = (self._select_start, end)
+                self._select_start = None
+            if self._statement_start is not None and self._first_statement is None:
+                self._first_statement = (self._statement_start, end)
+                self._statement_start = None
+        elif backticks:
+            self._backticks(position, end, pending)
+        elif create:
+            if self._create_phase == 0:
+                self._create_phase, self._create_start, self._create_as = 1, position, end
+        else:
+            # The trailing-space rule of extract_sql is stricter than the line-leading one of complete_sql
+            spaced = pending[match.end()] == " "
+            if keyword.upper() == "WITH":
+                if spaced and self._with_start is None:
+                    self._with_start = position
+            elif spaced and self._select_start is None:
+                self._select_start = position
+            if self._line_blank and self._statement_start is None and self._first_statement is None:
+                self._statement_start = position
+
+    def _find_as(self, pending: str, end: int) -> None:
+        # Searches the text between the last search and `end` (a semicolon or the held-back end)
+        if _AS.search(pending, self._create_as - self._offset, end):
+            self._create_phase = 2
+        else:
+            self._create_as = self._offset + end
+
+    def _backticks(self, start: int, end: int, pending: str) -> None:
+        # A run of n backticks holds n - 2 overlapping "```", any of which can open or close a block
+        for position in range(start, end - 2):
+            if position >= self._fence_cursor:
+                if self._fence_open is None:
+                    self._fence_open = position
+                elif position >= self._fence_open + 3:
+                    self._fence = (self._fence_open + 3, position)
+                    self._fence_open, self._fence_cursor = None, position + 3
+
+            if position >= self._sql_fence_cursor:
+                if self._sql_fence_content is None:
+                    opening = _SQL_FENCE_OPEN.match(pending, position + 3 - self._offset)
+                    if opening:
+                        self._sql_fence_content = self._offset + opening.end()
+                elif position >= self._sql_fence_content:
+                    self._close_sql_fence(position)
+
+    def _close_sql_fence(self, position: int) -> None:
+        self._sql_fence = (self._sql_fence_content, position)
+        if self._first_sql_fence is None:
+            self._first_sql_fence = self._sql_fence
+        self._sql_fence_content, self._sql_fence_cursor = None, position + 3
+
+    def _peek_sql_fence_close(self, pending: str, hold: int) -> None:
+        # A held-back run of backticks can't be tokenized until it ends, but it already closes an open
+        # ```sql block, whatever follows
+        if self._sql_fence_content is not None and pending.startswith("```", hold):
+            position = self._offset + hold
+            if position >= self._sql_fence_content and position >= self._sql_fence_cursor:
+                self._close_sql_fence(position)
+
+    def _slice(self, span: Span) -> str:
+        return self.text[span[0]:span[1]]
+
+    def last_sql(self) -> Optional[str]:
+        """
+        The SQL [`extract_sql`][kiwi.core.base.KiwiBase.extract_sql] returns, or None if no rule matched: the
+        last CREATE TABLE ... AS ...;, else the last WITH ...;, else the last SELECT ...;, else the content
+        of the last ```sql block, else of the last code block.
+        """
+        for span in (self._create, self._with, self._select):
+            if span is not None:
+                return self._slice(span)
+        for span in (self._sql_fence, self._fence):
+            if span is not None:
+                return self._slice(span).strip()
+        return None
+
+    def complete_sql(self) -> Optional[str]:
+        """
+        The first complete statement so far, or None: the content of the first ```sql block once it is
+        closed, else the first WITH / SELECT starting a line once it is terminated by a semicolon.
+        """
+        if self._first_sql_fence is not None:
+            sql = self._slice(self._first_sql_fence).strip()
+            if sql:
+                return sql
+        if self._first_statement is not None:
+            return self._slice(self._first_statement)
+        return None
+
+
+def extract_sql(text: str) -> Optional[str]:
+    """The SQL in a whole LLM response by the rules of [`SqlExtractor.last_sql`][kiwi.core.sql_extract.SqlExtractor.last_sql]."""
+    extractor = SqlExtractor()
+    extractor.feed(text, final=True)
+    return extractor.last_sql()
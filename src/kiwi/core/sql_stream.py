@@ -0,0 +1,68 @@
+from typing import List, Optional
+
+from kiwi.core.sql_extract import SqlExtractor
+
+_INTERMEDIATE = "intermediate_sql"
+
+
+def complete_sql(text: str) -> Optional[str]:
+    """
+    The first complete SQL statement in a partial LLM response, or None if there is none yet.
+
+    Stricter than [`extract_sql`][kiwi.core.base.KiwiBase.extract_sql], since the rest of the response
+    is still to come: a statement counts as complete once its code block is closed or it ends with a
+    semicolon, and a bare statement must start a line so prose like "select the columns; then" isn't taken
+    for SQL.
+    """
+    extractor = SqlExtractor()
+    extractor.feed(text, final=True)
+    return extractor.complete_sql()
+
+
+class SqlStream:
+    """
+    Accumulates the tokens of a streamed SQL response and turns each one into events for
+    [`generate_sql_stream`][kiwi.core.base.KiwiBase.generate_sql_stream]: a ``token`` event, plus one
+    ``early_sql`` event as soon as a complete statement can be extracted, so the query can be run while
+    the model is still writing its explanation.
+
+    No early SQL is reported once the response mentions ``intermediate_sql``, since that query only
+    inspects the data and isn't the answer.
+    """
+
+    def __init__(self):
+        self.extractor = SqlExtractor()
+        self.early_sql = None
+        self.intermediate = False
+        self._chunks = []
+        # How many chunks the extractor has seen, and the end of what it has seen, to spot "intermediate_sql"
+        # split across tokens
+        self._fed = 0
+        self._tail = ""
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, token: str) -> List[dict]:
+        self._chunks.append(token)
+        events = [{"type": "token", "text": token}]
+
+        # A statement can only have become complete with a semicolon or a closing fence, so the tokens since
+        # the last of those are fed to the extractor together
+        if self.early_sql is None and not self.intermediate and (";" in token or "`" in token):
+            batch = "".join(self._chunks[self._fed:])
+            self._fed = len(self._chunks)
+            window = self._tail + batch
+            if _INTERMEDIATE in window:
+                self.intermediate = True
+                return events
+            self._tail = window[-(len(_INTERMEDIATE) - 1):]
+
+            self.extractor.feed(batch)
+            sql = self.extractor.complete_sql()
+            if sql is not None:
+                self.early_sql = sql
+                events.append({"type": "early_sql", "text": sql})
+
+        return events
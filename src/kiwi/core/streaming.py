@@ -0,0 +1,333 @@
+import json
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    import pyarrow
+
+
+def _is_arrow(chunk) -> bool:
+    return hasattr(chunk, "schema") and hasattr(chunk, "num_rows")
+
+
+def _chunk_nbytes(chunk) -> int:
+    if _is_arrow(chunk):
+        return chunk.nbytes
+    return int(chunk.memory_usage(index=False, deep=True).sum())
+
+
+def _chunk_head(chunk, n: int):
+    return chunk.slice(0, n) if _is_arrow(chunk) else chunk.iloc[:n]
+
+
+def _chunk_columns(chunk) -> List[str]:
+    return list(chunk.schema.names) if _is_arrow(chunk) else [str(c) for c in chunk.columns]
+
+
+def cursor_chunks(cursor, chunk_rows: int, server_side: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Fetch an executed DB-API cursor's result ``chunk_rows`` rows at a time, as DataFrames.
+
+    Server-side (named) cursors only describe their result after the first fetch, so pass
+    ``server_side=True`` for them.
+    """
+    if cursor.description is None and not server_side:
+        return  # statement without a result set
+    columns = None
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if columns is None:
+            columns = [desc[0] for desc in cursor.description or []]
+            if not rows:
+                yield pd.DataFrame([], columns=columns)  # empty result, but keep its columns
+        if not rows:
+            break
+        yield pd.DataFrame(list(rows), columns=columns)
+
+
+def describe_cursor(cursor, dtypes: dict) -> pd.DataFrame:
+    """
+    An empty DataFrame with the columns of an executed DB-API cursor's result, typed by looking up each
+    column's ``type_code`` in ``dtypes``. Columns of other types are ``object``.
+    """
+    description = cursor.description or []
+    return pd.DataFrame(
+        {i: pd.Series(dtype=dtypes.get(desc[1], "object")) for i, desc in enumerate(description)}
+    ).set_axis([desc[0] for desc in description], axis=1)
+
+
+def dataframe_chunks(df: pd.DataFrame, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Slice an already materialized DataFrame into chunks."""
+    if df is None:
+        return
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+class ChunkedResult:
+    """
+    Result of [`KiwiBase.run_sql_iter`][kiwi.core.base.KiwiBase.run_sql_iter]: the rows of one query,
+    fetched a chunk at a time and cut off at a row or byte cap.
+
+    Iterating yields pandas DataFrames. When the cap is hit the fetch stops, the database cursor is
+    closed and [`truncated`][kiwi.core.streaming.ChunkedResult.truncated] is set. A result can be
+    consumed once, either by iterating it or with [`to_df`][kiwi.core.streaming.ChunkedResult.to_df] /
+    [`to_arrow`][kiwi.core.streaming.ChunkedResult.to_arrow].
+
+    **Example:**
+    ```python
+    with vn.run_sql_iter("SELECT * FROM orders", chunk_rows=5000, max_rows=100_000) as result:
+        for chunk in result:
+            chunk.to_csv(f, header=False)
+    result.truncated
+    ```
+
+    Args:
+        chunks (Iterable): DataFrame or ``pyarrow.RecordBatch`` chunks. A generator is closed (running its
+            ``finally`` blocks, which return connections and close cursors) when the result is closed.
+        max_rows (int): Stop after this many rows. None for no row cap.
+        max_bytes (int): Stop once the chunks fetched so far take this many bytes in memory. None for no byte cap.
+        columns (list): Column names, if known before the first chunk.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ):
+        self._source = chunks
+        self._chunks = iter(chunks)
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.columns = columns
+        self.rows = 0
+        self.bytes = 0
+        self.truncated = False
+        self._consumed = False
+        self._closed = False
+
+    def _next_chunk(self):
+        for chunk in self._chunks:
+            if self.columns is None:
+                self.columns = _chunk_columns(chunk)
+            if len(chunk):
+                return chunk
+        return None
+
+    def _capped(self) -> Iterator[Any]:
+        if self._consumed:
+            raise RuntimeError("A ChunkedResult can only be consumed once")
+        self._consumed = True
+
+        try:
+            while True:
+                if self.max_rows is not None and self.rows >= self.max_rows:
+                    # Only report truncation if there really is another row
+                    self.truncated = self._next_chunk() is not None
+                    return
+                if self.max_bytes is not None and self.bytes >= self.max_bytes:
+                    self.truncated = self._next_chunk() is not None
+                    return
+
+                chunk = self._next_chunk()
+                if chunk is None:
+                    return
+
+                if self.max_rows is not None and self.rows + len(chunk) > self.max_rows:
+                    chunk = _chunk_head(chunk, self.max_rows - self.rows)
+                    self.truncated = True
+
+                nbytes = _chunk_nbytes(chunk)
+                if self.max_bytes is not None and self.bytes + nbytes > self.max_bytes:
+                    # Keep the share of the chunk that fits, assuming rows of similar size
+                    keep = int(len(chunk) * (self.max_bytes - self.bytes) / max(nbytes, 1))
+                    if keep < len(chunk):
+                        chunk = _chunk_head(chunk, keep)
+                        nbytes = _chunk_nbytes(chunk)
+                        self.truncated = True
+
+                if len(chunk):
+                    self.rows += len(chunk)
+                    self.bytes += nbytes
+                    yield chunk
+
+                if self.truncated:
+                    return
+        finally:
+            self.close()
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        for chunk in self._capped():
+            yield chunk.to_pandas() if _is_arrow(chunk) else chunk
+
+    def to_df(self) -> pd.DataFrame:
+        """Fetch the (capped) result into one DataFrame."""
+        frames = list(self)
+        if not frames:
+            return pd.DataFrame(columns=self.columns or [])
+        if len(frames) == 1:
+            return frames[0].reset_index(drop=True)
+        return pd.concat(frames, ignore_index=True)
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """Fetch the (capped) result into one ``pyarrow.Table``, without going through pandas for Arrow sources."""
+        import pyarrow as pa
+
+        batches = [
+            chunk if _is_arrow(chunk) else pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+            for chunk in self._capped()
+        ]
+        if not batches:
+            return pa.table({name: pa.array([], type=pa.null()) for name in self.columns or []})
+        return pa.Table.from_batches(batches)
+
+    def close(self) -> None:
+        """Stop fetching and release the cursor. Safe to call more than once."""
+        if self._closed:
+            return
+        self._closed = True
+        close = getattr(self._source, "close", None)
+        if close is not None:
+            close()
+
+    def __enter__(self) -> "ChunkedResult":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def stats(self) -> dict:
+        return {
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "truncated": self.truncated,
+            "max_rows": self.max_rows,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class _ByteSink:
+    """Write-only file object that hands written bytes to the caller instead of keeping them."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _as_dataframes(chunks: Iterable) -> Iterator[pd.DataFrame]:
+    offset = 0
+    for chunk in chunks:
+        if _is_arrow(chunk):
+            chunk = chunk.to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+def _as_record_batches(chunks: Iterable) -> Iterator["pyarrow.RecordBatch"]:
+    import pyarrow as pa
+
+    for chunk in chunks:
+        if isinstance(chunk, pa.Table):
+            yield from chunk.to_batches() or [pa.RecordBatch.from_pylist([], schema=chunk.schema)]
+        elif _is_arrow(chunk):
+            yield chunk
+        else:
+            yield pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+
+
+def iter_csv(chunks: Iterable, index: bool = True) -> Iterator[bytes]:
+    """Encode DataFrame or Arrow chunks as CSV, one piece per chunk, with the header before the first."""
+    header = True
+    for chunk in _as_dataframes(chunks):
+        yield chunk.to_csv(header=header, index=index).encode("utf-8")
+        header = False
+
+
+def iter_parquet(chunks: Iterable, compression: str = "snappy") -> Iterator[bytes]:
+    """Encode chunks as a Parquet file, one row group per chunk, yielding bytes as each row group is written."""
+    import pyarrow.parquet as pq
+
+    sink = _ByteSink()
+    writer = None
+    try:
+        for batch in _as_record_batches(chunks):
+            if writer is None:
+                writer = pq.ParquetWriter(sink, batch.schema, compression=compression)
+            writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+def iter_arrow_ipc(chunks: Iterable) -> Iterator[bytes]:
+    """Encode chunks in the Arrow IPC streaming format, yielding one message per record batch."""
+    import pyarrow as pa
+
+    sink = _ByteSink()
+    writer = None
+    try:
+        for batch in _as_record_batches(chunks):
+            if writer is None:
+                writer = pa.ipc.new_stream(sink, batch.schema)
+            writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+def iter_gzip(pieces: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream on the fly."""
+    import zlib
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for piece in pieces:
+        data = compressor.compress(piece)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# format -> (mimetype, file extension, chunk encoder), for the download endpoints
+DOWNLOAD_FORMATS = {
+    "csv": ("text/csv", "csv", iter_csv),
+    "parquet": ("application/vnd.apache.parquet", "parquet", iter_parquet),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows", iter_arrow_ipc),
+}
+
+
+# Keep proxies from buffering or caching Server-Sent Events
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(data: dict) -> str:
+    """Format one Server-Sent Events message carrying a JSON object."""
+    return f"data: {json.dumps(data)}\n\n"
@@ -0,0 +1,258 @@
+import hashlib
+import logging
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Union
+
+from kiwi.exceptions import DependencyError, ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+# CJK ideographs, kana and hangul. BPE tokenizers spend roughly one token per character on these,
+# while Latin text averages about four characters per token.
+_WIDE_CHARS = re.compile(
+    "[\u2e80-\u2fdf\u3000-\u303f\u3040-\u30ff\u3100-\u31ff\u3400-\u4dbf\u4e00-\u9fff"
+    "\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]"
+)
+
+
+class TokenCounter(ABC):
+    """
+    Counts tokens in prompt chunks, remembering the count for each chunk it has seen.
+
+    Subclasses implement ``_count``; [`count`][kiwi.core.token_budget.TokenCounter.count] adds a bounded
+    LRU cache keyed by a digest of the text, so DDL and documentation that recur across questions are
+    tokenized once.
+
+    Args:
+        cache_size (int): Number of chunk counts to remember.
+    """
+
+    name = "tokens"
+
+    def __init__(self, cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def _count(self, text: str) -> int:
+        pass
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+
+        tokens = self._count(text)
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = tokens
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "counter": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._cache),
+            }
+
+
+class ApproxTokenCounter(TokenCounter):
+    """Heuristic counter: one token per CJK character plus one per four other characters."""
+
+    name = "approx"
+
+    def _count(self, text: str) -> int:
+        wide = len(_WIDE_CHARS.findall(text))
+        return wide + -(-(len(text) - wide) // 4)
+
+
+class TiktokenCounter(TokenCounter):
+    """Counts with an OpenAI ``tiktoken`` encoding, e.g. ``cl100k_base`` or ``o200k_base``."""
+
+    def __init__(self, encoding: str = "cl100k_base", cache_size: int = 4096):
+        super().__init__(cache_size=cache_size)
+        try:
+            import tiktoken
+        except ImportError:
+            raise DependencyError(
+                "You need to install required dependencies to execute this method, run command:"
+                " \npip install tiktoken"
+            )
+        self.name = f"tiktoken:{encoding}"
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def _count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+class AutoTokenCounter(TokenCounter):
+    """
+    Counts with a tiktoken encoding if it can be loaded, else like
+    [`ApproxTokenCounter`][kiwi.core.token_budget.ApproxTokenCounter].
+
+    tiktoken downloads an encoding the first time it is used, so the encoding is only loaded on the first
+    count rather than when the counter is created, and any failure to load it (tiktoken not installed, no
+    network) switches to approximate counts for good.
+    """
+
+    name = "auto"
+
+    def __init__(self, encoding: str = "cl100k_base", cache_size: int = 4096):
+        super().__init__(cache_size=cache_size)
+        self.encoding = encoding
+        self._counter: Optional[TokenCounter] = None
+        self._load_lock = threading.Lock()
+
+    def _load(self) -> TokenCounter:
+        with self._load_lock:
+            if self._counter is None:
+                try:
+                    self._counter = TiktokenCounter(self.encoding, cache_size=0)
+                except Exception as e:
+                    logger.info(f"tiktoken unavailable ({e}); using approximate token counts")
+                    self._counter = ApproxTokenCounter(cache_size=0)
+                self.name = f"auto:{self._counter.name}"
+        return self._counter
+
+    def _count(self, text: str) -> int:
+        counter = self._counter or self._load()
+        return counter._count(text)
+
+
+class HuggingFaceTokenCounter(TokenCounter):
+    """Counts with a Hugging Face ``tokenizers`` tokenizer, loaded from a ``tokenizer.json`` file or the hub."""
+
+    def __init__(self, tokenizer: str, cache_size: int = 4096):
+        super().__init__(cache_size=cache_size)
+        try:
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise DependencyError(
+                "You need to install required dependencies to execute this method, run command:"
+                " \npip install tokenizers"
+            )
+        self.name = f"hf:{tokenizer}"
+        if tokenizer.endswith(".json"):
+            self._tokenizer = Tokenizer.from_file(tokenizer)
+        else:
+            self._tokenizer = Tokenizer.from_pretrained(tokenizer)
+        self._tokenizer.no_truncation()
+
+    def _count(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def make_token_counter(spec: Union[str, TokenCounter, None] = "approx") -> TokenCounter:
+    """
+    Build a token counter from the `token_counter` config option.
+
+    - ``"approx"`` (default): [`ApproxTokenCounter`][kiwi.core.token_budget.ApproxTokenCounter], which
+      needs no tokenizer download
+    - ``"auto"``: [`AutoTokenCounter`][kiwi.core.token_budget.AutoTokenCounter], tiktoken ``cl100k_base``
+      if it can be loaded on first use, else ``"approx"``
+    - ``"tiktoken"`` or ``"tiktoken:<encoding>"``
+    - ``"hf:<model id or path to tokenizer.json>"``, e.g. ``"hf:Qwen/Qwen2.5-32B-Instruct"`` to count with
+      the tokenizer of the model the prompts are sent to
+    - a ``TokenCounter`` instance, returned as is
+    """
+    if isinstance(spec, TokenCounter):
+        return spec
+    if spec is None or spec == "approx":
+        return ApproxTokenCounter()
+    if spec == "auto":
+        return AutoTokenCounter()
+    if spec == "tiktoken" or spec.startswith("tiktoken:"):
+        _, _, encoding = spec.partition(":")
+        return TiktokenCounter(encoding or "cl100k_base")
+    if spec.startswith("hf:"):
+        return HuggingFaceTokenCounter(spec[len("hf:"):])
+    raise ImproperlyConfigured(f"Unknown token_counter: {spec!r}")
+
+
+class TokenBudget:
+    """
+    Running token total for one prompt.
+
+    Each chunk is counted once (through the counter's cache) and its cost added to the total, instead
+    of re-counting the whole prompt for every candidate.
+    [`pack`][kiwi.core.token_budget.TokenBudget.pack] chooses which chunks of a section to include by
+    relevance per token, so a long, marginally relevant DDL no longer crowds out several short, relevant ones.
+
+    **Example:**
+    ```python
+    budget = TokenBudget(make_token_counter("approx"), max_tokens=14000)
+    budget.add(system_prompt)
+    chosen = budget.pack(ddl_list)  # ddl_list is ordered best first
+    ```
+
+    Args:
+        counter (TokenCounter): Counts the tokens in each chunk.
+        max_tokens (int): Total budget for the prompt.
+    """
+
+    def __init__(self, counter: TokenCounter, max_tokens: int):
+        self.counter = counter
+        self.max_tokens = max_tokens
+        self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.max_tokens - self.used
+
+    def add(self, text: str) -> int:
+        """Charge text that is always included. Returns its token count."""
+        tokens = self.counter.count(text)
+        self.used += tokens
+        return tokens
+
+    def fits(self, text: str) -> bool:
+        return self.counter.count(text) < self.remaining
+
+    def try_add(self, text: str) -> bool:
+        """Charge text only if it fits in the remaining budget."""
+        tokens = self.counter.count(text)
+        if tokens >= self.remaining:
+            return False
+        self.used += tokens
+        return True
+
+    def pack(self, chunks: Sequence[str], scores: Optional[Sequence[float]] = None) -> List[int]:
+        """
+        Choose chunks that fit in the remaining budget, greedily by relevance per token, and charge them.
+
+        Args:
+            chunks (Sequence[str]): Candidate chunks, best first.
+            scores (Sequence[float]): Relevance of each chunk. Defaults to ``1 / (1 + rank)``.
+
+        Returns:
+            List[int]: Indices of the chosen chunks, in their original order.
+        """
+        if scores is None:
+            scores = [1.0 / (1 + rank) for rank in range(len(chunks))]
+        costs = [max(self.counter.count(chunk), 1) for chunk in chunks]
+
+        chosen = []
+        for index in sorted(range(len(chunks)), key=lambda i: (-scores[i] / costs[i], i)):
+            if costs[index] < self.remaining:
+                self.used += costs[index]
+                chosen.append(index)
+        return sorted(chosen)
@@ -1,3 +1,6 @@
+from kiwi.embedding.batcher import MicroBatchingEmbeddings
+from kiwi.embedding.cache import EmbeddingCache
 from kiwi.embedding.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+from kiwi.embedding.storage import CompactVectors, CompactVectorStore
 
-__all__ = ["ONNXMiniLM_L6_V2"]
+__all__ = ["CompactVectors", "CompactVectorStore", "EmbeddingCache", "MicroBatchingEmbeddings", "ONNXMiniLM_L6_V2"]
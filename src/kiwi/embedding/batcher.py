@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+Documents = List[str]
+
+_STOP = object()
+
+
+class MicroBatchingEmbeddings(Embeddings):
+    """
+    Coalesce concurrent embedding requests into shared model batches.
+
+    Every request (sync or async) is queued; a single collector thread takes the first
+    pending request, keeps collecting for up to ``max_wait_ms`` or until ``max_batch_size``
+    texts are waiting, then embeds them with one ``embed_documents`` call on the wrapped
+    model and resolves each caller's future with its own row. Under load, many
+    single-question ``embed_query`` calls become one forward pass instead of one each.
+
+    Requests that are already at least ``max_batch_size`` texts long (bulk ingestion) skip
+    the queue and go straight to the wrapped model.
+
+    The wrapper is a LangChain ``Embeddings`` and is also callable, so it can be passed to
+    ChromaDB as an ``embedding_function``.
+
+    **Example:**
+    ```python
+    embedder = MicroBatchingEmbeddings(ONNXMiniLM_L6_V2(), max_batch_size=32, max_wait_ms=5)
+    vector = await embedder.aembed_query("total sales by region")
+    embedder.stats()
+    ```
+
+    Args:
+        embedder (Embeddings): The model to batch calls for.
+        max_batch_size (int): Maximum number of texts embedded in one call.
+        max_wait_ms (float): How long to wait for more requests after the first one arrives.
+    """
+
+    def __init__(self, embedder: Embeddings, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive, got {max_batch_size}")
+        if max_wait_ms < 0:
+            raise ValueError(f"max_wait_ms must not be negative, got {max_wait_ms}")
+
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.batches = 0
+        self.batched_texts = 0
+
+    @property
+    def model_name(self) -> str:
+        for attr in ("model_name", "MODEL_NAME"):
+            value = getattr(self.embedder, attr, None)
+            if isinstance(value, str):
+                return value
+        return type(self.embedder).__name__
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="kiwi-embedding-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _submit(self, texts: List[str]) -> List[Future]:
+        self._ensure_started()
+        futures = []
+        for text in texts:
+            future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        with self._lock:
+            self.requests += 1
+        return futures
+
+    def _collect(self) -> Tuple[List[Tuple[str, Future]], bool]:
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            # Identical texts within a batch are embedded once.
+            unique = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(unique, self.embedder.embed_documents(unique)))
+            except Exception as e:
+                logger.exception("Embedding batch of %d texts failed", len(unique))
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.batches += 1
+                self.batched_texts += len(unique)
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) >= self.max_batch_size:
+            return self.embedder.embed_documents(texts)
+        return [future.result() for future in self._submit(texts)]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) >= self.max_batch_size:
+            return await self.embedder.aembed_documents(texts)
+        return list(await asyncio.gather(*(asyncio.wrap_future(f) for f in self._submit(texts))))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def __call__(self, input: Documents) -> List[List[float]]:
+        return self.embed_documents(input)
+
+    def close(self) -> None:
+        """Stop the collector thread once the requests already queued have been served."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "texts": self.batched_texts,
+                "mean_batch_size": self.batched_texts / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+            }
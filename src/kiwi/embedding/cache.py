@@ -0,0 +1,175 @@
+import logging
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+
+class EmbeddingCache:
+    """
+    Bounded, thread-safe LRU cache for query embeddings.
+
+    Entries are keyed by ``(model name, normalized text)`` so one cache can be shared by
+    several collections and vector stores, as long as they embed with the same model.
+    When ``path`` is given, every entry is also written to a SQLite file, and memory misses
+    fall back to it; this lets a restarted process skip re-embedding popular questions.
+
+    **Example:**
+    ```python
+    cache = EmbeddingCache(max_entries=4096, path="embeddings.sqlite")
+    vectors = cache.get_or_compute("all-MiniLM-L6-v2", ["total sales by region"], embed_fn)
+    cache.stats()
+    ```
+    """
+
+    def __init__(self, max_entries: int = 4096, path: Optional[str] = None):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: "OrderedDict[CacheKey, Sequence[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        self._disk = None
+        if path is not None:
+            self._disk = sqlite3.connect(path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, text))"
+            )
+            self._disk.commit()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Collapse runs of whitespace and strip the ends, so trivially different inputs share an entry."""
+        return " ".join(text.split())
+
+    def _key(self, model: str, text: str) -> CacheKey:
+        return model, self.normalize(text)
+
+    def _read_disk(self, key: CacheKey) -> Optional[List[float]]:
+        row = self._disk.execute(
+            "SELECT vector FROM embeddings WHERE model = ? AND text = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        vector = array("f")
+        vector.frombytes(row[0])
+        return vector.tolist()
+
+    def _write_disk(self, items: List[Tuple[CacheKey, Sequence[float]]]) -> None:
+        self._disk.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, text, vector) VALUES (?, ?, ?)",
+            [(model, text, array("f", [float(x) for x in vector]).tobytes()) for (model, text), vector in items],
+        )
+        self._disk.commit()
+
+    def _remember(self, key: CacheKey, vector: Sequence[float]) -> None:
+        # Caller holds the lock.
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, model: str, text: str) -> Optional[Sequence[float]]:
+        """Return the cached embedding for ``text`` or None, updating the hit/miss counters."""
+        key = self._key(model, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            if self._disk is not None:
+                vector = self._read_disk(key)
+                if vector is not None:
+                    self._remember(key, vector)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, model: str, text: str, vector: Sequence[float]) -> None:
+        self.put_many(model, [text], [vector])
+
+    def put_many(self, model: str, texts: List[str], vectors: List[Sequence[float]]) -> None:
+        items = [(self._key(model, text), vector) for text, vector in zip(texts, vectors)]
+        with self._lock:
+            for key, vector in items:
+                self._remember(key, vector)
+            if self._disk is not None:
+                try:
+                    self._write_disk(items)
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not persist embeddings to {self.path}: {e}")
+
+    def get_or_compute(
+        self,
+        model: str,
+        texts: List[str],
+        compute: Callable[[List[str]], List[Sequence[float]]],
+    ) -> List[Sequence[float]]:
+        """
+        Look up every text and embed only the misses, with a single call to ``compute``.
+
+        Args:
+            model (str): Name of the embedding model, part of the cache key.
+            texts (List[str]): The texts to embed.
+            compute (Callable): Embeds a list of texts, e.g. a Chroma embedding function.
+
+        Returns:
+            List: One embedding per text, in input order.
+        """
+        results: List[Optional[Sequence[float]]] = [self.get(model, text) for text in texts]
+
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        if missing:
+            computed = list(compute([texts[i] for i in missing]))
+            for i, vector in zip(missing, computed):
+                results[i] = vector
+            self.put_many(model, [texts[i] for i in missing], computed)
+
+        return results
+
+    def clear(self) -> None:
+        """Drop every entry from memory and disk and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = self.evictions = 0
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM embeddings")
+                self._disk.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "path": self.path,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -3,22 +3,34 @@ import hashlib
 import importlib
 import logging
 import os
+import queue
 import tarfile
+import threading
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from functools import cached_property
 from pathlib import Path
-from typing import List, Any, Optional, Literal
+from typing import Iterator, List, Any, Optional, Literal
 
 import numpy as np
 import numpy.typing as npt
 import httpx
-from pydantic import BaseModel, PrivateAttr
+from pydantic import BaseModel, Field, PrivateAttr
 from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random
 
 from langchain_core.embeddings import Embeddings
 
 Documents = List[str]
 Space = Literal["cosine", "l2", "ip"]
+Variant = Literal["fp32", "int8"]
+
+# Model file for each precision variant, relative to the extracted model folder. The int8 file
+# is produced locally from the fp32 one by `python -m kiwi.embedding.quantize`.
+MODEL_FILENAMES = {
+    "fp32": "model.onnx",
+    "int8": "model_int8.onnx",
+}
 
 logger = logging.getLogger(__name__)
 
@@ -41,14 +53,42 @@ class ONNXMiniLM_L6_V2(BaseModel, Embeddings):
     )
     _MODEL_SHA256: str = "913d7300ceae3b2dbc2c50d1de4baacab4be7b9380491c27fab7418616a16ec3"
 
+    # Pad each batch only to its longest sequence, and group documents of similar length
+    # into the same batch. False restores the fixed 256-token padding.
+    dynamic_padding: bool = True
+
+    # Precision of the ONNX graph to load. Defaults to the KIWI_EMBEDDING_VARIANT environment
+    # variable, then fp32.
+    variant: Variant = Field(default_factory=lambda: os.getenv("KIWI_EMBEDDING_VARIANT", "fp32"))
+
+    # ONNX Runtime session options. None leaves the runtime default in place.
+    intra_op_num_threads: Optional[int] = None
+    inter_op_num_threads: Optional[int] = None
+    execution_mode: Literal["sequential", "parallel"] = "sequential"
+    enable_cpu_mem_arena: bool = True
+    enable_mem_pattern: bool = True
+
+    # Number of InferenceSessions to keep. With more than one, concurrent callers each
+    # check out their own session instead of sharing one.
+    num_sessions: int = 1
+    # Size of the executor used by aembed_documents / aembed_query. Defaults to num_sessions.
+    executor_workers: Optional[int] = None
+
     # Pydantic private attributes for non-serializable dependencies
     _ort: Any = PrivateAttr()
     _Tokenizer: Any = PrivateAttr()
     _tqdm: Any = PrivateAttr()
     _preferred_providers: Optional[List[str]] = PrivateAttr(default=None)
+    _session_pool: Any = PrivateAttr(default=None)
+    _executor: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
 
     def __init__(self, preferred_providers: Optional[List[str]] = None, **kwargs) -> None:
         super().__init__(**kwargs)
+        if self.num_sessions < 1:
+            raise ValueError(f"num_sessions must be positive, got {self.num_sessions}")
+        if self.variant not in MODEL_FILENAMES:
+            raise ValueError(f"variant must be one of {list(MODEL_FILENAMES)}, got {self.variant!r}")
         self._preferred_providers = preferred_providers
         self._initialize_dependencies()
 
@@ -76,19 +116,38 @@ class ONNXMiniLM_L6_V2(BaseModel, Embeddings):
             # Fallback to simple progress bar if tqdm not available
             self._tqdm = lambda **kwargs: kwargs.get('iterable', None)
 
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+    def embed_documents_np(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        """Embed documents into a ``(len(texts), dim)`` float32 array, skipping the conversion to Python floats."""
         self._download_model_if_not_exists()
-        embeddings = self._forward(texts)
-        return embeddings.tolist()
+        return self._forward(texts)
+
+    def embed_query_np(self, text: str) -> npt.NDArray[np.float32]:
+        return self.embed_documents_np([text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents_np(texts).tolist()
 
     def embed_query(self, text: str) -> List[float]:
         return self.embed_documents([text])[0]
 
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.executor_workers or self.num_sessions,
+                    thread_name_prefix="kiwi-embedding",
+                )
+            return self._executor
+
     async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
-        return await asyncio.get_running_loop().run_in_executor(None, self.embed_documents, texts)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), self.embed_documents, texts
+        )
 
     async def aembed_query(self, text: str) -> List[float]:
-        return await asyncio.get_running_loop().run_in_executor(None, self.embed_query, text)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), self.embed_query, text
+        )
 
     @retry(
         reraise=True,
@@ -124,16 +183,23 @@ class ONNXMiniLM_L6_V2(BaseModel, Embeddings):
     def _forward(
             self, documents: List[str], batch_size: int = 32
     ) -> npt.NDArray[np.float32]:
+        if self.dynamic_padding:
+            # Sort by length so each batch pads to a similar size; the inverse
+            # permutation below puts the embeddings back in input order.
+            order = sorted(range(len(documents)), key=lambda i: len(documents[i]))
+        else:
+            order = list(range(len(documents)))
+
         all_embeddings = []
         for i in range(0, len(documents), batch_size):
-            batch = documents[i: i + batch_size]
-            encoded = [self.tokenizer.encode(d) for d in batch]
+            batch = [documents[j] for j in order[i: i + batch_size]]
+            encoded = self.tokenizer.encode_batch(batch)
 
             for doc_tokens in encoded:
-                if len(doc_tokens.ids) > self.max_tokens():
+                if doc_tokens.overflowing:
                     logger.warning(
                         f"Document truncated (max {self.max_tokens()} tokens): "
-                        f"Actual {len(doc_tokens.ids)} tokens"
+                        f"Actual {len(doc_tokens.ids) + sum(len(o.ids) for o in doc_tokens.overflowing)} tokens"
                     )
 
             input_ids = np.array([e.ids for e in encoded])
@@ -145,7 +211,8 @@ class ONNXMiniLM_L6_V2(BaseModel, Embeddings):
                 "token_type_ids": np.zeros_like(input_ids).astype(np.int64),
             }
 
-            model_output = self.model.run(None, onnx_input)
+            with self._acquire_session() as session:
+                model_output = session.run(None, onnx_input)
             last_hidden_state = model_output[0]
 
             input_mask_expanded = np.broadcast_to(
@@ -158,18 +225,44 @@ class ONNXMiniLM_L6_V2(BaseModel, Embeddings):
             embeddings = self._normalize(embeddings).astype(np.float32)
             all_embeddings.append(embeddings)
 
-        return np.concatenate(all_embeddings)
+        sorted_embeddings = np.concatenate(all_embeddings)
+        if not self.dynamic_padding:
+            return sorted_embeddings
+
+        result = np.empty_like(sorted_embeddings)
+        result[order] = sorted_embeddings
+        return result
 
     @cached_property
     def tokenizer(self) -> Any:
         tokenizer_path = self.DOWNLOAD_PATH / self.EXTRACTED_FOLDER_NAME / "tokenizer.json"
         tokenizer = self._Tokenizer.from_file(str(tokenizer_path))
-        tokenizer.enable_truncation(max_length=256)
-        tokenizer.enable_padding(pad_id=0, pad_token="[PAD]", length=256)
+        tokenizer.enable_truncation(max_length=self.max_tokens())
+        if self.dynamic_padding:
+            # Without a fixed length, encode_batch pads to the longest sequence in the batch.
+            tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        else:
+            tokenizer.enable_padding(pad_id=0, pad_token="[PAD]", length=self.max_tokens())
         return tokenizer
 
-    @cached_property
-    def model(self) -> Any:
+    def _session_options(self) -> Any:
+        so = self._ort.SessionOptions()
+        so.log_severity_level = 3
+        so.graph_optimization_level = self._ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.intra_op_num_threads is not None:
+            so.intra_op_num_threads = self.intra_op_num_threads
+        if self.inter_op_num_threads is not None:
+            so.inter_op_num_threads = self.inter_op_num_threads
+        so.execution_mode = (
+            self._ort.ExecutionMode.ORT_PARALLEL
+            if self.execution_mode == "parallel"
+            else self._ort.ExecutionMode.ORT_SEQUENTIAL
+        )
+        so.enable_cpu_mem_arena = self.enable_cpu_mem_arena
+        so.enable_mem_pattern = self.enable_mem_pattern
+        return so
+
+    def _create_session(self) -> Any:
         providers = self._preferred_providers or self._ort.get_available_providers()
 
         if not set(providers).issubset(set(self._ort.get_available_providers())):
@@ -177,17 +270,45 @@ class ONNXMiniLM_L6_V2(BaseModel, Embeddings):
                 f"Invalid providers. Available: {self._ort.get_available_providers()}"
             )
 
-        so = self._ort.SessionOptions()
-        so.log_severity_level = 3
-        so.graph_optimization_level = self._ort.GraphOptimizationLevel.ORT_ENABLE_ALL
-
-        model_path = self.DOWNLOAD_PATH / self.EXTRACTED_FOLDER_NAME / "model.onnx"
+        model_path = self.model_path
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"{self.variant} model not found at {model_path}. "
+                "Generate it with: python -m kiwi.embedding.quantize"
+            )
         return self._ort.InferenceSession(
             str(model_path),
             providers=providers,
-            sess_options=so,
+            sess_options=self._session_options(),
         )
 
+    @cached_property
+    def model(self) -> Any:
+        return self._create_session()
+
+    @contextmanager
+    def _acquire_session(self) -> Iterator[Any]:
+        # A single session is shared: InferenceSession.run is thread-safe, it just
+        # serializes work on one set of thread pools. With a pool, each caller checks
+        # out its own session for the duration of a batch.
+        if self.num_sessions == 1:
+            yield self.model
+            return
+
+        with self._lock:
+            if self._session_pool is None:
+                pool = queue.Queue()
+                pool.put(self.model)
+                for _ in range(self.num_sessions - 1):
+                    pool.put(self._create_session())
+                self._session_pool = pool
+
+        session = self._session_pool.get()
+        try:
+            yield session
+        finally:
+            self._session_pool.put(session)
+
     def _download_model_if_not_exists(self) -> None:
         required_files = {
             self.DOWNLOAD_PATH / self.EXTRACTED_FOLDER_NAME / f
@@ -217,11 +338,19 @@ class ONNXMiniLM_L6_V2(BaseModel, Embeddings):
         return 256
 
     @property
-    def model_name(self) -> str:
-        return self.MODEL_NAME
+    def model_path(self) -> Path:
+        return self.DOWNLOAD_PATH / self.EXTRACTED_FOLDER_NAME / MODEL_FILENAMES[self.variant]
 
-    def __call__(self, input: Documents) -> List[List[float]]:
-        return self.embed_documents(input)
+    @property
+    def model_name(self) -> str:
+        # Variants produce slightly different vectors, so they must not share cache entries.
+        if self.variant == "fp32":
+            return self.MODEL_NAME
+        return f"{self.MODEL_NAME}-{self.variant}"
+
+    def __call__(self, input: Documents) -> List[npt.NDArray[np.float32]]:
+        # Chroma accepts numpy rows directly; they are views into one array, not copies.
+        return list(self.embed_documents_np(input))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""
+Produce the INT8 variant of the bundled MiniLM embedding model.
+
+Dynamic quantization stores the MatMul/Gemm weights as int8 and quantizes activations on the fly,
+so no calibration data is needed. The result is written next to the fp32 ``model.onnx`` in the
+Chroma model cache, where ``ONNXMiniLM_L6_V2(variant="int8")`` picks it up.
+
+Usage:
+    python -m kiwi.embedding.quantize
+    python -m kiwi.embedding.quantize --per-channel --output /path/to/model_int8.onnx
+"""
+
+import argparse
+import importlib
+import logging
+from pathlib import Path
+from typing import Optional
+
+from kiwi.embedding.onnx_mini_lm_l6_v2 import MODEL_FILENAMES, ONNXMiniLM_L6_V2
+
+logger = logging.getLogger(__name__)
+
+
+def quantize_model(
+    source: Optional[Path] = None,
+    destination: Optional[Path] = None,
+    per_channel: bool = False,
+) -> Path:
+    """
+    Quantize an fp32 ONNX embedding model to INT8 weights.
+
+    **Example:**
+    ```python
+    quantize_model()  # cached fp32 model -> model_int8.onnx alongside it
+    ```
+
+    Args:
+        source (Path): The fp32 model. Defaults to the cached ``model.onnx``, downloading it if needed.
+        destination (Path): Where to write the INT8 model. Defaults to ``model_int8.onnx`` next to the source.
+        per_channel (bool): Quantize weights per output channel instead of per tensor.
+
+    Returns:
+        Path: The path of the quantized model.
+    """
+    try:
+        quantization = importlib.import_module("onnxruntime.quantization")
+    except ImportError:
+        raise ImportError(
+            "onnxruntime quantization tools not available. Install with: pip install onnxruntime onnx"
+        )
+
+    if source is None:
+        embedder = ONNXMiniLM_L6_V2(variant="fp32")
+        embedder._download_model_if_not_exists()
+        source = embedder.model_path
+    source = Path(source)
+    if destination is None:
+        destination = source.with_name(MODEL_FILENAMES["int8"])
+    destination = Path(destination)
+
+    quantization.quantize_dynamic(
+        model_input=str(source),
+        model_output=str(destination),
+        per_channel=per_channel,
+        weight_type=quantization.QuantType.QInt8,
+    )
+
+    logger.info(
+        f"Quantized {source} ({source.stat().st_size / 1e6:.1f} MB) -> "
+        f"{destination} ({destination.stat().st_size / 1e6:.1f} MB)"
+    )
+    return destination
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, default=None, help="fp32 model (default: cached model.onnx)")
+    parser.add_argument("--output", type=Path, default=None, help="INT8 model (default: model_int8.onnx beside the input)")
+    parser.add_argument("--per-channel", action="store_true", help="Quantize weights per output channel")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    quantize_model(args.input, args.output, per_channel=args.per_channel)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,38 @@
-import uuid
-from abc import ABC, abstractmethod
-
-
-class Cache(ABC):
-    """
-    Define the interface for a cache that can be used to store data in a Flask app.
-    """
-
-    @abstractmethod
-    def generate_id(self, *args, **kwargs):
-        """
-        Generate a unique ID for the cache.
-        """
-        pass
-
-    @abstractmethod
-    def get(self, id, field):
-        """
-        Get a value from the cache.
-        """
-        pass
-
-    @abstractmethod
-    def get_all(self, field_list) -> list:
-        """
-        Get all values from the cache.
-        """
-        pass
-
-    @abstractmethod
-    def set(self, id, field, value):
-        """
-        Set a value in the cache.
-        """
-        pass
-
-    @abstractmethod
-    def delete(self, id):
-        """
-        Delete a value from the cache.
-        """
-        pass
-
-
-class MemoryCache(Cache):
-    def __init__(self):
-        self.cache = {}
-
-    def generate_id(self, *args, **kwargs):
-        return str(uuid.uuid4())
-
-    def set(self, id, field, value):
-        if id not in self.cache:
-            self.cache[id] = {}
+import inspect
+from functools import wraps
+from typing import List, Optional
 
-        self.cache[id][field] = value
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
-    def get(self, id, field):
-        if id not in self.cache:
-            return None
+from kiwi.cache import Cache, MemoryCache
 
-        if field not in self.cache[id]:
-            return None
 
-        return self.cache[id][field]
+def request_signature(f):
+    """
+    Expose only ``request`` to FastAPI, so the values a decorator injects (``user``, ``id`` and the
+    cached fields) aren't mistaken for query parameters.
+    """
+    f.__signature__ = inspect.Signature(
+        [inspect.Parameter("request", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request)]
+    )
+    return f
 
-    def get_all(self, field_list) -> list:
-        return [
-            {"id": id, **{field: self.get(id=id, field=field) for field in field_list}}
-            for id in self.cache
-        ]
 
-    def delete(self, id):
-        if id in self.cache:
-            del self.cache[id]
-
-
-from fastapi import HTTPException, Request, status
-from functools import wraps
-from typing import List, Optional
+async def request_json(request: Request) -> dict:
+    try:
+        data = await request.json()
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
 
 
 class CacheManager:
     """
     Examples：
     cache_manager = CacheManager()
+    @router.get("/api/v0/user_profile")
     @cache_manager.requires_cache(
         required_fields=["name", "email"],
         optional_fields=["avatar_url"])
@@ -104,9 +52,38 @@ class CacheManager:
     """
 
     def __init__(self, cache: Cache = None):
-        if cache is None:
-            self.cache = MemoryCache()
-        self.cache = cache
+        self.cache = MemoryCache() if cache is None else cache
+
+    async def _call(self, fn, *args, **kwargs):
+        # MemoryCache is a dict lookup; other backends do file or network I/O and must not block the event loop
+        if isinstance(self.cache, MemoryCache):
+            return fn(*args, **kwargs)
+        return await run_in_threadpool(fn, *args, **kwargs)
+
+    async def get(self, id, field):
+        return await self._call(self.cache.get, id=id, field=field)
+
+    async def set(self, id, field, value):
+        await self._call(self.cache.set, id=id, field=field, value=value)
+
+    async def get_all(self, field_list) -> list:
+        return await self._call(self.cache.get_all, field_list=field_list)
+
+    async def stats(self) -> dict:
+        return await self._call(self.cache.stats)
+
+    async def get_cached(self, id, field):
+        """
+        Get a value from the cache. Results stored as an Arrow ``table`` are converted to the pandas
+        ``df`` the first time an endpoint asks for it, and the DataFrame is cached from then on.
+        """
+        value = await self.get(id, field)
+        if value is None and field == "df":
+            table = await self.get(id, "table")
+            if table is not None:
+                value = await run_in_threadpool(table.to_pandas)
+                await self.set(id, "df", value)
+        return value
 
     def requires_cache(
             self,
@@ -121,47 +98,26 @@ class CacheManager:
                 # 1. 获取 ID（支持查询参数和请求体）
                 id = request.query_params.get("id")
 
-                if not id:
-                    try:
-                        json_data = await request.json()
-                        id = json_data.get("id")
-                    except Exception as e:
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="Invalid request body"
-                        )
-
-                if not id:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="ID is required"
-                    )
-
-                # 2. 检查必需字段
-                missing_fields = []
+                if id is None:
+                    id = (await request_json(request)).get("id")
+                    if id is None:
+                        return JSONResponse({"type": "error", "error": "No id provided"})
+
+                # 2. 检查必需字段并收集字段值
+                field_values = {}
                 for field in required_fields:
-                    if self.cache.get(id, field) is None:
-                        missing_fields.append(field)
-
-                if missing_fields:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"Missing required fields: {', '.join(missing_fields)}"
-                    )
-
-                # 3. 收集字段值
-                field_values = {"id": id}
-                for field in required_fields + optional_fields:
-                    field_values[field] = self.cache.get(id, field)
-
-                # 4. 调用原始函数
-                try:
-                    # 保留原始参数结构
-                    return await f(request, *args, **kwargs, **field_values)
-                except TypeError:
-                    # 如果函数不接受额外参数，尝试直接调用
-                    return await f(request, *args, **kwargs)
-
-            return decorated
-
-        return decorator
\ No newline at end of file
+                    field_values[field] = await self.get_cached(id, field)
+                    if field_values[field] is None:
+                        return JSONResponse({"type": "error", "error": f"No {field} found"})
+
+                for field in optional_fields:
+                    field_values[field] = await self.get_cached(id, field)
+
+                field_values["id"] = id
+
+                # 3. 调用原始函数
+                return await f(request, *args, **field_values, **kwargs)
+
+            return request_signature(decorated)
+
+        return decorator
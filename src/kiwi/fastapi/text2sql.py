@@ -0,0 +1,619 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import wraps
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from kiwi.cache import Cache
+from kiwi.core import KiwiBase
+from kiwi.core.streaming import (
+    DOWNLOAD_FORMATS,
+    SSE_HEADERS,
+    dataframe_chunks,
+    iter_gzip,
+    sse_event,
+)
+from kiwi.fastapi.auth.auth import AuthInterface, NoAuth
+from kiwi.fastapi.cache.cache import CacheManager, request_json, request_signature
+
+
+class VannaFastAPI:
+    """
+    Async port of [`VannaFlaskAPI`][kiwi.flask_app.VannaFlaskAPI]: the same ``/api/v0/*`` endpoints and JSON
+    responses, served from an ``APIRouter`` so one process can hold many sessions open at once.
+
+    LLM calls await the async ``agenerate_*`` methods, bounded by the instance's ``llm_concurrency``. Work
+    that blocks runs on bounded thread pools, one per kind, so a burst of slow queries can't starve the
+    embedding lookups of threads:
+
+    - ``db_workers``: ``run_sql`` and the row fetch of downloads.
+    - ``embedding_workers``: training data, function lookups and other vector store calls.
+    - ``llm_workers``: chart rendering and LLM helpers without an async counterpart (``create_function``).
+
+    **Example:**
+    ```python
+    from fastapi import FastAPI
+    from kiwi.cache import SQLiteCache
+
+    api = VannaFastAPI(vn, cache=SQLiteCache("/var/run/kiwi/cache.sqlite"), allow_llm_to_see_data=True)
+    app = FastAPI(lifespan=api.lifespan)
+    app.include_router(api.router)
+    ```
+
+    Args:
+        vn: The Vanna instance to interact with.
+        cache: The cache to use. Defaults to a new MemoryCache; pass a SQLiteCache or RedisCache when running several workers.
+        auth: The authentication method to use. Defaults to NoAuth, which doesn't require authentication.
+        allow_llm_to_see_data: Whether to allow the LLM to see data. Defaults to False.
+        chart: Whether to show the chart output in the UI. Defaults to True.
+        db_workers (int): Threads running SQL queries.
+        embedding_workers (int): Threads running vector store calls.
+        llm_workers (int): Threads running blocking LLM helpers and charts.
+    """
+
+    def __init__(
+        self,
+        vn: KiwiBase,
+        cache: Cache = None,
+        auth: AuthInterface = NoAuth(),
+        allow_llm_to_see_data=False,
+        chart=True,
+        db_workers: int = 8,
+        embedding_workers: int = 4,
+        llm_workers: int = 16,
+    ):
+        self.vn = vn
+        self.cache = CacheManager(cache)
+        self.auth = auth
+        self.allow_llm_to_see_data = allow_llm_to_see_data
+        self.chart = chart
+        self.config = {
+            "debug": False,
+            "allow_llm_to_see_data": allow_llm_to_see_data,
+            "chart": chart,
+        }
+
+        self.db_executor = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix="kiwi-db")
+        self.embedding_executor = ThreadPoolExecutor(max_workers=embedding_workers, thread_name_prefix="kiwi-embedding")
+        self.llm_executor = ThreadPoolExecutor(max_workers=llm_workers, thread_name_prefix="kiwi-llm")
+
+        self.router = APIRouter(prefix="/api/v0", tags=["Text2SQL"])
+        self._add_routes()
+
+    async def run_in(self, executor: ThreadPoolExecutor, fn, *args, **kwargs):
+        """Run a blocking call on one of the bounded thread pools and await its result."""
+        return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+    def close(self) -> None:
+        """Shut the thread pools down, waiting for running calls to finish."""
+        for executor in (self.db_executor, self.embedding_executor, self.llm_executor):
+            executor.shutdown(wait=True)
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        """Lifespan handler for ``FastAPI(lifespan=...)`` that closes the thread pools on shutdown."""
+        yield
+        await asyncio.to_thread(self.close)
+
+    def requires_auth(self, f):
+        @wraps(f)
+        async def decorated(request: Request, *args, **kwargs):
+            user = self.auth.get_user(request)
+
+            if not self.auth.is_logged_in(user):
+                return JSONResponse({"type": "not_logged_in", "html": self.auth.login_form()})
+
+            # Pass the user to the function
+            return await f(request, *args, user=user, **kwargs)
+
+        return request_signature(decorated)
+
+    def _add_routes(self):
+        vn = self.vn
+        router = self.router
+
+        @router.get("/get_config")
+        @self.requires_auth
+        async def get_config(request: Request, user: any):
+            """Get the configuration for a user."""
+            return {"type": "config", "config": self.auth.override_config_for_user(user, self.config)}
+
+        @router.get("/generate_questions")
+        @self.requires_auth
+        async def generate_questions(request: Request, user: any):
+            """Suggest up to five questions from the training data."""
+            training_data = await self.run_in(self.embedding_executor, vn.get_training_data)
+
+            if training_data is None or len(training_data) == 0:
+                return {
+                    "type": "error",
+                    "error": "No training data found. Please add some training data first.",
+                }
+
+            try:
+                questions = training_data[training_data["question"].notnull()].sample(5)["question"].tolist()
+                return {
+                    "type": "question_list",
+                    "questions": questions,
+                    "header": "Here are some questions you can ask",
+                }
+            except Exception:
+                return {
+                    "type": "question_list",
+                    "questions": [],
+                    "header": "Go ahead and ask a question",
+                }
+
+        @router.get("/generate_sql")
+        @self.requires_auth
+        async def generate_sql(request: Request, user: any):
+            """Generate SQL for the ``question`` query parameter."""
+            question = request.query_params.get("question")
+
+            if question is None:
+                return {"type": "error", "error": "No question provided"}
+
+            id = self.cache.cache.generate_id(question=question)
+            sql = await vn.agenerate_sql(question=question, allow_llm_to_see_data=self.allow_llm_to_see_data)
+
+            await self.cache.set(id, "question", question)
+            await self.cache.set(id, "sql", sql)
+
+            return {"type": "sql" if vn.is_sql_valid(sql=sql) else "text", "id": id, "text": sql}
+
+        @router.get("/generate_sql_stream")
+        @self.requires_auth
+        async def generate_sql_stream(request: Request, user: any):
+            """
+            Generate SQL for the ``question`` query parameter, streamed as Server-Sent Events: ``token`` events,
+            ``early_sql`` as soon as a complete statement is extractable (it is cached, so ``run_sql`` can be
+            called with the id right away), and finally ``sql`` or ``text`` as returned by ``generate_sql``.
+            """
+            question = request.query_params.get("question")
+
+            if question is None:
+                return {"type": "error", "error": "No question provided"}
+
+            id = self.cache.cache.generate_id(question=question)
+            await self.cache.set(id, "question", question)
+
+            async def events():
+                async for event in vn.agenerate_sql_stream(
+                    question=question, allow_llm_to_see_data=self.allow_llm_to_see_data
+                ):
+                    if event["type"] == "early_sql":
+                        await self.cache.set(id, "sql", event["text"])
+                    elif event["type"] == "sql":
+                        sql = event["text"]
+                        await self.cache.set(id, "sql", sql)
+                        event = {"type": "sql" if vn.is_sql_valid(sql=sql) else "text", "text": sql}
+                    yield sse_event({**event, "id": id})
+
+            return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+        @router.get("/generate_rewritten_question")
+        @self.requires_auth
+        async def generate_rewritten_question(request: Request, user: any):
+            """Merge ``last_question`` and ``new_question`` into one standalone question."""
+            last_question = request.query_params.get("last_question")
+            new_question = request.query_params.get("new_question")
+
+            rewritten_question = await vn.agenerate_rewritten_question(last_question, new_question)
+
+            return {"type": "rewritten_question", "question": rewritten_question}
+
+        @router.get("/get_function")
+        @self.requires_auth
+        async def get_function(request: Request, user: any):
+            """Find the function matching the ``question`` query parameter and cache its instantiated SQL."""
+            question = request.query_params.get("question")
+
+            if question is None:
+                return {"type": "error", "error": "No question provided"}
+
+            if not hasattr(vn, "get_function"):
+                return {"type": "error", "error": "This setup does not support function generation."}
+
+            id = self.cache.cache.generate_id(question=question)
+            function = await self.run_in(self.embedding_executor, vn.get_function, question=question)
+
+            if function is None:
+                return {"type": "error", "error": "No function found"}
+
+            if "instantiated_sql" not in function:
+                vn.log(f"No instantiated SQL found for {question} in {function}")
+                return {"type": "error", "error": "No instantiated SQL found"}
+
+            await self.cache.set(id, "question", question)
+            await self.cache.set(id, "sql", function["instantiated_sql"])
+
+            if function.get("instantiated_post_processing_code"):
+                await self.cache.set(id, "plotly_code", function["instantiated_post_processing_code"])
+
+            return {"type": "function", "id": id, "function": function}
+
+        @router.get("/get_all_functions")
+        @self.requires_auth
+        async def get_all_functions(request: Request, user: any):
+            """List the stored functions."""
+            if not hasattr(vn, "get_all_functions"):
+                return {"type": "error", "error": "This setup does not support function generation."}
+
+            functions = await self.run_in(self.embedding_executor, vn.get_all_functions)
+
+            return {"type": "functions", "functions": functions}
+
+        @router.get("/run_sql")
+        @self.requires_auth
+        @self.cache.requires_cache(["sql"])
+        async def run_sql(request: Request, user: any, id: str, sql: str):
+            """Run the cached SQL, cache the (capped) result and return its first 10 rows."""
+            if not vn.run_sql_is_set:
+                return {
+                    "type": "error",
+                    "error": "Please connect to a database using vn.connect_to_... in order to run SQL queries.",
+                }
+
+            def fetch():
+                result = vn.run_sql_iter(sql=sql)
+                if vn.run_sql_arrow_is_set:
+                    table = result.to_arrow()
+                    return result, table, table.slice(0, 10).to_pandas()
+                df = result.to_df()
+                return result, df, df.head(10)
+
+            try:
+                result, df, preview = await self.run_in(self.db_executor, fetch)
+            except Exception as e:
+                return {"type": "sql_error", "error": str(e)}
+
+            if vn.run_sql_arrow_is_set:
+                await self.cache.set(id, "table", df)
+                await self.cache.set(id, "df", None)  # drop a DataFrame from an earlier run
+            else:
+                await self.cache.set(id, "df", df)
+            await self.cache.set(id, "truncated", result.truncated)
+
+            return {
+                "type": "df",
+                "id": id,
+                "df": preview.to_json(orient="records", date_format="iso"),
+                "truncated": result.truncated,
+                "should_generate_chart": self.chart and vn.should_generate_chart(df),
+            }
+
+        @router.post("/fix_sql")
+        @self.requires_auth
+        @self.cache.requires_cache(["question", "sql"])
+        async def fix_sql(request: Request, user: any, id: str, question: str, sql: str):
+            """Regenerate the cached SQL given the ``error`` it raised."""
+            error = (await request_json(request)).get("error")
+
+            if error is None:
+                return {"type": "error", "error": "No error provided"}
+
+            question = f"I have an error: {error}\n\nHere is the SQL I tried to run: {sql}\n\nThis is the question I was trying to answer: {question}\n\nCan you rewrite the SQL to fix the error?"
+
+            fixed_sql = await vn.agenerate_sql(question=question)
+
+            await self.cache.set(id, "sql", fixed_sql)
+
+            return {"type": "sql", "id": id, "text": fixed_sql}
+
+        @router.post("/update_sql")
+        @self.requires_auth
+        @self.cache.requires_cache([])
+        async def update_sql(request: Request, user: any, id: str):
+            """Replace the cached SQL with the ``sql`` edited by the user."""
+            sql = (await request_json(request)).get("sql")
+
+            if sql is None:
+                return {"type": "error", "error": "No sql provided"}
+
+            await self.cache.set(id, "sql", sql)
+
+            return {"type": "sql", "id": id, "text": sql}
+
+        @router.get("/download_csv")
+        @self.requires_auth
+        @self.cache.requires_cache([])
+        async def download_csv(request: Request, user: any, id: str):
+            """Stream the cached result as CSV, Parquet or Arrow IPC (``format`` query parameter)."""
+            fmt = request.query_params.get("format", "csv")
+            if fmt not in DOWNLOAD_FORMATS:
+                return {"type": "error", "error": f"Unknown format: {fmt}"}
+
+            # Prefer the Arrow result so it is never converted to pandas just to be written out
+            result = await self.cache.get(id, "table")
+            if result is not None:
+                chunks = result.to_batches(max_chunksize=vn.result_chunk_rows) or [result]
+            else:
+                result = await self.cache.get(id, "df")
+                if result is None:
+                    return {"type": "error", "error": "No df found"}
+                chunks = dataframe_chunks(result, vn.result_chunk_rows)
+
+            mimetype, extension, encode = DOWNLOAD_FORMATS[fmt]
+            body = encode(chunks)
+            headers = {
+                "Content-disposition": f"attachment; filename={id}.{extension}",
+                "Vary": "Accept-Encoding",
+            }
+
+            # Parquet is compressed already
+            if fmt != "parquet" and "gzip" in request.headers.get("accept-encoding", ""):
+                body = iter_gzip(body)
+                headers["Content-Encoding"] = "gzip"
+
+            # Starlette encodes a synchronous iterator in its thread pool, a chunk at a time
+            return StreamingResponse(body, media_type=mimetype, headers=headers)
+
+        @router.get("/generate_plotly_figure")
+        @self.requires_auth
+        @self.cache.requires_cache(["df", "question", "sql"])
+        async def generate_plotly_figure(request: Request, user: any, id: str, df, question, sql):
+            """Render the cached chart code, or generate new code from ``chart_instructions``."""
+            chart_instructions = request.query_params.get("chart_instructions")
+
+            try:
+                if not chart_instructions:
+                    code = await self.cache.get(id, "plotly_code")
+                else:
+                    question = f"{question}. When generating the chart, use these special instructions: {chart_instructions}"
+                    code = await vn.agenerate_plotly_code(
+                        question=question,
+                        sql=sql,
+                        df_metadata=f"Running df.dtypes gives:\n {df.dtypes}",
+                    )
+                    await self.cache.set(id, "plotly_code", code)
+
+                def render():
+                    return vn.get_plotly_figure(plotly_code=code, df=df, dark_mode=False).to_json()
+
+                fig_json = await self.run_in(self.llm_executor, render)
+                await self.cache.set(id, "fig_json", fig_json)
+
+                return {"type": "plotly_figure", "id": id, "fig": fig_json}
+            except Exception as e:
+                return {"type": "error", "error": str(e)}
+
+        @router.get("/get_training_data")
+        @self.requires_auth
+        async def get_training_data(request: Request, user: any):
+            """List the training data."""
+            df = await self.run_in(self.embedding_executor, vn.get_training_data)
+
+            if df is None or len(df) == 0:
+                return {
+                    "type": "error",
+                    "error": "No training data found. Please add some training data first.",
+                }
+
+            return {"type": "df", "id": "training_data", "df": df.to_json(orient="records")}
+
+        @router.post("/remove_training_data")
+        @self.requires_auth
+        async def remove_training_data(request: Request, user: any):
+            """Remove the training data item ``id``."""
+            id = (await request_json(request)).get("id")
+
+            if id is None:
+                return {"type": "error", "error": "No id provided"}
+
+            if await self.run_in(self.embedding_executor, vn.remove_training_data, id=id):
+                return {"success": True}
+            return {"type": "error", "error": "Couldn't remove training data"}
+
+        @router.post("/train")
+        @self.requires_auth
+        async def add_training_data(request: Request, user: any):
+            """Add a question/SQL pair, DDL or documentation to the training data."""
+            data = await request_json(request)
+
+            try:
+                id = await self.run_in(
+                    self.embedding_executor,
+                    vn.train,
+                    question=data.get("question"),
+                    sql=data.get("sql"),
+                    ddl=data.get("ddl"),
+                    documentation=data.get("documentation"),
+                )
+                return {"id": id}
+            except Exception as e:
+                return {"type": "error", "error": str(e)}
+
+        @router.get("/create_function")
+        @self.requires_auth
+        @self.cache.requires_cache(["question", "sql"])
+        async def create_function(request: Request, user: any, id: str, question: str, sql: str):
+            """Turn the cached question and SQL into a reusable function template."""
+            plotly_code = await self.cache.get(id, "plotly_code") or ""
+
+            function_data = await self.run_in(
+                self.llm_executor, vn.create_function, question=question, sql=sql, plotly_code=plotly_code
+            )
+
+            return {"type": "function_template", "id": id, "function_template": function_data}
+
+        @router.post("/update_function")
+        @self.requires_auth
+        async def update_function(request: Request, user: any):
+            """Replace the function ``old_function_name`` with ``updated_function``."""
+            data = await request_json(request)
+
+            updated = await self.run_in(
+                self.embedding_executor,
+                vn.update_function,
+                old_function_name=data.get("old_function_name"),
+                updated_function=data.get("updated_function"),
+            )
+
+            return {"success": updated}
+
+        @router.post("/delete_function")
+        @self.requires_auth
+        async def delete_function(request: Request, user: any):
+            """Delete the function ``function_name``."""
+            function_name = (await request_json(request)).get("function_name")
+
+            return {"success": await self.run_in(self.embedding_executor, vn.delete_function, function_name=function_name)}
+
+        @router.get("/generate_followup_questions")
+        @self.requires_auth
+        @self.cache.requires_cache(["df", "question", "sql"])
+        async def generate_followup_questions(request: Request, user: any, id: str, df, question, sql):
+            """Suggest up to five followup questions for the cached result."""
+            if not self.allow_llm_to_see_data:
+                await self.cache.set(id, "followup_questions", [])
+                return {
+                    "type": "question_list",
+                    "id": id,
+                    "questions": [],
+                    "header": "Followup Questions can be enabled if you set allow_llm_to_see_data=True",
+                }
+
+            followup_questions = await vn.agenerate_followup_questions(question=question, sql=sql, df=df)
+            if followup_questions is not None and len(followup_questions) > 5:
+                followup_questions = followup_questions[:5]
+
+            await self.cache.set(id, "followup_questions", followup_questions)
+
+            return {
+                "type": "question_list",
+                "id": id,
+                "questions": followup_questions,
+                "header": "Here are some potential followup questions:",
+            }
+
+        @router.get("/generate_summary")
+        @self.requires_auth
+        @self.cache.requires_cache(["df", "question"])
+        async def generate_summary(request: Request, user: any, id: str, df, question):
+            """Summarize the cached result."""
+            if not self.allow_llm_to_see_data:
+                return {
+                    "type": "text",
+                    "id": id,
+                    "text": "Summarization can be enabled if you set allow_llm_to_see_data=True",
+                }
+
+            summary = await vn.agenerate_summary(question=question, df=df)
+
+            await self.cache.set(id, "summary", summary)
+
+            return {"type": "text", "id": id, "text": summary}
+
+        @router.get("/generate_summary_stream")
+        @self.requires_auth
+        @self.cache.requires_cache(["df", "question"])
+        async def generate_summary_stream(request: Request, user: any, id: str, df, question):
+            """Summarize the cached result, streamed as Server-Sent Events: ``token`` events, then ``text``."""
+            if not self.allow_llm_to_see_data:
+                message = {"type": "text", "id": id, "text": "Summarization can be enabled if you set allow_llm_to_see_data=True"}
+                return StreamingResponse(iter([sse_event(message)]), media_type="text/event-stream", headers=SSE_HEADERS)
+
+            async def events():
+                tokens = []
+                async for token in vn.agenerate_summary_stream(question=question, df=df):
+                    tokens.append(token)
+                    yield sse_event({"type": "token", "id": id, "text": token})
+                summary = "".join(tokens)
+                await self.cache.set(id, "summary", summary)
+                yield sse_event({"type": "text", "id": id, "text": summary})
+
+            return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+        @router.get("/enrich")
+        @self.requires_auth
+        @self.cache.requires_cache(["df", "question", "sql"], optional_fields=["plotly_code"])
+        async def enrich(request: Request, user: any, id: str, df, question, sql, plotly_code):
+            """
+            Generate the chart, summary and followup questions concurrently, streamed as Server-Sent Events.
+            Each stage is cached and sent as soon as it completes, shaped like the matching endpoint's response
+            plus a ``stage`` key (``chart``, ``summary`` or ``followup_questions``), then ``{"type": "end"}``.
+            """
+            chart = self.chart and vn.should_generate_chart(df)
+            see_data = self.allow_llm_to_see_data
+
+            async def events():
+                if not see_data:
+                    await self.cache.set(id, "followup_questions", [])
+                    yield sse_event({"stage": "summary", "type": "text", "id": id, "text": "Summarization can be enabled if you set allow_llm_to_see_data=True"})
+                    yield sse_event({"stage": "followup_questions", "type": "question_list", "id": id, "questions": [], "header": "Followup Questions can be enabled if you set allow_llm_to_see_data=True"})
+
+                async for event in vn.aenrich(
+                    question=question,
+                    sql=sql,
+                    df=df,
+                    chart=chart,
+                    summary=see_data,
+                    followup_questions=see_data,
+                    plotly_code=plotly_code,
+                    dark_mode=False,
+                ):
+                    if event["type"] == "plotly_figure":
+                        fig_json = await self.run_in(self.llm_executor, event["fig"].to_json)
+                        await self.cache.set(id, "plotly_code", event["plotly_code"])
+                        await self.cache.set(id, "fig_json", fig_json)
+                        yield sse_event({"stage": "chart", "type": "plotly_figure", "id": id, "fig": fig_json})
+                    elif event["type"] == "summary":
+                        await self.cache.set(id, "summary", event["text"])
+                        yield sse_event({"stage": "summary", "type": "text", "id": id, "text": event["text"]})
+                    elif event["type"] == "followup_questions":
+                        questions = event["questions"][:5]
+                        await self.cache.set(id, "followup_questions", questions)
+                        yield sse_event({"stage": "followup_questions", "type": "question_list", "id": id, "questions": questions, "header": "Here are some potential followup questions:"})
+                    else:
+                        yield sse_event({"stage": event["stage"], "type": "error", "id": id, "error": event["error"]})
+
+                yield sse_event({"type": "end", "id": id})
+
+            return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+        @router.get("/load_question")
+        @self.requires_auth
+        @self.cache.requires_cache(["question", "sql", "df"], optional_fields=["summary", "fig_json"])
+        async def load_question(request: Request, user: any, id: str, question, sql, df, fig_json, summary):
+            """Reload a question from the history: its SQL, first 10 rows, chart and summary."""
+            try:
+                return {
+                    "type": "question_cache",
+                    "id": id,
+                    "question": question,
+                    "sql": sql,
+                    "df": df.head(10).to_json(orient="records", date_format="iso"),
+                    "fig": fig_json,
+                    "summary": summary,
+                }
+            except Exception as e:
+                return {"type": "error", "error": str(e)}
+
+        @router.get("/get_question_history")
+        @self.requires_auth
+        async def get_question_history(request: Request, user: any):
+            """List the questions in the cache."""
+            return {"type": "question_history", "questions": await self.cache.get_all(field_list=["question"])}
+
+        @router.get("/get_cache_stats")
+        @self.requires_auth
+        async def get_cache_stats(request: Request, user: any):
+            """Statistics of the instance's caches and of the app's question cache."""
+            return {"type": "cache_stats", "stats": {**vn.get_cache_stats(), "app_cache": await self.cache.stats()}}
+
+        @router.post("/invalidate_result_cache")
+        @self.requires_auth
+        async def invalidate_result_cache(request: Request, user: any):
+            """Drop cached query results, or only those of ``sql``."""
+            sql = (await request_json(request)).get("sql")
+
+            return {"type": "result_cache_invalidated", "removed": vn.invalidate_result_cache(sql=sql)}
+
+        @router.get("/get_pool_stats")
+        @self.requires_auth
+        async def get_pool_stats(request: Request, user: any):
+            """Statistics of the database connection pool."""
+            return {"type": "pool_stats", "stats": vn.get_pool_stats()}
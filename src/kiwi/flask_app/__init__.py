@@ -2,8 +2,6 @@ import json
 import logging
 import os
 import sys
-import uuid
-from abc import ABC, abstractmethod
 from functools import wraps
 import importlib.metadata
 
@@ -14,85 +12,13 @@ from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_sock import Sock
 from langchain_core.messages import BaseMessage
 
+from kiwi.cache import Cache, MemoryCache
 from kiwi.core import KiwiBase
+from kiwi.core.streaming import DOWNLOAD_FORMATS, SSE_HEADERS, dataframe_chunks, iter_gzip, sse_event
 from kiwi.flask_app.assets import css_content, html_content, js_content
 from kiwi.flask_app.auth import AuthInterface, NoAuth
 
 
-class Cache(ABC):
-    """
-    Define the interface for a cache that can be used to store data in a Flask app.
-    """
-
-    @abstractmethod
-    def generate_id(self, *args, **kwargs):
-        """
-        Generate a unique ID for the cache.
-        """
-        pass
-
-    @abstractmethod
-    def get(self, id, field):
-        """
-        Get a value from the cache.
-        """
-        pass
-
-    @abstractmethod
-    def get_all(self, field_list) -> list:
-        """
-        Get all values from the cache.
-        """
-        pass
-
-    @abstractmethod
-    def set(self, id, field, value):
-        """
-        Set a value in the cache.
-        """
-        pass
-
-    @abstractmethod
-    def delete(self, id):
-        """
-        Delete a value from the cache.
-        """
-        pass
-
-
-class MemoryCache(Cache):
-    def __init__(self):
-        self.cache = {}
-
-    def generate_id(self, *args, **kwargs):
-        return str(uuid.uuid4())
-
-    def set(self, id, field, value):
-        if id not in self.cache:
-            self.cache[id] = {}
-
-        self.cache[id][field] = value
-
-    def get(self, id, field):
-        if id not in self.cache:
-            return None
-
-        if field not in self.cache[id]:
-            return None
-
-        return self.cache[id][field]
-
-    def get_all(self, field_list) -> list:
-        return [
-            {"id": id, **{field: self.get(id=id, field=field) for field in field_list}}
-            for id in self.cache
-        ]
-
-    def delete(self, id):
-        if id in self.cache:
-            del self.cache[id]
-
-
 class VannaFlaskAPI:
     flask_app = None
 
@@ -107,16 +33,14 @@ class VannaFlaskAPI:
                     if id is None:
                         return jsonify({"type": "error", "error": "No id provided"})
 
+                field_values = {}
                 for field in required_fields:
-                    if self.cache.get(id=id, field=field) is None:
+                    field_values[field] = self.get_cached(id=id, field=field)
+                    if field_values[field] is None:
                         return jsonify({"type": "error", "error": f"No {field} found"})
 
-                field_values = {
-                    field: self.cache.get(id=id, field=field) for field in required_fields
-                }
-
                 for field in optional_fields:
-                    field_values[field] = self.cache.get(id=id, field=field)
+                    field_values[field] = self.get_cached(id=id, field=field)
 
                 # Add the id to the field_values
                 field_values["id"] = id
@@ -127,6 +51,19 @@ class VannaFlaskAPI:
 
         return decorator
 
+    def get_cached(self, id, field):
+        """
+        Get a value from the cache. Results stored as an Arrow ``table`` are converted to the pandas
+        ``df`` the first time an endpoint asks for it, and the DataFrame is cached from then on.
+        """
+        value = self.cache.get(id=id, field=field)
+        if value is None and field == "df":
+            table = self.cache.get(id=id, field="table")
+            if table is not None:
+                value = table.to_pandas()
+                self.cache.set(id=id, field="df", value=value)
+        return value
+
     def requires_auth(self, f):
         @wraps(f)
         def decorated(*args, **kwargs):
@@ -356,6 +293,47 @@ class VannaFlaskAPI:
                     }
                 )
 
+        @self.flask_app.route("/api/v0/generate_sql_stream", methods=["GET"])
+        @self.requires_auth
+        def generate_sql_stream(user: any):
+            """
+            Generate SQL from a question, streamed as Server-Sent Events
+            ---
+            parameters:
+              - name: user
+                in: query
+              - name: question
+                in: query
+                type: string
+                required: true
+            responses:
+              200:
+                description: >
+                  text/event-stream of JSON events with the id: "token" for each piece of the LLM response,
+                  "early_sql" as soon as a complete statement is extractable (it is cached, so run_sql can be
+                  called with the id right away), "intermediate_sql", and finally "sql" or "text" as returned by
+                  generate_sql.
+            """
+            question = flask.request.args.get("question")
+
+            if question is None:
+                return jsonify({"type": "error", "error": "No question provided"})
+
+            id = self.cache.generate_id(question=question)
+            self.cache.set(id=id, field="question", value=question)
+
+            def events():
+                for event in vn.generate_sql_stream(question=question, allow_llm_to_see_data=self.allow_llm_to_see_data):
+                    if event["type"] == "early_sql":
+                        self.cache.set(id=id, field="sql", value=event["text"])
+                    elif event["type"] == "sql":
+                        sql = event["text"]
+                        self.cache.set(id=id, field="sql", value=sql)
+                        event = {"type": "sql" if vn.is_sql_valid(sql=sql) else "text", "text": sql}
+                    yield sse_event({**event, "id": id})
+
+            return Response(events(), mimetype="text/event-stream", headers=SSE_HEADERS)
+
         @self.flask_app.route("/api/v0/generate_rewritten_question", methods=["GET"])
         @self.requires_auth
         def generate_rewritten_question(user: any):
@@ -496,6 +474,8 @@ class VannaFlaskAPI:
                       type: string
                     df:
                       type: object
+                    truncated:
+                      type: boolean
                     should_generate_chart:
                       type: boolean
             """
@@ -508,15 +488,30 @@ class VannaFlaskAPI:
                         }
                     )
 
-                df = vn.run_sql(sql=sql)
+                # Fetched in chunks and cut off at the configured row/byte cap, so a runaway
+                # SELECT * cannot exhaust the worker's memory.
+                result = vn.run_sql_iter(sql=sql)
+
+                if vn.run_sql_arrow_is_set:
+                    # Keep the Arrow result; pandas is only built for the 10 preview rows here
+                    # and for the whole result when the chart or summary endpoints need it.
+                    df = result.to_arrow()
+                    self.cache.set(id=id, field="table", value=df)
+                    self.cache.set(id=id, field="df", value=None)  # drop a DataFrame from an earlier run
+                    preview = df.slice(0, 10).to_pandas()
+                else:
+                    df = result.to_df()
+                    self.cache.set(id=id, field="df", value=df)
+                    preview = df.head(10)
 
-                self.cache.set(id=id, field="df", value=df)
+                self.cache.set(id=id, field="truncated", value=result.truncated)
 
                 return jsonify(
                     {
                         "type": "df",
                         "id": id,
-                        "df": df.head(10).to_json(orient='records', date_format='iso'),
+                        "df": preview.to_json(orient='records', date_format='iso'),
+                        "truncated": result.truncated,
                         "should_generate_chart": self.chart and vn.should_generate_chart(df),
                     }
                 )
@@ -622,10 +617,10 @@ class VannaFlaskAPI:
 
         @self.flask_app.route("/api/v0/download_csv", methods=["GET"])
         @self.requires_auth
-        @self.requires_cache(["df"])
-        def download_csv(user: any, id: str, df):
+        @self.requires_cache([])
+        def download_csv(user: any, id: str):
             """
-            Download CSV
+            Download the query result as CSV, Parquet or Arrow IPC
             ---
             parameters:
               - name: user
@@ -634,17 +629,42 @@ class VannaFlaskAPI:
                 in: query|body
                 type: string
                 required: true
+              - name: format
+                in: query
+                type: string
+                enum: [csv, parquet, arrow]
+                default: csv
             responses:
               200:
-                description: download CSV
+                description: download file, streamed in row chunks (gzip-encoded for csv and arrow when accepted)
             """
-            csv = df.to_csv()
+            fmt = flask.request.args.get("format", "csv")
+            if fmt not in DOWNLOAD_FORMATS:
+                return jsonify({"type": "error", "error": f"Unknown format: {fmt}"})
+
+            # Prefer the Arrow result so it is never converted to pandas just to be written out
+            result = self.cache.get(id=id, field="table")
+            if result is not None:
+                chunks = result.to_batches(max_chunksize=vn.result_chunk_rows) or [result]
+            else:
+                result = self.cache.get(id=id, field="df")
+                if result is None:
+                    return jsonify({"type": "error", "error": "No df found"})
+                chunks = dataframe_chunks(result, vn.result_chunk_rows)
 
-            return Response(
-                csv,
-                mimetype="text/csv",
-                headers={"Content-disposition": f"attachment; filename={id}.csv"},
-            )
+            mimetype, extension, encode = DOWNLOAD_FORMATS[fmt]
+            body = encode(chunks)
+            headers = {
+                "Content-disposition": f"attachment; filename={id}.{extension}",
+                "Vary": "Accept-Encoding",
+            }
+
+            # Parquet is compressed already
+            if fmt != "parquet" and flask.request.accept_encodings["gzip"]:
+                body = iter_gzip(body)
+                headers["Content-Encoding"] = "gzip"
+
+            return Response(body, mimetype=mimetype, headers=headers)
 
         @self.flask_app.route("/api/v0/generate_plotly_figure", methods=["GET"])
         @self.requires_auth
@@ -1037,6 +1057,104 @@ class VannaFlaskAPI:
                     }
                 )
 
+        @self.flask_app.route("/api/v0/generate_summary_stream", methods=["GET"])
+        @self.requires_auth
+        @self.requires_cache(["df", "question"])
+        def generate_summary_stream(user: any, id: str, df, question):
+            """
+            Generate summary, streamed as Server-Sent Events
+            ---
+            parameters:
+              - name: user
+                in: query
+              - name: id
+                in: query|body
+                type: string
+                required: true
+            responses:
+              200:
+                description: >
+                  text/event-stream of JSON events with the id: "token" for each piece of the summary, then
+                  "text" with the whole summary, as returned by generate_summary.
+            """
+            if not self.allow_llm_to_see_data:
+                return Response(
+                    [sse_event({"type": "text", "id": id, "text": "Summarization can be enabled if you set allow_llm_to_see_data=True"})],
+                    mimetype="text/event-stream",
+                    headers=SSE_HEADERS,
+                )
+
+            def events():
+                tokens = []
+                for token in vn.generate_summary_stream(question=question, df=df):
+                    tokens.append(token)
+                    yield sse_event({"type": "token", "id": id, "text": token})
+                summary = "".join(tokens)
+                self.cache.set(id=id, field="summary", value=summary)
+                yield sse_event({"type": "text", "id": id, "text": summary})
+
+            return Response(events(), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+        @self.flask_app.route("/api/v0/enrich", methods=["GET"])
+        @self.requires_auth
+        @self.requires_cache(["df", "question", "sql"], optional_fields=["plotly_code"])
+        def enrich(user: any, id: str, df, question, sql, plotly_code):
+            """
+            Generate the chart, summary and followup questions concurrently, streamed as Server-Sent Events
+            ---
+            parameters:
+              - name: user
+                in: query
+              - name: id
+                in: query|body
+                type: string
+                required: true
+            responses:
+              200:
+                description: >
+                  text/event-stream of JSON events, one per stage as it completes and each cached as it arrives,
+                  with the shape of the matching endpoint plus a "stage" key: "chart" (as generate_plotly_figure),
+                  "summary" (as generate_summary) and "followup_questions" (as generate_followup_questions),
+                  then {"type": "end"}.
+            """
+            chart = self.chart and vn.should_generate_chart(df)
+            see_data = self.allow_llm_to_see_data
+
+            def events():
+                if not see_data:
+                    self.cache.set(id=id, field="followup_questions", value=[])
+                    yield sse_event({"stage": "summary", "type": "text", "id": id, "text": "Summarization can be enabled if you set allow_llm_to_see_data=True"})
+                    yield sse_event({"stage": "followup_questions", "type": "question_list", "id": id, "questions": [], "header": "Followup Questions can be enabled if you set allow_llm_to_see_data=True"})
+
+                for event in vn.enrich(
+                    question=question,
+                    sql=sql,
+                    df=df,
+                    chart=chart,
+                    summary=see_data,
+                    followup_questions=see_data,
+                    plotly_code=plotly_code,
+                    dark_mode=False,
+                ):
+                    if event["type"] == "plotly_figure":
+                        fig_json = event["fig"].to_json()
+                        self.cache.set(id=id, field="plotly_code", value=event["plotly_code"])
+                        self.cache.set(id=id, field="fig_json", value=fig_json)
+                        yield sse_event({"stage": "chart", "type": "plotly_figure", "id": id, "fig": fig_json})
+                    elif event["type"] == "summary":
+                        self.cache.set(id=id, field="summary", value=event["text"])
+                        yield sse_event({"stage": "summary", "type": "text", "id": id, "text": event["text"]})
+                    elif event["type"] == "followup_questions":
+                        questions = event["questions"][:5]
+                        self.cache.set(id=id, field="followup_questions", value=questions)
+                        yield sse_event({"stage": "followup_questions", "type": "question_list", "id": id, "questions": questions, "header": "Here are some potential followup questions:"})
+                    else:
+                        yield sse_event({"stage": event["stage"], "type": "error", "id": id, "error": event["error"]})
+
+                yield sse_event({"type": "end", "id": id})
+
+            return Response(events(), mimetype="text/event-stream", headers=SSE_HEADERS)
+
         @self.flask_app.route("/api/v0/load_question", methods=["GET"])
         @self.requires_auth
         @self.requires_cache(
@@ -1120,6 +1238,93 @@ class VannaFlaskAPI:
                 }
             )
 
+        @self.flask_app.route("/api/v0/get_cache_stats", methods=["GET"])
+        @self.requires_auth
+        def get_cache_stats(user: any):
+            """
+            Get cache statistics: the instance's caches, plus entries, bytes and evictions of the app's question cache
+            ---
+            parameters:
+              - name: user
+                in: query
+            responses:
+              200:
+                schema:
+                  type: object
+                  properties:
+                    type:
+                      type: string
+                      default: cache_stats
+                    stats:
+                      type: object
+            """
+            return jsonify(
+                {
+                    "type": "cache_stats",
+                    "stats": {**vn.get_cache_stats(), "app_cache": self.cache.stats()},
+                }
+            )
+
+        @self.flask_app.route("/api/v0/invalidate_result_cache", methods=["POST"])
+        @self.requires_auth
+        def invalidate_result_cache(user: any):
+            """
+            Drop cached query results, e.g. after new data was loaded
+            ---
+            parameters:
+              - name: user
+                in: query
+              - name: sql
+                in: body
+                type: string
+                description: only drop this query's result
+            responses:
+              200:
+                schema:
+                  type: object
+                  properties:
+                    type:
+                      type: string
+                      default: result_cache_invalidated
+                    removed:
+                      type: integer
+            """
+            sql = (flask.request.get_json(silent=True) or {}).get("sql")
+
+            return jsonify(
+                {
+                    "type": "result_cache_invalidated",
+                    "removed": vn.invalidate_result_cache(sql=sql),
+                }
+            )
+
+        @self.flask_app.route("/api/v0/get_pool_stats", methods=["GET"])
+        @self.requires_auth
+        def get_pool_stats(user: any):
+            """
+            Get database connection pool statistics
+            ---
+            parameters:
+              - name: user
+                in: query
+            responses:
+              200:
+                schema:
+                  type: object
+                  properties:
+                    type:
+                      type: string
+                      default: pool_stats
+                    stats:
+                      type: object
+            """
+            return jsonify(
+                {
+                    "type": "pool_stats",
+                    "stats": vn.get_pool_stats(),
+                }
+            )
+
         @self.flask_app.route("/api/v0/<path:catch_all>", methods=["GET", "POST"])
         def catch_all(catch_all):
             return jsonify(
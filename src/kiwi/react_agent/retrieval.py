@@ -8,6 +8,7 @@ The retrievers support filtering results by user_id to ensure data isolation bet
 
 import os
 from contextlib import contextmanager
+from functools import lru_cache
 from typing import Generator
 
 from langchain_core.embeddings import Embeddings
@@ -21,7 +22,13 @@ from kiwi.react_agent.configuration import Configuration, IndexConfiguration
 
 
 def make_text_encoder(model: str) -> Embeddings:
-    """Connect to the configured text encoder."""
+    """Connect to the configured text encoder.
+
+    ``default/<model>`` loads the bundled ONNX MiniLM encoder; ``default/batched`` wraps it in a
+    MicroBatchingEmbeddings so concurrent single-query calls share one forward pass. Both are created once
+    per process and shared by every retriever, so the model isn't reloaded and the batcher sees the calls
+    of all graph runs.
+    """
     provider, model = model.split("/", maxsplit=1)
     match provider:
         case "openai":
@@ -33,11 +40,20 @@ def make_text_encoder(model: str) -> Embeddings:
         #
         #     return CohereEmbeddings(model=model)  # type: ignore
         case "default":
-            from kiwi.embedding.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
-            return ONNXMiniLM_L6_V2()
+            return _default_text_encoder(model == "batched")
         case _:
             raise ValueError(f"Unsupported embedding provider: {provider}")
 
+
+@lru_cache(maxsize=None)
+def _default_text_encoder(batched: bool) -> Embeddings:
+    from kiwi.embedding import MicroBatchingEmbeddings, ONNXMiniLM_L6_V2
+
+    if batched:
+        return MicroBatchingEmbeddings(_default_text_encoder(False))
+    return ONNXMiniLM_L6_V2()
+
+
 ## Retriever constructors
 
 
@@ -155,8 +171,12 @@ def make_in_memory_retriever(
         configuration: IndexConfiguration, embedding_model: Embeddings
 ) -> Generator[VectorStoreRetriever, None, None]:
     """Configure this agent to connect to in memory index."""
-    from langchain_core.vectorstores import InMemoryVectorStore
-    vstore = InMemoryVectorStore(embedding_model)
+    if configuration.vector_storage == "float32":
+        from langchain_core.vectorstores import InMemoryVectorStore
+        vstore = InMemoryVectorStore(embedding_model)
+    else:
+        from kiwi.embedding.storage import CompactVectorStore
+        vstore = CompactVectorStore(embedding_model, dtype=configuration.vector_storage)
     search_kwargs = configuration.search_kwargs
     yield vstore.as_retriever(search_kwargs=search_kwargs)
 
@@ -13,6 +13,8 @@ project_root = Path(__file__).parent.parent
 src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
 
+from kiwi.core.base import KiwiBase  # noqa: E402
+
 
 @pytest.fixture
 def mock_env_vars():
@@ -72,4 +74,47 @@ FLASK_ENV=testing
 """
     env_file = tmp_path / ".env"
     env_file.write_text(env_content)
-    return env_file
\ No newline at end of file
+    return env_file
+
+
+class StubKiwi(KiwiBase):
+    """KiwiBase with no vector store or LLM; only the connectors are exercised."""
+
+    def generate_embedding(self, data, **kwargs):
+        return []
+
+    def get_similar_question_sql(self, question, **kwargs):
+        return []
+
+    def get_related_ddl(self, question, **kwargs):
+        return []
+
+    def get_related_documentation(self, question, **kwargs):
+        return []
+
+    def add_question_sql(self, question, sql, **kwargs):
+        return ""
+
+    def add_ddl(self, ddl, **kwargs):
+        return ""
+
+    def add_documentation(self, documentation, **kwargs):
+        return ""
+
+    def get_training_data(self, **kwargs):
+        return None
+
+    def remove_training_data(self, id, **kwargs):
+        return True
+
+    def system_message(self, message):
+        return message
+
+    def user_message(self, message):
+        return message
+
+    def assistant_message(self, message):
+        return message
+
+    def submit_prompt(self, prompt, **kwargs):
+        return ""
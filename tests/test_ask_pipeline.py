@@ -0,0 +1,187 @@
+"""
+Tests for describe_sql and the pipelined ask mode.
+"""
+
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from kiwi.core.base import _MYSQL_DTYPES, _POSTGRES_DTYPES
+from kiwi.core.streaming import describe_cursor
+from tests.conftest import StubKiwi
+
+duckdb = pytest.importorskip("duckdb")
+
+SQL = "SELECT name, SUM(sales) AS sales FROM t GROUP BY name ORDER BY sales DESC;"
+# The statement is complete well before the model finishes its explanation
+RESPONSE = ["```sql\n", SQL, "\n```", "\nThis sums", " the sales", " of each", " name."]
+PLOTLY_CODE = "```python\nfig = px.bar(df, x='name', y='sales')\n```"
+
+
+class PipelineKiwi(StubKiwi):
+    """Records when the stages start and end; the model and the database are slow."""
+
+    def __init__(self, tokens=RESPONSE):
+        super().__init__()
+        self.tokens = tokens
+        self.timeline = []
+        self.lock = threading.Lock()
+        self.connect_to_duckdb(
+            ":memory:", init_sql="CREATE TABLE t AS SELECT * FROM (VALUES ('a', 3), ('b', 2), ('a', 1)) v(name, sales)"
+        )
+        run_sql = self.run_sql
+
+        def slow_run_sql(sql):
+            self.record(f"run {sql}")
+            time.sleep(0.2)
+            df = run_sql(sql)
+            self.record("rows")
+            return df
+
+        self.run_sql = slow_run_sql
+
+    def record(self, event):
+        with self.lock:
+            self.timeline.append(event)
+
+    def submit_prompt_stream(self, prompt, **kwargs):
+        for token in self.tokens:
+            if token.startswith(("\nThis", " ")):
+                time.sleep(0.05)
+            yield token
+        self.record("sql generated")
+
+    def submit_prompt(self, prompt, **kwargs):
+        if "plotly" not in prompt[-1]:
+            return "".join(self.submit_prompt_stream(prompt))
+        self.record("chart")
+        return PLOTLY_CODE
+
+
+class TestDescribeSql:
+    """Test that the result's columns are known without fetching the rows."""
+
+    def test_duckdb(self):
+        vn = PipelineKiwi()
+
+        columns = vn.describe_sql(SQL)
+
+        assert list(columns.columns) == ["name", "sales"]
+        assert len(columns) == 0
+        assert pd.api.types.is_numeric_dtype(columns["sales"])
+        assert vn.timeline == []  # run_sql wasn't used
+
+    def test_limit_0_probe(self):
+        vn = StubKiwi()
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE t (x INTEGER, y TEXT)")
+        conn.execute("INSERT INTO t VALUES (1, 'a')")
+        vn.run_sql = lambda sql: pd.read_sql_query(sql, conn)
+
+        columns = vn.describe_sql("SELECT x, y FROM t;")
+
+        assert list(columns.columns) == ["x", "y"]
+        assert len(columns) == 0
+        # Nothing to infer dtypes from without rows
+        assert columns.dtypes.tolist() == [object, object]
+
+    @pytest.mark.parametrize(
+        "dtypes, codes",
+        [(_POSTGRES_DTYPES, [23, 1700, 25, 1114, 16]), (_MYSQL_DTYPES, [8, 246, 253, 12, 1])],
+        ids=["postgres", "mysql"],
+    )
+    def test_cursor_type_codes(self, dtypes, codes):
+        class Cursor:
+            description = [(name, code, None, None, None, None, None) for name, code in zip("abcde", codes)]
+
+        columns = describe_cursor(Cursor(), dtypes)
+
+        assert list(columns.columns) == list("abcde")
+        assert len(columns) == 0
+        assert [str(dtype) for dtype in columns.dtypes][:4] == ["int64", "float64", "object", "datetime64[ns]"]
+
+
+class TestPipelinedAsk:
+    """Test that ask(pipelined=True) overlaps SQL generation, execution and chart generation."""
+
+    def test_stages_overlap(self):
+        vn = PipelineKiwi()
+
+        sql, df, fig = vn.ask("Sales by name?", print_results=False, auto_train=False, pipelined=True)
+
+        assert sql == SQL
+        assert df.to_dict("list") == {"name": ["a", "b"], "sales": [4, 2]}
+        assert fig.data[0].type == "bar"
+        # The query started before the explanation was generated, and the chart code before the rows landed
+        assert vn.timeline.index(f"run {SQL}") < vn.timeline.index("sql generated")
+        assert vn.timeline.index("chart") < vn.timeline.index("rows")
+
+    def test_staged_is_unchanged(self):
+        vn = PipelineKiwi()
+
+        sql, df, fig = vn.ask("Sales by name?", print_results=False, auto_train=False)
+
+        assert fig.data[0].type == "bar"
+        assert vn.timeline == ["sql generated", f"run {SQL}", "rows", "chart"]
+
+    def test_final_statement_differs_from_the_early_one(self):
+        final = "SELECT name FROM t;"
+        vn = PipelineKiwi(tokens=["```sql\n", SQL, "\n```", "\nOr simply:\n```sql\n", final, "\n```"])
+
+        sql, df, fig = vn.ask("Names?", print_results=False, auto_train=False, visualize=False, pipelined=True)
+
+        assert sql == final
+        assert list(df.columns) == ["name"]
+        assert f"run {final}" in vn.timeline
+
+    def test_final_statement_differs_in_literal_whitespace(self):
+        early, final = "SELECT 'a  b' AS label;", "SELECT 'a b' AS label;"
+        vn = PipelineKiwi(tokens=["```sql\n", early, "\n```", "\nOr rather:\n```sql\n", final, "\n```"])
+
+        sql, df, fig = vn.ask("Label?", print_results=False, auto_train=False, visualize=False, pipelined=True)
+
+        assert sql == final
+        assert df["label"].tolist() == ["a b"]
+        assert f"run {final}" in vn.timeline
+
+    def test_chart_falls_back_to_the_fetched_rows(self):
+        vn = PipelineKiwi()
+
+        def describe_sql(sql):
+            raise RuntimeError("no LIMIT in this dialect")
+
+        vn.describe_sql = describe_sql
+
+        sql, df, fig = vn.ask("Sales by name?", print_results=False, auto_train=False, pipelined=True)
+
+        assert fig.data[0].type == "bar"
+        assert vn.timeline.index("rows") < vn.timeline.index("chart")
+
+    def test_discarded_statement_gets_no_chart(self):
+        final = "SELECT name FROM t;"
+        vn = PipelineKiwi(tokens=["```sql\n", SQL, "\n```", "\nOr simply:\n```sql\n", final, "\n```"])
+        describe_sql = vn.describe_sql
+
+        def slow_describe_sql(sql):
+            time.sleep(0.2)
+            return describe_sql(sql)
+
+        vn.describe_sql = slow_describe_sql
+
+        sql, df, fig = vn.ask("Names?", print_results=False, auto_train=False, summarize=False, pipelined=True)
+        time.sleep(0.3)  # the discarded statement's chart stage has finished
+
+        assert sql == final
+        assert vn.timeline.count("chart") == 1
+
+    def test_refusal_is_not_run(self):
+        vn = PipelineKiwi(tokens=["The context doesn't say", " which table has", " the sales."])
+
+        sql, df, fig = vn.ask("Sales?", print_results=False, auto_train=False, pipelined=True)
+
+        assert sql == "The context doesn't say which table has the sales."
+        assert df is None
+        assert not any(event.startswith("run ") for event in vn.timeline)
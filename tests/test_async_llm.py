@@ -0,0 +1,181 @@
+"""
+Tests for the native async LLM calls and the per-endpoint concurrency bound.
+"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from kiwi.core.langchain_chat import LangChain_Chat
+from kiwi.core.llm_limits import endpoint_semaphore
+from tests.conftest import StubKiwi
+
+
+class SlowKiwi(StubKiwi):
+    """Records how many asubmit_prompt calls are in flight at once."""
+
+    def __init__(self, config=None, in_flight=None):
+        super().__init__(config=config)
+        self.in_flight = in_flight if in_flight is not None else {"now": 0, "max": 0}
+
+    async def asubmit_prompt(self, prompt, **kwargs):
+        self.in_flight["now"] += 1
+        self.in_flight["max"] = max(self.in_flight["max"], self.in_flight["now"])
+        await asyncio.sleep(0.01)
+        self.in_flight["now"] -= 1
+        return "1. How many?\n2. Which one?\n```python\nfig = px.bar(df)\nfig.show()\n```"
+
+
+DF = pd.DataFrame({"x": [1, 2, 3]})
+
+
+class TestAsyncGenerate:
+    """Test the async generate_* counterparts."""
+
+    def test_counterparts_compose_asubmit_prompt(self):
+        vn = SlowKiwi()
+
+        async def main():
+            return await asyncio.gather(
+                vn.agenerate_summary("How many?", DF),
+                vn.agenerate_followup_questions("How many?", "SELECT x FROM t", DF),
+                vn.agenerate_plotly_code("How many?", "SELECT x FROM t", "x int64"),
+                vn.agenerate_rewritten_question(None, "Which one?"),
+            )
+
+        summary, followups, plotly_code, rewritten = asyncio.run(main())
+
+        assert summary.startswith("1. How many?")
+        assert followups[:2] == ["How many?", "Which one?"]
+        assert plotly_code.strip() == "fig = px.bar(df)"  # fig.show() removed
+        assert rewritten == "Which one?"
+        assert vn.in_flight["max"] == 3  # concurrent without a bound
+
+    def test_sync_wrappers_are_kept(self):
+        vn = StubKiwi()
+        vn.submit_prompt = lambda prompt, **kwargs: "1. How many?"
+
+        assert vn.generate_followup_questions("Q", "SELECT 1", DF) == ["How many?"]
+        assert vn.generate_summary("Q", DF) == "1. How many?"
+
+
+class TestLlmConcurrency:
+    """Test the llm_concurrency semaphore."""
+
+    def test_bound_per_instance(self):
+        vn = SlowKiwi(config={"llm_concurrency": 2})
+
+        async def main():
+            await asyncio.gather(*(vn.agenerate_summary("How many?", DF) for _ in range(10)))
+
+        asyncio.run(main())
+
+        assert vn.in_flight["max"] == 2
+
+    def test_instances_share_an_endpoint(self):
+        in_flight = {"now": 0, "max": 0}
+        config = {"llm_concurrency": 3, "llm_endpoint": "qwen-32b@gpu-1"}
+        instances = [SlowKiwi(config=config, in_flight=in_flight) for _ in range(4)]
+
+        async def main():
+            await asyncio.gather(*(vn.agenerate_summary("How many?", DF) for vn in instances for _ in range(3)))
+
+        asyncio.run(main())
+
+        assert in_flight["max"] == 3
+
+    def test_semaphore_per_event_loop(self):
+        async def get(limit=1):
+            return endpoint_semaphore("endpoint", limit)
+
+        assert asyncio.run(get()) is not asyncio.run(get())
+
+        with pytest.raises(ValueError):
+            asyncio.run(get(limit=0))
+
+
+class TestChatClients:
+    """Test asubmit_prompt in the LangChain and OpenAI chat classes."""
+
+    def test_langchain_ainvoke(self):
+        from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+        from langchain_core.messages import AIMessage
+
+        class LangChainKiwi(LangChain_Chat, StubKiwi):
+            pass
+
+        llm = GenericFakeChatModel(messages=iter([AIMessage("SELECT 1;")]))
+        vn = LangChainKiwi(llm, config={"llm_concurrency": 1})
+
+        assert asyncio.run(vn.agenerate_summary("One?", DF)) == "SELECT 1;"
+        assert vn._llm_endpoint_key() == "GenericFakeChatModel|GenericFakeChatModel"
+
+    def test_openai_async_client(self):
+        pytest.importorskip("openai")
+        from kiwi.core.openai_chat import OpenAI_Chat
+
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            message = SimpleNamespace(content="SELECT 1;")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        async_client = SimpleNamespace(
+            base_url="http://gpu-1/v1", chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+
+        class OpenAIKiwi(OpenAI_Chat, StubKiwi):
+            pass
+
+        vn = OpenAIKiwi(
+            client=object(), async_client=async_client, config={"model": "qwen-32b"}
+        )
+
+        assert asyncio.run(vn.agenerate_summary("One?", DF)) == "SELECT 1;"
+        assert calls[0]["model"] == "qwen-32b"
+        assert vn._llm_endpoint_key() == "http://gpu-1/v1|qwen-32b"
+
+    def test_openai_async_response_text(self):
+        pytest.importorskip("openai")
+        from kiwi.core.openai_chat import OpenAI_Chat
+
+        async def create(**kwargs):
+            choices = [SimpleNamespace(message=SimpleNamespace(content=content)) for content in (None, "SELECT 2;")]
+            return SimpleNamespace(choices=choices)
+
+        async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        class OpenAIKiwi(OpenAI_Chat, StubKiwi):
+            pass
+
+        vn = OpenAIKiwi(client=object(), async_client=async_client, config={})
+
+        assert asyncio.run(vn.asubmit_prompt([vn.user_message("Two?")])) == "SELECT 2;"
+
+    def test_openai_async_client_keeps_client_settings(self):
+        openai = pytest.importorskip("openai")
+        from kiwi.core.openai_chat import OpenAI_Chat
+
+        client = openai.OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY", "sk-test"),
+            project="analytics",
+            base_url="http://gpu-1/v1",
+            timeout=12.5,
+            max_retries=5,
+            default_headers={"X-Team": "bi"},
+        )
+
+        class OpenAIKiwi(OpenAI_Chat, StubKiwi):
+            pass
+
+        async_client = OpenAIKiwi(client=client, config={})._get_async_client()
+
+        assert isinstance(async_client, openai.AsyncOpenAI)
+        assert async_client.api_key == client.api_key
+        assert (async_client.project, str(async_client.base_url)) == ("analytics", "http://gpu-1/v1/")
+        assert (async_client.timeout, async_client.max_retries) == (12.5, 5)
+        assert async_client.default_headers["X-Team"] == "bi"
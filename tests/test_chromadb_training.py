@@ -0,0 +1,174 @@
+"""
+Tests for batched training data ingestion into ChromaDB.
+"""
+
+import numpy as np
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+from chromadb.config import Settings  # noqa: E402
+
+from kiwi.core.chromadb_vector import ChromaDB_VectorStore  # noqa: E402
+from kiwi.types import TrainingPlan, TrainingPlanItem  # noqa: E402
+from tests.conftest import StubKiwi  # noqa: E402
+
+DDL = [f"CREATE TABLE t{i} (id INT, amount DECIMAL)" for i in range(5)]
+QUESTION_SQL = [
+    {"question": "How many orders are there?", "sql": "SELECT COUNT(*) FROM orders"},
+    {"question": "Total sales by region?", "sql": "SELECT region, SUM(amount) FROM sales GROUP BY region"},
+]
+
+
+class CountingEmbeddingFunction(chromadb.EmbeddingFunction):
+    """Records every batch it embeds."""
+
+    def __init__(self):
+        self.calls = []
+
+    @staticmethod
+    def name():
+        return "counting"
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return [np.array([float(len(text)), 1.0], dtype=np.float32) for text in input]
+
+
+class SpyCollection:
+    """Records upserts without embedding or storing anything."""
+
+    def __init__(self):
+        self.upserts = []
+
+    def upsert(self, documents, embeddings, ids):
+        assert len(documents) == len(embeddings) == len(ids)
+        self.upserts.append(ids)
+
+
+class ChromaKiwi(ChromaDB_VectorStore, StubKiwi):
+    pass
+
+
+@pytest.fixture
+def embedding_function():
+    return CountingEmbeddingFunction()
+
+
+@pytest.fixture
+def vn(embedding_function):
+    # The in-memory client's storage is shared per process; reset it so every test starts empty
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False, allow_reset=True))
+    client.reset()
+    return ChromaKiwi(config={"client": client, "embedding_function": embedding_function, "embedding_cache": False})
+
+
+def training_counts(vn):
+    return vn.get_training_data()["training_data_type"].value_counts().to_dict()
+
+
+class TestUpsertInBatches:
+    """Test chunking and de-duplication of bulk upserts."""
+
+    def test_chunk_boundaries(self, vn, embedding_function):
+        collection = SpyCollection()
+
+        ids = vn._upsert_in_batches(collection, [(f"id{i}", f"doc{i}") for i in range(5)], batch_size=2)
+
+        assert ids == [f"id{i}" for i in range(5)]
+        assert collection.upserts == [["id0", "id1"], ["id2", "id3"], ["id4"]]
+        assert embedding_function.calls == [["doc0", "doc1"], ["doc2", "doc3"], ["doc4"]]
+
+    def test_exact_multiple_of_batch_size(self, vn):
+        collection = SpyCollection()
+
+        vn._upsert_in_batches(collection, [(f"id{i}", f"doc{i}") for i in range(4)], batch_size=2)
+
+        assert collection.upserts == [["id0", "id1"], ["id2", "id3"]]
+
+    def test_duplicates_written_once(self, vn, embedding_function):
+        collection = SpyCollection()
+        items = [("a", "first"), ("b", "second"), ("a", "first"), ("c", "third"), ("b", "second")]
+
+        ids = vn._upsert_in_batches(collection, items, batch_size=10)
+
+        assert ids == ["a", "b", "a", "c", "b"]
+        assert collection.upserts == [["a", "b", "c"]]
+        assert embedding_function.calls == [["first", "second", "third"]]
+
+    def test_default_batch_size(self, vn):
+        collection = SpyCollection()
+        vn.embedding_batch_size = 3
+
+        vn._upsert_in_batches(collection, [(f"id{i}", f"doc{i}") for i in range(7)])
+
+        assert [len(ids) for ids in collection.upserts] == [3, 3, 1]
+
+    def test_empty(self, vn, embedding_function):
+        collection = SpyCollection()
+
+        assert vn._upsert_in_batches(collection, []) == []
+        assert collection.upserts == []
+        assert embedding_function.calls == []
+
+    @pytest.mark.parametrize("batch_size", [0, -1])
+    def test_invalid_batch_size(self, vn, batch_size):
+        with pytest.raises(ValueError):
+            vn._upsert_in_batches(SpyCollection(), [("a", "doc")], batch_size=batch_size)
+
+
+class TestBatchTraining:
+    """Test the batch methods and train(plan=...) against an in-memory Chroma client."""
+
+    def test_add_ddl_batch(self, vn, embedding_function):
+        version = vn._training_data_version
+
+        ids = vn.add_ddl_batch(DDL + DDL[:2], batch_size=2)
+
+        assert len(ids) == 7
+        assert ids[5:] == ids[:2]
+        assert all(id.endswith("-ddl") for id in ids)
+        assert [len(batch) for batch in embedding_function.calls] == [2, 2, 1]
+        assert training_counts(vn) == {"ddl": 5}
+        assert vn._training_data_version == version + 1
+
+    def test_add_documentation_batch(self, vn, embedding_function):
+        ids = vn.add_documentation_batch(["Amounts are in USD.", "Regions are sales territories."])
+
+        assert all(id.endswith("-doc") for id in ids)
+        assert len(embedding_function.calls) == 1
+        assert training_counts(vn) == {"documentation": 2}
+
+    def test_add_question_sql_batch(self, vn):
+        ids = vn.add_question_sql_batch(QUESTION_SQL)
+
+        df = vn.get_training_data()
+        assert all(id.endswith("-sql") for id in ids)
+        assert df.set_index("id").loc[ids, "question"].tolist() == [item["question"] for item in QUESTION_SQL]
+
+    def test_ids_match_single_adds(self, vn):
+        batch_ids = vn.add_ddl_batch(DDL[:2]) + vn.add_question_sql_batch(QUESTION_SQL[:1])
+
+        single_ids = [vn.add_ddl(DDL[0]), vn.add_ddl(DDL[1]), vn.add_question_sql(**QUESTION_SQL[0])]
+
+        assert batch_ids == single_ids
+
+    def test_rerun_is_idempotent(self, vn):
+        vn.add_ddl_batch(DDL)
+        vn.add_ddl_batch(DDL)
+
+        assert training_counts(vn) == {"ddl": 5}
+
+    def test_train_plan_is_batched(self, vn, embedding_function):
+        plan = TrainingPlan(
+            [TrainingPlanItem(TrainingPlanItem.ITEM_TYPE_DDL, "db.public", f"t{i}", ddl) for i, ddl in enumerate(DDL)]
+            + [TrainingPlanItem(TrainingPlanItem.ITEM_TYPE_IS, "db.public", "t0", "t0 holds one row per order.")]
+            + [
+                TrainingPlanItem(TrainingPlanItem.ITEM_TYPE_SQL, "db", item["question"], item["sql"])
+                for item in QUESTION_SQL
+            ]
+        )
+
+        vn.train(plan=plan, batch_size=3)
+
+        assert [len(batch) for batch in embedding_function.calls] == [3, 2, 1, 2]
+        assert training_counts(vn) == {"ddl": 5, "documentation": 1, "sql": 2}
@@ -0,0 +1,310 @@
+"""
+Tests for the DB-API connection pool used by connect_to_postgres and connect_to_mysql.
+"""
+
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from kiwi import exceptions
+from kiwi.core.pool import ConnectionPool
+from kiwi.exceptions import ValidationError
+from tests.conftest import StubKiwi
+
+
+class BrokenConnection(Exception):
+    pass
+
+
+class FakeConnection:
+    """Minimal DB-API connection that records rollbacks and can be broken."""
+
+    def __init__(self, n):
+        self.n = n
+        self.closed = False
+        self.broken = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def execute(self, sql):
+                if conn.broken:
+                    raise BrokenConnection("connection lost")
+
+            def fetchall(self):
+                return [(1,)]
+
+            def close(self):
+                pass
+
+        return Cursor()
+
+    def rollback(self):
+        if self.broken:
+            raise BrokenConnection("connection lost")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class Factory:
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        conn = FakeConnection(len(self.connections))
+        self.connections.append(conn)
+        return conn
+
+
+class TestConnectionPool:
+    """Test reuse, bounds, health checks and metrics."""
+
+    def test_connections_are_reused(self):
+        factory = Factory()
+        pool = ConnectionPool(factory, min_size=1, max_size=4)
+
+        for _ in range(5):
+            with pool.connection() as conn:
+                conn.cursor().execute("SELECT 1")
+
+        assert len(factory.connections) == 1
+        assert pool.stats()["checkouts"] == 5
+        assert conn.rollbacks >= 5  # reset on every checkin
+
+    def test_max_size_blocks_then_times_out(self):
+        pool = ConnectionPool(Factory(), min_size=0, max_size=1, timeout=0.05)
+
+        with pool.connection():
+            with pytest.raises(exceptions.ConnectionError):
+                with pool.connection():
+                    pass
+
+        stats = pool.stats()
+        assert stats["timeouts"] == 1
+        assert stats["max_wait_ms"] >= 0
+
+    def test_waiters_are_woken(self):
+        pool = ConnectionPool(Factory(), min_size=0, max_size=1, timeout=2)
+        held = pool.acquire()
+        got = []
+
+        def waiter():
+            with pool.connection() as conn:
+                got.append(conn)
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.05)
+        pool.release(held)
+        thread.join()
+
+        assert got == [held.connection]
+        assert pool.stats()["max_wait_ms"] >= 40
+
+    def test_failed_ping_replaces_connection(self):
+        factory = Factory()
+        pool = ConnectionPool(factory, min_size=1, max_size=2)
+        factory.connections[0].broken = True
+
+        with pool.connection() as conn:
+            assert conn.n == 1
+
+        assert factory.connections[0].closed
+        assert pool.stats()["failed_pings"] == 1
+
+    def test_disconnect_error_discards_connection(self):
+        factory = Factory()
+        pool = ConnectionPool(factory, min_size=0, max_size=2, disconnect_errors=(BrokenConnection,))
+
+        with pytest.raises(BrokenConnection):
+            with pool.connection() as conn:
+                conn.broken = True
+                conn.cursor().execute("SELECT 1")
+
+        stats = pool.stats()
+        assert stats["size"] == 0
+        assert stats["discarded"] == 1
+        assert factory.connections[0].closed
+
+    def test_recycle(self):
+        factory = Factory()
+        pool = ConnectionPool(factory, min_size=1, max_size=1, recycle=0.01)
+        time.sleep(0.02)
+
+        with pool.connection() as conn:
+            assert conn.n == 1
+
+        assert pool.stats()["recycled"] == 1
+
+    def test_utilization(self):
+        pool = ConnectionPool(Factory(), min_size=0, max_size=4)
+        entries = [pool.acquire() for _ in range(2)]
+
+        stats = pool.stats()
+        assert stats["in_use"] == 2
+        assert stats["utilization"] == pytest.approx(0.5)
+        assert stats["peak_in_use"] == 2
+
+        for entry in entries:
+            pool.release(entry)
+        assert pool.stats()["idle"] == 2
+
+    def test_close(self):
+        factory = Factory()
+        pool = ConnectionPool(factory, min_size=2, max_size=2)
+
+        pool.close()
+
+        assert all(conn.closed for conn in factory.connections)
+        with pytest.raises(exceptions.ConnectionError):
+            pool.acquire()
+
+    def test_invalid_sizes(self):
+        with pytest.raises(ValueError):
+            ConnectionPool(Factory(), max_size=0)
+        with pytest.raises(ValueError):
+            ConnectionPool(Factory(), min_size=3, max_size=2)
+
+    def test_disconnect_filter(self):
+        factory = Factory()
+        pool = ConnectionPool(
+            factory, min_size=0, max_size=2, disconnect_errors=(BrokenConnection,),
+            disconnect_filter=lambda e: "lost" in str(e),
+        )
+
+        with pytest.raises(BrokenConnection):
+            with pool.connection():
+                raise BrokenConnection("lock wait timeout")
+
+        assert pool.stats()["discarded"] == 0
+        assert pool.is_disconnect(BrokenConnection("connection lost"))
+        assert not pool.is_disconnect(ValueError("connection lost"))
+
+
+class DriverConnection:
+    """A driver connection whose next statements fail with the errors queued on the driver."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.closed = False
+
+    def cursor(self, *args):
+        conn = self
+
+        class Cursor:
+            description = [("x",)]
+
+            def execute(self, sql):
+                if conn.driver.failures:
+                    raise conn.driver.failures.pop(0)
+
+            def fetchall(self):
+                return [(1,)]
+
+            def close(self):
+                pass
+
+        return Cursor()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def fake_driver(monkeypatch, name, submodules):
+    """Installs a stand-in DB-API module with the exception hierarchy the connectors catch."""
+    driver = types.ModuleType(name)
+    driver.Error = type("Error", (Exception,), {})
+    driver.InterfaceError = type("InterfaceError", (driver.Error,), {})
+    driver.OperationalError = type("OperationalError", (driver.Error,), {})
+    driver.failures = []
+    driver.connections = []
+
+    def connect(**kwargs):
+        conn = DriverConnection(driver)
+        driver.connections.append(conn)
+        return conn
+
+    driver.connect = connect
+    monkeypatch.setitem(sys.modules, name, driver)
+    for submodule in submodules:
+        module = types.ModuleType(f"{name}.{submodule}")
+        setattr(driver, submodule, module)
+        monkeypatch.setitem(sys.modules, f"{name}.{submodule}", module)
+    return driver
+
+
+class TestConnectorDisconnects:
+    """Test that run_sql retries once on a fresh connection when the server drops one, and only then."""
+
+    @pytest.fixture
+    def postgres(self, monkeypatch):
+        psycopg2 = fake_driver(monkeypatch, "psycopg2", ["extras", "extensions"])
+        psycopg2.extensions.QueryCanceledError = type("QueryCanceledError", (psycopg2.OperationalError,), {})
+        vn = StubKiwi()
+        vn.connect_to_postgres(host="db", dbname="sales", user="kiwi", password="secret", port=5432, pool_pre_ping=False)
+        return vn, psycopg2
+
+    @pytest.fixture
+    def mysql(self, monkeypatch):
+        pymysql = fake_driver(monkeypatch, "pymysql", ["cursors", "err"])
+        pymysql.cursors.DictCursor = pymysql.cursors.SSDictCursor = object
+        pymysql.err.InterfaceError = pymysql.InterfaceError
+        pymysql.err.OperationalError = pymysql.OperationalError
+        vn = StubKiwi()
+        vn.connect_to_mysql(host="db", dbname="sales", user="kiwi", password="secret", port=3306, pool_pre_ping=False)
+        return vn, pymysql
+
+    def test_postgres_server_closed_connection(self, postgres):
+        vn, psycopg2 = postgres
+        psycopg2.failures.append(psycopg2.OperationalError("server closed the connection unexpectedly"))
+
+        assert vn.run_sql("SELECT 1").to_dict("list") == {"x": [1]}
+        assert psycopg2.connections[0].closed
+        assert vn.get_pool_stats()["discarded"] == 1
+
+    def test_postgres_cancelled_statement_is_not_retried(self, postgres):
+        vn, psycopg2 = postgres
+        psycopg2.failures.append(psycopg2.extensions.QueryCanceledError("canceling statement due to statement timeout"))
+
+        with pytest.raises(ValidationError):
+            vn.run_sql("SELECT 1")
+        assert vn.get_pool_stats()["discarded"] == 0
+
+    @pytest.mark.parametrize("code", [2006, 2013])
+    def test_mysql_lost_connection(self, mysql, code):
+        vn, pymysql = mysql
+        pymysql.failures.append(pymysql.OperationalError(code, "Lost connection to MySQL server during query"))
+
+        assert vn.run_sql("SELECT 1").to_dict("list") == {"x": [1]}
+        assert pymysql.connections[0].closed
+        assert vn.get_pool_stats()["discarded"] == 1
+
+    def test_mysql_other_operational_error_is_not_retried(self, mysql):
+        vn, pymysql = mysql
+        pymysql.failures.append(pymysql.OperationalError(1205, "Lock wait timeout exceeded"))
+
+        with pytest.raises(ValidationError):
+            vn.run_sql("SELECT 1")
+        assert pymysql.failures == []
+        assert vn.get_pool_stats()["discarded"] == 0
+
+    def test_retried_only_once(self, mysql):
+        vn, pymysql = mysql
+        pymysql.failures += [pymysql.InterfaceError(0, ""), pymysql.OperationalError(2013, "Lost connection")]
+
+        with pytest.raises(ValidationError):
+            vn.run_sql("SELECT 1")
+        assert vn.get_pool_stats()["discarded"] == 2
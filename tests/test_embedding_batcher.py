@@ -0,0 +1,131 @@
+"""
+Tests for the micro-batching embedding wrapper.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from kiwi.embedding.batcher import MicroBatchingEmbeddings
+
+
+class RecordingEmbedder:
+    """Deterministic stand-in for an embedding model that records each batch it sees."""
+
+    model_name = "recording"
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model failed")
+        return [[float(len(text)), float(sum(map(ord, text)) % 97)] for text in texts]
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
+
+class TestMicroBatchingEmbeddings:
+    """Test request coalescing, ordering and error propagation."""
+
+    def test_concurrent_queries_share_a_batch(self):
+        model = RecordingEmbedder()
+        embedder = MicroBatchingEmbeddings(model, max_batch_size=16, max_wait_ms=50)
+        questions = [f"question {i}" for i in range(8)]
+
+        async def run():
+            return await asyncio.gather(*(embedder.aembed_query(q) for q in questions))
+
+        vectors = asyncio.run(run())
+        embedder.close()
+
+        assert vectors == model.embed_documents(questions)
+        assert len(model.batches) == 2  # one coalesced batch, plus the reference call above
+        assert embedder.stats()["requests"] == 8
+
+    def test_threads_share_a_batch(self):
+        model = RecordingEmbedder()
+        embedder = MicroBatchingEmbeddings(model, max_batch_size=4, max_wait_ms=200)
+        results = {}
+
+        def worker(n):
+            results[n] = embedder.embed_query(f"q{n}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        embedder.close()
+
+        assert len(model.batches) == 1
+        assert sorted(model.batches[0]) == ["q0", "q1", "q2", "q3"]
+        assert results[2] == model.embed_documents(["q2"])[0]
+
+    def test_max_batch_size_splits_batches(self):
+        model = RecordingEmbedder()
+        embedder = MicroBatchingEmbeddings(model, max_batch_size=3, max_wait_ms=50)
+
+        async def run():
+            return await asyncio.gather(*(embedder.aembed_query(f"q{i}") for i in range(7)))
+
+        asyncio.run(run())
+        embedder.close()
+
+        assert all(len(batch) <= 3 for batch in model.batches)
+        assert sum(len(batch) for batch in model.batches) == 7
+
+    def test_large_requests_bypass_the_queue(self):
+        model = RecordingEmbedder()
+        embedder = MicroBatchingEmbeddings(model, max_batch_size=2)
+
+        embedder.embed_documents(["a", "b", "c"])
+
+        assert model.batches == [["a", "b", "c"]]
+        assert embedder.stats()["batches"] == 0
+
+    def test_duplicate_texts_are_embedded_once(self):
+        model = RecordingEmbedder()
+        embedder = MicroBatchingEmbeddings(model, max_batch_size=8, max_wait_ms=50)
+
+        vectors = embedder(["same", "same", "other"])
+        embedder.close()
+
+        assert vectors[0] == vectors[1]
+        assert model.batches == [["same", "other"]]
+
+    def test_errors_reach_every_caller(self):
+        embedder = MicroBatchingEmbeddings(RecordingEmbedder(fail=True), max_wait_ms=1)
+
+        with pytest.raises(RuntimeError, match="model failed"):
+            embedder.embed_query("q")
+        embedder.close()
+
+    def test_model_name_is_forwarded(self):
+        assert MicroBatchingEmbeddings(RecordingEmbedder()).model_name == "recording"
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            MicroBatchingEmbeddings(RecordingEmbedder(), max_batch_size=0)
+        with pytest.raises(ValueError):
+            MicroBatchingEmbeddings(RecordingEmbedder(), max_wait_ms=-1)
+
+    def test_default_encoder_is_shared(self, monkeypatch):
+        retrieval = pytest.importorskip("kiwi.react_agent.retrieval")
+        import kiwi.embedding
+
+        monkeypatch.setattr(kiwi.embedding, "ONNXMiniLM_L6_V2", RecordingEmbedder)
+        retrieval._default_text_encoder.cache_clear()
+        try:
+            batched = retrieval.make_text_encoder("default/batched")
+
+            assert retrieval.make_text_encoder("default/batched") is batched
+            assert retrieval.make_text_encoder("default/all-MiniLM-L6-v2") is batched.embedder
+        finally:
+            retrieval._default_text_encoder.cache_clear()
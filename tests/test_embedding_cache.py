@@ -0,0 +1,117 @@
+"""
+Tests for the query embedding cache used by ChromaDB_VectorStore.
+"""
+
+import threading
+
+import pytest
+
+from kiwi.embedding.cache import EmbeddingCache
+
+
+class CountingEmbedder:
+    """Deterministic stand-in for an embedding function that records each batch it sees."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), float(sum(map(ord, text)) % 97)] for text in texts]
+
+
+class TestEmbeddingCache:
+    """Test lookup, eviction and persistence behaviour."""
+
+    def test_hit_and_miss_counters(self):
+        cache = EmbeddingCache(max_entries=8)
+        embed = CountingEmbedder()
+
+        first = cache.get_or_compute("m", ["total sales"], embed)
+        second = cache.get_or_compute("m", ["total sales"], embed)
+
+        assert first == second
+        assert len(embed.batches) == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(0.5)
+
+    def test_whitespace_is_normalized(self):
+        cache = EmbeddingCache()
+        embed = CountingEmbedder()
+
+        cache.get_or_compute("m", ["top  customers\n"], embed)
+        cache.get_or_compute("m", [" top customers"], embed)
+
+        assert len(embed.batches) == 1
+
+    def test_key_includes_model_name(self):
+        cache = EmbeddingCache()
+        embed = CountingEmbedder()
+
+        cache.get_or_compute("model-a", ["q"], embed)
+        cache.get_or_compute("model-b", ["q"], embed)
+
+        assert len(embed.batches) == 2
+
+    def test_misses_are_embedded_in_one_batch(self):
+        cache = EmbeddingCache()
+        embed = CountingEmbedder()
+        cache.get_or_compute("m", ["b"], embed)
+
+        vectors = cache.get_or_compute("m", ["a", "b", "c"], embed)
+
+        assert embed.batches[-1] == ["a", "c"]
+        assert vectors == embed(["a", "b", "c"])
+
+    def test_lru_eviction(self):
+        cache = EmbeddingCache(max_entries=2)
+        embed = CountingEmbedder()
+
+        cache.get_or_compute("m", ["a"], embed)
+        cache.get_or_compute("m", ["b"], embed)
+        cache.get("m", "a")  # "a" becomes most recently used
+        cache.get_or_compute("m", ["c"], embed)
+
+        assert cache.get("m", "b") is None
+        assert cache.get("m", "a") is not None
+        assert cache.stats()["evictions"] == 1
+        assert len(cache) == 2
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "embeddings.sqlite")
+        embed = CountingEmbedder()
+
+        EmbeddingCache(path=path).get_or_compute("m", ["popular question"], embed)
+        restarted = EmbeddingCache(path=path)
+        [vector] = restarted.get_or_compute("m", ["popular question"], embed)
+
+        assert len(embed.batches) == 1
+        assert vector == pytest.approx(embed(["popular question"])[0])
+        assert restarted.stats()["disk_hits"] == 1
+
+    def test_concurrent_access(self):
+        cache = EmbeddingCache(max_entries=16)
+        embed = CountingEmbedder()
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(200):
+                    cache.get_or_compute("m", [f"q{(i + n) % 32}"], embed)
+            except Exception as e:  # pragma: no cover - surfaced by the assertion below
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert len(cache) <= 16
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            EmbeddingCache(max_entries=0)
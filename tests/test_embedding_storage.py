@@ -0,0 +1,141 @@
+"""
+Tests for compact in-process vector storage.
+"""
+
+import zlib
+
+import numpy as np
+import pytest
+
+from kiwi.embedding.storage import CompactVectors, CompactVectorStore
+
+
+class HashEmbedder:
+    """Deterministic bag-of-words embedder, so texts sharing words are similar."""
+
+    dim = 64
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        # crc32 rather than hash(), which is salted per process and made word collisions flaky
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode()) % self.dim] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        return [self._vector(t).tolist() for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text).tolist()
+
+
+@pytest.fixture
+def random_vectors():
+    return np.random.default_rng(0).normal(size=(500, 384)).astype(np.float32)
+
+
+class TestCompactVectors:
+    """Test encoding precision, memory footprint and search."""
+
+    @pytest.mark.parametrize("dtype, row_bytes", [("float32", 1536), ("float16", 768), ("int8", 388)])
+    def test_memory_footprint(self, random_vectors, dtype, row_bytes):
+        vectors = CompactVectors(dtype=dtype)
+        vectors.add(random_vectors)
+
+        assert len(vectors) == 500
+        assert vectors.nbytes == 500 * row_bytes
+
+    @pytest.mark.parametrize("dtype, tolerance", [("float32", 1e-6), ("float16", 1e-3), ("int8", 2e-2)])
+    def test_scores_match_full_precision(self, random_vectors, dtype, tolerance):
+        vectors = CompactVectors(dtype=dtype)
+        vectors.add(random_vectors)
+        normalized = random_vectors / np.linalg.norm(random_vectors, axis=1, keepdims=True)
+
+        query = random_vectors[7]
+        expected = normalized @ (query / np.linalg.norm(query))
+
+        assert np.max(np.abs(vectors.scores(query) - expected)) < tolerance
+
+    @pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+    def test_search_finds_self(self, random_vectors, dtype):
+        vectors = CompactVectors(dtype=dtype)
+        vectors.add(random_vectors[:100])
+        vectors.add(random_vectors[100:])
+
+        indices, scores = vectors.search(random_vectors[321], k=3)
+
+        assert indices[0] == 321
+        assert scores[0] == pytest.approx(1.0, abs=2e-2)
+        assert list(scores) == sorted(scores, reverse=True)
+
+    def test_get_reconstructs_vector(self, random_vectors):
+        vectors = CompactVectors(dtype="int8")
+        vectors.add(random_vectors[:1])
+        normalized = random_vectors[0] / np.linalg.norm(random_vectors[0])
+
+        assert np.allclose(vectors.get(0), normalized, atol=1e-2)
+
+    def test_dimension_mismatch(self):
+        vectors = CompactVectors()
+        vectors.add(np.ones((1, 4)))
+
+        with pytest.raises(ValueError):
+            vectors.add(np.ones((1, 5)))
+
+    def test_invalid_dtype(self):
+        with pytest.raises(ValueError):
+            CompactVectors(dtype="float64")
+
+
+class TestCompactVectorStore:
+    """Test the LangChain vector store wrapper."""
+
+    def test_similarity_search(self):
+        store = CompactVectorStore(HashEmbedder(), dtype="int8")
+        store.add_texts(
+            ["total sales by region", "number of orders per customer", "list all suppliers"],
+            metadatas=[{"n": 1}, {"n": 2}, {"n": 3}],
+        )
+
+        [(doc, score)] = store.similarity_search_with_score("orders per customer", k=1)
+
+        assert doc.page_content == "number of orders per customer"
+        assert doc.metadata == {"n": 2}
+        assert 0 < score <= 1.0 + 1e-6
+
+    def test_delete_and_replace(self):
+        store = CompactVectorStore(HashEmbedder(), dtype="float16")
+        store.add_texts(["alpha beta", "gamma delta"], ids=["a", "b"])
+
+        store.delete(["a"])
+        store.add_texts(["gamma delta epsilon"], ids=["b"])
+
+        results = store.similarity_search("alpha beta", k=5)
+        assert [doc.id for doc in results] == ["b"]
+        assert results[0].page_content == "gamma delta epsilon"
+
+    def test_retriever(self):
+        store = CompactVectorStore.from_texts(["alpha", "beta"], HashEmbedder(), dtype="int8")
+
+        docs = store.as_retriever(search_kwargs={"k": 1}).invoke("beta")
+
+        assert [doc.page_content for doc in docs] == ["beta"]
+
+    def test_filter(self):
+        store = CompactVectorStore(HashEmbedder(), dtype="int8")
+        store.add_texts(
+            ["total sales by region", "total sales by nation", "list all suppliers"],
+            metadatas=[{"type": "sql"}, {"type": "ddl"}, {"type": "sql"}],
+        )
+
+        results = store.similarity_search("total sales by nation", k=2, filter=lambda doc: doc.metadata["type"] == "sql")
+
+        assert [doc.page_content for doc in results] == ["total sales by region", "list all suppliers"]
+        assert store.similarity_search("sales", k=3, filter=lambda doc: False) == []
+
+    def test_filter_through_retriever(self):
+        store = CompactVectorStore.from_texts(["alpha", "beta"], HashEmbedder(), metadatas=[{"n": 1}, {"n": 2}])
+
+        retriever = store.as_retriever(search_kwargs={"k": 2, "filter": lambda doc: doc.metadata["n"] == 1})
+
+        assert [doc.page_content for doc in retriever.invoke("beta")] == ["alpha"]
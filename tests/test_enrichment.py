@@ -0,0 +1,146 @@
+"""
+Tests for the concurrent chart/summary/followup enrichment stage.
+"""
+
+import asyncio
+import threading
+
+import pandas as pd
+
+from tests.conftest import StubKiwi
+
+DF = pd.DataFrame({"name": ["a", "b", "c"], "sales": [3, 2, 1]})
+
+# stage -> (marker in the prompt, response)
+RESPONSES = {
+    "chart": ("plotly", "```python\nfig = px.bar(df, x='name', y='sales')\n```"),
+    "summary": ("summarize", "a sells the most."),
+    "followup_questions": ("followup", "1. Who sells the least?\n2. What is the total?"),
+}
+# The order the tests let the stages finish in, each one only after the previous one was yielded
+ORDER = ["summary", "followup_questions", "chart"]
+TIMEOUT = 5
+
+
+class EnrichKiwi(StubKiwi):
+    """
+    The LLM calls of the stages wait until all of them have started, so they fail if they run one after
+    another, and then until the test lets them finish.
+    """
+
+    def __init__(self, stages=3, fail=None):
+        super().__init__()
+        self.fail = fail
+        self.barrier = threading.Barrier(stages, timeout=TIMEOUT)
+        self.gates = {stage: threading.Event() for stage in RESPONSES}
+        self.started = 0
+        self.all_started = asyncio.Event()
+        self.agates = {stage: asyncio.Event() for stage in RESPONSES}
+        self.stages = stages
+
+    def release(self, stage):
+        self.gates[stage].set()
+        self.agates[stage].set()
+
+    def release_after(self, event):
+        # Lets the stage after the one this event came from finish
+        stage = event.get("stage") or {"plotly_figure": "chart"}.get(event["type"], event["type"])
+        if stage in ORDER[:-1]:
+            self.release(ORDER[ORDER.index(stage) + 1])
+
+    def _respond(self, prompt):
+        for stage, (marker, response) in RESPONSES.items():
+            if marker in prompt[-1]:
+                return stage, response
+        raise AssertionError(prompt)
+
+    def _result(self, stage, response):
+        if stage == self.fail:
+            raise RuntimeError("model overloaded")
+        return response
+
+    def submit_prompt(self, prompt, **kwargs):
+        stage, response = self._respond(prompt)
+        self.barrier.wait()
+        assert self.gates[stage].wait(TIMEOUT), f"{stage} was never released"
+        return self._result(stage, response)
+
+    async def asubmit_prompt(self, prompt, **kwargs):
+        stage, response = self._respond(prompt)
+        self.started += 1
+        if self.started == self.stages:
+            self.all_started.set()
+        await asyncio.wait_for(self.all_started.wait(), TIMEOUT)
+        await asyncio.wait_for(self.agates[stage].wait(), TIMEOUT)
+        return self._result(stage, response)
+
+
+def collect(vn, events):
+    vn.release(ORDER[0])
+    collected = []
+    for event in events:
+        collected.append(event)
+        vn.release_after(event)
+    return collected
+
+
+class TestEnrich:
+    """Test that the stages run concurrently and are yielded as they complete."""
+
+    def test_stages_run_concurrently(self):
+        vn = EnrichKiwi()
+
+        events = collect(vn, vn.enrich("Top sellers?", "SELECT * FROM sales", DF))
+
+        assert [event["type"] for event in events] == ["summary", "followup_questions", "plotly_figure"]
+        assert events[0]["text"] == "a sells the most."
+        assert events[1]["questions"][:2] == ["Who sells the least?", "What is the total?"]
+        assert events[2]["fig"].data[0].type == "bar"
+
+    def test_failed_stage_does_not_stop_the_others(self):
+        vn = EnrichKiwi(stages=2, fail="summary")
+
+        events = collect(vn, vn.enrich("Top sellers?", "SELECT * FROM sales", DF, chart=False))
+
+        assert events[0] == {"type": "error", "stage": "summary", "error": "model overloaded"}
+        assert events[1]["type"] == "followup_questions"
+
+    def test_cached_plotly_code_skips_the_llm(self):
+        vn = EnrichKiwi(fail="chart")
+
+        events = list(
+            vn.enrich("Top sellers?", "SELECT * FROM sales", DF, summary=False, followup_questions=False,
+                      plotly_code="fig = px.line(df, x='name', y='sales')")
+        )
+
+        assert events[0]["fig"].data[0].type == "scatter"
+
+    def test_async(self):
+        vn = EnrichKiwi()
+
+        async def acollect():
+            vn.release(ORDER[0])
+            events = []
+            async for event in vn.aenrich("Top sellers?", "SELECT * FROM sales", DF):
+                events.append(event)
+                vn.release_after(event)
+            return events
+
+        events = asyncio.run(acollect())
+
+        assert [event["type"] for event in events] == ["summary", "followup_questions", "plotly_figure"]
+        assert events[2]["fig"].data[0].type == "bar"
+
+    def test_ask_enriches_concurrently(self, capsys):
+        # Chart and summary only return once both LLM calls are in flight
+        vn = EnrichKiwi(stages=2)
+        for stage in RESPONSES:
+            vn.release(stage)
+        vn.generate_sql = lambda question, **kwargs: "SELECT * FROM sales"
+        vn.run_sql_cached = lambda sql: DF
+        vn.run_sql_is_set = True
+
+        sql, df, fig = vn.ask("Top sellers?", print_results=False, auto_train=False, summarize=True)
+
+        assert fig is not None
+        assert "a sells the most." in capsys.readouterr().out
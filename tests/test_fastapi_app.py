@@ -0,0 +1,204 @@
+"""
+Tests for the async FastAPI port of the /api/v0 endpoints.
+"""
+
+import asyncio
+import io
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+fastapi = pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient  # noqa: E402
+
+from kiwi.fastapi.text2sql import VannaFastAPI  # noqa: E402
+from tests.conftest import StubKiwi  # noqa: E402
+
+
+class SqlKiwi(StubKiwi):
+    """Answers every question with the same SQL and records the thread each call runs on."""
+
+    def __init__(self, config=None):
+        super().__init__(config=config)
+        self.threads = {}
+
+    async def asubmit_prompt(self, prompt, **kwargs):
+        await asyncio.sleep(0.05)
+        if "summarize" in prompt[-1]:
+            return "The table has 1000 rows."
+        return "SELECT x FROM t ORDER BY x"
+
+    async def asubmit_prompt_stream(self, prompt, **kwargs):
+        for token in ["```sql\n", "SELECT x FROM t ORDER BY x", ";\n```", "\nAll of x."]:
+            await asyncio.sleep(0)
+            yield token
+
+    def get_training_data(self, **kwargs):
+        self.threads["training_data"] = threading.current_thread().name
+        return pd.DataFrame({"id": ["1-sql"], "question": ["How many rows?"], "content": ["SELECT count(*) FROM t"]})
+
+
+async def _agen(items):
+    for item in items:
+        yield item
+
+
+@pytest.fixture
+def vn():
+    vn = SqlKiwi()
+    vn.connect_to_duckdb(":memory:", init_sql="CREATE TABLE t AS SELECT range AS x FROM range(1000)")
+    return vn
+
+
+@pytest.fixture
+def api(vn):
+    api = VannaFastAPI(vn, allow_llm_to_see_data=True, db_workers=2)
+    yield api
+    api.close()
+
+
+@pytest.fixture
+def client(api):
+    app = fastapi.FastAPI(lifespan=api.lifespan)
+    app.include_router(api.router)
+    with TestClient(app) as client:
+        yield client
+
+
+class TestVannaFastAPI:
+    """Test the endpoint contract and where the blocking work runs."""
+
+    def test_generate_then_run_sql(self, client, vn):
+        generated = client.get("/api/v0/generate_sql", params={"question": "All x?"}).json()
+
+        assert generated["type"] == "sql"
+        assert generated["text"] == "SELECT x FROM t ORDER BY x"
+
+        result = client.get("/api/v0/run_sql", params={"id": generated["id"]}).json()
+
+        assert result["type"] == "df"
+        assert result["truncated"] is False
+        assert pd.read_json(io.StringIO(result["df"]))["x"].tolist() == list(range(10))
+
+        summary = client.get("/api/v0/generate_summary", params={"id": generated["id"]}).json()
+
+        assert summary == {"type": "text", "id": generated["id"], "text": "The table has 1000 rows."}
+
+    def test_sql_stream_caches_early_sql(self, client, api):
+        with client.stream("GET", "/api/v0/generate_sql_stream", params={"question": "All x?"}) as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+
+        types = [event["type"] for event in events]
+        assert types.index("early_sql") < types.index("token", types.index("early_sql"))
+        assert events[-1]["type"] == "sql"
+        assert events[-1]["text"] == "SELECT x FROM t ORDER BY x;"
+
+        id = events[0]["id"]
+        assert client.get("/api/v0/run_sql", params={"id": id}).json()["type"] == "df"
+
+    def test_summary_stream(self, client, vn):
+        vn.asubmit_prompt_stream = lambda prompt, **kwargs: _agen(["1000 ", "rows"])
+        id = client.get("/api/v0/generate_sql", params={"question": "All x?"}).json()["id"]
+        client.get("/api/v0/run_sql", params={"id": id})
+
+        body = client.get("/api/v0/generate_summary_stream", params={"id": id}).text
+        events = [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+        assert [event["type"] for event in events] == ["token", "token", "text"]
+        assert events[-1]["text"] == "1000 rows"
+
+    def test_enrich_streams_and_caches_each_stage(self, client):
+        id = client.get("/api/v0/generate_sql", params={"question": "All x?"}).json()["id"]
+        client.get("/api/v0/run_sql", params={"id": id})
+
+        body = client.get("/api/v0/enrich", params={"id": id}).text
+        events = [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+        assert sorted(event.get("stage") for event in events[:-1]) == ["chart", "followup_questions", "summary"]
+        assert events[-1] == {"type": "end", "id": id}
+
+        loaded = client.get("/api/v0/load_question", params={"id": id}).json()
+        assert loaded["summary"] == "The table has 1000 rows."
+        assert loaded["fig"] is not None
+
+    def test_missing_cache_fields_follow_the_flask_contract(self, client):
+        assert client.get("/api/v0/run_sql").json() == {"type": "error", "error": "No id provided"}
+        assert client.get("/api/v0/run_sql", params={"id": "nope"}).json() == {"type": "error", "error": "No sql found"}
+        assert client.get("/api/v0/generate_sql").json() == {"type": "error", "error": "No question provided"}
+
+    def test_update_and_fix_sql_read_the_body(self, client):
+        id = client.get("/api/v0/generate_sql", params={"question": "All x?"}).json()["id"]
+
+        updated = client.post("/api/v0/update_sql", json={"id": id, "sql": "SELECT count(*) AS n FROM t"}).json()
+        result = client.get("/api/v0/run_sql", params={"id": id}).json()
+
+        assert updated["text"] == "SELECT count(*) AS n FROM t"
+        assert pd.read_json(io.StringIO(result["df"]))["n"].tolist() == [1000]
+
+        fixed = client.post("/api/v0/fix_sql", json={"id": id, "error": "boom"}).json()
+        assert fixed == {"type": "sql", "id": id, "text": "SELECT x FROM t ORDER BY x"}
+
+    def test_sql_error(self, client):
+        id = client.get("/api/v0/generate_sql", params={"question": "All x?"}).json()["id"]
+        client.post("/api/v0/update_sql", json={"id": id, "sql": "SELECT nope FROM t"})
+
+        assert client.get("/api/v0/run_sql", params={"id": id}).json()["type"] == "sql_error"
+
+    def test_download_is_streamed_and_gzipped(self, client):
+        id = client.get("/api/v0/generate_sql", params={"question": "All x?"}).json()["id"]
+        client.get("/api/v0/run_sql", params={"id": id})
+
+        response = client.get(
+            "/api/v0/download_csv", params={"id": id}, headers={"Accept-Encoding": "identity"}
+        )
+        assert response.headers["content-type"].startswith("text/csv")
+        assert len(pd.read_csv(io.StringIO(response.text), index_col=0)) == 1000
+
+        response = client.get("/api/v0/download_csv", params={"id": id}, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(pd.read_csv(io.StringIO(response.text), index_col=0)) == 1000  # decoded by the client
+
+        response = client.get("/api/v0/download_csv", params={"id": id, "format": "nope"})
+        assert response.json() == {"type": "error", "error": "Unknown format: nope"}
+
+    def test_history_and_training_data(self, client, vn):
+        client.get("/api/v0/generate_sql", params={"question": "All x?"})
+
+        history = client.get("/api/v0/get_question_history").json()
+        training = client.get("/api/v0/get_training_data").json()
+
+        assert [entry["question"] for entry in history["questions"]] == ["All x?"]
+        assert training["type"] == "df"
+        assert vn.threads["training_data"].startswith("kiwi-embedding")
+
+    def test_cache_stats(self, client):
+        stats = client.get("/api/v0/get_cache_stats").json()
+
+        assert stats["type"] == "cache_stats"
+        assert stats["stats"]["app_cache"]["backend"] == "memory"
+
+    def test_requests_are_served_concurrently(self, api):
+        # asubmit_prompt sleeps 50 ms; 20 sequential requests would take a second
+        import httpx
+
+        app = fastapi.FastAPI()
+        app.include_router(api.router)
+
+        async def main():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                loop = asyncio.get_running_loop()
+                start = loop.time()
+                responses = await asyncio.gather(
+                    *(client.get("/api/v0/generate_sql", params={"question": f"q{i}"}) for i in range(20))
+                )
+                return responses, loop.time() - start
+
+        responses, elapsed = asyncio.run(main())
+
+        assert all(response.json()["type"] == "sql" for response in responses)
+        assert elapsed < 0.5
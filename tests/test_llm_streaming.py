@@ -0,0 +1,202 @@
+"""
+Tests for token streaming from the chat classes and the streamed SQL/summary generation built on it.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from kiwi.core.langchain_chat import LangChain_Chat
+from kiwi.core.sql_stream import SqlStream, complete_sql
+from tests.conftest import StubKiwi
+
+RESPONSE = ["Here", " is", " the", " query:\n```sql\n", "SELECT x\n", "FROM t", ";\n", "```", "\nIt lists", " every x."]
+
+
+class StreamingKiwi(StubKiwi):
+    def __init__(self, tokens, config=None):
+        super().__init__(config=config)
+        self.tokens = tokens
+        self.consumed = 0
+
+    def submit_prompt_stream(self, prompt, **kwargs):
+        for token in self.tokens:
+            self.consumed += 1
+            yield token
+
+
+class TestCompleteSql:
+    """Test detection of a complete statement in a partial response."""
+
+    def test_incomplete(self):
+        assert complete_sql("```sql\nSELECT x FROM") is None
+        assert complete_sql("First select the columns; then") is None
+
+    def test_terminated_statement(self):
+        assert complete_sql("```sql\nSELECT x\nFROM t;\n") == "SELECT x\nFROM t;"
+        assert complete_sql("WITH a AS (SELECT 1)\nSELECT * FROM a; -- done") == "WITH a AS (SELECT 1)\nSELECT * FROM a;"
+
+    def test_closed_fence_without_semicolon(self):
+        assert complete_sql("Sure:\n```sql\nSELECT x FROM t\n```") == "SELECT x FROM t"
+
+    def test_no_early_sql_for_intermediate_queries(self):
+        stream = SqlStream()
+        events = stream.feed("intermediate_sql\n```sql\nSELECT DISTINCT x FROM t;\n```")
+
+        assert [event["type"] for event in events] == ["token"]
+
+
+class TestGenerateSqlStream:
+    """Test the events of generate_sql_stream and its async counterpart."""
+
+    def test_early_sql_comes_before_the_explanation(self):
+        vn = StreamingKiwi(RESPONSE)
+        events = vn.generate_sql_stream("All x?")
+
+        for event in events:
+            if event["type"] == "early_sql":
+                break
+        assert event["text"] == "SELECT x\nFROM t;"
+        consumed = vn.consumed
+        assert consumed == RESPONSE.index(";\n") + 1  # the rest is still to be generated
+
+        rest = list(events)
+        assert "".join(e["text"] for e in rest if e["type"] == "token") == "".join(RESPONSE[consumed:])
+        assert rest[-1] == {"type": "sql", "text": "SELECT x\nFROM t;"}
+
+    def test_default_stream_yields_the_whole_response(self):
+        vn = StubKiwi()
+        vn.submit_prompt = lambda prompt, **kwargs: "SELECT 1;"
+
+        assert [event["type"] for event in vn.generate_sql_stream("One?")] == ["token", "early_sql", "sql"]
+
+    def test_async(self):
+        vn = StreamingKiwi(RESPONSE)
+
+        async def collect():
+            return [event async for event in vn.agenerate_sql_stream("All x?")]
+
+        events = asyncio.run(collect())
+
+        assert [event["type"] for event in events].count("early_sql") == 1
+        assert events[-1] == {"type": "sql", "text": "SELECT x\nFROM t;"}
+
+    def test_summary_stream(self):
+        vn = StreamingKiwi(["There ", "are ", "3 rows."])
+
+        assert "".join(vn.generate_summary_stream("How many?", pd.DataFrame({"x": [1, 2, 3]}))) == "There are 3 rows."
+
+
+class IntermediateKiwi(StubKiwi):
+    """Answers with `first` until the prompt holds an intermediate query's result, then with `final`."""
+
+    def __init__(self, first, final="SELECT max(x) FROM t;"):
+        super().__init__()
+        self.connect_to_duckdb(":memory:", init_sql="CREATE TABLE t AS SELECT range AS x FROM range(3)")
+        self.first, self.final = first, final
+
+    def log(self, message, title="Info"):
+        pass
+
+    def submit_prompt(self, prompt, **kwargs):
+        return self.final if "results of the intermediate SQL query" in str(prompt) else self.first
+
+
+def generate(vn, variant, question, **kwargs):
+    if variant == "generate_sql":
+        return vn.generate_sql(question, **kwargs)
+    if variant == "agenerate_sql":
+        return asyncio.run(vn.agenerate_sql(question, **kwargs))
+    if variant == "generate_sql_stream":
+        return list(vn.generate_sql_stream(question, **kwargs))[-1]["text"]
+
+    async def collect():
+        return [event async for event in vn.agenerate_sql_stream(question, **kwargs)]
+
+    return asyncio.run(collect())[-1]["text"]
+
+
+class TestGenerateSqlVariants:
+    """Test that the four ways of generating SQL give the same answers."""
+
+    INTERMEDIATE = "intermediate_sql\n```sql\nSELECT DISTINCT x FROM t;\n```"
+
+    @pytest.fixture(params=["generate_sql", "agenerate_sql", "generate_sql_stream", "agenerate_sql_stream"])
+    def variant(self, request):
+        return request.param
+
+    def test_sql(self, variant):
+        assert generate(IntermediateKiwi("```sql\nSELECT x FROM t;\n```"), variant, "x?") == "SELECT x FROM t;"
+
+    def test_intermediate_sql(self, variant):
+        vn = IntermediateKiwi(self.INTERMEDIATE)
+
+        assert generate(vn, variant, "max x?", allow_llm_to_see_data=True) == "SELECT max(x) FROM t;"
+
+    def test_intermediate_sql_not_allowed(self, variant):
+        answer = generate(IntermediateKiwi(self.INTERMEDIATE), variant, "max x?")
+
+        assert answer.startswith("The LLM is not allowed to see the data in your database.")
+
+    def test_intermediate_sql_fails(self, variant):
+        vn = IntermediateKiwi("intermediate_sql\n```sql\nSELECT y FROM missing;\n```")
+
+        assert generate(vn, variant, "y?", allow_llm_to_see_data=True).startswith("Error running intermediate SQL: ")
+
+
+class TestChatStreaming:
+    """Test submit_prompt_stream in the LangChain and OpenAI chat classes."""
+
+    def test_langchain(self):
+        from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+        from langchain_core.messages import AIMessage
+
+        class LangChainKiwi(LangChain_Chat, StubKiwi):
+            pass
+
+        llm = GenericFakeChatModel(messages=iter([AIMessage("SELECT x FROM t; -- all x"), AIMessage("SELECT 1;")]))
+        vn = LangChainKiwi(llm)
+        tokens = list(vn.submit_prompt_stream([vn.user_message("All x?")]))
+
+        assert len(tokens) > 1
+        assert "".join(tokens) == "SELECT x FROM t; -- all x"
+
+        async def collect():
+            return [token async for token in vn.asubmit_prompt_stream([vn.user_message("One?")])]
+
+        assert "".join(asyncio.run(collect())) == "SELECT 1;"
+
+    def test_openai(self):
+        pytest.importorskip("openai")
+        from kiwi.core.openai_chat import OpenAI_Chat
+
+        class Stream:
+            closed = False
+
+            def __iter__(self):
+                for text in ["SELECT ", None, "1;"]:
+                    yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+            def close(self):
+                self.closed = True
+
+        stream = Stream()
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs)
+            return stream
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        class OpenAIKiwi(OpenAI_Chat, StubKiwi):
+            pass
+
+        vn = OpenAIKiwi(client=client, config={"model": "qwen-32b"})
+
+        assert list(vn.submit_prompt_stream([vn.user_message("One?")])) == ["SELECT ", "1;"]
+        assert calls[0]["model"] == "qwen-32b"
+        assert calls[0]["stream"] is True
+        assert stream.closed
@@ -0,0 +1,103 @@
+"""
+Tests for the bounded in-process app cache.
+"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from kiwi.cache import MemoryCache, sizeof
+
+
+class TestSizeof:
+    """Test size accounting."""
+
+    def test_dataframe_counts_deep_memory(self):
+        df = pd.DataFrame({"s": ["x" * 1000] * 10})
+
+        assert sizeof(df) > 10_000
+
+    def test_containers(self):
+        assert sizeof(["a" * 500, "b" * 500]) > 1000
+        assert sizeof(None) == 0
+
+
+class TestMemoryCache:
+    """Test bounds, eviction order, TTL and statistics."""
+
+    def test_get_set(self):
+        cache = MemoryCache()
+        cache.set(id="q", field="sql", value="SELECT 1")
+
+        assert cache.get(id="q", field="sql") == "SELECT 1"
+        assert cache.get(id="q", field="df") is None
+        assert cache.get(id="missing", field="sql") is None
+        assert cache.get_all(["sql"]) == [{"id": "q", "sql": "SELECT 1"}]
+
+    def test_max_entries_evicts_least_recently_used(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set(id="a", field="sql", value="1")
+        cache.set(id="b", field="sql", value="2")
+        cache.get(id="a", field="sql")
+        cache.set(id="c", field="sql", value="3")
+
+        assert cache.get(id="b", field="sql") is None
+        assert cache.get(id="a", field="sql") == "1"
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_budget(self):
+        df = pd.DataFrame({"a": range(1000)})
+        cache = MemoryCache(max_bytes=int(sizeof(df) * 2.5))
+        for id in ["a", "b", "c"]:
+            cache.set(id=id, field="df", value=df)
+
+        assert len(cache) == 2
+        assert cache.nbytes <= cache.max_bytes
+
+    def test_overwrite_updates_size(self):
+        cache = MemoryCache()
+        cache.set(id="a", field="summary", value="x" * 10_000)
+        cache.set(id="a", field="summary", value="short")
+
+        assert cache.nbytes < 1000
+        cache.delete(id="a")
+        assert cache.nbytes == 0
+
+    def test_ttl(self):
+        cache = MemoryCache(ttl=0.01)
+        cache.set(id="a", field="sql", value="1")
+        time.sleep(0.02)
+
+        assert cache.get_all(["sql"]) == []
+        assert cache.get(id="a", field="sql") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_thread_safety(self):
+        cache = MemoryCache(max_entries=50)
+
+        def worker(n):
+            for i in range(200):
+                cache.set(id=f"{n}-{i}", field="sql", value=str(i))
+                cache.get(id=f"{n}-{i // 2}", field="sql")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.stats()
+        assert stats["entries"] == 50
+        assert stats["evictions"] == 8 * 200 - 50
+        assert stats["bytes"] == sum(entry.nbytes for entry in cache.cache.values())
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            MemoryCache(max_entries=0)
+
+    def test_shared_by_both_apps(self):
+        from kiwi.flask_app import MemoryCache as FlaskMemoryCache
+
+        assert FlaskMemoryCache is MemoryCache
@@ -0,0 +1,264 @@
+"""
+Tests for the ONNX MiniLM embedding model, run against a stand-in inference session.
+"""
+
+import asyncio
+import random
+import threading
+
+import numpy as np
+import pytest
+
+onnxruntime = pytest.importorskip("onnxruntime")
+tokenizers = pytest.importorskip("tokenizers")
+
+from kiwi.embedding.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2  # noqa: E402
+from kiwi.embedding.quantize import quantize_model  # noqa: E402
+
+WORDS = ["total", "sales", "by", "region", "customer", "orders", "per", "year", "nation", "revenue"]
+
+
+class FakeSession:
+    """Stands in for an InferenceSession: each token's hidden state is a fixed function of its id."""
+
+    def __init__(self):
+        self.input_shapes = []
+
+    def run(self, output_names, inputs):
+        ids = inputs["input_ids"]
+        self.input_shapes.append(ids.shape)
+        # Padding (id 0) has a non-zero hidden state, so it changes the result unless it is masked out
+        hidden = np.stack([ids, ids % 3, np.ones_like(ids)], axis=-1).astype(np.float32)
+        return [hidden]
+
+
+class FakeEmbedder(ONNXMiniLM_L6_V2):
+    def _create_session(self):
+        return FakeSession()
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """A model folder holding a word-level tokenizer; the model files only need to exist."""
+    folder = tmp_path / "onnx"
+    folder.mkdir()
+    vocab = {"[PAD]": 0, "[UNK]": 1, **{word: i + 2 for i, word in enumerate(WORDS)}}
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer.save(str(folder / "tokenizer.json"))
+    for name in ("config.json", "model.onnx"):
+        (folder / name).touch()
+    return tmp_path
+
+
+def documents(n, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12))) for _ in range(n)]
+
+
+class TestDynamicPadding:
+    """Test that length-sorted, dynamically padded batches give the same embeddings, in input order."""
+
+    def test_matches_unpadded_embeddings_in_input_order(self, model_dir):
+        embedder = FakeEmbedder(DOWNLOAD_PATH=model_dir)
+        docs = documents(70)
+
+        vectors = embedder.embed_documents_np(docs)
+        # A document on its own is padded to nothing
+        alone = np.stack([embedder.embed_documents_np([doc])[0] for doc in docs])
+
+        assert vectors.shape == (70, 3)
+        np.testing.assert_allclose(vectors, alone, rtol=1e-6)
+
+    def test_matches_fixed_padding(self, model_dir):
+        docs = documents(70, seed=1)
+
+        dynamic = FakeEmbedder(DOWNLOAD_PATH=model_dir).embed_documents_np(docs)
+        fixed = FakeEmbedder(DOWNLOAD_PATH=model_dir, dynamic_padding=False).embed_documents_np(docs)
+
+        np.testing.assert_allclose(dynamic, fixed, rtol=1e-6)
+
+    def test_batches_are_sorted_and_padded_to_their_longest(self, model_dir):
+        embedder = FakeEmbedder(DOWNLOAD_PATH=model_dir)
+        docs = documents(70, seed=2)
+
+        embedder.embed_documents_np(docs)
+
+        # Sorted by characters, each batch padded to its longest document in tokens
+        by_length = sorted(docs, key=len)
+        widths = [max(len(doc.split()) for doc in by_length[i:i + 32]) for i in range(0, 70, 32)]
+        assert embedder.model.input_shapes == [(32, widths[0]), (32, widths[1]), (6, widths[2])]
+        assert widths[0] < widths[2] < 256
+
+    def test_fixed_padding(self, model_dir):
+        embedder = FakeEmbedder(DOWNLOAD_PATH=model_dir, dynamic_padding=False)
+
+        embedder.embed_documents_np(documents(40))
+
+        assert embedder.model.input_shapes == [(32, 256), (8, 256)]
+
+
+class TestSessionPool:
+    """Test that concurrent callers check out sessions of a pool sized by num_sessions."""
+
+    def test_single_session_is_shared(self, model_dir):
+        embedder = FakeEmbedder(DOWNLOAD_PATH=model_dir)
+
+        with embedder._acquire_session() as first, embedder._acquire_session() as second:
+            assert first is second is embedder.model
+        assert embedder._session_pool is None
+
+    def test_concurrent_callers_get_their_own_session(self, model_dir):
+        embedder = FakeEmbedder(DOWNLOAD_PATH=model_dir, num_sessions=3)
+        barrier = threading.Barrier(3, timeout=5)
+        held, errors = [], []
+
+        def worker():
+            try:
+                with embedder._acquire_session() as session:
+                    held.append(session)
+                    barrier.wait()  # all three sessions are checked out at once
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert len({id(session) for session in held}) == 3
+        assert embedder.model in held
+        assert embedder._session_pool.qsize() == 3
+
+    def test_callers_wait_for_a_free_session(self, model_dir):
+        embedder = FakeEmbedder(DOWNLOAD_PATH=model_dir, num_sessions=2)
+        got = []
+
+        def worker():
+            with embedder._acquire_session() as session:
+                got.append(session)
+
+        with embedder._acquire_session() as first, embedder._acquire_session() as second:
+            waiting = threading.Thread(target=worker)
+            waiting.start()
+            waiting.join(0.1)
+            assert waiting.is_alive()
+        waiting.join(5)
+
+        assert got[0] in (first, second)
+        assert embedder._session_pool.qsize() == 2
+
+    def test_concurrent_embedding(self, model_dir):
+        embedder = FakeEmbedder(DOWNLOAD_PATH=model_dir, num_sessions=2)
+        docs = documents(40, seed=3)
+        expected = embedder.embed_documents_np(docs)
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(embedder.embed_documents_np(docs))) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(results) == 6
+        for vectors in results:
+            np.testing.assert_allclose(vectors, expected)
+        assert embedder._session_pool.qsize() == 2
+
+    def test_num_sessions_must_be_positive(self, model_dir):
+        with pytest.raises(ValueError):
+            FakeEmbedder(DOWNLOAD_PATH=model_dir, num_sessions=0)
+
+    @pytest.mark.parametrize("settings, workers", [({}, 1), ({"num_sessions": 3}, 3), ({"executor_workers": 5}, 5)])
+    def test_executor_size(self, model_dir, settings, workers):
+        embedder = FakeEmbedder(DOWNLOAD_PATH=model_dir, **settings)
+
+        executor = embedder._get_executor()
+
+        assert executor is embedder._get_executor()
+        assert executor._max_workers == workers
+        vector = asyncio.run(embedder.aembed_query("total sales"))
+        assert vector == embedder.embed_query("total sales")
+
+
+class TestVariant:
+    """Test how the model variant is resolved and which model file it loads."""
+
+    def test_defaults_to_fp32(self, model_dir, monkeypatch):
+        monkeypatch.delenv("KIWI_EMBEDDING_VARIANT", raising=False)
+        embedder = FakeEmbedder(DOWNLOAD_PATH=model_dir)
+
+        assert embedder.variant == "fp32"
+        assert embedder.model_name == "all-MiniLM-L6-v2"
+        assert embedder.model_path == model_dir / "onnx" / "model.onnx"
+
+    def test_environment_override(self, model_dir, monkeypatch):
+        monkeypatch.setenv("KIWI_EMBEDDING_VARIANT", "int8")
+        embedder = FakeEmbedder(DOWNLOAD_PATH=model_dir)
+
+        assert embedder.variant == "int8"
+        assert embedder.model_name == "all-MiniLM-L6-v2-int8"
+        assert embedder.model_path == model_dir / "onnx" / "model_int8.onnx"
+
+    def test_argument_overrides_environment(self, model_dir, monkeypatch):
+        monkeypatch.setenv("KIWI_EMBEDDING_VARIANT", "int8")
+
+        assert FakeEmbedder(DOWNLOAD_PATH=model_dir, variant="fp32").variant == "fp32"
+
+    @pytest.mark.parametrize("source", ["argument", "environment"])
+    def test_unknown_variant(self, model_dir, monkeypatch, source):
+        if source == "environment":
+            monkeypatch.setenv("KIWI_EMBEDDING_VARIANT", "fp16")
+            settings = {}
+        else:
+            settings = {"variant": "fp16"}
+
+        with pytest.raises(ValueError):
+            FakeEmbedder(DOWNLOAD_PATH=model_dir, **settings)
+
+    def test_missing_variant_model(self, model_dir):
+        embedder = ONNXMiniLM_L6_V2(DOWNLOAD_PATH=model_dir, variant="int8")
+
+        with pytest.raises(FileNotFoundError, match="kiwi.embedding.quantize"):
+            embedder._create_session()
+
+
+class TestQuantizeModel:
+    """Test that quantize_model writes an INT8 model that ONNX Runtime can load."""
+
+    @pytest.fixture
+    def fp32_model(self, tmp_path):
+        onnx = pytest.importorskip("onnx")
+        pytest.importorskip("onnxruntime.quantization")
+        from onnx import TensorProto, helper, numpy_helper
+
+        weight = np.random.default_rng(0).standard_normal((64, 32)).astype(np.float32)
+        graph = helper.make_graph(
+            [helper.make_node("MatMul", ["input", "weight"], ["output"])],
+            "matmul",
+            [helper.make_tensor_value_info("input", TensorProto.FLOAT, [1, 64])],
+            [helper.make_tensor_value_info("output", TensorProto.FLOAT, [1, 32])],
+            initializer=[numpy_helper.from_array(weight, "weight")],
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)], ir_version=8)
+        path = tmp_path / "onnx" / "model.onnx"
+        path.parent.mkdir()
+        onnx.save(model, str(path))
+        return path
+
+    def test_writes_next_to_source(self, fp32_model):
+        destination = quantize_model(fp32_model)
+
+        assert destination == fp32_model.with_name("model_int8.onnx")
+        session = onnxruntime.InferenceSession(str(destination), providers=["CPUExecutionProvider"])
+        (output,) = session.run(None, {"input": np.ones((1, 64), dtype=np.float32)})
+        assert output.shape == (1, 32)
+
+    def test_explicit_destination(self, fp32_model, tmp_path):
+        destination = quantize_model(fp32_model, tmp_path / "small.onnx", per_channel=True)
+
+        assert destination == tmp_path / "small.onnx"
+        assert destination.exists()
+        assert not fp32_model.with_name("model_int8.onnx").exists()
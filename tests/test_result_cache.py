@@ -0,0 +1,90 @@
+"""
+Tests for the query result cache.
+"""
+
+import time
+
+import pandas as pd
+import pytest
+
+from kiwi.core.result_cache import ResultCache, normalize_sql
+
+
+def frame(n=10):
+    return pd.DataFrame({"a": range(n)})
+
+
+class TestNormalizeSql:
+    """Test the cache key normalization."""
+
+    def test_whitespace_case_and_comments(self):
+        a = "select a,\n   b from t -- latest\nwhere x = 1;"
+        b = "SELECT a, b FROM t WHERE x = 1"
+
+        assert normalize_sql(a) == normalize_sql(b)
+
+    def test_literals_are_kept(self):
+        assert normalize_sql("SELECT * FROM t WHERE n = 'A'") != normalize_sql("SELECT * FROM t WHERE n = 'a'")
+
+    def test_whitespace_in_literals_is_kept(self):
+        a = "SELECT * FROM t WHERE name = 'a  b'"
+        b = "SELECT * FROM t WHERE name = 'a b'"
+
+        assert normalize_sql(a) != normalize_sql(b)
+        assert normalize_sql("select *\nfrom t  where name = 'a  b';") == normalize_sql(a)
+
+
+class TestResultCache:
+    """Test lookup, TTLs, eviction and invalidation."""
+
+    def test_hit_by_normalized_sql(self):
+        cache = ResultCache()
+        df = frame()
+        cache.set("SELECT a FROM t", df, "db1")
+
+        assert cache.get("select a\nfrom t;", "db1") is df
+        assert cache.get("SELECT a FROM t", "db2") is None
+        assert cache.stats()["hits"] == 1
+
+    def test_dialect_ttl(self):
+        cache = ResultCache(ttl=None, dialect_ttls={"DuckDB SQL": 0.01})
+        cache.set("SELECT 1", frame(), "db", dialect="DuckDB SQL")
+        cache.set("SELECT 2", frame(), "db", dialect="PostgreSQL")
+        time.sleep(0.02)
+
+        assert cache.get("SELECT 1", "db") is None
+        assert cache.get("SELECT 2", "db") is not None
+        assert cache.stats()["expirations"] == 1
+
+    def test_byte_bound_evicts_lru(self):
+        size = frame(100).memory_usage(index=True, deep=True).sum()
+        cache = ResultCache(max_bytes=int(size * 2.5))
+        for i in range(3):
+            cache.set(f"SELECT {i}", frame(100), "db")
+            cache.get("SELECT 0", "db")
+
+        assert cache.get("SELECT 0", "db") is not None
+        assert cache.get("SELECT 1", "db") is None
+        assert cache.stats()["evictions"] == 1
+        assert cache.nbytes <= cache.max_bytes
+
+    def test_too_large_is_not_cached(self):
+        cache = ResultCache(max_bytes=100)
+
+        assert not cache.set("SELECT a FROM t", frame(1000), "db")
+        assert len(cache) == 0
+
+    def test_invalidate(self):
+        cache = ResultCache()
+        for connection in ["db1", "db2"]:
+            cache.set("SELECT 1", frame(), connection)
+            cache.set("SELECT 2", frame(), connection)
+
+        assert cache.invalidate(sql="select 1", connection="db1") == 1
+        assert cache.invalidate(connection="db2") == 2
+        assert cache.invalidate() == 1
+        assert cache.stats()["bytes"] == 0
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            ResultCache(max_bytes=0)
@@ -0,0 +1,140 @@
+"""
+Tests for the retrieval stage of generate_sql: one embedding, three lookups, run concurrently.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from tests.conftest import StubKiwi
+
+EMBEDDING = [0.5, 0.25]
+
+
+class RetrievalKiwi(StubKiwi):
+    """Records what each lookup receives; the lookups optionally wait for each other at a barrier."""
+
+    def __init__(self, config=None, barrier=None):
+        super().__init__(config=config)
+        self.barrier = barrier
+        self.embedded = []
+        self.lookups = []
+        self.logs = []
+        self.lock = threading.Lock()
+
+    def log(self, message, title="Info"):
+        self.logs.append((title, message))
+
+    def generate_embedding(self, data, **kwargs):
+        with self.lock:
+            self.embedded.append(data)
+        return EMBEDDING
+
+    def lookup(self, stage, question, kwargs):
+        with self.lock:
+            self.lookups.append((stage, question, kwargs.get("embedding")))
+        if self.barrier is not None:
+            self.barrier.wait()  # raises BrokenBarrierError if the lookups don't overlap
+        return [f"{stage} for {question}"]
+
+    def get_similar_question_sql(self, question, **kwargs):
+        return self.lookup("sql", question, kwargs)
+
+    def get_related_ddl(self, question, **kwargs):
+        return self.lookup("ddl", question, kwargs)
+
+    def get_related_documentation(self, question, **kwargs):
+        return self.lookup("documentation", question, kwargs)
+
+
+def retrieval_timings(vn):
+    return [message for title, message in vn.logs if title == "Retrieval Timings"]
+
+
+class TestGetRelatedContext:
+    """Test get_related_context and aget_related_context."""
+
+    @pytest.mark.parametrize("parallel", [True, False])
+    def test_embeds_once_and_keeps_order(self, parallel):
+        vn = RetrievalKiwi(config={"parallel_retrieval": parallel})
+
+        context = vn.get_related_context("Sales by region?")
+
+        assert context == (["sql for Sales by region?"], ["ddl for Sales by region?"],
+                           ["documentation for Sales by region?"])
+        assert vn.embedded == ["Sales by region?"]
+        assert sorted(vn.lookups) == [
+            (stage, "Sales by region?", EMBEDDING) for stage in ("ddl", "documentation", "sql")
+        ]
+
+    def test_async_embeds_once_and_keeps_order(self):
+        vn = RetrievalKiwi(barrier=threading.Barrier(3, timeout=5))
+
+        context = asyncio.run(vn.aget_related_context("Sales by region?"))
+
+        assert context == (["sql for Sales by region?"], ["ddl for Sales by region?"],
+                           ["documentation for Sales by region?"])
+        assert vn.embedded == ["Sales by region?"]
+        assert [embedding for _, _, embedding in vn.lookups] == [EMBEDDING] * 3
+
+    @pytest.mark.parametrize("run", ["sync", "async"])
+    def test_given_embedding_is_not_recomputed(self, run):
+        vn = RetrievalKiwi()
+        embedding = [1.0, 0.0]
+
+        if run == "sync":
+            vn.get_related_context("Sales?", embedding=embedding)
+        else:
+            asyncio.run(vn.aget_related_context("Sales?", embedding=embedding))
+
+        assert vn.embedded == []
+        assert [lookup[2] for lookup in vn.lookups] == [embedding] * 3
+        assert "embed:" not in retrieval_timings(vn)[0]
+
+    def test_lookups_overlap(self):
+        vn = RetrievalKiwi(barrier=threading.Barrier(3, timeout=5))
+
+        vn.get_related_context("Sales?")
+
+        assert len(vn.lookups) == 3
+
+    @pytest.mark.parametrize("run", ["sync", "async"])
+    def test_timings_are_logged(self, run):
+        vn = RetrievalKiwi()
+
+        if run == "sync":
+            vn.get_related_context("Sales?")
+        else:
+            asyncio.run(vn.aget_related_context("Sales?"))
+
+        (message,) = retrieval_timings(vn)
+        assert [part.split(":")[0] for part in message.split(", ")] == ["embed", "sql", "ddl", "documentation", "total"]
+
+    def test_concurrent_requests_do_not_queue(self):
+        # Four questions at once need twelve lookups running together
+        vn = RetrievalKiwi(barrier=threading.Barrier(12, timeout=5))
+        errors = []
+
+        def ask(n):
+            try:
+                vn.get_related_context(f"Question {n}?")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=ask, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(vn.lookups) == 12
+
+    def test_retrieval_workers(self):
+        vn = RetrievalKiwi(config={"retrieval_workers": 5})
+
+        executor = vn._get_retrieval_executor()
+
+        assert executor._max_workers == 5
+        assert vn._get_retrieval_executor() is executor
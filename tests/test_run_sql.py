@@ -0,0 +1,267 @@
+"""
+Tests for the DuckDB connector and the run_sql helpers built on it.
+"""
+
+import gzip
+import json
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+
+from kiwi.core.result_cache import ResultCache
+from tests.conftest import StubKiwi
+
+duckdb = pytest.importorskip("duckdb")
+
+
+@pytest.fixture
+def vn():
+    vn = StubKiwi()
+    vn.connect_to_duckdb(
+        ":memory:",
+        init_sql="CREATE TABLE t AS SELECT range AS x FROM range(1000)",
+        threads=2,
+        memory_limit="512MB",
+    )
+    return vn
+
+
+class TestDuckDB:
+    """Test settings and concurrent use of the DuckDB connection."""
+
+    def test_settings_are_applied(self, vn):
+        df = vn.run_sql("SELECT current_setting('threads') AS threads, count(*) AS n FROM t")
+
+        assert df["threads"][0] == 2
+        assert df["n"][0] == 1000
+
+    def test_concurrent_queries(self, vn):
+        results, errors = [], []
+
+        def worker(i):
+            try:
+                for _ in range(20):
+                    results.append(vn.run_sql(f"SELECT sum(x) + {i} AS s FROM t")["s"][0])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert sorted(set(results)) == [499500 + i for i in range(4)]
+
+    def test_init_sql_session_state_on_every_cursor(self):
+        vn = StubKiwi()
+        vn.connect_to_duckdb(
+            ":memory:",
+            init_sql=(
+                "CREATE SCHEMA s; CREATE TABLE s.t AS SELECT range AS x FROM range(10); USE s; "
+                "SET VARIABLE v = 5; CREATE TEMP TABLE tt AS SELECT 2 AS y"
+            ),
+        )
+        results, errors = [], []
+
+        def worker():
+            try:
+                results.append(vn.run_sql("SELECT count(*) AS n, getvariable('v') AS v, (SELECT y FROM tt) AS y FROM t"))
+                results.append(vn.run_sql_iter("SELECT x FROM t", chunk_rows=4).to_df())
+                results.append(vn.describe_sql("SELECT x, y FROM t, tt"))
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        worker()
+
+        assert not errors
+        for counts, rows, columns in (results[:3], results[3:]):
+            assert counts.iloc[0].tolist() == [10, 5, 2]
+            assert len(rows) == 10
+            assert list(columns.columns) == ["x", "y"]
+
+
+class TestArrow:
+    """Test the Arrow result path from DuckDB to the Flask preview."""
+
+    def test_duckdb_returns_arrow(self, vn):
+        pa = pytest.importorskip("pyarrow")
+
+        table = vn.run_sql_arrow("SELECT x, x * 2 AS y FROM t")
+
+        assert vn.run_sql_arrow_is_set
+        assert isinstance(table, pa.Table)
+        assert table.num_rows == 1000
+        assert vn.should_generate_chart(table)
+        assert vn.run_sql_arrow("CREATE TABLE u (a INT)").num_rows == 0
+
+    def test_default_converts_dataframe(self):
+        pytest.importorskip("pyarrow")
+        vn = StubKiwi()
+        vn.run_sql = lambda sql: pd.DataFrame({"a": [1, 2]})
+
+        assert not vn.run_sql_arrow_is_set
+        assert vn.run_sql_arrow("SELECT a").column("a").to_pylist() == [1, 2]
+
+    def test_flask_previews_without_pandas_result(self, vn):
+        pytest.importorskip("pyarrow")
+        from kiwi.flask_app import MemoryCache, VannaFlaskAPI
+
+        cache = MemoryCache()
+        app = VannaFlaskAPI(vn, cache=cache)
+        cache.set(id="q", field="sql", value="SELECT x FROM t ORDER BY x")
+
+        body = app.flask_app.test_client().get("/api/v0/run_sql?id=q").get_json()
+
+        assert body["type"] == "df"
+        assert len(json.loads(body["df"])) == 10
+        assert cache.get(id="q", field="df") is None
+        assert len(app.get_cached(id="q", field="df")) == 1000
+        assert cache.get(id="q", field="df") is not None
+
+
+class TestRunSqlIter:
+    """Test streaming fetch through the connectors."""
+
+    def test_duckdb_streams_batches(self, vn):
+        result = vn.run_sql_iter("SELECT x FROM t", chunk_rows=100, max_rows=250)
+
+        assert [len(chunk) for chunk in result] == [100, 100, 50]
+        assert result.truncated
+
+    def test_sqlite(self, tmp_path):
+        path = str(tmp_path / "db.sqlite")
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(50)])
+        vn = StubKiwi()
+        vn.connect_to_sqlite(path)
+
+        result = vn.run_sql_iter("SELECT x FROM t", chunk_rows=7, max_rows=20)
+
+        assert [len(chunk) for chunk in result] == [7, 7, 6]
+        assert result.truncated
+
+    def test_fallback_chunks_run_sql(self):
+        vn = StubKiwi(config={"result_max_rows": 3})
+        vn.run_sql = lambda sql: pd.DataFrame({"a": range(10)})
+
+        result = vn.run_sql_iter("SELECT a")
+
+        assert len(result.to_df()) == 3
+        assert result.truncated
+
+    def test_flask_reports_truncation(self, vn):
+        from kiwi.flask_app import MemoryCache, VannaFlaskAPI
+
+        vn.result_max_rows = 15
+        cache = MemoryCache()
+        app = VannaFlaskAPI(vn, cache=cache)
+        cache.set(id="q", field="sql", value="SELECT x FROM t")
+
+        body = app.flask_app.test_client().get("/api/v0/run_sql?id=q").get_json()
+
+        assert body["truncated"]
+        assert len(app.get_cached(id="q", field="df")) == 15
+
+    def test_flask_download_formats(self, vn):
+        pa = pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+
+        from kiwi.flask_app import MemoryCache, VannaFlaskAPI
+
+        cache = MemoryCache()
+        app = VannaFlaskAPI(vn, cache=cache)
+        client = app.flask_app.test_client()
+        cache.set(id="q", field="sql", value="SELECT x FROM t ORDER BY x")
+        client.get("/api/v0/run_sql?id=q")
+
+        csv = client.get("/api/v0/download_csv?id=q", headers={"Accept-Encoding": "gzip"})
+        assert csv.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(csv.data).decode().splitlines()[:2] == [",x", "0,0"]
+
+        parquet = client.get("/api/v0/download_csv?id=q&format=parquet")
+        assert pq.read_table(pa.BufferReader(parquet.data)).num_rows == 1000
+        assert cache.get(id="q", field="df") is None  # served from Arrow, never converted
+
+        arrow = client.get("/api/v0/download_csv?id=q&format=arrow")
+        assert "Content-Encoding" not in arrow.headers
+        assert pa.ipc.open_stream(arrow.data).read_all().num_rows == 1000
+
+
+class TestResultCacheIntegration:
+    """Test the result cache in front of run_sql and run_sql_iter."""
+
+    @pytest.fixture
+    def counted(self):
+        vn = StubKiwi(config={"result_cache": True})
+        calls = []
+
+        def run_sql(sql):
+            calls.append(sql)
+            return pd.DataFrame({"a": range(5)})
+
+        vn.run_sql = run_sql
+        vn.run_sql_is_set = True
+        return vn, calls
+
+    def test_read_only_queries_are_cached(self, counted):
+        vn, calls = counted
+
+        vn.run_sql_cached("SELECT a FROM t")
+        df = vn.run_sql_cached("select a  from t -- again")
+        vn.run_sql_cached("DELETE FROM t")
+        vn.run_sql_cached("DELETE FROM t")
+
+        assert len(df) == 5
+        assert len(calls) == 3
+        assert vn.get_cache_stats()["result_cache"]["hits"] == 1
+
+    def test_invalidate(self, counted):
+        vn, calls = counted
+        vn.run_sql_cached("SELECT a FROM t")
+
+        assert vn.invalidate_result_cache() == 1
+        vn.run_sql_cached("SELECT a FROM t")
+        assert len(calls) == 2
+
+    def test_iter_caches_complete_results_only(self, vn):
+        vn.result_cache = ResultCache()
+
+        truncated = vn.run_sql_iter("SELECT x FROM t", max_rows=10)
+        truncated.to_df()
+        assert truncated.truncated
+        assert len(vn.result_cache) == 0
+
+        assert len(vn.run_sql_iter("SELECT x FROM t").to_df()) == 1000
+        assert len(vn.result_cache) == 1
+        assert len(vn.run_sql_iter("SELECT x FROM t", chunk_rows=300).to_df()) == 1000
+        assert vn.result_cache.stats()["hits"] == 1
+
+    def test_reconnect_starts_a_new_namespace(self):
+        vn = StubKiwi(config={"result_cache": True})
+        vn.connect_to_duckdb(":memory:", init_sql="CREATE TABLE t AS SELECT 1 AS x")
+        assert vn.run_sql_cached("SELECT x FROM t")["x"][0] == 1
+
+        vn.connect_to_duckdb(":memory:", init_sql="CREATE TABLE t AS SELECT 2 AS x")
+
+        assert vn.run_sql_cached("SELECT x FROM t")["x"][0] == 2
+
+    def test_connection_id_shares_results(self):
+        cache = ResultCache()
+        first, second = (
+            StubKiwi(config={"result_cache": cache, "connection_id": "warehouse"})
+            for _ in range(2)
+        )
+        first.connect_to_duckdb(":memory:", init_sql="CREATE TABLE t AS SELECT 1 AS x")
+        second.connect_to_duckdb(":memory:", init_sql="CREATE TABLE t AS SELECT 2 AS x")
+
+        first.run_sql_cached("SELECT x FROM t")
+
+        assert second.run_sql_cached("SELECT x FROM t")["x"][0] == 1
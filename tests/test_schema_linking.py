@@ -0,0 +1,163 @@
+"""
+Tests for DDL parsing and schema linking.
+"""
+
+import pandas as pd
+import pytest
+
+from kiwi.core.schema_linking import (
+    SchemaIndex,
+    cjk_tokens,
+    identifier_tokens,
+    parse_ddl,
+)
+from tests.conftest import StubKiwi
+
+TPCH_DDL = [
+    "CREATE TABLE region (r_regionkey INTEGER PRIMARY KEY, r_name VARCHAR, r_comment VARCHAR);",
+    "CREATE TABLE nation (n_nationkey INTEGER PRIMARY KEY, n_name VARCHAR, "
+    "n_regionkey INTEGER REFERENCES region(r_regionkey), n_comment VARCHAR);",
+    "CREATE TABLE customer (c_custkey INTEGER PRIMARY KEY, c_name VARCHAR, c_nationkey INTEGER, "
+    "c_acctbal DECIMAL(15,2), c_mktsegment VARCHAR, c_comment VARCHAR, "
+    "FOREIGN KEY (c_nationkey) REFERENCES nation(n_nationkey));",
+    "CREATE TABLE orders (o_orderkey INTEGER PRIMARY KEY, o_custkey INTEGER REFERENCES customer(c_custkey), "
+    "o_orderstatus VARCHAR, o_totalprice DECIMAL(15,2), o_orderdate DATE, o_comment VARCHAR);",
+    "CREATE TABLE lineitem (l_orderkey INTEGER REFERENCES orders(o_orderkey), l_partkey INTEGER, "
+    "l_quantity DECIMAL(15,2), l_discount DECIMAL(15,2), l_shipdate DATE, l_shipmode VARCHAR);",
+    "CREATE TABLE part (p_partkey INTEGER PRIMARY KEY, p_name VARCHAR, p_brand VARCHAR, p_size INTEGER);",
+]
+
+
+@pytest.fixture
+def index():
+    index = SchemaIndex(max_tables=4)
+    index.sync(TPCH_DDL)
+    return index
+
+
+class TestParseDDL:
+    """Test extraction of tables, columns and keys."""
+
+    def test_bracketed_identifiers_and_constraints(self):
+        [table] = parse_ddl(
+            "CREATE TABLE [Album]\n(\n    [AlbumId] INTEGER NOT NULL,\n    [Title] NVARCHAR(160) NOT NULL,\n"
+            "    [ArtistId] INTEGER NOT NULL,\n    CONSTRAINT [PK_Album] PRIMARY KEY ([AlbumId]),\n"
+            "    FOREIGN KEY ([ArtistId]) REFERENCES [Artist] ([ArtistId]) ON DELETE NO ACTION\n);"
+        )
+
+        assert table.name == "Album"
+        assert table.columns == ["albumid", "title", "artistid"]
+        assert table.primary_key == ["albumid"]
+        assert [(fk.columns, fk.ref_table, fk.ref_columns) for fk in table.foreign_keys] == [
+            (["artistid"], "artist", ["artistid"])
+        ]
+
+    def test_multiple_statements_are_split(self):
+        tables = parse_ddl(" ".join(TPCH_DDL[:2]) + " CREATE VIEW v AS SELECT 1;")
+
+        assert [t.name for t in tables] == ["region", "nation"]
+        assert tables[1].ddl.startswith("CREATE TABLE nation")
+        assert tables[1].foreign_keys[0].ref_table == "region"
+
+    def test_qualified_names_and_type_arguments(self):
+        [table] = parse_ddl('CREATE TABLE IF NOT EXISTS main."Sales" (amount DECIMAL(15, 2), day DATE)')
+
+        assert table.key == "sales"
+        assert table.columns == ["amount", "day"]
+
+    def test_identifier_tokens(self):
+        assert identifier_tokens("SupportRepId") >= {"support", "rep", "supportrepid"}
+        assert "orderdate" in identifier_tokens("o_orderdate")
+        assert "customer" in identifier_tokens("Customers")
+
+    def test_cjk_tokens(self):
+        assert cjk_tokens("客户名称") == {"客户", "户名", "名称"}
+        assert cjk_tokens("每个 region 的 额") == {"每个", "的", "额"}
+        assert "客户" in identifier_tokens("客户_编号")
+
+
+class TestSchemaIndex:
+    """Test table scoring and foreign-key expansion."""
+
+    def test_lexical_match_selects_table(self, index):
+        assert index.link_tables("Customers in the BUILDING market segment by account balance") == ["customer"]
+
+    def test_join_path_is_added(self, index):
+        linked = index.link_tables("Total order price by region")
+
+        assert {"orders", "region"} <= set(linked)
+        assert {"customer", "nation"} <= set(linked)
+        assert "part" not in linked
+
+    def test_vector_hits_contribute(self, index):
+        ranked = dict(index.rank_tables("something unrelated", ddl_hits=[TPCH_DDL[5]]))
+
+        assert ranked == {"part": pytest.approx(1.0)}
+
+    def test_link_returns_table_ddl_and_passthrough(self, index):
+        view = "CREATE VIEW revenue AS SELECT 1"
+        ddl = index.link("discount by ship mode", [TPCH_DDL[4], view])
+
+        assert ddl == [TPCH_DDL[4], view]
+
+    def test_max_tables(self):
+        index = SchemaIndex(max_tables=2)
+        index.sync(TPCH_DDL)
+
+        assert len(index.link_tables("order price by region and customer nation")) <= 2
+
+    def test_sync_drops_removed_ddl(self, index):
+        index.sync(TPCH_DDL[:2])
+
+        assert set(index.tables) == {"region", "nation"}
+
+    def test_empty_index_passes_through(self):
+        assert SchemaIndex().link("q", ["CREATE TABLE t (a INT)"]) == ["CREATE TABLE t (a INT)"]
+
+    def test_cjk_question(self):
+        index = SchemaIndex(max_tables=2)
+        index.sync([
+            "CREATE TABLE 客户 (客户编号 INTEGER PRIMARY KEY, 客户名称 VARCHAR);",
+            "CREATE TABLE 订单 (订单编号 INTEGER PRIMARY KEY, 客户编号 INTEGER REFERENCES 客户(客户编号), 订单金额 DECIMAL);",
+            "CREATE TABLE 产品 (产品编号 INTEGER PRIMARY KEY, 产品名称 VARCHAR);",
+        ])
+
+        assert set(index.link_tables("每个客户的订单金额是多少？")) == {"客户", "订单"}
+
+
+class TestLinkSchema:
+    """Test that the index follows the training data of a KiwiBase."""
+
+    def test_failed_sync_is_retried(self):
+        class TrainedKiwi(StubKiwi):
+            fail = True
+
+            def get_training_data(self, **kwargs):
+                if self.fail:
+                    raise ConnectionError("vector store unavailable")
+                return pd.DataFrame({"training_data_type": ["ddl"] * len(TPCH_DDL), "content": TPCH_DDL})
+
+        vn = TrainedKiwi(config={"schema_linking": True})
+        with pytest.raises(ConnectionError):
+            vn.link_schema("orders by nation", [])
+
+        vn.fail = False
+
+        assert vn.link_schema("order dates", [])
+        assert len(vn.schema_index) == len(TPCH_DDL)
+
+    def test_training_data_change_resyncs(self):
+        class TrainedKiwi(StubKiwi):
+            ddl = TPCH_DDL[:2]
+
+            def get_training_data(self, **kwargs):
+                return pd.DataFrame({"training_data_type": ["ddl"] * len(self.ddl), "content": self.ddl})
+
+        vn = TrainedKiwi(config={"schema_linking": True})
+        vn.link_schema("regions", [])
+        vn.ddl = TPCH_DDL
+
+        vn._training_data_changed()
+        vn.link_schema("regions", [])
+
+        assert len(vn.schema_index) == len(TPCH_DDL)
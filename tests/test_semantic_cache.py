@@ -0,0 +1,156 @@
+"""
+Tests for the semantic question -> SQL answer cache.
+"""
+
+import time
+
+import pytest
+
+from kiwi.core.semantic_cache import SemanticCache
+from tests.conftest import StubKiwi
+
+
+class TestSemanticCache:
+    """Test similarity lookups, namespacing, expiry and statistics."""
+
+    def test_hit_above_threshold(self):
+        cache = SemanticCache(threshold=0.9)
+        cache.add("DuckDB SQL", "total sales by region", [1.0, 0.0, 0.0], "SELECT 1", generation_ms=1200)
+
+        hit = cache.lookup("DuckDB SQL", [0.99, 0.05, 0.0])
+
+        assert hit is not None
+        assert hit.sql == "SELECT 1"
+        assert hit.similarity == pytest.approx(0.9987, abs=1e-3)
+
+    def test_miss_below_threshold(self):
+        cache = SemanticCache(threshold=0.95)
+        cache.add("DuckDB SQL", "total sales by region", [1.0, 0.0], "SELECT 1")
+
+        assert cache.lookup("DuckDB SQL", [0.7, 0.7]) is None
+
+    def test_namespaces_are_isolated(self):
+        cache = SemanticCache()
+        cache.add("DuckDB SQL", "q", [1.0, 0.0], "SELECT 1")
+
+        assert cache.lookup("PostgreSQL", [1.0, 0.0]) is None
+
+    def test_best_match_wins(self):
+        cache = SemanticCache(threshold=0.5)
+        cache.add("ns", "a", [1.0, 0.0], "SELECT 'a'")
+        cache.add("ns", "b", [0.8, 0.6], "SELECT 'b'")
+
+        assert cache.lookup("ns", [0.79, 0.61]).sql == "SELECT 'b'"
+
+    def test_invalidate(self):
+        cache = SemanticCache()
+        cache.add("ns", "q", [1.0, 0.0], "SELECT 1")
+
+        cache.invalidate()
+
+        assert cache.lookup("ns", [1.0, 0.0]) is None
+        assert cache.stats()["invalidations"] == 1
+
+    def test_ttl_expiry(self):
+        cache = SemanticCache(ttl=0.01)
+        cache.add("ns", "q", [1.0, 0.0], "SELECT 1")
+        time.sleep(0.02)
+
+        assert cache.lookup("ns", [1.0, 0.0]) is None
+
+    def test_max_entries(self):
+        cache = SemanticCache(max_entries=2)
+        cache.add("ns", "a", [1.0, 0.0, 0.0], "A")
+        cache.add("ns", "b", [0.0, 1.0, 0.0], "B")
+        cache.add("ns", "c", [0.0, 0.0, 1.0], "C")
+
+        assert cache.lookup("ns", [1.0, 0.0, 0.0]) is None
+        assert cache.stats()["size"] == 2
+
+    def test_stats_track_latency_saved(self):
+        cache = SemanticCache()
+        cache.add("ns", "q", [1.0, 0.0], "SELECT 1", generation_ms=800)
+
+        cache.lookup("ns", [1.0, 0.0])
+        cache.lookup("ns", [0.0, 1.0])
+        stats = cache.stats()
+
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(0.5)
+        assert stats["latency_saved_ms"] == pytest.approx(800)
+
+
+class TestSemanticCacheNamespaces:
+    """Test which instances sharing a SemanticCache see each other's answers."""
+
+    @staticmethod
+    def make_kiwi(cache, store="store", **config):
+        class CachingKiwi(StubKiwi):
+            def __init__(self):
+                super().__init__(config={"semantic_cache": cache, **config})
+                self.embedded = []
+                self.prompts = 0
+
+            def log(self, message, title="Info"):
+                pass
+
+            def generate_embedding(self, data, **kwargs):
+                self.embedded.append(data)
+                return [1.0, 0.0]
+
+            def _training_data_id(self):
+                return store if store is not None else super()._training_data_id()
+
+            def submit_prompt(self, prompt, **kwargs):
+                self.prompts += 1
+                return f"SELECT {self.prompts};"
+
+        return CachingKiwi()
+
+    def test_same_database_and_store_share_answers(self):
+        cache = SemanticCache()
+        first = self.make_kiwi(cache, connection_id="warehouse")
+        second = self.make_kiwi(cache, connection_id="warehouse")
+
+        assert first.generate_sql("q") == "SELECT 1;"
+        assert second.generate_sql("q") == "SELECT 1;"
+        assert second.prompts == 0
+
+    def test_other_database_or_store_misses(self):
+        cache = SemanticCache()
+        self.make_kiwi(cache, connection_id="warehouse").generate_sql("q")
+
+        assert self.make_kiwi(cache).generate_sql("q") == "SELECT 1;"
+        assert self.make_kiwi(cache, connection_id="staging").generate_sql("q") == "SELECT 1;"
+        assert self.make_kiwi(cache, store=None, connection_id="warehouse").generate_sql("q") == "SELECT 1;"
+        assert cache.stats()["hits"] == 0
+
+    def test_training_data_change_moves_the_namespace(self):
+        vn = self.make_kiwi(SemanticCache(), connection_id="warehouse")
+        namespace = vn._semantic_cache_namespace()
+
+        vn._training_data_changed()
+
+        assert vn._semantic_cache_namespace() != namespace
+
+    def test_training_data_change_keeps_other_instances_answers(self):
+        cache = SemanticCache()
+        changed = self.make_kiwi(cache, connection_id="warehouse")
+        other = self.make_kiwi(cache, connection_id="staging")
+        changed.generate_sql("q")
+        other.generate_sql("q")
+
+        changed._training_data_changed()
+
+        assert other.generate_sql("q") == "SELECT 1;"
+        assert other.prompts == 1
+        assert changed.generate_sql("q") == "SELECT 2;"
+        assert cache.stats()["size"] == 2
+
+    def test_question_is_embedded_once(self):
+        vn = self.make_kiwi(SemanticCache())
+
+        vn.generate_sql("q")
+
+        assert vn.embedded == ["q"]
@@ -0,0 +1,166 @@
+"""
+Tests for the out-of-process app cache backends and their serialization.
+"""
+
+import datetime
+import decimal
+import multiprocessing
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kiwi.cache import SQLiteCache
+from kiwi.cache.serialization import dumps, loads
+
+
+def frame():
+    return pd.DataFrame({"region": ["north", "south"], "total": [1.5, 2.5]})
+
+
+def _write_from_other_process(path):
+    SQLiteCache(path).set(id="q", field="sql", value="SELECT 1")
+
+
+class TestSerialization:
+    """Test the value encoding."""
+
+    def test_round_trips(self):
+        pytest.importorskip("pyarrow")
+
+        pd.testing.assert_frame_equal(loads(dumps(frame())), frame())
+        assert loads(dumps("SELECT 1")) == "SELECT 1"
+        assert loads(dumps(["a", "b"])) == ["a", "b"]
+        assert loads(dumps(True)) is True
+
+    def test_mixed_object_columns(self):
+        pytest.importorskip("pyarrow")
+        df = pd.DataFrame({"mixed": [1, "a", None]})
+
+        restored = loads(dumps(df))["mixed"]
+        assert list(restored[:2]) == ["1", "a"]
+        assert pd.isna(restored[2])
+
+    def test_mixed_object_column_nulls(self):
+        pytest.importorskip("pyarrow")
+        df = pd.DataFrame({"mixed": [1, "a", None, float("nan")], "total": [1.0, 2.0, 3.0, 4.0]})
+
+        restored = loads(dumps(df))
+
+        assert restored["mixed"].isna().tolist() == [False, False, True, True]
+        assert "None" not in restored["mixed"].tolist()
+        assert df["mixed"].tolist()[:2] == [1, "a"]  # the caller's frame is left alone
+
+    def test_tagged_values(self):
+        value = {
+            "at": datetime.datetime(2024, 1, 31, 12, 30),
+            "on": datetime.date(2024, 1, 31),
+            "time": datetime.time(8, 15),
+            "total": decimal.Decimal("12.50"),
+            "id": uuid.UUID(int=1),
+            "count": np.int64(3),
+            "share": np.float32(0.5),
+        }
+
+        restored = loads(dumps(value))
+
+        assert restored == value
+        assert type(restored["at"]) is datetime.datetime
+        assert type(restored["count"]) is int
+
+    def test_unsupported_type(self):
+        with pytest.raises(TypeError, match="object"):
+            dumps({"value": object()})
+        with pytest.raises(TypeError, match="set"):
+            dumps({1, 2})
+
+    def test_arrow_table(self):
+        pa = pytest.importorskip("pyarrow")
+        table = pa.table({"a": [1, 2]})
+
+        assert loads(dumps(table)).equals(table)
+
+
+class SharedCacheContract:
+    """Behaviour every backend shares; subclasses provide the ``cache`` fixture."""
+
+    def test_fields_are_independent(self, cache):
+        pytest.importorskip("pyarrow")
+        cache.set(id="q", field="sql", value="SELECT 1")
+        cache.set(id="q", field="df", value=frame())
+
+        assert cache.get(id="q", field="sql") == "SELECT 1"
+        pd.testing.assert_frame_equal(cache.get(id="q", field="df"), frame())
+        assert cache.get(id="q", field="summary") is None
+        assert cache.get(id="other", field="sql") is None
+
+    def test_set_none_clears_field(self, cache):
+        cache.set(id="q", field="sql", value="SELECT 1")
+        cache.set(id="q", field="sql", value=None)
+
+        assert cache.get(id="q", field="sql") is None
+
+    def test_get_all_in_order(self, cache):
+        for i in range(3):
+            cache.set(id=f"q{i}", field="question", value=f"question {i}")
+
+        assert [entry["question"] for entry in cache.get_all(["question"])] == [
+            "question 0",
+            "question 1",
+            "question 2",
+        ]
+
+    def test_delete(self, cache):
+        cache.set(id="q", field="sql", value="SELECT 1")
+        cache.delete(id="q")
+
+        assert cache.get(id="q", field="sql") is None
+        assert cache.get_all(["sql"]) == []
+
+
+class TestSQLiteCache(SharedCacheContract):
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return SQLiteCache(str(tmp_path / "cache.sqlite"))
+
+    def test_shared_between_processes(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = SQLiteCache(path)
+        process = multiprocessing.get_context("spawn").Process(target=_write_from_other_process, args=(path,))
+        process.start()
+        process.join()
+
+        assert cache.get(id="q", field="sql") == "SELECT 1"
+
+    def test_ttl_and_max_entries(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl=0.05, max_entries=2)
+        for id in ["a", "b", "c"]:
+            cache.set(id=id, field="sql", value=id)
+
+        assert [entry["id"] for entry in cache.get_all([])] == ["b", "c"]
+        time.sleep(0.06)
+        assert cache.get(id="c", field="sql") is None
+        assert cache.stats()["entries"] == 0
+
+
+class TestRedisCache(SharedCacheContract):
+    @pytest.fixture
+    def cache(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        from kiwi.cache import RedisCache
+
+        return RedisCache(client=fakeredis.FakeRedis())
+
+    def test_max_entries(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        from kiwi.cache import RedisCache
+
+        cache = RedisCache(client=fakeredis.FakeRedis(), max_entries=2)
+        for id in ["a", "b", "c"]:
+            cache.set(id=id, field="sql", value=id)
+            time.sleep(0.001)
+
+        assert [entry["id"] for entry in cache.get_all(["sql"])] == ["b", "c"]
+        assert cache.get(id="a", field="sql") is None
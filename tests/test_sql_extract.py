@@ -0,0 +1,151 @@
+"""
+Tests for the single-pass SQL extractor, checked against the regular expressions it replaces.
+"""
+
+import random
+import re
+
+import pytest
+
+from kiwi.core.sql_extract import SqlExtractor, extract_sql
+from kiwi.core.sql_stream import SqlStream, complete_sql
+from tests.conftest import StubKiwi
+
+
+def reference_extract_sql(text):
+    """The regex passes extract_sql used to make, returning None where it returned the response."""
+    for pattern in (r"\bCREATE\s+TABLE\b.*?\bAS\b.*?;", r"\bWITH\b .*?;", r"\bSELECT\b .*?;"):
+        sqls = re.findall(pattern, text, re.DOTALL | re.IGNORECASE)
+        if sqls:
+            return sqls[-1]
+    for pattern in (r"```sql\s*\n(.*?)```", r"```(.*?)```"):
+        sqls = re.findall(pattern, text, re.DOTALL | re.IGNORECASE)
+        if sqls:
+            return sqls[-1].strip()
+    return None
+
+
+def reference_complete_sql(text):
+    match = re.search(r"```sql\s*\n(.*?)```", text, re.DOTALL | re.IGNORECASE)
+    if match and match.group(1).strip():
+        return match.group(1).strip()
+    match = re.search(
+        r"^[ \t]*((?:WITH|SELECT)\b\s.*?;)", text, re.DOTALL | re.IGNORECASE | re.MULTILINE
+    )
+    return match.group(1) if match else None
+
+
+RESPONSES = [
+    "Here's the SQL query in a code block: ```sql\nSELECT * FROM customers\n```",
+    "```sql\nSELECT name, SUM(sales) AS total FROM t GROUP BY name;\n```\nThis sums the sales.",
+    "WITH a AS (SELECT 1 AS x)\nSELECT * FROM a;",
+    "CREATE TABLE top AS SELECT * FROM t; then SELECT * FROM top;",
+    "create table x\nas\nselect 1; select 2;",
+    "First select the columns; then filter them.",
+    "SELECT\nx FROM t;",
+    "-- intermediate_sql\n```sql\nSELECT DISTINCT region FROM t;\n```",
+    "```python\nfig = px.bar(df)\n```",
+    "```sql\n\n```\n  select x from t; -- done",
+    "````sql\nSELECT 1\n````",
+    "``````",
+    "`````sql\nSELECT 2\n```",
+    "```SQL   \n  SELECT 3\n``` and ```sql\nSELECT 4\n```",
+    "I can't answer this from the given context.",
+    "SELECT a FROM t\n```\nWITH\tb AS (SELECT 1); with c as (select 2);",
+    "\tSELECT 1;\nSELECT 2;",
+    "selected; xSELECT y; _WITH z;",
+]
+
+FRAGMENTS = [
+    "SELECT ", "select", "WITH ", "with\n", "CREATE TABLE ", "create\ntable", " AS ", "as", "ASC",
+    ";", " ", "\n", "\t", "`", "``", "```", "````", "sql", "```sql\n", "```SQL \n", "x", "_", "tables",
+    "intermediate_sql", "-- ", "(", ")",
+]
+
+
+def fuzz_responses(n, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 30))) for _ in range(n)]
+
+
+def chunked(text, rng):
+    """Splits text at random points, sometimes into single characters."""
+    chunks, start = [], 0
+    while start < len(text):
+        end = start + rng.choice([1, 1, 2, 3, 5, 8])
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+class TestExtractSql:
+    """Test that the extractor finds what the regular expressions did."""
+
+    @pytest.mark.parametrize("text", RESPONSES)
+    def test_responses(self, text):
+        assert extract_sql(text) == reference_extract_sql(text)
+        assert complete_sql(text) == reference_complete_sql(text)
+
+    def test_fuzz(self):
+        for text in fuzz_responses(3000):
+            assert extract_sql(text) == reference_extract_sql(text), text
+            assert complete_sql(text) == reference_complete_sql(text), text
+
+    def test_incremental_matches_one_shot(self):
+        rng = random.Random(1)
+        for text in RESPONSES + fuzz_responses(1000, seed=2):
+            extractor = SqlExtractor()
+            for chunk in chunked(text, rng):
+                extractor.feed(chunk)
+            extractor.feed("", final=True)
+
+            assert extractor.text == text
+            assert extractor.last_sql() == reference_extract_sql(text), text
+            assert extractor.complete_sql() == reference_complete_sql(text), text
+
+    def test_base_method_logs_and_falls_back(self):
+        vn = StubKiwi()
+
+        assert vn.extract_sql("No SQL here.") == "No SQL here."
+        assert vn.extract_sql("Sure: SELECT 1; -- one") == "SELECT 1;"
+
+    def test_feed_after_final(self):
+        extractor = SqlExtractor()
+        extractor.feed("SELECT 1;", final=True)
+
+        with pytest.raises(ValueError):
+            extractor.feed("SELECT 2;")
+
+    def test_long_response_without_terminator(self):
+        # Every SELECT made the regex scan to the end of the text; tokenizing it is a single pass
+        text = "SELECT x FROM t WHERE y = 1\n" * 20000
+        assert extract_sql(text) is None
+
+
+class TestSqlStreamEarlySql:
+    """Test that early_sql is reported as soon as the statement is complete."""
+
+    def test_closing_fence_is_not_held_back(self):
+        stream = SqlStream()
+        events = []
+        for token in ["```sql\n", "SELECT x FROM t\n", "``"]:
+            events += stream.feed(token)
+        assert stream.early_sql is None
+
+        events += stream.feed("`")  # could still become ```` but closes the block either way
+
+        assert events[-1] == {"type": "early_sql", "text": "SELECT x FROM t"}
+
+    def test_keyword_split_across_tokens(self):
+        stream = SqlStream()
+        for token in ["Sure:\nSEL", "ECT", " x FROM t", ";"]:
+            stream.feed(token)
+
+        assert stream.early_sql == "SELECT x FROM t;"
+
+    def test_intermediate_split_across_tokens(self):
+        stream = SqlStream()
+        for token in ["-- intermedi", "ate_sql\n", "SELECT DISTINCT x FROM t;"]:
+            stream.feed(token)
+
+        assert stream.early_sql is None
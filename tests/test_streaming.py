@@ -0,0 +1,145 @@
+"""
+Tests for chunked, capped result fetching.
+"""
+
+import gzip
+
+import pandas as pd
+import pytest
+
+from kiwi.core.streaming import (
+    ChunkedResult,
+    cursor_chunks,
+    dataframe_chunks,
+    iter_arrow_ipc,
+    iter_csv,
+    iter_gzip,
+    iter_parquet,
+)
+
+
+class FakeCursor:
+    """DB-API cursor over a list of rows that records how many were fetched."""
+
+    def __init__(self, rows, columns=("a", "b")):
+        self.rows = rows
+        self.description = [(name,) for name in columns]
+        self.fetched = 0
+
+    def fetchmany(self, size):
+        batch = self.rows[self.fetched:self.fetched + size]
+        self.fetched += len(batch)
+        return batch
+
+
+def frame(n):
+    return pd.DataFrame({"a": range(n), "b": [f"row {i}" for i in range(n)]})
+
+
+class TestChunkedResult:
+    """Test chunking, caps and truncation."""
+
+    def test_chunks_whole_result(self):
+        cursor = FakeCursor([(i, str(i)) for i in range(25)])
+
+        result = ChunkedResult(cursor_chunks(cursor, 10))
+
+        assert [len(chunk) for chunk in result] == [10, 10, 5]
+        assert not result.truncated
+        assert result.rows == 25
+
+    def test_row_cap_stops_fetch(self):
+        cursor = FakeCursor([(i, str(i)) for i in range(1000)])
+
+        df = ChunkedResult(cursor_chunks(cursor, 10), max_rows=25).to_df()
+
+        assert len(df) == 25
+        assert list(df.columns) == ["a", "b"]
+        assert cursor.fetched == 30
+
+    def test_exact_row_cap_is_not_truncated(self):
+        result = ChunkedResult(dataframe_chunks(frame(20), 10), max_rows=20)
+
+        assert len(result.to_df()) == 20
+        assert not result.truncated
+
+    def test_byte_cap(self):
+        result = ChunkedResult(dataframe_chunks(frame(10000), 1000), max_bytes=50_000)
+
+        df = result.to_df()
+
+        assert result.truncated
+        assert 0 < len(df) < 10000
+        assert result.bytes <= 50_000
+
+    def test_close_closes_source(self):
+        closed = []
+
+        def chunks():
+            try:
+                yield frame(10)
+                yield frame(10)
+            finally:
+                closed.append(True)
+
+        with ChunkedResult(chunks(), max_rows=5) as result:
+            assert len(result.to_df()) == 5
+
+        assert closed == [True]
+        assert result.truncated
+
+    def test_empty_result_keeps_columns(self):
+        df = ChunkedResult(cursor_chunks(FakeCursor([]), 10)).to_df()
+
+        assert df.empty
+        assert list(df.columns) == ["a", "b"]
+
+    def test_consumed_once(self):
+        result = ChunkedResult(dataframe_chunks(frame(3), 10))
+        result.to_df()
+
+        with pytest.raises(RuntimeError):
+            result.to_df()
+
+    def test_to_arrow(self):
+        pytest.importorskip("pyarrow")
+
+        table = ChunkedResult(dataframe_chunks(frame(25), 10), max_rows=12).to_arrow()
+
+        assert table.num_rows == 12
+        assert table.column_names == ["a", "b"]
+
+
+class TestEncoders:
+    """Test the chunked download encoders."""
+
+    def test_csv_matches_to_csv(self):
+        df = frame(25)
+
+        data = b"".join(iter_csv(dataframe_chunks(df, 10)))
+
+        assert data.decode() == df.to_csv()
+
+    def test_csv_from_arrow_keeps_running_index(self):
+        pa = pytest.importorskip("pyarrow")
+        df = frame(25)
+        batches = pa.Table.from_pandas(df, preserve_index=False).to_batches(max_chunksize=10)
+
+        assert b"".join(iter_csv(batches)).decode() == df.to_csv()
+
+    def test_parquet_and_arrow_round_trip(self):
+        pa = pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+
+        parquet = b"".join(iter_parquet(dataframe_chunks(frame(25), 10)))
+        table = pq.read_table(pa.BufferReader(parquet))
+        assert table.num_rows == 25
+        assert pq.ParquetFile(pa.BufferReader(parquet)).num_row_groups == 3
+
+        ipc = b"".join(iter_arrow_ipc(dataframe_chunks(frame(25), 10)))
+        assert pa.ipc.open_stream(ipc).read_all().num_rows == 25
+
+    def test_gzip(self):
+        pieces = [b"a,b\n", b"1,2\n" * 1000]
+
+        assert gzip.decompress(b"".join(iter_gzip(pieces))) == b"".join(pieces)
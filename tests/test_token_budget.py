@@ -0,0 +1,161 @@
+"""
+Tests for token counting and prompt budgeting.
+"""
+
+import sys
+import types
+
+import pytest
+
+from kiwi.core.token_budget import (
+    ApproxTokenCounter,
+    AutoTokenCounter,
+    HuggingFaceTokenCounter,
+    TokenBudget,
+    TokenCounter,
+    make_token_counter,
+)
+from kiwi.exceptions import ImproperlyConfigured
+from tests.conftest import StubKiwi
+
+
+class FixedCounter(TokenCounter):
+    """Counts one token per whitespace-separated word and records every text it tokenizes."""
+
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def _count(self, text):
+        self.seen.append(text)
+        return len(text.split())
+
+
+class TestTokenCounter:
+    """Test counting heuristics, caching and construction."""
+
+    def test_approx_counts_cjk_per_character(self):
+        counter = ApproxTokenCounter()
+
+        assert counter.count("每个地区的总销售额") == 9
+        assert counter.count("total sales") == 3
+        assert counter.count("") == 0
+
+    def test_counts_are_cached(self):
+        counter = FixedCounter()
+
+        counter.count("CREATE TABLE t (a INT)")
+        counter.count("CREATE TABLE t (a INT)")
+
+        assert counter.seen == ["CREATE TABLE t (a INT)"]
+        assert counter.stats()["hits"] == 1
+
+    def test_cache_is_bounded(self):
+        counter = ApproxTokenCounter(cache_size=2)
+        for text in ["a", "b", "c"]:
+            counter.count(text)
+
+        assert counter.stats()["size"] == 2
+
+    def test_huggingface_tokenizer_file(self, tmp_path):
+        tokenizers = pytest.importorskip("tokenizers")
+        vocab = {"[UNK]": 0, "total": 1, "sales": 2}
+        tokenizer = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="[UNK]"))
+        tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+        path = str(tmp_path / "tokenizer.json")
+        tokenizer.save(path)
+
+        counter = make_token_counter(f"hf:{path}")
+
+        assert isinstance(counter, HuggingFaceTokenCounter)
+        assert counter.count("total sales by region") == 4
+
+    def test_make_token_counter(self):
+        counter = ApproxTokenCounter()
+
+        assert make_token_counter(counter) is counter
+        assert isinstance(make_token_counter("approx"), ApproxTokenCounter)
+        assert isinstance(make_token_counter("auto"), TokenCounter)
+        with pytest.raises(ImproperlyConfigured):
+            make_token_counter("bogus")
+
+    def test_default_needs_no_download(self):
+        assert isinstance(make_token_counter(), ApproxTokenCounter)
+        assert isinstance(make_token_counter(None), ApproxTokenCounter)
+        assert StubKiwi().get_cache_stats()["token_counter"]["counter"] == "approx"
+
+    def test_counter_is_abstract(self):
+        with pytest.raises(TypeError):
+            TokenCounter()
+
+    @staticmethod
+    def fake_tiktoken(monkeypatch, fail=False):
+        loaded = []
+
+        def get_encoding(name):
+            loaded.append(name)
+            if fail:
+                raise OSError("no network")
+            return types.SimpleNamespace(encode=lambda text, disallowed_special=(): text.split())
+
+        monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(get_encoding=get_encoding))
+        return loaded
+
+    def test_auto_loads_tiktoken_on_first_count(self, monkeypatch):
+        loaded = self.fake_tiktoken(monkeypatch)
+
+        counter = make_token_counter("auto")
+        assert isinstance(counter, AutoTokenCounter)
+        assert loaded == []
+
+        assert counter.count("total sales by region") == 4
+        counter.count("per year")
+        assert loaded == ["cl100k_base"]
+        assert counter.stats()["counter"] == "auto:tiktoken:cl100k_base"
+
+    def test_auto_falls_back_to_approx(self, monkeypatch):
+        loaded = self.fake_tiktoken(monkeypatch, fail=True)
+        counter = make_token_counter("auto")
+
+        assert counter.count("total sales by region") == ApproxTokenCounter().count("total sales by region")
+        counter.count("per year")
+        assert loaded == ["cl100k_base"]
+        assert counter.stats()["counter"] == "auto:approx"
+
+
+class TestTokenBudget:
+    """Test incremental accounting and relevance-per-token packing."""
+
+    def test_running_total(self):
+        budget = TokenBudget(FixedCounter(), max_tokens=10)
+
+        assert budget.add("one two three") == 3
+        assert budget.try_add("four five")
+        assert not budget.try_add("six seven eight nine ten")
+        assert budget.used == 5
+        assert budget.remaining == 5
+
+    def test_pack_prefers_relevance_per_token(self):
+        budget = TokenBudget(FixedCounter(), max_tokens=8)
+        long_chunk = "w " * 6
+        chunks = [long_chunk, "a b", "c d", "e f"]
+
+        chosen = budget.pack(chunks, scores=[1.0, 0.9, 0.8, 0.7])
+
+        # First fit would take only the long chunk; packing by density takes the three short ones.
+        assert chosen == [1, 2, 3]
+        assert budget.used == 6
+
+    def test_pack_returns_original_order(self):
+        budget = TokenBudget(FixedCounter(), max_tokens=100)
+
+        assert budget.pack(["a b c d", "e", "f g"]) == [0, 1, 2]
+
+    def test_each_chunk_counted_once(self):
+        counter = FixedCounter()
+        budget = TokenBudget(counter, max_tokens=100)
+
+        budget.pack(["a", "b", "c"])
+        budget.pack(["a", "b", "c"])
+
+        assert counter.seen == ["a", "b", "c"]